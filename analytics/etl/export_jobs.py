@@ -0,0 +1,162 @@
+"""
+Incremental export of jobs from Postgres to partitioned Parquet
+
+Each run exports every job (hot ``jobs`` and archived ``jobs_history``) whose
+``updated_at`` is past the stored watermark, up to ``now() - lag`` so rows
+from transactions still in flight are not skipped. Output is Hive-partitioned
+by submission date and compressed with zstd:
+
+    datasets/jobs/created_date=2025-11-17/part-20251117T160000Z-0000.parquet
+    datasets/jobs/_watermark.json
+
+A job that changes after being exported appears again in a later file; readers
+keep the row with the newest ``updated_at`` per id (see
+``apps/api/src/analytics.py``). Deletes are not propagated.
+
+Usage:
+    DATABASE_URL=postgresql://... python analytics/etl/export_jobs.py \\
+        [--dataset analytics/datasets/jobs] [--lag-seconds 60]
+"""
+
+import argparse
+import json
+import os
+from datetime import UTC, datetime
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import create_engine, text
+
+EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+
+SCHEMA = pa.schema(
+    [
+        ("id", pa.string()),
+        ("name", pa.dictionary(pa.int32(), pa.string())),
+        ("state", pa.dictionary(pa.int8(), pa.string())),
+        ("priority", pa.int32()),
+        ("submitted_by", pa.dictionary(pa.int32(), pa.string())),
+        ("created_at", pa.timestamp("us", tz="UTC")),
+        ("started_at", pa.timestamp("us", tz="UTC")),
+        ("finished_at", pa.timestamp("us", tz="UTC")),
+        ("updated_at", pa.timestamp("us", tz="UTC")),
+        ("gpu_seconds", pa.float64()),
+        ("memoized", pa.bool_()),
+        ("params", pa.string()),
+    ]
+)
+
+# Column lists are spelled out: jobs and jobs_history differ in column order
+EXPORTED_COLUMNS = """
+    id::text, name, state, priority, submitted_by,
+    created_at, started_at, finished_at, updated_at,
+    (result ->> 'duration_seconds')::double precision AS gpu_seconds,
+    memoized_from IS NOT NULL AS memoized,
+    params::text AS params
+"""
+
+CHANGED_JOBS = text(f"""
+    SELECT {EXPORTED_COLUMNS} FROM jobs
+    WHERE updated_at > :since AND updated_at <= :until
+    UNION ALL
+    SELECT {EXPORTED_COLUMNS} FROM jobs_history
+    WHERE updated_at > :since AND updated_at <= :until
+    ORDER BY updated_at
+""")
+
+
+def read_watermark(dataset: Path) -> datetime:
+    path = dataset / "_watermark.json"
+    if not path.exists():
+        return EPOCH
+    return datetime.fromisoformat(json.loads(path.read_text())["updated_at"])
+
+
+def write_watermark(dataset: Path, updated_at: datetime, rows: int):
+    """Atomically replace the watermark once all files are on disk"""
+    path = dataset / "_watermark.json"
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(
+        json.dumps(
+            {
+                "updated_at": updated_at.isoformat(),
+                "exported_at": datetime.now(UTC).isoformat(),
+                "rows": rows,
+            },
+            indent=2,
+        )
+    )
+    os.replace(tmp, path)
+
+
+def write_chunk(dataset: Path, rows: list, run_id: str, seq: int) -> int:
+    """Write one chunk of rows, split into created_date partitions"""
+    by_date: dict[str, list] = {}
+    for row in rows:
+        by_date.setdefault(
+            row.created_at.astimezone(UTC).date().isoformat(), []
+        ).append(row)
+
+    for created_date, part in by_date.items():
+        columns = {
+            field.name: [getattr(row, field.name) for row in part] for field in SCHEMA
+        }
+        table = pa.Table.from_pydict(columns, schema=SCHEMA)
+        directory = dataset / f"created_date={created_date}"
+        directory.mkdir(parents=True, exist_ok=True)
+        # Written under a dot-name first: readers glob *.parquet only
+        final = directory / f"part-{run_id}-{seq:04d}.parquet"
+        tmp = directory / f".{final.name}.tmp"
+        pq.write_table(table, tmp, compression="zstd", row_group_size=128_000)
+        os.replace(tmp, final)
+    return len(rows)
+
+
+def export(database_url: str, dataset: Path, lag_seconds: int, chunk_size: int):
+    dataset.mkdir(parents=True, exist_ok=True)
+    since = read_watermark(dataset)
+    run_id = datetime.now(UTC).strftime("%Y%m%dT%H%M%SZ")
+
+    engine = create_engine(database_url)
+    with engine.connect() as conn:
+        until = conn.execute(
+            text("SELECT now() - make_interval(secs => :lag)"), {"lag": lag_seconds}
+        ).scalar()
+        result = conn.execution_options(stream_results=True).execute(
+            CHANGED_JOBS, {"since": since, "until": until}
+        )
+
+        total = 0
+        seq = 0
+        while rows := result.fetchmany(chunk_size):
+            total += write_chunk(dataset, rows, run_id, seq)
+            seq += 1
+    engine.dispose()
+
+    # Advance to the window end even when nothing changed
+    write_watermark(dataset, max(until, since), total)
+    print(f"[ETL] Exported {total} changed jobs ({since.isoformat()} -> {until})")
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export changed jobs to Parquet")
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"))
+    parser.add_argument(
+        "--dataset",
+        type=Path,
+        default=Path(__file__).resolve().parent.parent / "datasets" / "jobs",
+    )
+    parser.add_argument("--lag-seconds", type=int, default=60)
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    args = parser.parse_args()
+
+    if not args.database_url:
+        parser.error("DATABASE_URL or --database-url is required")
+
+    export(args.database_url, args.dataset, args.lag_seconds, args.chunk_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,3 @@
+"""
+Load benchmarks for the API (run from apps/api: python -m benchmarks.<name>)
+"""
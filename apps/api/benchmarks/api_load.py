@@ -0,0 +1,243 @@
+"""Closed-loop HTTP load against the job endpoints and /events
+
+Seeds the jobs table with synthetic history (1M jobs by default), starts the
+API in a subprocess and drives each scenario at each concurrency level for a
+fixed duration after a warmup. Every virtual user issues its next request as
+soon as the previous one returns. Reported per scenario and concurrency:
+
+- requests/s overall and for 2xx responses
+- latency percentiles of 2xx responses (ms)
+- status code counts (429/503 are admission-control sheds)
+- client CPU utilisation; near 1.0 means the load generator, not the API,
+  was the bottleneck and the run should be split across processes
+
+Scenarios: get (GET /jobs/{id}), create (POST /jobs), update (PUT /jobs/{id}),
+events (open /events until the "connected" event), list (GET /jobs; returns
+every job, so only meaningful on small seeds).
+
+Usage:
+    DATABASE_URL=postgresql://.../bench_db python -m benchmarks.api_load \\
+        --jobs 1000000 --concurrency 1,16,64 --duration 20 --output api.json
+"""
+
+import argparse
+import asyncio
+import random
+import resource
+import time
+from collections import Counter
+
+import httpx
+from src.database import engine
+
+from .common import (
+    ApiServer,
+    guard_database,
+    percentiles,
+    prepare_schema,
+    progress,
+    reset_tables,
+    sample_job_ids,
+    seed_jobs,
+    write_results,
+)
+
+
+async def get_job(client: httpx.AsyncClient, ctx: dict, rng: random.Random):
+    response = await client.get(f"/jobs/{rng.choice(ctx['job_ids'])}")
+    return response.status_code
+
+
+async def create_job(client: httpx.AsyncClient, ctx: dict, rng: random.Random):
+    response = await client.post(
+        "/jobs",
+        json={
+            "name": f"bench-{rng.randrange(20)}",
+            "params": {"size": rng.randrange(1000)},
+            "priority": rng.randrange(10),
+            "submitted_by": f"bench-user-{rng.randrange(50)}",
+        },
+    )
+    return response.status_code
+
+
+async def update_job(client: httpx.AsyncClient, ctx: dict, rng: random.Random):
+    response = await client.put(
+        f"/jobs/{rng.choice(ctx['queued_ids'])}",
+        json={"priority": rng.randrange(10)},
+    )
+    return response.status_code
+
+
+async def list_jobs(client: httpx.AsyncClient, ctx: dict, rng: random.Random):
+    response = await client.get("/jobs")
+    return response.status_code
+
+
+async def open_events(client: httpx.AsyncClient, ctx: dict, rng: random.Random):
+    """Time to the SSE "connected" event, then disconnect"""
+    async with client.stream("GET", "/events") as response:
+        async for line in response.aiter_lines():
+            if line.startswith("data:"):
+                return response.status_code if '"connected"' in line else 502
+    return 502
+
+
+SCENARIOS = {
+    "get": get_job,
+    "create": create_job,
+    "update": update_job,
+    "events": open_events,
+    "list": list_jobs,
+}
+
+
+async def run_scenario(
+    base_url: str, scenario, ctx: dict, concurrency: int, args
+) -> dict:
+    latencies = []
+    statuses = Counter()
+    limits = httpx.Limits(
+        max_connections=concurrency, max_keepalive_connections=concurrency
+    )
+
+    async with httpx.AsyncClient(
+        base_url=base_url, limits=limits, timeout=args.timeout
+    ) as client:
+        loop = asyncio.get_running_loop()
+        measure_from = loop.time() + args.warmup
+        deadline = measure_from + args.duration
+
+        async def user(n: int):
+            rng = random.Random(args.seed * 100_003 + n)
+            while (started := loop.time()) < deadline:
+                t0 = time.perf_counter()
+                try:
+                    status = await scenario(client, ctx, rng)
+                except httpx.HTTPError as e:
+                    status = type(e).__name__
+                elapsed = time.perf_counter() - t0
+                if started >= measure_from:
+                    statuses[status] += 1
+                    if isinstance(status, int) and status < 300:
+                        latencies.append(elapsed)
+
+        await asyncio.sleep(0)
+        cpu_before = resource.getrusage(resource.RUSAGE_SELF)
+        await asyncio.gather(*(user(n) for n in range(concurrency)))
+        cpu_after = resource.getrusage(resource.RUSAGE_SELF)
+
+    client_cpu = (cpu_after.ru_utime - cpu_before.ru_utime) + (
+        cpu_after.ru_stime - cpu_before.ru_stime
+    )
+    total = sum(statuses.values())
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "requests_per_second": total / args.duration,
+        "ok_per_second": len(latencies) / args.duration,
+        "latency_ms": {
+            **{k: v * 1000 for k, v in percentiles(latencies).items()},
+            "max": max(latencies, default=0.0) * 1000,
+        },
+        "status_counts": {str(k): v for k, v in sorted(statuses.items(), key=str)},
+        "client_cpu_utilization": client_cpu / (args.duration + args.warmup),
+    }
+
+
+async def run_all(base_url: str, ctx: dict, args) -> dict:
+    results = {}
+    for name in args.scenarios:
+        results[name] = []
+        for concurrency in args.concurrency:
+            progress(f"{name} @ {concurrency} concurrent for {args.duration}s")
+            results[name].append(
+                await run_scenario(base_url, SCENARIOS[name], ctx, concurrency, args)
+            )
+    return results
+
+
+def parse_env(pairs: list[str]) -> dict[str, str]:
+    env = {}
+    for pair in pairs:
+        key, sep, value = pair.partition("=")
+        if not sep:
+            raise SystemExit(f"--server-env expects KEY=VALUE, got {pair!r}")
+        env[key] = value
+    return env
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=1_000_000, help="Jobs to seed")
+    parser.add_argument("--queued-fraction", type=float, default=0.01)
+    parser.add_argument(
+        "--skip-seed", action="store_true", help="Reuse the jobs already seeded"
+    )
+    parser.add_argument(
+        "--scenarios",
+        type=lambda s: s.split(","),
+        default=["get", "create", "update", "events"],
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=lambda s: [int(c) for c in s.split(",")],
+        default=[1, 16, 64],
+    )
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--warmup", type=float, default=3.0)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers")
+    parser.add_argument(
+        "--server-env",
+        action="append",
+        default=[],
+        metavar="KEY=VALUE",
+        help="Extra API settings, e.g. ADMISSION_ENABLED=false",
+    )
+    parser.add_argument("--server-log", help="Write API output here")
+    parser.add_argument("--url", help="Benchmark a running API instead")
+    parser.add_argument("--output", help="Write JSON here instead of stdout")
+    parser.add_argument("--force", action="store_true", help="Skip the DB name guard")
+    args = parser.parse_args()
+
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {sorted(unknown)}")
+
+    guard_database(engine, args.force)
+    prepare_schema(engine)
+    if not args.skip_seed:
+        reset_tables(engine)
+        seed_jobs(engine, args.jobs, args.queued_fraction)
+
+    ctx = {
+        "job_ids": sample_job_ids(engine),
+        "queued_ids": sample_job_ids(engine, state="queued"),
+    }
+    if not ctx["job_ids"] or ("update" in args.scenarios and not ctx["queued_ids"]):
+        raise SystemExit("[Bench] No seeded jobs to target; drop --skip-seed")
+
+    if args.url:
+        results = asyncio.run(run_all(args.url, ctx, args))
+    else:
+        server = ApiServer(
+            port=args.port,
+            workers=args.workers,
+            env={
+                "DATABASE_URL": engine.url.render_as_string(hide_password=False),
+                **parse_env(args.server_env),
+            },
+            log_path=args.server_log,
+        )
+        with server:
+            results = asyncio.run(run_all(server.url, ctx, args))
+    engine.dispose()
+
+    write_results("api_load", vars(args), results, args.output)
+
+
+if __name__ == "__main__":
+    main()
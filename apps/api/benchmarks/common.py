@@ -0,0 +1,320 @@
+"""Shared helpers for API benchmarks
+
+Benchmarks own the database in DATABASE_URL: every run truncates the job
+tables and reseeds them. As a guard they refuse to run unless the database
+name contains "bench" or "test" (or --force).
+
+The API under test is started as a uvicorn subprocess against the same
+database and the NATS server in NATS_URL, so a run needs nothing beyond the
+dev stack (``docker compose -f infra/docker-compose.yml up postgres nats``).
+"""
+
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import UTC, datetime
+from pathlib import Path
+
+import httpx
+from sqlalchemy import Engine, text
+from src import models  # noqa: F401  (registers the tables on Base)
+from src.database import Base
+
+API_ROOT = Path(__file__).resolve().parent.parent
+
+# Same indexes as the migrations (keep in step with db/migrations), so query
+# plans and the cost of every write match production
+JOB_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS ix_jobs_state ON jobs (state)",
+    "CREATE INDEX IF NOT EXISTS ix_jobs_created_at ON jobs (created_at)",
+    "CREATE INDEX IF NOT EXISTS ix_jobs_updated_at ON jobs (updated_at)",
+    """
+    CREATE INDEX IF NOT EXISTS ix_jobs_memo_key
+    ON jobs (memo_key) WHERE memo_key IS NOT NULL
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS ix_jobs_memoized_from
+    ON jobs (memoized_from) WHERE memoized_from IS NOT NULL
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS ix_jobs_queued_priority
+    ON jobs (priority DESC, created_at) WHERE state = 'queued'
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS ix_jobs_queued_submitter_priority
+    ON jobs ((COALESCE(submitted_by, '')), priority DESC, created_at)
+    WHERE state = 'queued'
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS ix_jobs_queued_submitter_created
+    ON jobs ((COALESCE(submitted_by, '')), created_at) WHERE state = 'queued'
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS ix_jobs_terminal_finished_at
+    ON jobs (finished_at) WHERE state IN ('completed', 'failed', 'cancelled')
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS ix_jobs_queued_queued_at
+    ON jobs (queued_at) WHERE state = 'queued'
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS ix_jobs_scheduled_next_run
+    ON jobs (next_run_at) WHERE state = 'scheduled'
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS ix_jobs_queued_input_keys
+    ON jobs USING gin (input_keys) WHERE state = 'queued'
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS ix_jobs_params
+    ON jobs USING gin (params jsonb_path_ops)
+    """,
+    "CREATE TABLE IF NOT EXISTS jobs_history_default PARTITION OF jobs_history DEFAULT",
+    """
+    CREATE INDEX IF NOT EXISTS ix_jobs_history_created_at
+    ON jobs_history (created_at)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS ix_jobs_history_updated_at
+    ON jobs_history (updated_at)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS ix_jobs_history_params
+    ON jobs_history USING gin (params jsonb_path_ops)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS ix_job_result_cache_expires_at
+    ON job_result_cache (expires_at)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS ix_job_result_cache_created_at
+    ON job_result_cache (created_at)
+    """,
+]
+
+
+def progress(message: str):
+    """Progress line on stderr, leaving stdout to the JSON results"""
+    print(f"[Bench] {message}", file=sys.stderr, flush=True)
+
+
+def guard_database(engine: Engine, force: bool = False):
+    """Refuse to truncate anything that does not look like a scratch database"""
+    name = engine.url.database or ""
+    if not force and "bench" not in name and "test" not in name:
+        raise SystemExit(
+            f"Refusing to benchmark against database {name!r}: it will be "
+            "truncated. Use a *bench*/*test* database or pass --force."
+        )
+
+
+def prepare_schema(engine: Engine):
+    """Create the API tables and production indexes if they are missing"""
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        for ddl in JOB_INDEXES:
+            conn.execute(text(ddl))
+
+
+def reset_tables(engine: Engine):
+    with engine.begin() as conn:
+        conn.execute(text("TRUNCATE jobs, jobs_history, job_result_cache"))
+
+
+def seed_jobs(
+    engine: Engine,
+    count: int,
+    queued_fraction: float = 0.01,
+    submitters: int = 50,
+    chunk: int = 500_000,
+):
+    """
+    Insert `count` synthetic jobs server-side in chunks.
+
+    A `queued_fraction` share is queued; the rest is a 95/5 completed/failed
+    mix spread over the last 30 days, like a long-running deployment.
+    """
+    for offset in range(0, count, chunk):
+        with engine.begin() as conn:
+            conn.execute(
+                text("""
+                    INSERT INTO jobs (name, params, priority, state, created_at,
+                                      started_at, finished_at, submitted_by)
+                    SELECT 'bench-' || (g % 20),
+                           jsonb_build_object('seed', g, 'size', g % 1000),
+                           g % 10,
+                           state,
+                           created_at,
+                           CASE WHEN state <> 'queued' THEN created_at END,
+                           CASE WHEN state <> 'queued'
+                                THEN created_at + interval '10 seconds' END,
+                           'bench-user-' || (g % :submitters)
+                    FROM (
+                        SELECT g,
+                               CASE
+                                   WHEN random() < :queued THEN 'queued'
+                                   WHEN random() < 0.05 THEN 'failed'
+                                   ELSE 'completed'
+                               END AS state,
+                               now() - random() * interval '30 days' AS created_at
+                        FROM generate_series(:start, :stop) g
+                    ) s
+                """),
+                {
+                    "start": offset + 1,
+                    "stop": min(offset + chunk, count),
+                    "queued": queued_fraction,
+                    "submitters": submitters,
+                },
+            )
+        progress(f"Seeded {min(offset + chunk, count):,}/{count:,} jobs")
+    # VACUUM sets the visibility map so index-only scans behave as in production
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("VACUUM ANALYZE jobs"))
+
+
+def sample_job_ids(engine: Engine, state: str | None = None, limit: int = 10_000):
+    """Up to `limit` seeded job ids: a random block sample, or any in `state`"""
+    with engine.connect() as conn:
+        if state:
+            rows = conn.execute(
+                text("SELECT id FROM jobs WHERE state = :state LIMIT :limit"),
+                {"state": state, "limit": limit},
+            )
+        else:
+            # Sample about twice the pages needed, from the planner's row estimate
+            estimate = conn.execute(
+                text("SELECT reltuples FROM pg_class WHERE relname = 'jobs'")
+            ).scalar()
+            percent = min(100.0, 200.0 * limit / max(estimate or 0, 1))
+            rows = conn.execute(
+                text(
+                    f"SELECT id FROM jobs TABLESAMPLE SYSTEM ({percent:.4f}) LIMIT :limit"
+                ),
+                {"limit": limit},
+            )
+        return [str(job_id) for job_id in rows.scalars()]
+
+
+class ApiServer:
+    """Run the API in a uvicorn subprocess for the duration of a benchmark"""
+
+    def __init__(
+        self,
+        port: int = 8765,
+        workers: int = 1,
+        env: dict[str, str] | None = None,
+        log_path: str | None = None,
+    ):
+        self.port = port
+        self.workers = workers
+        self.env = env or {}
+        self.log_path = log_path
+        self.url = f"http://127.0.0.1:{port}"
+        self.process: subprocess.Popen | None = None
+
+    def __enter__(self):
+        self._log = open(self.log_path or os.devnull, "w")  # noqa: SIM115
+        self.process = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "uvicorn",
+                "src.main:app",
+                "--host",
+                "127.0.0.1",
+                "--port",
+                str(self.port),
+                "--workers",
+                str(self.workers),
+                "--no-access-log",
+            ],
+            cwd=API_ROOT,
+            env={**os.environ, **self.env},
+            stdout=self._log,
+            stderr=subprocess.STDOUT,
+        )
+        self.wait_ready()
+        progress(f"API running at {self.url} (pid {self.process.pid})")
+        return self
+
+    def wait_ready(self, timeout: float = 30.0):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise SystemExit("[Bench] API exited during startup, see --server-log")
+            try:
+                if httpx.get(f"{self.url}/health", timeout=1).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.2)
+        raise SystemExit(f"[Bench] API not ready after {timeout}s")
+
+    def __exit__(self, *exc):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+        self._log.close()
+
+
+def process_cpu_seconds(pid: int) -> float | None:
+    """User + system CPU time of a process (Linux /proc; None elsewhere)"""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+    except OSError:
+        return None
+    # utime and stime are fields 14 and 15 of stat(5); index 0 here is field 3
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def process_rss_bytes(pid: int) -> int | None:
+    """Resident set size of a process (Linux /proc; None elsewhere)"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    return None
+
+
+def percentiles(samples: list[float], points=(50, 95, 99)) -> dict[str, float]:
+    """Nearest-rank percentiles, keyed p50/p95/p99"""
+    if not samples:
+        return {f"p{p}": 0.0 for p in points}
+    ordered = sorted(samples)
+    return {
+        f"p{p}": ordered[min(len(ordered) - 1, math.ceil(p / 100 * len(ordered)) - 1)]
+        for p in points
+    }
+
+
+def write_results(name: str, params: dict, results: dict, output: str | None):
+    """Emit a machine-readable result document (stdout when no path)"""
+    document = {
+        "benchmark": name,
+        "timestamp": datetime.now(UTC).isoformat(),
+        "host": {
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "params": params,
+        "results": results,
+    }
+    payload = json.dumps(document, indent=2, default=str)
+    if output:
+        with open(output, "w") as f:
+            f.write(payload + "\n")
+        progress(f"Results written to {output}")
+    else:
+        print(payload)
@@ -0,0 +1,243 @@
+"""Fan-out cost of /events with many concurrent dashboard clients
+
+Starts one API process and opens ``--clients`` SSE connections to /events,
+then publishes synthetic ``jobs.*`` events straight to JetStream at each
+``--rates`` value (events/s) for ``--duration`` seconds. Every event carries
+its send time, so clients on the same host measure end-to-end delivery
+latency (publish -> NATS -> per-client consumer -> API -> socket). Reported:
+
+- connect latency (time to the "connected" event) and failed connects
+- per rate: delivery latency percentiles, delivered/expected ratio and API
+  CPU utilisation (1.0 = one core)
+- API RSS growth per connection, and NATS consumers created per connection
+  (each SSE client currently gets its own durable consumer)
+- consumers still present `--settle-seconds` after every client disconnected
+
+Clients are raw asyncio sockets rather than an HTTP library so thousands fit
+in one process. Raise the open-files limit (``ulimit -n``) for large runs.
+The API also replays the JOBS stream to every new consumer, so events left
+from earlier runs are counted separately as ``replayed_events``.
+
+Only SSE is covered: the API has no WebSocket endpoint yet.
+
+Usage:
+    DATABASE_URL=postgresql://.../bench_db python -m benchmarks.sse_fanout \\
+        --clients 1000 --rates 10,100 --duration 20 --output sse.json
+"""
+
+import argparse
+import asyncio
+import json
+import resource
+import time
+import uuid
+from collections import Counter
+
+import nats
+from src.config import settings
+
+from .common import (
+    ApiServer,
+    percentiles,
+    process_cpu_seconds,
+    process_rss_bytes,
+    progress,
+    write_results,
+)
+
+
+class SSEClient:
+    """Minimal /events reader: counts and times events from this run"""
+
+    def __init__(self, host: str, port: int, run_id: str):
+        self.host = host
+        self.port = port
+        self.run_id = run_id
+        self.connected = asyncio.Event()
+        self.connect_latency: float | None = None
+        self.latencies: list[float] = []
+        self.replayed = 0
+        self.error: str | None = None
+        self._writer = None
+
+    async def run(self):
+        started = time.perf_counter()
+        try:
+            reader, self._writer = await asyncio.open_connection(self.host, self.port)
+            self._writer.write(
+                f"GET /events HTTP/1.1\r\nHost: {self.host}\r\n"
+                "Accept: text/event-stream\r\n\r\n".encode()
+            )
+            status = await reader.readline()
+            if b" 200 " not in status:
+                raise ConnectionError(status.decode().strip())
+
+            # Each SSE message is one chunk, so data lines arrive whole
+            while line := await reader.readline():
+                if not line.startswith(b"data: "):
+                    continue
+                received = time.time()
+                event = json.loads(line[6:])
+                if event.get("type") == "connected":
+                    self.connect_latency = time.perf_counter() - started
+                    self.connected.set()
+                elif event.get("bench_run") == self.run_id:
+                    self.latencies.append(received - event["sent_at"])
+                else:
+                    self.replayed += 1
+        except (OSError, ValueError) as e:
+            self.error = type(e).__name__
+        finally:
+            self.connected.set()
+
+    def close(self):
+        if self._writer:
+            self._writer.close()
+
+
+async def consumer_count(js) -> int:
+    return (await js.stream_info("JOBS")).state.consumer_count
+
+
+async def publish(js, run_id: str, rate: float, duration: float) -> int:
+    """Publish at `rate` events/s on a fixed schedule (no drift)"""
+    interval = 1 / rate
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    sent = 0
+    while (next_at := start + sent * interval) < start + duration:
+        await asyncio.sleep(max(0.0, next_at - loop.time()))
+        payload = {
+            "job_id": f"bench-{sent}",
+            "state": "bench",
+            "bench_run": run_id,
+            "sent_at": time.time(),
+        }
+        await js.publish(f"jobs.bench-{sent}.bench", json.dumps(payload).encode())
+        sent += 1
+    return sent
+
+
+async def run_benchmark(server: ApiServer, args) -> dict:
+    nc = await nats.connect(settings.nats_url)
+    js = nc.jetstream()
+    pid = server.process.pid
+    port = server.port
+
+    consumers_before = await consumer_count(js)
+    rss_before = process_rss_bytes(pid)
+
+    # Connect in waves so the accept queue and NATS are not flooded
+    run_id = uuid.uuid4().hex
+    clients = [SSEClient("127.0.0.1", port, run_id) for _ in range(args.clients)]
+    tasks = []
+    for i, client in enumerate(clients):
+        tasks.append(asyncio.create_task(client.run()))
+        if (i + 1) % args.connect_batch == 0:
+            await asyncio.gather(*(c.connected.wait() for c in clients[: i + 1]))
+    await asyncio.gather(*(c.connected.wait() for c in clients))
+    await asyncio.sleep(args.settle_seconds)
+
+    connected = [c for c in clients if c.connect_latency is not None and not c.error]
+    consumers_connected = await consumer_count(js)
+    rss_connected = process_rss_bytes(pid)
+    progress(f"{len(connected)}/{args.clients} clients connected")
+
+    phases = []
+    for rate in args.rates:
+        for client in clients:
+            client.latencies.clear()
+        cpu_before = process_cpu_seconds(pid)
+        started = time.perf_counter()
+        sent = await publish(js, run_id, rate, args.duration)
+        await asyncio.sleep(args.drain_seconds)
+        elapsed = time.perf_counter() - started
+        cpu_after = process_cpu_seconds(pid)
+
+        latencies = [s for c in connected for s in c.latencies]
+        expected = sent * len(connected)
+        phases.append(
+            {
+                "rate": rate,
+                "events_published": sent,
+                "deliveries": len(latencies),
+                "delivered_ratio": len(latencies) / expected if expected else 0.0,
+                "latency_ms": {
+                    **{k: v * 1000 for k, v in percentiles(latencies).items()},
+                    "max": max(latencies, default=0.0) * 1000,
+                },
+                "api_cpu_utilization": (
+                    (cpu_after - cpu_before) / elapsed
+                    if cpu_before is not None
+                    else None
+                ),
+            }
+        )
+        progress(f"{rate} events/s: {phases[-1]['delivered_ratio']:.1%} delivered")
+
+    for client in clients:
+        client.close()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await asyncio.sleep(args.settle_seconds)
+    consumers_after = await consumer_count(js)
+    await nc.close()
+
+    per_connection = len(connected) or 1
+    return {
+        "clients": args.clients,
+        "connected": len(connected),
+        "connect_errors": dict(Counter(c.error for c in clients if c.error)),
+        "connect_latency_ms": {
+            k: v * 1000
+            for k, v in percentiles([c.connect_latency for c in connected]).items()
+        },
+        "replayed_events": sum(c.replayed for c in clients),
+        "api_rss_bytes": {"before": rss_before, "connected": rss_connected},
+        "api_rss_per_connection_bytes": (
+            (rss_connected - rss_before) / per_connection
+            if rss_before is not None
+            else None
+        ),
+        "nats_consumers": {
+            "before": consumers_before,
+            "connected": consumers_connected,
+            "per_connection": (consumers_connected - consumers_before) / per_connection,
+            "remaining_after_disconnect": consumers_after - consumers_before,
+        },
+        "phases": phases,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument(
+        "--rates",
+        type=lambda s: [float(r) for r in s.split(",")],
+        default=[10.0, 100.0],
+        help="Published events per second, one phase each",
+    )
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--drain-seconds", type=float, default=5.0)
+    parser.add_argument("--settle-seconds", type=float, default=2.0)
+    parser.add_argument("--connect-batch", type=int, default=100)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--server-log", help="Write API output here")
+    parser.add_argument("--output", help="Write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    # Each client is one socket here and one in the API
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    if args.clients + 100 > hard:
+        parser.error(f"--clients {args.clients} exceeds the open-files limit {hard}")
+
+    # One process, so CPU and memory per connection are attributable
+    with ApiServer(port=args.port, workers=1, log_path=args.server_log) as server:
+        results = asyncio.run(run_benchmark(server, args))
+
+    write_results("sse_fanout", vars(args), results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Adaptive admission control for write endpoints
+
+An AIMD (additive-increase, multiplicative-decrease) concurrency limit sits in
+front of job submission and the other write endpoints:
+
+- Each request that finishes under the latency target grows the limit by
+  1/limit (about +1 per limit's worth of requests) while the limit is in use.
+- A request over the target, or a server error, shrinks it by a constant
+  factor, at most once per latency-target window.
+
+Requests over the limit are shed with 429. Submission additionally checks the
+queued-job count (from the ``queue_stats`` counters, cached for a couple of
+seconds) and sheds with 503 once the backlog is over
+``admission_max_queue_depth``. Both carry ``Retry-After``.
+"""
+
+import time
+
+from fastapi import Depends, HTTPException
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from .backlog import QUEUED_TOTAL
+from .config import settings
+from .database import get_db
+from .metrics import metrics_manager
+
+
+class AdmissionController:
+    """AIMD concurrency limiter with a cached queue-depth probe"""
+
+    def __init__(
+        self,
+        initial_limit: int = 32,
+        min_limit: int = 4,
+        max_limit: int = 256,
+        latency_target: float = 0.25,
+        decrease_factor: float = 0.9,
+        max_queue_depth: int = 100_000,
+        queue_depth_ttl: float = 2.0,
+    ):
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target = latency_target
+        self.decrease_factor = decrease_factor
+        self.max_queue_depth = max_queue_depth
+        self.queue_depth_ttl = queue_depth_ttl
+
+        self.inflight = 0
+        self._last_decrease = 0.0
+        self._queue_depth = 0
+        self._queue_depth_at = float("-inf")
+
+    def try_acquire(self) -> bool:
+        """Take a concurrency slot if one is free"""
+        if self.inflight >= int(self.limit):
+            return False
+        self.inflight += 1
+        return True
+
+    def release(self, latency: float, ok: bool = True):
+        """Return a slot and adapt the limit to the observed latency"""
+        self.inflight -= 1
+        now = time.monotonic()
+
+        if not ok or latency > self.latency_target:
+            if now - self._last_decrease >= self.latency_target:
+                self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+                self._last_decrease = now
+        elif self.inflight + 1 >= self.limit / 2:
+            # Only grow while the limit is actually being exercised
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+        metrics_manager.record_admission_limit(self.limit)
+
+    def queue_depth(self, db: Session) -> int:
+        """Queued-job count, refreshed at most every `queue_depth_ttl` seconds"""
+        now = time.monotonic()
+        if now - self._queue_depth_at >= self.queue_depth_ttl:
+            self._queue_depth = db.execute(text(QUEUED_TOTAL)).scalar()
+            self._queue_depth_at = now
+        return self._queue_depth
+
+    def queue_full(self, db: Session) -> bool:
+        return self.queue_depth(db) >= self.max_queue_depth
+
+
+admission_controller = AdmissionController(
+    initial_limit=settings.admission_initial_limit,
+    min_limit=settings.admission_min_limit,
+    max_limit=settings.admission_max_limit,
+    latency_target=settings.admission_latency_target_ms / 1000,
+    max_queue_depth=settings.admission_max_queue_depth,
+)
+
+
+def _shed(status_code: int, reason: str, retry_after: int):
+    metrics_manager.record_request_shed(reason)
+    raise HTTPException(
+        status_code=status_code,
+        detail=f"Server is shedding load ({reason}), retry later",
+        headers={"Retry-After": str(retry_after)},
+    )
+
+
+def admission_guard(check_queue_depth: bool = False):
+    """
+    Build a dependency that admits a write request or sheds it.
+
+    Args:
+        check_queue_depth: also reject when the job backlog is too deep
+            (used for submission only)
+    """
+
+    async def guard(db: Session = Depends(get_db)):
+        if not settings.admission_enabled:
+            yield
+            return
+
+        if check_queue_depth and admission_controller.queue_full(db):
+            _shed(503, "queue_depth", settings.admission_queue_full_retry_after)
+
+        if not admission_controller.try_acquire():
+            _shed(429, "concurrency", settings.admission_retry_after)
+
+        start = time.perf_counter()
+        ok = True
+        try:
+            yield
+        except HTTPException as e:
+            ok = e.status_code < 500
+            raise
+        except Exception:
+            ok = False
+            raise
+        finally:
+            admission_controller.release(time.perf_counter() - start, ok)
+
+    return guard
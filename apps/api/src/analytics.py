@@ -0,0 +1,144 @@
+"""
+Reporting queries over the exported Parquet dataset
+
+``analytics/etl/export_jobs.py`` exports changed jobs incrementally, so the
+same job can appear in several files. Every query starts from the ``latest``
+view, which keeps the newest ``updated_at`` row per id. DuckDB only reads the
+columns a query needs and prunes ``created_date`` partitions from the time
+filter, so these reports never touch Postgres.
+"""
+
+from datetime import UTC, date, datetime
+from pathlib import Path
+
+import duckdb
+
+BUCKETS = {"hour", "day", "week"}
+
+LATEST = """
+    WITH latest AS (
+        SELECT * FROM read_parquet(?, hive_partitioning = true, union_by_name = true)
+        WHERE created_date BETWEEN CAST(? AS DATE) AND CAST(? AS DATE)
+        QUALIFY row_number() OVER (PARTITION BY id ORDER BY updated_at DESC) = 1
+    )
+"""
+
+
+class AnalyticsUnavailableError(Exception):
+    """Raised when no Parquet dataset has been exported yet"""
+
+
+class JobAnalytics:
+    """Throughput, wait-time and failure-rate reports from DuckDB"""
+
+    def __init__(self, dataset_path: str | Path):
+        self.dataset_path = Path(dataset_path)
+
+    def _query(
+        self,
+        sql: str,
+        params: list,
+        until: datetime,
+        created_since: datetime | None = None,
+    ) -> list[tuple]:
+        """
+        Run `sql` with the ``latest`` CTE over jobs created up to `until`.
+
+        Finish-time reports pass no ``created_since``: a job finishing in the
+        window may have been submitted long before it.
+        """
+        files = str(self.dataset_path / "created_date=*" / "*.parquet")
+        if not any(self.dataset_path.glob("created_date=*/*.parquet")):
+            raise AnalyticsUnavailableError(
+                f"No Parquet files under {self.dataset_path}"
+            )
+
+        first_day = created_since.date() if created_since else date.min
+        # Short-lived in-memory connection per query: cheap, and thread-safe
+        with duckdb.connect() as conn:
+            conn.execute("SET TimeZone = 'UTC'")
+            return conn.execute(
+                LATEST + sql, [files, first_day, until.date(), *params]
+            ).fetchall()
+
+    def throughput(
+        self, since: datetime, until: datetime, bucket: str = "hour"
+    ) -> list[dict]:
+        """Jobs finished per time bucket, split by terminal state"""
+        if bucket not in BUCKETS:
+            raise ValueError(f"bucket must be one of {sorted(BUCKETS)}")
+
+        rows = self._query(
+            """
+            SELECT CAST(date_trunc(?, finished_at) AS TIMESTAMP) AS bucket,
+                   count(*) FILTER (WHERE state = 'completed') AS completed,
+                   count(*) FILTER (WHERE state = 'failed') AS failed
+            FROM latest
+            WHERE finished_at >= ? AND finished_at < ?
+            GROUP BY 1
+            ORDER BY 1
+            """,
+            [bucket, since, until],
+            until,
+        )
+        return [
+            # Naive UTC out of DuckDB (the session zone); tag it explicitly
+            {"bucket": b.replace(tzinfo=UTC), "completed": completed, "failed": failed}
+            for b, completed, failed in rows
+        ]
+
+    def wait_times(
+        self, since: datetime, until: datetime, name: str | None = None
+    ) -> list[dict]:
+        """Queue wait (created -> started) percentiles in seconds, per job name"""
+        rows = self._query(
+            """
+            SELECT name,
+                   count(*) AS jobs,
+                   quantile_cont(wait_seconds, 0.5) AS p50,
+                   quantile_cont(wait_seconds, 0.95) AS p95,
+                   quantile_cont(wait_seconds, 0.99) AS p99
+            FROM (
+                SELECT name, epoch(started_at) - epoch(created_at) AS wait_seconds
+                FROM latest
+                WHERE started_at IS NOT NULL
+                  AND created_at >= ? AND created_at < ?
+                  AND (CAST(? AS VARCHAR) IS NULL OR name = ?)
+            ) waits
+            GROUP BY name
+            ORDER BY jobs DESC, name
+            """,
+            [since, until, name, name],
+            until,
+            created_since=since,
+        )
+        return [
+            {"name": n, "jobs": jobs, "p50": p50, "p95": p95, "p99": p99}
+            for n, jobs, p50, p95, p99 in rows
+        ]
+
+    def failure_rate(self, since: datetime, until: datetime) -> list[dict]:
+        """Share of finished jobs that failed, per job name"""
+        rows = self._query(
+            """
+            SELECT name,
+                   count(*) AS finished,
+                   count(*) FILTER (WHERE state = 'failed') AS failed
+            FROM latest
+            WHERE state IN ('completed', 'failed')
+              AND finished_at >= ? AND finished_at < ?
+            GROUP BY name
+            ORDER BY failed DESC, name
+            """,
+            [since, until],
+            until,
+        )
+        return [
+            {
+                "name": n,
+                "finished": finished,
+                "failed": failed,
+                "failure_rate": failed / finished,
+            }
+            for n, finished, failed in rows
+        ]
@@ -0,0 +1,264 @@
+"""
+Hot/cold split of the jobs table
+
+Active jobs live in the small ``jobs`` table that the claim query and the
+list endpoints hit. Terminal jobs older than ``archive_after_seconds`` are
+moved into ``jobs_history``, which is range-partitioned by month on
+``finished_at``. The archiver:
+
+- moves rows in bounded batches (``DELETE ... RETURNING`` feeding an
+  ``INSERT``), each batch its own short transaction using SKIP LOCKED;
+- locks a batch, creates the monthly partitions its rows need, then moves
+  it in the same transaction;
+- enforces retention by detaching and dropping whole expired partitions,
+  which is instant compared with deleting rows.
+
+Every statement runs under a short ``lock_timeout`` so the archiver gives up
+rather than queueing behind (and blocking) application traffic. Replicas
+coordinate through a session advisory lock, so only one archives at a time.
+Behind PgBouncer in transaction pooling mode a session lock could be taken
+and released on different server connections, so there each transaction
+takes a transaction-scoped advisory lock instead (``transaction_locks``).
+"""
+
+import asyncio
+import logging
+import re
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from .database import SessionLocal
+from .models import JobHistory
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATES = ("completed", "failed", "cancelled")
+
+ARCHIVER_LOCK_ID = 0x6A6F6273  # "jobs"
+
+PARTITION_NAME = re.compile(r"^jobs_history_(\d{4})(\d{2})$")
+
+ARCHIVED_COLUMNS = ", ".join(c.name for c in JobHistory.__table__.columns)
+
+
+def month_start(value: datetime) -> datetime:
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def next_month(value: datetime) -> datetime:
+    return month_start(month_start(value) + timedelta(days=32))
+
+
+def partition_name(month: datetime) -> str:
+    return f"jobs_history_{month:%Y%m}"
+
+
+class JobArchiver:
+    """Moves terminal jobs into partitioned history and purges expired months"""
+
+    def __init__(
+        self,
+        archive_after_seconds: int = 86400,
+        retention_days: int = 365,
+        batch_size: int = 1000,
+        max_batches_per_run: int = 100,
+        interval_seconds: float = 300.0,
+        lock_timeout_ms: int = 2000,
+        transaction_locks: bool = False,
+    ):
+        self.archive_after_seconds = archive_after_seconds
+        self.retention_days = retention_days
+        self.batch_size = batch_size
+        self.max_batches_per_run = max_batches_per_run
+        self.interval_seconds = interval_seconds
+        self.lock_timeout_ms = lock_timeout_ms
+        self.transaction_locks = transaction_locks
+
+    def _set_lock_timeout(self, db: Session):
+        db.execute(text(f"SET LOCAL lock_timeout = {int(self.lock_timeout_ms)}"))
+
+    def _take_turn(self, db: Session) -> bool:
+        """With transaction_locks, hold the archiver lock for this transaction"""
+        if not self.transaction_locks:
+            return True
+        locked = db.execute(
+            text("SELECT pg_try_advisory_xact_lock(:id)"), {"id": ARCHIVER_LOCK_ID}
+        ).scalar()
+        if not locked:
+            # Nothing done yet in this transaction; just end it
+            db.commit()
+        return locked
+
+    def ensure_partition(self, db: Session, month: datetime):
+        """Create the monthly partition covering `month` if it is missing"""
+        start = month_start(month)
+        db.execute(
+            text(f"""
+                CREATE TABLE IF NOT EXISTS {partition_name(start)}
+                PARTITION OF jobs_history
+                FOR VALUES FROM ('{start.isoformat()}') TO ('{next_month(start).isoformat()}')
+            """)
+        )
+
+    def ensure_default_partition(self, db: Session):
+        db.execute(
+            text(
+                "CREATE TABLE IF NOT EXISTS jobs_history_default "
+                "PARTITION OF jobs_history DEFAULT"
+            )
+        )
+
+    def archive_batch(self, db: Session) -> int:
+        """Move one batch of archivable jobs into history; returns rows moved"""
+        self._set_lock_timeout(db)
+        if not self._take_turn(db):
+            return 0
+        params = {
+            "states": list(TERMINAL_STATES),
+            "after": self.archive_after_seconds,
+            "batch": self.batch_size,
+        }
+        # Lock the batch first and take its months from the locked rows: a
+        # row skipped here (locked by another transaction) must not decide
+        # which partitions exist, or rows moved below could land in the
+        # default partition and block creating their month's partition later.
+        batch = db.execute(
+            text("""
+                SELECT id, date_trunc('month', finished_at, 'UTC') AS month
+                FROM jobs
+                WHERE state = ANY(:states)
+                  AND finished_at < now() - make_interval(secs => :after)
+                ORDER BY finished_at
+                LIMIT :batch
+                FOR UPDATE SKIP LOCKED
+            """),
+            params,
+        ).all()
+        for month in {row.month for row in batch}:
+            self.ensure_partition(db, month.astimezone(UTC))
+
+        moved = 0
+        if batch:
+            moved = db.execute(
+                text(f"""
+                    WITH moved AS (
+                        DELETE FROM jobs WHERE id = ANY(CAST(:ids AS uuid[]))
+                        RETURNING *
+                    )
+                    INSERT INTO jobs_history ({ARCHIVED_COLUMNS})
+                    SELECT {ARCHIVED_COLUMNS} FROM moved
+                """),
+                {"ids": [str(row.id) for row in batch]},
+            ).rowcount
+        db.commit()
+        return moved
+
+    def expired_partitions(self, db: Session, now: datetime) -> list[str]:
+        """Monthly partitions whose whole range is past retention"""
+        cutoff = now - timedelta(days=self.retention_days)
+        names = db.execute(
+            text("""
+                SELECT c.relname FROM pg_inherits i
+                JOIN pg_class c ON c.oid = i.inhrelid
+                JOIN pg_class p ON p.oid = i.inhparent
+                WHERE p.relname = 'jobs_history'
+            """)
+        ).scalars()
+
+        expired = []
+        for name in names:
+            match = PARTITION_NAME.match(name)
+            if not match:
+                continue
+            start = datetime(int(match[1]), int(match[2]), 1, tzinfo=UTC)
+            if next_month(start) <= cutoff:
+                expired.append(name)
+        return sorted(expired)
+
+    def purge_expired(self, db: Session, now: datetime | None = None) -> list[str]:
+        """Drop expired partitions and trim the default partition in batches"""
+        if self.retention_days <= 0:
+            return []
+        now = now or datetime.now(UTC)
+
+        dropped = []
+        for name in self.expired_partitions(db, now):
+            self._set_lock_timeout(db)
+            if not self._take_turn(db):
+                return dropped
+            db.execute(text(f"ALTER TABLE jobs_history DETACH PARTITION {name}"))
+            db.execute(text(f"DROP TABLE {name}"))
+            db.commit()
+            dropped.append(name)
+
+        self._set_lock_timeout(db)
+        if not self._take_turn(db):
+            return dropped
+        db.execute(
+            text("""
+                DELETE FROM jobs_history_default
+                WHERE ctid = ANY(ARRAY(
+                    SELECT ctid FROM jobs_history_default
+                    WHERE finished_at < :cutoff
+                    LIMIT :batch
+                ))
+            """),
+            {
+                "cutoff": now - timedelta(days=self.retention_days),
+                "batch": self.batch_size,
+            },
+        )
+        db.commit()
+        return dropped
+
+    def run_once(self) -> int:
+        """One archival pass; a no-op if another replica holds the lock"""
+        db = SessionLocal()
+        try:
+            if self.transaction_locks:
+                return self._archive_pass(db)
+
+            locked = db.execute(
+                text("SELECT pg_try_advisory_lock(:id)"), {"id": ARCHIVER_LOCK_ID}
+            ).scalar()
+            db.commit()
+            if not locked:
+                return 0
+
+            try:
+                return self._archive_pass(db)
+            finally:
+                db.execute(
+                    text("SELECT pg_advisory_unlock(:id)"), {"id": ARCHIVER_LOCK_ID}
+                )
+                db.commit()
+        finally:
+            db.close()
+
+    def _archive_pass(self, db: Session) -> int:
+        if self._take_turn(db):
+            self.ensure_default_partition(db)
+            db.commit()
+
+        total = 0
+        for _ in range(self.max_batches_per_run):
+            moved = self.archive_batch(db)
+            total += moved
+            if moved < self.batch_size:
+                break
+
+        dropped = self.purge_expired(db)
+        if total or dropped:
+            logger.info("Archived %d jobs, dropped partitions: %s", total, dropped)
+        return total
+
+    async def run(self):
+        """Background loop for the API lifespan"""
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                await asyncio.to_thread(self.run_once)
+            except Exception as e:
+                logger.exception("Pass failed: %s", e)
@@ -0,0 +1,128 @@
+"""
+Queue backlog signal for autoscaling
+
+Triggers on ``jobs`` keep per-band counters in ``queue_stats``: queued jobs
+by priority band, and jobs finished by a worker (running -> completed or
+failed). Reading the backlog is a sum over a few dozen counter rows plus one
+probe of the partial index on queued jobs' ``queued_at``, so it costs the
+same at ten queued jobs as at ten million and can be scraped every few
+seconds. ``queued_at`` is stamped by a trigger each time a job enters the
+queue, so a scheduled job that just came due, or a retry, counts as new.
+
+The completion rate is the growth of the finished counter over a sliding
+window of samples taken by this replica; the estimated drain time is the
+queued count over that rate. Both are None until the window holds two
+samples, and the drain time stays None while nothing is finishing.
+
+``GET /queue/backlog`` computes a report per request as JSON for KEDA's
+metrics-api scaler (see k8s/worker). A background loop refreshes every few
+seconds so the rate window keeps moving between polls, and its latest report
+is exported as gauges on /metrics for Prometheus-based autoscalers.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from datetime import UTC, datetime
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from .database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Bands as assigned by job_priority_band() (see models.QUEUE_STATS_DDL)
+PRIORITY_BANDS = ("low", "normal", "high", "urgent")
+
+QUEUED_TOTAL = "SELECT coalesce(sum(queued), 0) FROM queue_stats"
+
+BAND_COUNTS = """
+    SELECT band, sum(queued) AS queued, sum(finished) AS finished
+    FROM queue_stats
+    GROUP BY band
+"""
+
+OLDEST_QUEUED = """
+    SELECT extract(epoch FROM now() - min(queued_at))
+    FROM jobs WHERE state = 'queued'
+"""
+
+
+class BacklogMonitor:
+    """Backlog reports from queue_stats, with a completion-rate window"""
+
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        interval_seconds: float = 5.0,
+        rate_window_seconds: float = 300.0,
+        clock=time.monotonic,
+    ):
+        self.session_factory = session_factory
+        self.interval_seconds = interval_seconds
+        self.rate_window_seconds = rate_window_seconds
+        self.clock = clock
+        self.report: dict | None = None
+        self._samples: deque[tuple[float, int]] = deque()
+        self._lock = threading.Lock()
+
+    def _completion_rate(self, now: float, finished: int) -> float | None:
+        samples = self._samples
+        # At most one sample per second, however often we are scraped
+        if len(samples) > 1 and now - samples[-1][0] < 1.0:
+            samples.pop()
+        samples.append((now, finished))
+        while len(samples) > 2 and now - samples[1][0] >= self.rate_window_seconds:
+            samples.popleft()
+        started, finished_then = samples[0]
+        if now <= started:
+            return None
+        return max(finished - finished_then, 0) / (now - started)
+
+    def refresh(self, db: Session) -> dict:
+        """Read the counters and compute a new report"""
+        with self._lock:
+            rows = db.execute(text(BAND_COUNTS)).all()
+            oldest = db.execute(text(OLDEST_QUEUED)).scalar()
+            now = self.clock()
+
+            bands = dict.fromkeys(PRIORITY_BANDS, 0)
+            bands.update({row.band: int(row.queued) for row in rows})
+            queued = sum(bands.values())
+            rate = self._completion_rate(now, sum(int(row.finished) for row in rows))
+
+            if not queued:
+                drain = 0.0
+            elif rate:
+                drain = round(queued / rate, 1)
+            else:
+                drain = None
+
+            self.report = {
+                "queued": queued,
+                "bands": bands,
+                # 0 rather than null on an empty queue: scalers need a number
+                "oldest_queued_seconds": round(float(oldest or 0), 1),
+                "completion_rate_per_second": (
+                    round(rate, 4) if rate is not None else None
+                ),
+                "estimated_drain_seconds": drain,
+                "checked_at": datetime.now(UTC),
+            }
+            return self.report
+
+    def refresh_once(self) -> dict:
+        with self.session_factory() as db:
+            return self.refresh(db)
+
+    async def run(self):
+        """Background loop for the API lifespan: keeps gauges and the rate fresh"""
+        while True:
+            try:
+                await asyncio.to_thread(self.refresh_once)
+            except Exception as e:
+                logger.warning("Backlog refresh failed: %s", e)
+            await asyncio.sleep(self.interval_seconds)
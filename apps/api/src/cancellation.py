@@ -0,0 +1,68 @@
+"""
+Job cancellation
+
+A job that has not started (queued, scheduled, or linked to a memoized
+original) is cancelled on the spot. A running job is marked ``cancelling`` and a request
+is published on ``jobs.{id}.cancel``; the worker running it stops the
+execution, frees the GPU and records ``cancelled`` (workers also poll the
+row, so a lost message only delays the cancel by a few seconds).
+
+Both happen in one conditional UPDATE, so a cancel racing a claim either
+wins before the claim (cancelled) or waits for its row lock and then sees a
+running job (cancelling).
+"""
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from .memoization import LINKED_STATE, release_linked_jobs
+from .scheduling import SCHEDULED_STATE
+
+CANCELLING_STATE = "cancelling"
+CANCELLED_STATE = "cancelled"
+
+# States a cancel can still act on; anything else has already finished
+CANCELLABLE_STATES = (
+    "queued",
+    SCHEDULED_STATE,
+    LINKED_STATE,
+    "running",
+    CANCELLING_STATE,
+)
+
+# Not started yet, so nothing to stop
+WAITING_STATES = ("queued", SCHEDULED_STATE, LINKED_STATE)
+
+CANCEL_JOB = text("""
+    UPDATE jobs
+    SET state = CASE WHEN state = ANY(:waiting)
+                     THEN 'cancelled' ELSE 'cancelling' END,
+        finished_at = CASE WHEN state = ANY(:waiting)
+                           THEN now() ELSE finished_at END
+    WHERE id = :id AND state = ANY(:cancellable)
+    RETURNING state
+""")
+
+
+def cancel_subject(job_id) -> str:
+    return f"jobs.{job_id}.cancel"
+
+
+def cancel_job(db: Session, job_id) -> str | None:
+    """
+    Cancel a job if it has not finished; returns its new state or None.
+
+    Does not commit.
+    """
+    state = db.execute(
+        CANCEL_JOB,
+        {
+            "id": job_id,
+            "waiting": list(WAITING_STATES),
+            "cancellable": list(CANCELLABLE_STATES),
+        },
+    ).scalar()
+    if state == CANCELLED_STATE:
+        # Duplicates waiting on this job would otherwise never complete
+        release_linked_jobs(db, job_id)
+    return state
@@ -12,6 +12,17 @@ class Settings(BaseSettings):
     # Database
     database_url: str
 
+    # Connection pool: size plus overflow per process, checkout timeout,
+    # recycle age; statement timeout in ms (0 disables); set db_pgbouncer
+    # behind PgBouncer in transaction pooling mode
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout_seconds: float = 30.0
+    db_pool_recycle_seconds: int = 1800
+    db_pool_pre_ping: bool = True
+    db_statement_timeout_ms: int = 30000
+    db_pgbouncer: bool = False
+
     # API Server
     host: str = "0.0.0.0"
     port: int = 8000
@@ -19,6 +30,66 @@ class Settings(BaseSettings):
 
     # NATS JetStream
     nats_url: str = "nats://localhost:4222"
+    nats_connect_max_backoff_seconds: float = 30.0  # background connect retries
+
+    # /ready: probe cache, database ping timeout, whether NATS gates readiness
+    readiness_cache_seconds: float = 2.0
+    readiness_db_timeout_seconds: float = 1.0
+    readiness_requires_nats: bool = False
+
+    # Reject jobs whose gpu_memory_mb no live worker's GPU has (heartbeats)
+    gpu_fit_check_enabled: bool = True
+
+    # Result memoization (jobs still opt in individually with memoize=true)
+    memoization_enabled: bool = True
+
+    # Admission control (adaptive load shedding on write endpoints)
+    admission_enabled: bool = True
+    admission_initial_limit: int = 32
+    admission_min_limit: int = 4
+    admission_max_limit: int = 256
+    admission_latency_target_ms: float = 250.0
+    admission_max_queue_depth: int = 100_000
+    admission_retry_after: int = 1  # seconds, 429 responses
+    admission_queue_full_retry_after: int = 30  # seconds, 503 responses
+
+    # Queue backlog signal for autoscalers: gauge refresh and rate window
+    backlog_refresh_seconds: float = 5.0
+    backlog_rate_window_seconds: float = 300.0
+
+    # Archival of terminal jobs into partitioned jobs_history
+    archiver_enabled: bool = True
+    archive_after_seconds: int = 86400
+    archive_batch_size: int = 1000
+    archive_interval_seconds: float = 300.0
+    history_retention_days: int = 365  # 0 keeps history forever
+
+    # GET /jobs params filters: rows returned when no limit is given
+    params_query_default_limit: int = 100
+
+    # GPU usage rollups maintained from job completion events
+    usage_rollups_enabled: bool = True
+    usage_ledger_retention_hours: int = 168  # must exceed JetStream redelivery
+
+    # Metrics: distinct values per attribute before "_other", /metrics cache TTL
+    metrics_max_attribute_values: int = 100
+    metrics_scrape_cache_seconds: float = 1.0
+
+    # Logging: level, json|text, per-logger levels ("src.nats_client=DEBUG"),
+    # and records per second per repeated message after a burst (0 disables)
+    log_level: str = "INFO"
+    log_format: str = "json"
+    log_levels: str = ""
+    log_sample_rate: float = 10.0
+    log_sample_burst: int = 20
+
+    # Tracing: exporter none|console|file|memory|otlp|module:factory
+    tracing_exporter: str = "none"
+    tracing_sample_ratio: float = 1.0
+    tracing_file_path: str = "spans.jsonl"
+
+    # Parquet dataset written by analytics/etl/export_jobs.py
+    analytics_dataset_path: str = "../../analytics/datasets/jobs"
 
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -2,14 +2,22 @@
 Database connection and session management
 """
 
-from sqlalchemy import create_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
 
 from .config import settings
+from .pool import create_pooled_engine
 
-# Create database engine
-engine = create_engine(
+# Create database engine (pool sizing and timeouts from settings)
+engine = create_pooled_engine(
     settings.database_url,
+    pool_name="api",
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    pool_timeout=settings.db_pool_timeout_seconds,
+    pool_recycle=settings.db_pool_recycle_seconds,
+    pre_ping=settings.db_pool_pre_ping,
+    statement_timeout_ms=settings.db_statement_timeout_ms,
+    pgbouncer=settings.db_pgbouncer,
     echo=False,  # Log SQL queries (helpful for development)
     future=True,
 )
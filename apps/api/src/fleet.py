@@ -0,0 +1,119 @@
+"""
+Fleet-wide GPU capacity from worker heartbeats
+
+Workers publish their GPUs (memory, utilisation, allocation) and input cache
+(advertised keys, hit rate) on ``gpus.<worker_id>`` every few seconds over core NATS: nothing is persisted,
+and a lost heartbeat is simply replaced by the next one. The API keeps the
+latest heartbeat per worker in memory and forgets a worker once it is older
+than the TTL the worker announced, so ``GET /gpus`` reports live capacity
+without a database query and submission can refuse jobs that no live GPU
+could ever hold. Ages are measured on the API's clock from receipt, so
+clock skew between hosts does not matter.
+"""
+
+import json
+import logging
+import time
+from dataclasses import dataclass
+
+from .schemas import GPUStatus, InputCacheStatus
+
+logger = logging.getLogger(__name__)
+
+HEARTBEAT_SUBJECT = "gpus.*"
+
+
+@dataclass
+class WorkerHeartbeat:
+    worker_id: str
+    gpus: list[GPUStatus]
+    received_at: float
+    ttl_seconds: float
+    input_cache: InputCacheStatus | None = None
+
+
+class FleetRegistry:
+    """Latest heartbeat per worker, expiring after each worker's TTL"""
+
+    def __init__(self, default_ttl: float = 15.0, clock=time.monotonic):
+        self.default_ttl = default_ttl
+        self.clock = clock
+        self.workers: dict[str, WorkerHeartbeat] = {}
+
+    def observe(self, heartbeat: dict):
+        """Record a heartbeat; a ``stopping`` one removes the worker at once"""
+        worker_id = heartbeat.get("worker_id")
+        if not worker_id:
+            raise ValueError("Heartbeat without worker_id")
+        if heartbeat.get("stopping"):
+            self.workers.pop(worker_id, None)
+            return
+
+        self.workers[worker_id] = WorkerHeartbeat(
+            worker_id=worker_id,
+            gpus=[GPUStatus.model_validate(gpu) for gpu in heartbeat.get("gpus", [])],
+            received_at=self.clock(),
+            ttl_seconds=float(heartbeat.get("ttl_seconds") or self.default_ttl),
+            input_cache=(
+                InputCacheStatus.model_validate(heartbeat["input_cache"])
+                if heartbeat.get("input_cache")
+                else None
+            ),
+        )
+
+    def live(self) -> list[WorkerHeartbeat]:
+        """Workers with a fresh heartbeat, dropping the expired ones"""
+        now = self.clock()
+        for worker_id, beat in list(self.workers.items()):
+            if now - beat.received_at > beat.ttl_seconds:
+                logger.info("Worker %s stopped sending heartbeats", worker_id)
+                del self.workers[worker_id]
+        return sorted(self.workers.values(), key=lambda beat: beat.worker_id)
+
+    def snapshot(self) -> dict:
+        """Live workers and fleet totals, shaped like ``FleetCapacity``"""
+        now = self.clock()
+        workers = self.live()
+        gpus = [gpu for beat in workers for gpu in beat.gpus]
+        return {
+            "workers": [
+                {
+                    "worker_id": beat.worker_id,
+                    "age_seconds": round(now - beat.received_at, 3),
+                    "gpus": beat.gpus,
+                    "input_cache": beat.input_cache,
+                }
+                for beat in workers
+            ],
+            "totals": {
+                "workers": len(workers),
+                "gpus": len(gpus),
+                "available_gpus": sum(gpu.available for gpu in gpus),
+                "memory_total_mb": sum(gpu.memory_total_mb for gpu in gpus),
+                "memory_used_mb": sum(gpu.memory_used_mb for gpu in gpus),
+            },
+        }
+
+    def fits(self, gpu_memory_mb: int | None, gpu_count: int = 1) -> bool | None:
+        """
+        Whether any live worker has `gpu_count` GPUs large enough, busy or
+        not. A gang runs on one worker, so GPUs are not pooled across them.
+
+        None when no worker is live (startup, scaled to zero): capacity is
+        unknown, so callers should accept and let the job wait.
+        """
+        workers = self.live()
+        if not workers:
+            return None
+        return any(
+            sum(gpu.memory_total_mb >= (gpu_memory_mb or 0) for gpu in beat.gpus)
+            >= gpu_count
+            for beat in workers
+        )
+
+    async def on_message(self, msg):
+        """NATS callback for ``HEARTBEAT_SUBJECT``"""
+        try:
+            self.observe(json.loads(msg.data.decode()))
+        except ValueError as e:
+            logger.warning("Skipping malformed heartbeat on %s: %s", msg.subject, e)
@@ -0,0 +1,59 @@
+"""
+Job inputs
+
+Jobs list the files they read in ``params["inputs"]``, each a URI or
+``{"uri": ..., "sha256": ...}``. Workers keep a local cache of inputs keyed
+by content: the given ``sha256``, or else the hash of the URI. The same keys
+are stored on the job (``input_keys``) so that a worker can claim queued
+jobs whose inputs it already holds through a GIN index, without reading
+params. Keep in step with the worker's ``src/input_cache.py``.
+
+A key is also a file name in the worker's cache, so a ``sha256`` that is not
+64 hex digits is rejected on submission (``check_inputs``), and skipped by
+``input_keys`` should one reach it some other way.
+"""
+
+import hashlib
+import re
+
+INPUTS_PARAM = "inputs"
+
+SHA256_HEX = re.compile(r"[0-9a-fA-F]{64}")
+
+
+class InputsError(ValueError):
+    """A job input the workers could not cache safely"""
+
+
+def _digest(item: dict) -> str | None:
+    """The item's sha256, lowercased; raises InputsError if malformed"""
+    digest = item.get("sha256")
+    if digest is None:
+        return None
+    if not isinstance(digest, str) or not SHA256_HEX.fullmatch(digest):
+        raise InputsError(
+            f"sha256 of input {item['uri']!r} must be 64 hex digits, got {digest!r}"
+        )
+    return digest.lower()
+
+
+def check_inputs(params: dict | None):
+    """Raise InputsError if any input names a malformed sha256"""
+    for item in (params or {}).get(INPUTS_PARAM) or []:
+        if isinstance(item, dict) and isinstance(item.get("uri"), str):
+            _digest(item)
+
+
+def input_keys(params: dict | None) -> list[str] | None:
+    """Cache keys of the inputs in a job's params (None without inputs)"""
+    keys = []
+    for item in (params or {}).get(INPUTS_PARAM) or []:
+        if isinstance(item, str):
+            keys.append(hashlib.sha256(item.encode()).hexdigest())
+        elif isinstance(item, dict) and isinstance(item.get("uri"), str):
+            try:
+                digest = _digest(item)
+            except InputsError:
+                continue
+            keys.append(digest or hashlib.sha256(item["uri"].encode()).hexdigest())
+    return sorted(set(keys)) or None
@@ -2,56 +2,190 @@
 Overflying API - FastAPI service for GPU job orchestration and work scheduling
 """
 
+import asyncio
+import contextlib
 import json
+import logging
 from contextlib import asynccontextmanager
+from datetime import UTC, datetime, timedelta
 from uuid import UUID
 
-from fastapi import Depends, FastAPI, HTTPException, Request
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import JSONResponse, StreamingResponse
+from opentelemetry.trace import SpanKind
+from sqlalchemy import select, union_all
 from sqlalchemy.orm import Session
 
+from .admission import admission_guard
+from .analytics import AnalyticsUnavailableError, JobAnalytics
+from .archiver import JobArchiver
+from .backlog import BacklogMonitor
+from .cancellation import CANCELLED_STATE, CANCELLING_STATE, cancel_job, cancel_subject
 from .config import settings
 from .database import engine, get_db
-from .metrics import metrics_manager
-from .models import Job
-from .nats_client import NATSManager
-from .schemas import JobCreate, JobResponse, JobUpdate
+from .fleet import HEARTBEAT_SUBJECT, FleetRegistry
+from .inputs import InputsError, check_inputs, input_keys
+from .logs import RequestIdMiddleware, setup_logging
+from .memoization import (
+    apply_memoization,
+    compute_memo_key,
+    rekey_memoized,
+    release_linked_jobs,
+)
+from .metrics import TimingMiddleware, metrics_manager
+from .models import Job, JobHistory
+from .nats_client import NATSManager, NATSUnavailableError
+from .params_query import (
+    ParamsQueryError,
+    params_criteria,
+    parse_containment,
+    parse_path_predicate,
+)
+from .readiness import ReadinessProbe
+from .scheduling import schedule
+from .schemas import (
+    AccountUsage,
+    FailureRate,
+    FleetCapacity,
+    JobCreate,
+    JobResponse,
+    JobUpdate,
+    LeaderboardEntry,
+    QueueBacklog,
+    ThroughputBucket,
+    WaitTimeStats,
+)
+from .tracing import (
+    current_trace_context,
+    extract_context,
+    flush_tracing,
+    get_tracer,
+    setup_tracing,
+)
+from .usage import UsageAccountant, account_usage, leaderboard
+
+# Structured logs through a background writer; uvicorn's loggers included
+setup_logging(
+    level=settings.log_level,
+    fmt=settings.log_format,
+    levels=settings.log_levels,
+    sample_rate=settings.log_sample_rate,
+    sample_burst=settings.log_sample_burst,
+    adopt=("uvicorn", "uvicorn.error", "uvicorn.access"),
+)
+logger = logging.getLogger(__name__)
 
 # Global NATS manager instance
 nats_manager = NATSManager(settings.nats_url)
 
+# Background mover of terminal jobs into partitioned history
+job_archiver = JobArchiver(
+    archive_after_seconds=settings.archive_after_seconds,
+    retention_days=settings.history_retention_days,
+    batch_size=settings.archive_batch_size,
+    interval_seconds=settings.archive_interval_seconds,
+    # Session advisory locks do not survive PgBouncer transaction pooling
+    transaction_locks=settings.db_pgbouncer,
+)
+
+# Folds job completion events into per-submitter usage rollups
+usage_accountant = UsageAccountant(
+    retention_hours=settings.usage_ledger_retention_hours
+)
+
+# Live GPU capacity from worker heartbeats (memory only, no database)
+gpu_fleet = FleetRegistry()
+nats_manager.listeners[HEARTBEAT_SUBJECT] = gpu_fleet.on_message
+
+# Queue backlog and drain-time estimate for autoscaling (counter reads only)
+backlog_monitor = BacklogMonitor(
+    interval_seconds=settings.backlog_refresh_seconds,
+    rate_window_seconds=settings.backlog_rate_window_seconds,
+)
+
+# Reporting over the exported Parquet dataset (never queries Postgres)
+job_analytics = JobAnalytics(settings.analytics_dataset_path)
+
+# Cached dependency checks behind /ready
+readiness_probe = ReadinessProbe(
+    engine,
+    nats_manager,
+    ttl=settings.readiness_cache_seconds,
+    db_timeout=settings.readiness_db_timeout_seconds,
+    requires_nats=settings.readiness_requires_nats,
+    on_nats_status=metrics_manager.set_nats_connection_status,
+)
+
+
+async def instrument_runtime():
+    """SQLAlchemy and system metrics, set up off the startup path"""
+    try:
+        await asyncio.to_thread(metrics_manager.setup_runtime_instrumentation, engine)
+    except Exception as e:
+        logger.warning("Could not initialize runtime instrumentation: %s", e)
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """FastAPI lifespan event handler"""
-    # Startup: Initialize metrics
+    # Startup: Tracing first, so the instrumentors below pick it up
     try:
-        metrics_manager.setup_metrics(app, engine)
-        print("[API] Metrics initialized")
+        setup_tracing(
+            metrics_manager.service_name,
+            exporter=settings.tracing_exporter,
+            sample_ratio=settings.tracing_sample_ratio,
+            file_path=settings.tracing_file_path,
+        )
     except Exception as e:
-        print(f"[API] WARNING: Could not initialize metrics: {e}")
+        logger.warning("Could not initialize tracing: %s", e)
 
-    # Startup: Connect to NATS (non-blocking, allows API to start without NATS)
+    # Startup: Initialize metrics (HTTP instrumentation has to precede startup)
+    tasks = []
     try:
-        await nats_manager.connect()
-        await nats_manager.ensure_stream("JOBS", ["jobs.>"])
-        print("[API] Connected to NATS JetStream")
-        metrics_manager.set_nats_connection_status(True)
+        metrics_manager.setup_metrics(app)
+        metrics_manager.instrument_backlog(backlog_monitor)
+        logger.info("Metrics initialized")
+        tasks.append(asyncio.create_task(instrument_runtime()))
     except Exception as e:
-        print(f"[API] WARNING: Could not connect to NATS: {e}")
-        print("[API] API will run without real-time updates. Start NATS to enable SSE.")
-        metrics_manager.set_nats_connection_status(False)
+        logger.warning("Could not initialize metrics: %s", e)
+
+    # Startup: Connect to NATS in the background; until then the API runs
+    # without real-time updates and /ready reports NATS as down
+    tasks.append(
+        asyncio.create_task(
+            nats_manager.run(
+                {"JOBS": ["jobs.>"]},
+                max_delay=settings.nats_connect_max_backoff_seconds,
+            )
+        )
+    )
+
+    # Startup: Background tasks (backlog sampling, archival, usage accounting
+    # once NATS is up)
+    tasks.append(asyncio.create_task(backlog_monitor.run()))
+    if settings.archiver_enabled:
+        tasks.append(asyncio.create_task(job_archiver.run()))
+    if settings.usage_rollups_enabled:
+        tasks.append(asyncio.create_task(usage_accountant.run(nats_manager)))
 
     yield
 
+    # Shutdown: Stop background tasks
+    for task in tasks:
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+
     # Shutdown: Disconnect from NATS
     try:
         await nats_manager.disconnect()
-        print("[API] Disconnected from NATS")
+        logger.info("Disconnected from NATS")
         metrics_manager.set_nats_connection_status(False)
     except Exception as e:
-        print(f"[API] Failed to disconnect from NATS: {e}")
+        logger.warning("Failed to disconnect from NATS: %s", e)
+
+    flush_tracing()
 
 
 app = FastAPI(
@@ -63,7 +197,7 @@ app = FastAPI(
 
 # Parse CORS origins from settings
 cors_origins = settings.cors_origins.split(",")
-print(f"[API] CORS origins configured: {cors_origins}")
+logger.info("CORS origins configured: %s", cors_origins)
 
 app.add_middleware(
     CORSMiddleware,
@@ -73,8 +207,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Add metrics middleware
-app.middleware("http")(metrics_manager.create_timing_middleware())
+# Add metrics middleware (outside CORS, so it also times CORS handling)
+app.add_middleware(TimingMiddleware, metrics=metrics_manager)
+
+# Bind X-Request-ID around everything else, so every log line carries it
+app.add_middleware(RequestIdMiddleware)
 
 
 @app.get("/")
@@ -89,22 +226,127 @@ async def health():
     return {"status": "healthy", "environment": "testing-approval-workflow"}
 
 
-@app.get("/jobs", response_model=list[JobResponse])
-async def list_jobs(db: Session = Depends(get_db)):
-    """Get all jobs from the database"""
-    jobs = db.query(Job).order_by(Job.created_at.desc()).all()
-    return jobs
+@app.get("/ready")
+async def ready():
+    """Readiness: database pool and NATS status from cached probes (503 if not ready)"""
+    report = await readiness_probe.check()
+    status_code = 200 if report["status"] == "ready" else 503
+    return JSONResponse(report, status_code=status_code)
+
+
+@app.get("/gpus", response_model=FleetCapacity)
+async def list_gpus():
+    """GPUs of every worker with a fresh heartbeat (served from memory)"""
+    return gpu_fleet.snapshot()
+
 
+@app.get("/queue/backlog", response_model=QueueBacklog)
+async def queue_backlog(db: Session = Depends(get_db)):
+    """Queued jobs by priority band, oldest wait and estimated drain time"""
+    return backlog_monitor.refresh(db)
 
-@app.post("/jobs", response_model=JobResponse, status_code=201)
+
+def all_jobs(where=None):
+    """
+    Hot and archived jobs as one union (columns matched by name), each side
+    filtered by the clauses ``where(table)`` returns, if given
+    """
+    names = [c.name for c in Job.__table__.columns]
+    return union_all(
+        *(
+            select(*(table.c[n] for n in names)).where(*(where(table) if where else ()))
+            for table in (Job.__table__, JobHistory.__table__)
+        )
+    )
+
+
+@app.get("/jobs", response_model=list[JobResponse])
+async def list_jobs(
+    params: str | None = Query(
+        None, description='JSON object the params contain, e.g. {"scene_id": "x"}'
+    ),
+    params_path: str | None = Query(
+        None, description='JSONPath predicate on params, e.g. $.aoi == "alps"'
+    ),
+    limit: int | None = Query(None, ge=1, le=1000),
+    db: Session = Depends(get_db),
+):
+    """Get jobs from the database (active and archived), newest first"""
+    if params is None and params_path is None:
+        jobs = all_jobs().subquery()
+    else:
+        try:
+            contains = None if params is None else parse_containment(params)
+            path = None if params_path is None else parse_path_predicate(params_path)
+        except ParamsQueryError as e:
+            raise HTTPException(status_code=422, detail=str(e)) from e
+
+        # Matches first, through the GIN indexes, rather than walking
+        # created_at until enough rows pass the filter
+        jobs = (
+            all_jobs(lambda table: params_criteria(table, contains, path))
+            .cte("matched")
+            .prefix_with("MATERIALIZED")
+        )
+        limit = limit or settings.params_query_default_limit
+
+    query = select(jobs).order_by(jobs.c.created_at.desc())
+    if limit:
+        query = query.limit(limit)
+    return db.execute(query).all()
+
+
+@app.post(
+    "/jobs",
+    response_model=JobResponse,
+    status_code=201,
+    dependencies=[Depends(admission_guard(check_queue_depth=True))],
+)
 async def create_job(job_data: JobCreate, db: Session = Depends(get_db)):
     """Create a new job"""
+    try:
+        check_inputs(job_data.params)
+    except InputsError as e:
+        raise HTTPException(status_code=422, detail=str(e)) from e
+
+    # Jobs no live worker could ever hold would sit in the queue forever
+    if (
+        (job_data.gpu_memory_mb or job_data.gpu_count > 1)
+        and settings.gpu_fit_check_enabled
+        and gpu_fleet.fits(job_data.gpu_memory_mb, job_data.gpu_count) is False
+    ):
+        raise HTTPException(
+            status_code=422,
+            detail=(
+                f"No live worker has {job_data.gpu_count} GPU(s)"
+                f" with {job_data.gpu_memory_mb or 0} MB"
+            ),
+        )
+
     job = Job(
         name=job_data.name,
         params=job_data.params,
         priority=job_data.priority,
         submitted_by=job_data.submitted_by,
+        gpu_memory_mb=job_data.gpu_memory_mb,
+        gpu_count=job_data.gpu_count,
+        input_keys=input_keys(job_data.params),
+        max_runtime_seconds=job_data.max_runtime_seconds,
+        max_retries=job_data.max_retries,
+        # The worker continues this request's trace when it runs the job
+        trace_context=current_trace_context(),
     )
+
+    # Future jobs wait as scheduled; their memo lookup happens when claimed
+    scheduled = schedule(job, job_data.run_at)
+
+    # Opt-in memoization: complete from cache or link to an in-flight original
+    if job_data.memoize and settings.memoization_enabled:
+        job.memo_key = compute_memo_key(job_data.name, job_data.params)
+        if not scheduled:
+            outcome, gpu_seconds_saved = apply_memoization(db, job)
+            metrics_manager.record_memo_lookup(outcome, gpu_seconds_saved)
+
     db.add(job)
     db.commit()
     db.refresh(job)
@@ -122,50 +364,205 @@ async def create_job(job_data: JobCreate, db: Session = Depends(get_db)):
 async def get_job(job_id: UUID, db: Session = Depends(get_db)):
     """Get a single job by ID"""
     job = db.query(Job).filter(Job.id == job_id).first()
+    if not job:
+        job = db.query(JobHistory).filter(JobHistory.id == job_id).first()
     if not job:
         raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
     return job
 
 
-@app.put("/jobs/{job_id}", response_model=JobResponse)
+@app.put(
+    "/jobs/{job_id}",
+    response_model=JobResponse,
+    dependencies=[Depends(admission_guard())],
+)
 async def update_job(job_id: UUID, job_data: JobUpdate, db: Session = Depends(get_db)):
     """Update an existing job"""
     job = db.query(Job).filter(Job.id == job_id).first()
     if not job:
+        if db.query(JobHistory).filter(JobHistory.id == job_id).first():
+            raise HTTPException(
+                status_code=409, detail=f"Job {job_id} is archived and read-only"
+            )
         raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
 
     # Update only provided fields
     update_data = job_data.model_dump(exclude_unset=True)
+    try:
+        check_inputs(update_data.get("params"))
+    except InputsError as e:
+        raise HTTPException(status_code=422, detail=str(e)) from e
     for field, value in update_data.items():
         setattr(job, field, value)
+    if "params" in update_data:
+        job.input_keys = input_keys(job.params)
+    if job.memo_key and update_data.keys() & {"name", "params"}:
+        rekey_memoized(db, job)
 
     db.commit()
     db.refresh(job)
     return job
 
 
-@app.delete("/jobs/{job_id}", status_code=204)
+@app.post(
+    "/jobs/{job_id}/cancel",
+    response_model=JobResponse,
+    dependencies=[Depends(admission_guard())],
+)
+async def cancel_job_endpoint(
+    job_id: UUID, response: Response, db: Session = Depends(get_db)
+):
+    """
+    Cancel a job: at once if it has not started (200), otherwise by asking
+    the worker running it to stop (202, state ``cancelling``)
+    """
+    state = cancel_job(db, job_id)
+    if state is None:
+        job = db.get(Job, job_id)
+        if not job:
+            job = db.query(JobHistory).filter(JobHistory.id == job_id).first()
+        if not job:
+            raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+        raise HTTPException(
+            status_code=409, detail=f"Job {job_id} already finished ({job.state})"
+        )
+    db.commit()
+
+    subject = cancel_subject(job_id)
+    if state == CANCELLED_STATE:
+        subject = f"jobs.{job_id}.{CANCELLED_STATE}"
+    else:
+        response.status_code = 202
+    try:
+        await nats_manager.publish(
+            subject,
+            {
+                "job_id": str(job_id),
+                "state": state,
+                "timestamp": datetime.now(UTC).isoformat(),
+            },
+        )
+    except Exception as e:
+        # Workers also poll running jobs' state, so the cancel still lands
+        logger.warning("Could not publish cancel for job %s: %s", job_id, e)
+
+    return db.get(Job, job_id)
+
+
+@app.delete(
+    "/jobs/{job_id}", status_code=204, dependencies=[Depends(admission_guard())]
+)
 async def delete_job(job_id: UUID, db: Session = Depends(get_db)):
     """Delete a job"""
     job = db.query(Job).filter(Job.id == job_id).first()
+    if not job:
+        job = db.query(JobHistory).filter(JobHistory.id == job_id).first()
     if not job:
         raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
-
+    if job.state in ("running", CANCELLING_STATE):
+        # The worker would keep the GPU busy for a job that no longer exists
+        raise HTTPException(
+            status_code=409,
+            detail=f"Job {job_id} is {job.state}; cancel it first",
+        )
+
+    # Duplicates waiting on this job would otherwise never complete
+    release_linked_jobs(db, job.id)
     db.delete(job)
     db.commit()
     return None
 
 
-@app.post("/admin/purge-stream")
+@app.post("/admin/purge-stream", dependencies=[Depends(admission_guard())])
 async def purge_stream(stream_name: str = "JOBS"):
     """Purge all messages from a JetStream stream (dev only)"""
     try:
         await nats_manager.purge_stream(stream_name)
         return {"message": f"Stream {stream_name} purged"}
+    except NATSUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e)) from e
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e)) from e
 
 
+def report_window(
+    since: datetime | None,
+    until: datetime | None,
+    default: timedelta = timedelta(days=1),
+):
+    """Default to the last `default` period; naive datetimes are taken as UTC"""
+    until = until or datetime.now(UTC)
+    since = since or until - default
+    since, until = (t if t.tzinfo else t.replace(tzinfo=UTC) for t in (since, until))
+    if since >= until:
+        raise HTTPException(status_code=422, detail="since must be before until")
+    return since, until
+
+
+async def run_report(report, *args):
+    """Run a DuckDB report off the event loop"""
+    try:
+        return await asyncio.to_thread(report, *args)
+    except AnalyticsUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e)) from e
+
+
+@app.get("/analytics/throughput", response_model=list[ThroughputBucket])
+async def analytics_throughput(
+    since: datetime | None = None,
+    until: datetime | None = None,
+    bucket: str = Query("hour", pattern="^(hour|day|week)$"),
+):
+    """Completed and failed jobs per time bucket"""
+    since, until = report_window(since, until)
+    return await run_report(job_analytics.throughput, since, until, bucket)
+
+
+@app.get("/analytics/wait-times", response_model=list[WaitTimeStats])
+async def analytics_wait_times(
+    since: datetime | None = None,
+    until: datetime | None = None,
+    name: str | None = None,
+):
+    """Queue wait percentiles per job name, for jobs submitted in the window"""
+    since, until = report_window(since, until)
+    return await run_report(job_analytics.wait_times, since, until, name)
+
+
+@app.get("/analytics/failure-rate", response_model=list[FailureRate])
+async def analytics_failure_rate(
+    since: datetime | None = None, until: datetime | None = None
+):
+    """Failure rate per job name, for jobs finished in the window"""
+    since, until = report_window(since, until)
+    return await run_report(job_analytics.failure_rate, since, until)
+
+
+@app.get("/usage/accounts/{submitted_by}", response_model=AccountUsage)
+async def get_account_usage(
+    submitted_by: str,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    bucket: str = Query("day", pattern="^(hour|day|week|month)$"),
+    db: Session = Depends(get_db),
+):
+    """GPU usage for one submitter (last 30 days by default), from rollups only"""
+    since, until = report_window(since, until, default=timedelta(days=30))
+    return account_usage(db, submitted_by, since, until, bucket)
+
+
+@app.get("/usage/leaderboard", response_model=list[LeaderboardEntry])
+async def get_usage_leaderboard(
+    since: datetime | None = None,
+    until: datetime | None = None,
+    limit: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db),
+):
+    """Submitters ranked by GPU-seconds (last 30 days by default)"""
+    since, until = report_window(since, until, default=timedelta(days=30))
+    return leaderboard(db, since, until, limit)
+
+
 @app.get("/events")
 async def job_events_stream(request: Request):
     """
@@ -176,12 +573,13 @@ async def job_events_stream(request: Request):
     async def event_generator():
         """Generate SSE events from NATS JetStream"""
         # Check if NATS is connected
-        if not nats_manager.nc or not nats_manager.nc.is_connected:
-            yield f"data: {json.dumps({'type': 'error', 'message': 'NATS not available. Start NATS and restart API.'})}\n\n"
+        if not nats_manager.is_connected:
+            yield f"data: {json.dumps({'type': 'error', 'message': 'NATS not available yet. Retry shortly.'})}\n\n"
             return
 
         # Create a unique consumer for this SSE connection
         consumer_name = f"api-sse-{id(request)}"
+        tracer = get_tracer()
 
         try:
             # Subscribe to NATS JetStream
@@ -203,7 +601,7 @@ async def job_events_stream(request: Request):
             while True:
                 # Check if client disconnected
                 if await request.is_disconnected():
-                    print(f"[SSE] Client disconnected: {consumer_name}")
+                    logger.info("SSE client disconnected: %s", consumer_name)
                     break
 
                 try:
@@ -211,10 +609,20 @@ async def job_events_stream(request: Request):
                     msgs = await psub.fetch(batch=1, timeout=1.0)
 
                     for msg in msgs:
-                        data = json.loads(msg.data.decode())
-                        # Format as SSE event
-                        yield f"data: {json.dumps(data)}\n\n"
-                        await msg.ack()
+                        # Delivery span continues the publisher's trace
+                        span = tracer.start_span(
+                            "jobs deliver",
+                            context=extract_context(msg.headers),
+                            kind=SpanKind.CONSUMER,
+                            attributes={"messaging.destination.name": msg.subject},
+                        )
+                        try:
+                            data = json.loads(msg.data.decode())
+                            # Format as SSE event
+                            yield f"data: {json.dumps(data)}\n\n"
+                            await msg.ack()
+                        finally:
+                            span.end()
 
                 except TimeoutError:
                     # Send keepalive comment every second to prevent connection timeout
@@ -222,7 +630,7 @@ async def job_events_stream(request: Request):
                     continue
 
         except Exception as e:
-            print(f"[SSE] Error in event stream: {e}")
+            logger.exception("Error in SSE event stream: %s", e)
             yield f"data: {json.dumps({'type': 'error', 'message': str(e)})}\n\n"
         finally:
             # Track SSE disconnection
@@ -231,9 +639,11 @@ async def job_events_stream(request: Request):
             # Cleanup: Delete the consumer
             try:
                 await nats_manager.js.delete_consumer("JOBS", consumer_name)
-                print(f"[SSE] Cleaned up consumer: {consumer_name}")
+                logger.debug("Cleaned up SSE consumer: %s", consumer_name)
             except Exception as e:
-                print(f"[SSE] Failed to cleanup consumer {consumer_name}: {e}")
+                logger.warning(
+                    "Failed to clean up SSE consumer %s: %s", consumer_name, e
+                )
 
     return StreamingResponse(
         event_generator(),
@@ -0,0 +1,120 @@
+"""
+Content-hash memoization of job results
+
+Jobs submitted with ``memoize=True`` are keyed by a canonical hash of their
+name and normalized params. An identical submission is either completed
+straight from the result cache or linked to the in-flight original, so the
+GPU only runs each distinct workload once per cache TTL.
+
+The key is stored on the job row; the worker repeats the lookup at claim time.
+"""
+
+import hashlib
+import json
+from typing import Any
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from .models import Job, JobResultCache
+
+# Jobs in these states will eventually produce a result a duplicate can reuse
+INFLIGHT_STATES = ("queued", "running")
+
+# A duplicate waiting on its in-flight original; never claimed by workers
+LINKED_STATE = "linked"
+
+
+def normalize_params(value: Any) -> Any:
+    """Normalize params so that semantically equal payloads hash equally"""
+    if isinstance(value, dict):
+        return {str(k): normalize_params(v) for k, v in sorted(value.items())}
+    if isinstance(value, list | tuple):
+        return [normalize_params(v) for v in value]
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def compute_memo_key(name: str, params: dict[str, Any]) -> str:
+    """Canonical SHA-256 of the job name and normalized params"""
+    canonical = json.dumps(
+        {"name": name, "params": normalize_params(params)},
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def lookup_cached_result(db: Session, memo_key: str) -> JobResultCache | None:
+    """Return the unexpired cache entry for a memo key, if any"""
+    return (
+        db.query(JobResultCache)
+        .filter(
+            JobResultCache.memo_key == memo_key,
+            JobResultCache.expires_at > func.now(),
+        )
+        .first()
+    )
+
+
+def find_inflight_original(db: Session, memo_key: str) -> Job | None:
+    """Return the oldest queued or running job with the same memo key"""
+    return (
+        db.query(Job)
+        .filter(Job.memo_key == memo_key, Job.state.in_(INFLIGHT_STATES))
+        .order_by(Job.created_at.asc())
+        .first()
+    )
+
+
+def apply_memoization(db: Session, job: Job) -> tuple[str, float]:
+    """
+    Complete or link a new job from the memo cache before it is queued.
+
+    Returns:
+        (outcome, gpu_seconds_saved) where outcome is "hit", "linked" or "miss"
+    """
+    cached = lookup_cached_result(db, job.memo_key)
+    if cached:
+        job.state = "completed"
+        job.finished_at = func.now()
+        job.result = cached.result
+        job.memoized_from = cached.job_id
+        return "hit", float(cached.result.get("duration_seconds", 0))
+
+    original = find_inflight_original(db, job.memo_key)
+    if original:
+        job.state = LINKED_STATE
+        job.memoized_from = original.id
+        return "linked", 0.0
+
+    return "miss", 0.0
+
+
+def release_linked_jobs(db: Session, job_id) -> int:
+    """Requeue duplicates linked to a job that will never produce a result"""
+    return (
+        db.query(Job)
+        .filter(Job.memoized_from == job_id, Job.state == LINKED_STATE)
+        .update(
+            {Job.state: "queued", Job.memoized_from: None},
+            synchronize_session=False,
+        )
+    )
+
+
+def rekey_memoized(db: Session, job: Job) -> None:
+    """
+    Key an edited job by its new name and params.
+
+    Its result no longer answers the old key: duplicates linked to it are
+    requeued, and if it was itself linked it is queued to run on its own
+    (the worker looks the new key up again at claim time).
+    """
+    job.memo_key = compute_memo_key(job.name, job.params)
+    release_linked_jobs(db, job.id)
+    if job.state == LINKED_STATE:
+        job.state = "queued"
+        job.memoized_from = None
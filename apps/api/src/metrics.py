@@ -6,21 +6,60 @@ This module sets up OpenTelemetry with Prometheus exporter following best practi
 - Custom business metrics (jobs created, database queries, NATS events)
 - System metrics (CPU, memory, disk)
 - SQLAlchemy instrumentation (database query metrics)
+
+Custom metric attributes pass through per-instrument ``AttributeGuard``s so
+that IDs and free text never become unbounded label values, and /metrics is
+served from a short-lived cache rendered off the event loop.
 """
 
+import asyncio
+import logging
 import time
-from collections.abc import Callable
 
-from fastapi import FastAPI, Request, Response
+from fastapi import FastAPI, Response
 from opentelemetry import metrics
-from opentelemetry.exporter.prometheus import PrometheusMetricReader
-from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
-from opentelemetry.instrumentation.sqlalchemy import SQLAlchemyInstrumentor
-from opentelemetry.instrumentation.system_metrics import SystemMetricsInstrumentor
+from opentelemetry.metrics import CallbackOptions, Observation
 from opentelemetry.sdk.metrics import MeterProvider
 from opentelemetry.sdk.resources import SERVICE_NAME, Resource
 from prometheus_client import REGISTRY, generate_latest
 from sqlalchemy import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .cardinality import HTTP_METHODS, AttributeGuard, path_template, subject_template
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# Route label for requests that matched no route (404s, probes)
+UNMATCHED_ROUTE = "unmatched"
+
+
+class ExpositionCache:
+    """
+    Prometheus exposition shared by scrapes within `ttl` seconds.
+
+    ``generate_latest`` walks every series, so it runs in a thread; concurrent
+    scrapes wait for one render instead of starting their own.
+    """
+
+    def __init__(self, registry=REGISTRY, ttl: float = 1.0):
+        self.registry = registry
+        self.ttl = ttl
+        self._payload: bytes | None = None
+        self._expires = 0.0
+        self._lock = asyncio.Lock()
+
+    def _fresh(self) -> bool:
+        return self._payload is not None and time.monotonic() < self._expires
+
+    async def get(self) -> bytes:
+        if self._fresh():
+            return self._payload
+        async with self._lock:
+            if not self._fresh():
+                self._payload = await asyncio.to_thread(generate_latest, self.registry)
+                self._expires = time.monotonic() + self.ttl
+        return self._payload
 
 
 class MetricsManager:
@@ -33,10 +72,36 @@ class MetricsManager:
     - Custom metrics: overflying.* namespace
     """
 
-    def __init__(self, service_name: str = "overflying-api"):
+    def __init__(
+        self,
+        service_name: str = "overflying-api",
+        max_attribute_values: int = 100,
+        scrape_cache_seconds: float = 1.0,
+    ):
         self.service_name = service_name
         self.meter_provider = None
         self.meter = None
+        self.exposition = ExpositionCache(ttl=scrape_cache_seconds)
+
+        # Attribute budgets per instrument
+        self.job_created_attributes = AttributeGuard(
+            {"priority": None, "submitted_by": None}, max_attribute_values
+        )
+        self.memo_attributes = AttributeGuard(
+            {"outcome": {"hit", "linked", "miss"}}, max_attribute_values
+        )
+        self.shed_attributes = AttributeGuard({"reason": None}, max_attribute_values)
+        self.nats_event_attributes = AttributeGuard(
+            {"event_type": None, "subject": subject_template}, max_attribute_values
+        )
+        self.request_attributes = AttributeGuard(
+            {
+                "http.method": HTTP_METHODS,
+                "http.route": path_template,
+                "http.status_code": None,
+            },
+            max_attribute_values,
+        )
 
         # Custom metrics instruments
         self.jobs_created_counter = None
@@ -46,15 +111,27 @@ class MetricsManager:
         self.nats_connection_status = None
         self.sse_connections_gauge = None
         self.request_duration_histogram = None
-
-    def setup_metrics(self, app: FastAPI, engine: Engine = None):
+        self.stream_duration_histogram = None
+        self.memo_lookups_counter = None
+        self.memo_gpu_seconds_saved_counter = None
+        self.admission_limit_gauge = None
+        self.admission_shed_counter = None
+        self.pool_wait_histogram = None
+        self.pool_timeout_counter = None
+
+    def setup_metrics(self, app: FastAPI):
         """
         Initialize OpenTelemetry metrics with Prometheus exporter.
 
+        Only what must exist before the app starts serving; SQLAlchemy and
+        system metrics follow in ``setup_runtime_instrumentation``.
+
         Args:
             app: FastAPI application instance
-            engine: SQLAlchemy engine for database instrumentation
         """
+        # Instrumentation packages are imported on first use, not with the app
+        from opentelemetry.exporter.prometheus import PrometheusMetricReader
+
         # Create Prometheus metric reader
         prometheus_reader = PrometheusMetricReader()
 
@@ -83,8 +160,8 @@ class MetricsManager:
             version="0.1.0",
         )
 
-        # Setup automatic instrumentation
-        self._setup_automatic_instrumentation(app, engine)
+        # Setup automatic HTTP instrumentation (middleware: before startup)
+        self._instrument_app(app)
 
         # Create custom metrics instruments
         self._create_custom_metrics()
@@ -92,18 +169,31 @@ class MetricsManager:
         # Add metrics endpoint
         self._add_metrics_endpoint(app)
 
-        print(f"[Metrics] OpenTelemetry metrics initialized for {self.service_name}")
-        print("[Metrics] Prometheus endpoint available at /metrics")
+        logger.info("OpenTelemetry metrics initialized for %s", self.service_name)
+        logger.info("Prometheus endpoint available at /metrics")
 
-    def _setup_automatic_instrumentation(self, app: FastAPI, engine: Engine = None):
-        """Setup automatic instrumentation for FastAPI and SQLAlchemy."""
+    def _instrument_app(self, app: FastAPI):
+        """Setup automatic instrumentation for FastAPI."""
+        from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
 
         # Instrument FastAPI (HTTP metrics)
         FastAPIInstrumentor.instrument_app(
             app,
             meter_provider=self.meter_provider,
         )
-        print("[Metrics] FastAPI automatic instrumentation enabled")
+        logger.info("FastAPI automatic instrumentation enabled")
+
+    def setup_runtime_instrumentation(self, engine: Engine = None):
+        """
+        Setup automatic instrumentation for SQLAlchemy and system metrics.
+
+        Safe to run after startup (the API does so in a thread): it only
+        adds engine event listeners and observable instruments.
+        """
+        from opentelemetry.instrumentation.sqlalchemy import SQLAlchemyInstrumentor
+        from opentelemetry.instrumentation.system_metrics import (
+            SystemMetricsInstrumentor,
+        )
 
         # Instrument SQLAlchemy if engine provided
         if engine:
@@ -111,13 +201,133 @@ class MetricsManager:
                 engine=engine,
                 meter_provider=self.meter_provider,
             )
-            print("[Metrics] SQLAlchemy automatic instrumentation enabled")
+            logger.info("SQLAlchemy automatic instrumentation enabled")
+            self.instrument_pool(engine)
 
         # Instrument system metrics (CPU, memory, disk)
         SystemMetricsInstrumentor().instrument(
             meter_provider=self.meter_provider,
         )
-        print("[Metrics] System metrics instrumentation enabled")
+        logger.info("System metrics instrumentation enabled")
+
+    def instrument_pool(self, engine: Engine):
+        """
+        Connection pool metrics for an engine on an InstrumentedQueuePool.
+
+        Connection counts are read from the pool at collection time; checkout
+        waits and timeouts are recorded by the pool as they happen.
+        """
+        pool_name = engine.pool.pool_name
+
+        def observe(key: str, **extra):
+            def callback(options: CallbackOptions):
+                # engine.pool, not pool: dispose() swaps in a new pool
+                value = engine.pool.status_counts()[key]
+                yield Observation(
+                    value, {"db.client.connection.pool.name": pool_name, **extra}
+                )
+
+            return callback
+
+        self.meter.create_observable_up_down_counter(
+            name="db.client.connection.count",
+            callbacks=[
+                observe("checked_out", **{"db.client.connection.state": "used"}),
+                observe("idle", **{"db.client.connection.state": "idle"}),
+            ],
+            description="Connections in the pool by state",
+            unit="{connection}",
+        )
+        self.meter.create_observable_gauge(
+            name="db.client.connection.max",
+            callbacks=[observe("max")],
+            description="Pool size plus max overflow",
+            unit="{connection}",
+        )
+        self.meter.create_observable_up_down_counter(
+            name="db.client.connection.pending_requests",
+            callbacks=[observe("pending")],
+            description="Checkouts waiting for a connection",
+            unit="{request}",
+        )
+        self.meter.create_observable_gauge(
+            name="overflying.db.client.connection.overflow",
+            callbacks=[observe("overflow")],
+            description="Connections open beyond the pool size",
+            unit="{connection}",
+        )
+        self.pool_wait_histogram = self.meter.create_histogram(
+            name="db.client.connection.wait_time",
+            description="Time to check a connection out of the pool",
+            unit="s",
+        )
+        self.pool_timeout_counter = self.meter.create_counter(
+            name="db.client.connection.timeouts",
+            description="Checkouts that gave up after the pool timeout",
+            unit="{timeout}",
+        )
+        engine.pool.observer = self
+        logger.info("Connection pool metrics enabled for %s", pool_name)
+
+    def record_pool_wait(self, pool_name: str, seconds: float):
+        """Record a connection checkout (InstrumentedQueuePool observer)."""
+        if self.pool_wait_histogram:
+            self.pool_wait_histogram.record(
+                seconds, {"db.client.connection.pool.name": pool_name}
+            )
+
+    def record_pool_timeout(self, pool_name: str):
+        """Record a checkout that timed out (InstrumentedQueuePool observer)."""
+        if self.pool_timeout_counter:
+            self.pool_timeout_counter.add(
+                1, {"db.client.connection.pool.name": pool_name}
+            )
+
+    def instrument_backlog(self, monitor):
+        """
+        Queue backlog gauges from a BacklogMonitor.
+
+        Collection reads the monitor's latest report (kept fresh by its
+        background loop) and never queries the database itself.
+        """
+
+        def observe(key: str):
+            def callback(options: CallbackOptions):
+                report = monitor.report
+                if report is not None and report[key] is not None:
+                    yield Observation(report[key])
+
+            return callback
+
+        def observe_bands(options: CallbackOptions):
+            if monitor.report is not None:
+                for band, queued in monitor.report["bands"].items():
+                    yield Observation(queued, {"priority.band": band})
+
+        self.meter.create_observable_gauge(
+            name="overflying.queue.jobs",
+            callbacks=[observe_bands],
+            description="Queued jobs by priority band",
+            unit="{job}",
+        )
+        self.meter.create_observable_gauge(
+            name="overflying.queue.oldest_age",
+            callbacks=[observe("oldest_queued_seconds")],
+            description="Time the oldest queued job has been waiting",
+            unit="s",
+        )
+        self.meter.create_observable_gauge(
+            name="overflying.queue.completion_rate",
+            callbacks=[observe("completion_rate_per_second")],
+            description="Jobs finished by workers per second over the rate window",
+            unit="{job}/s",
+        )
+        self.meter.create_observable_gauge(
+            name="overflying.queue.drain_time",
+            callbacks=[observe("estimated_drain_seconds")],
+            description="Estimated time to drain the queue at the current rate",
+            unit="s",
+        )
 
     def _create_custom_metrics(self):
         """Create custom business metrics for Overflying."""
@@ -141,6 +351,32 @@ class MetricsManager:
             unit="1",
         )
 
+        # Memoization metrics
+        self.memo_lookups_counter = self.meter.create_counter(
+            name="overflying.memo.lookups",
+            description="Memoization lookups at submission time by outcome (hit, linked, miss)",
+            unit="1",
+        )
+
+        self.memo_gpu_seconds_saved_counter = self.meter.create_counter(
+            name="overflying.memo.gpu_seconds_saved",
+            description="GPU seconds not spent because a job was served from the memo cache",
+            unit="s",
+        )
+
+        # Admission control metrics
+        self.admission_limit_gauge = self.meter.create_gauge(
+            name="overflying.admission.limit",
+            description="Current adaptive concurrency limit for write endpoints",
+            unit="1",
+        )
+
+        self.admission_shed_counter = self.meter.create_counter(
+            name="overflying.admission.shed",
+            description="Write requests rejected by admission control, by reason",
+            unit="1",
+        )
+
         # NATS metrics
         self.nats_events_counter = self.meter.create_counter(
             name="overflying.nats.events.published",
@@ -164,11 +400,17 @@ class MetricsManager:
         # HTTP request duration (custom, more detailed than auto-instrumentation)
         self.request_duration_histogram = self.meter.create_histogram(
             name="overflying.http.request.duration",
-            description="HTTP request duration in seconds",
+            description="HTTP request duration in seconds (to first byte for streams)",
+            unit="s",
+        )
+
+        self.stream_duration_histogram = self.meter.create_histogram(
+            name="overflying.http.stream.duration",
+            description="Lifetime of streaming responses such as /events",
             unit="s",
         )
 
-        print("[Metrics] Custom business metrics created")
+        logger.info("Custom business metrics created")
 
     def _add_metrics_endpoint(self, app: FastAPI):
         """Add /metrics endpoint for Prometheus scraping."""
@@ -177,7 +419,7 @@ class MetricsManager:
         async def metrics_endpoint():
             """Prometheus metrics endpoint."""
             return Response(
-                content=generate_latest(REGISTRY),
+                content=await self.exposition.get(),
                 media_type="text/plain; version=0.0.4; charset=utf-8",
             )
 
@@ -192,7 +434,32 @@ class MetricsManager:
         if submitted_by:
             attributes["submitted_by"] = submitted_by
 
-        self.jobs_created_counter.add(1, attributes=attributes)
+        self.jobs_created_counter.add(
+            1, attributes=self.job_created_attributes(attributes)
+        )
+
+    def record_memo_lookup(self, outcome: str, gpu_seconds_saved: float = 0.0):
+        """Record a memoization lookup and the GPU time it saved."""
+        if not self.memo_lookups_counter:
+            return
+
+        self.memo_lookups_counter.add(
+            1, attributes=self.memo_attributes({"outcome": outcome})
+        )
+        if gpu_seconds_saved > 0:
+            self.memo_gpu_seconds_saved_counter.add(gpu_seconds_saved)
+
+    def record_admission_limit(self, limit: float):
+        """Record the current admission concurrency limit."""
+        if self.admission_limit_gauge:
+            self.admission_limit_gauge.set(limit)
+
+    def record_request_shed(self, reason: str):
+        """Record a request rejected by admission control."""
+        if self.admission_shed_counter:
+            self.admission_shed_counter.add(
+                1, attributes=self.shed_attributes({"reason": reason})
+            )
 
     def record_nats_event(self, event_type: str, subject: str):
         """Record a NATS event publication."""
@@ -201,10 +468,9 @@ class MetricsManager:
 
         self.nats_events_counter.add(
             1,
-            attributes={
-                "event_type": event_type,
-                "subject": subject,
-            },
+            attributes=self.nats_event_attributes(
+                {"event_type": event_type, "subject": subject}
+            ),
         )
 
     def set_nats_connection_status(self, connected: bool):
@@ -226,50 +492,98 @@ class MetricsManager:
     def record_request_duration(
         self,
         method: str,
-        path: str,
+        route: str,
         status_code: int,
         duration: float,
     ):
-        """Record HTTP request duration."""
+        """Record HTTP request duration (time to first byte for streams)."""
         if not self.request_duration_histogram:
             return
 
         self.request_duration_histogram.record(
             duration,
-            attributes={
-                "http.method": method,
-                "http.route": path,
-                "http.status_code": str(status_code),
-            },
+            attributes=self.request_attributes(
+                {
+                    "http.method": method,
+                    "http.route": route,
+                    "http.status_code": status_code,
+                }
+            ),
         )
 
-    def create_timing_middleware(self) -> Callable:
-        """
-        Create middleware to track request timings.
+    def record_stream_duration(self, route: str, status_code: int, duration: float):
+        """Record how long a streaming response stayed open."""
+        if not self.stream_duration_histogram:
+            return
 
-        Returns:
-            FastAPI middleware function
-        """
+        self.stream_duration_histogram.record(
+            duration,
+            attributes=self.request_attributes(
+                {"http.route": route, "http.status_code": status_code}
+            ),
+        )
 
-        async def metrics_middleware(request: Request, call_next):
-            start_time = time.time()
 
-            # Process request
-            response = await call_next(request)
+class TimingMiddleware:
+    """
+    Pure ASGI request timing labelled by the matched route template.
 
-            # Record metrics
-            duration = time.time() - start_time
-            self.record_request_duration(
-                method=request.method,
-                path=request.url.path,
-                status_code=response.status_code,
-                duration=duration,
-            )
+    Unlike ``BaseHTTPMiddleware`` it does not wrap the response body, so
+    streaming responses such as /events pass through untouched. A request's
+    duration runs until its last body chunk; for a streaming response (a body
+    sent in several chunks) it runs until the first chunk, and the stream's
+    full lifetime is recorded separately.
+
+    Request counts, active requests and sizes are left to
+    ``FastAPIInstrumentor``; only the latency split is recorded here.
+    """
 
-            return response
+    def __init__(self, app: ASGIApp, metrics: MetricsManager):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-        return metrics_middleware
+        started = time.perf_counter()
+        status_code = 500
+        first_byte = None
+        streaming = False
+
+        async def timed_send(message: Message):
+            nonlocal status_code, first_byte, streaming
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body" and first_byte is None:
+                first_byte = time.perf_counter()
+                streaming = message.get("more_body", False)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, timed_send)
+        finally:
+            finished = time.perf_counter()
+            # The router records the matched route in the scope it was given
+            route = scope.get("route")
+            template = getattr(route, "path", None) or UNMATCHED_ROUTE
+
+            if streaming:
+                self.metrics.record_request_duration(
+                    scope["method"], template, status_code, first_byte - started
+                )
+                self.metrics.record_stream_duration(
+                    template, status_code, finished - started
+                )
+            else:
+                self.metrics.record_request_duration(
+                    scope["method"], template, status_code, finished - started
+                )
 
 
 # Global metrics manager instance
-metrics_manager = MetricsManager()
+metrics_manager = MetricsManager(
+    max_attribute_values=settings.metrics_max_attribute_values,
+    scrape_cache_seconds=settings.metrics_scrape_cache_seconds,
+)
@@ -2,16 +2,25 @@
 SQLAlchemy models for database tables
 """
 
-from sqlalchemy import TIMESTAMP, Column, Integer, Text, text
-from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy import (
+    DDL,
+    TIMESTAMP,
+    BigInteger,
+    Column,
+    Float,
+    Integer,
+    SmallInteger,
+    Text,
+    event,
+    text,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, UUID
 
 from .database import Base
 
 
-class Job(Base):
-    """Job model - matches the jobs table in Postgres"""
-
-    __tablename__ = "jobs"
+class JobColumns:
+    """Columns shared by the hot jobs table and the archived history table"""
 
     id = Column(
         UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()")
@@ -24,6 +33,217 @@ class Job(Base):
         TIMESTAMP(timezone=True), nullable=False, server_default=text("now()")
     )
     submitted_by = Column(Text, nullable=True)
+    memo_key = Column(Text, nullable=True)
+    result = Column(JSONB, nullable=True)
+    memoized_from = Column(UUID(as_uuid=True), nullable=True)
+    finished_at = Column(TIMESTAMP(timezone=True), nullable=True)
+    started_at = Column(TIMESTAMP(timezone=True), nullable=True)
+    trace_context = Column(JSONB, nullable=True)
+    gpu_memory_mb = Column(Integer, nullable=True)
+    gpu_count = Column(Integer, nullable=False, server_default=text("1"))
+    input_keys = Column(ARRAY(Text), nullable=True)
+    max_runtime_seconds = Column(Integer, nullable=True)
+    checkpoint = Column(JSONB, nullable=True)
+    preemptions = Column(Integer, nullable=False, server_default=text("0"))
+    run_at = Column(TIMESTAMP(timezone=True), nullable=True)
+    next_run_at = Column(
+        TIMESTAMP(timezone=True), nullable=False, server_default=text("now()")
+    )
+    retries = Column(Integer, nullable=False, server_default=text("0"))
+    max_retries = Column(Integer, nullable=True)
+    queued_at = Column(TIMESTAMP(timezone=True), nullable=True)
+    updated_at = Column(
+        TIMESTAMP(timezone=True),
+        nullable=False,
+        server_default=text("now()"),
+        onupdate=text("now()"),
+    )
+
+
+class Job(JobColumns, Base):
+    """Job model - matches the jobs table in Postgres (active and recent jobs)"""
+
+    __tablename__ = "jobs"
 
     def __repr__(self):
         return f"<Job(id={self.id}, name={self.name}, state={self.state})>"
+
+
+class JobHistory(JobColumns, Base):
+    """Archived terminal jobs - monthly range partitions on finished_at"""
+
+    __tablename__ = "jobs_history"
+    __table_args__ = {"postgresql_partition_by": "RANGE (finished_at)"}
+
+    id = Column(UUID(as_uuid=True), primary_key=True)
+    finished_at = Column(TIMESTAMP(timezone=True), primary_key=True)
+
+    def __repr__(self):
+        return f"<JobHistory(id={self.id}, name={self.name}, state={self.state})>"
+
+
+class JobResultCache(Base):
+    """Memoized job results keyed by the canonical hash of (name, params)"""
+
+    __tablename__ = "job_result_cache"
+
+    memo_key = Column(Text, primary_key=True)
+    job_id = Column(UUID(as_uuid=True), nullable=False)
+    result = Column(JSONB, nullable=False)
+    created_at = Column(
+        TIMESTAMP(timezone=True), nullable=False, server_default=text("now()")
+    )
+    expires_at = Column(TIMESTAMP(timezone=True), nullable=False)
+
+    def __repr__(self):
+        return f"<JobResultCache(memo_key={self.memo_key}, job_id={self.job_id})>"
+
+
+class UsageRollup(Base):
+    """Hourly GPU usage per submitter and job name, built from job events"""
+
+    __tablename__ = "usage_rollups"
+
+    submitted_by = Column(Text, primary_key=True)  # '' for anonymous jobs
+    bucket_start = Column(TIMESTAMP(timezone=True), primary_key=True)
+    job_name = Column(Text, primary_key=True)
+    gpu_seconds = Column(Float, nullable=False, server_default=text("0"))
+    jobs = Column(Integer, nullable=False, server_default=text("0"))
+    failed_jobs = Column(Integer, nullable=False, server_default=text("0"))
+
+    def __repr__(self):
+        return (
+            f"<UsageRollup(submitted_by={self.submitted_by}, "
+            f"bucket_start={self.bucket_start}, job_name={self.job_name})>"
+        )
+
+
+class UsageAppliedEvent(Base):
+    """JetStream sequence numbers already counted in usage_rollups"""
+
+    __tablename__ = "usage_applied_events"
+
+    stream_seq = Column(BigInteger, primary_key=True)
+    applied_at = Column(
+        TIMESTAMP(timezone=True), nullable=False, server_default=text("now()")
+    )
+
+    def __repr__(self):
+        return f"<UsageAppliedEvent(stream_seq={self.stream_seq})>"
+
+
+class QueueStat(Base):
+    """
+    Trigger-maintained queue counters per priority band.
+
+    Each band is spread over a few shards (by backend pid) so concurrent
+    claims do not serialize on one counter row; readers sum the shards.
+    """
+
+    __tablename__ = "queue_stats"
+
+    band = Column(Text, primary_key=True)
+    shard = Column(SmallInteger, primary_key=True)
+    queued = Column(BigInteger, nullable=False, server_default=text("0"))
+    finished = Column(BigInteger, nullable=False, server_default=text("0"))
+
+    def __repr__(self):
+        return f"<QueueStat(band={self.band}, shard={self.shard})>"
+
+
+# The counting triggers, as created by the add_queue_stats migration; also
+# installed by create_all (once every table exists) so test and benchmark
+# databases count the same way. DDL() formats with %, hence "%%".
+QUEUE_STATS_DDL = [
+    """
+    CREATE OR REPLACE FUNCTION job_priority_band(priority integer) RETURNS text
+    LANGUAGE sql IMMUTABLE AS $$
+        SELECT CASE
+            WHEN priority < 0 THEN 'low'
+            WHEN priority = 0 THEN 'normal'
+            WHEN priority < 10 THEN 'high'
+            ELSE 'urgent'
+        END
+    $$
+    """,
+    """
+    CREATE OR REPLACE FUNCTION jobs_queue_stats() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    DECLARE
+        slot smallint := pg_backend_pid() %% 16;
+    BEGIN
+        IF TG_OP = 'UPDATE'
+           AND OLD.state = NEW.state AND OLD.priority = NEW.priority THEN
+            RETURN NULL;
+        END IF;
+        IF TG_OP <> 'INSERT' AND OLD.state = 'queued' THEN
+            INSERT INTO queue_stats AS s (band, shard, queued)
+            VALUES (job_priority_band(OLD.priority), slot, -1)
+            ON CONFLICT (band, shard) DO UPDATE SET queued = s.queued - 1;
+        END IF;
+        IF TG_OP <> 'DELETE' AND NEW.state = 'queued' THEN
+            INSERT INTO queue_stats AS s (band, shard, queued)
+            VALUES (job_priority_band(NEW.priority), slot, 1)
+            ON CONFLICT (band, shard) DO UPDATE SET queued = s.queued + 1;
+        END IF;
+        IF TG_OP = 'UPDATE' AND OLD.state = 'running'
+           AND NEW.state IN ('completed', 'failed') THEN
+            INSERT INTO queue_stats AS s (band, shard, finished)
+            VALUES (job_priority_band(NEW.priority), slot, 1)
+            ON CONFLICT (band, shard) DO UPDATE SET finished = s.finished + 1;
+        END IF;
+        RETURN NULL;
+    END
+    $$
+    """,
+    """
+    CREATE OR REPLACE FUNCTION jobs_queue_stats_truncate() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        UPDATE queue_stats SET queued = 0;
+        RETURN NULL;
+    END
+    $$
+    """,
+    """
+    CREATE OR REPLACE TRIGGER jobs_queue_stats
+    AFTER INSERT OR DELETE OR UPDATE OF state, priority ON jobs
+    FOR EACH ROW EXECUTE FUNCTION jobs_queue_stats()
+    """,
+    """
+    CREATE OR REPLACE TRIGGER jobs_queue_stats_truncate
+    AFTER TRUNCATE ON jobs
+    FOR EACH STATEMENT EXECUTE FUNCTION jobs_queue_stats_truncate()
+    """,
+]
+
+for statement in QUEUE_STATS_DDL:
+    event.listen(Base.metadata, "after_create", DDL(statement))
+
+
+# Stamps queued_at whenever a job enters the queue (submission, promotion of
+# a due scheduled job, retry, requeue), as created by the add_job_queued_at
+# migration. An insert may carry its own queued_at.
+QUEUED_AT_DDL = [
+    """
+    CREATE OR REPLACE FUNCTION jobs_mark_queued() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        IF NEW.state = 'queued' AND TG_OP = 'INSERT' THEN
+            NEW.queued_at := COALESCE(NEW.queued_at, now());
+        ELSIF NEW.state = 'queued' AND OLD.state <> 'queued' THEN
+            NEW.queued_at := now();
+        END IF;
+        RETURN NEW;
+    END
+    $$
+    """,
+    """
+    CREATE OR REPLACE TRIGGER jobs_mark_queued
+    BEFORE INSERT OR UPDATE OF state ON jobs
+    FOR EACH ROW EXECUTE FUNCTION jobs_mark_queued()
+    """,
+]
+
+for statement in QUEUED_AT_DDL:
+    event.listen(Base.metadata, "after_create", DDL(statement))
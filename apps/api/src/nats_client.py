@@ -4,12 +4,24 @@ NATS JetStream client utilities for persistent pub/sub messaging
 
 import asyncio
 import json
+import logging
+import random
 from collections.abc import Callable
 from typing import Any
 
 import nats
 from nats.aio.client import Client as NATSClient
 from nats.js import JetStreamContext
+from opentelemetry.trace import SpanKind
+
+from .cardinality import subject_template
+from .tracing import current_trace_context, get_tracer
+
+logger = logging.getLogger(__name__)
+
+
+class NATSUnavailableError(RuntimeError):
+    """NATS is not connected (yet); the caller should degrade or retry"""
 
 
 class NATSManager:
@@ -19,66 +31,138 @@ class NATSManager:
         self.url = url
         self.nc: NATSClient | None = None
         self.js: JetStreamContext | None = None
-
-    async def connect(self, max_retries: int = 5, retry_delay: float = 2.0):
-        """Connect to NATS server and initialize JetStream with retries"""
+        # Streams (name -> subjects) recreated on every (re)connect
+        self.streams: dict[str, list[str]] = {}
+        # Core NATS subscriptions (subject -> callback) made on connect; the
+        # client renews them itself after reconnects
+        self.listeners: dict[str, Callable] = {}
+        self.ready = asyncio.Event()
+
+    @property
+    def is_connected(self) -> bool:
+        """Connected with streams in place"""
+        return bool(self.nc and self.nc.is_connected and self.ready.is_set())
+
+    async def connect(self):
+        """Connect once and set up the registered streams"""
         if self.nc and self.nc.is_connected:
             return self.nc
 
-        for attempt in range(max_retries):
+        nc = await nats.connect(
+            self.url,
+            connect_timeout=5,
+            # Once connected, the client reconnects on its own indefinitely
+            max_reconnect_attempts=-1,
+            disconnected_cb=self._on_disconnected,
+            reconnected_cb=self._on_reconnected,
+        )
+        try:
+            self.nc, self.js = nc, nc.jetstream()
+            await self._ensure_streams()
+            for subject, callback in self.listeners.items():
+                await nc.subscribe(subject, cb=callback)
+        except Exception:
+            self.nc, self.js = None, None
+            await nc.close()
+            raise
+        self.ready.set()
+        logger.info("Connected to %s with JetStream", self.url)
+        return self.nc
+
+    async def run(
+        self,
+        streams: dict[str, list[str]],
+        base_delay: float = 0.5,
+        max_delay: float = 30.0,
+    ):
+        """
+        Connect in the background, retrying with exponential backoff.
+
+        Startup does not wait for NATS: callers check ``is_connected`` or
+        await ``ready``. Returns once connected; later outages are handled by
+        the client's own reconnects, after which the streams are ensured
+        again (a NATS restart without persistence loses them).
+        """
+        self.streams.update(streams)
+        attempt = 0
+        while True:
             try:
-                self.nc = await nats.connect(
-                    self.url,
-                    connect_timeout=5,
-                    max_reconnect_attempts=3,
-                )
-                self.js = self.nc.jetstream()
-                print(f"[NATS] Connected to {self.url} with JetStream")
-                return self.nc
+                return await self.connect()
             except Exception as e:
-                if attempt < max_retries - 1:
-                    print(
-                        f"[NATS] Connection attempt {attempt + 1}/{max_retries} failed: {e}"
-                    )
-                    print(f"[NATS] Retrying in {retry_delay} seconds...")
-                    await asyncio.sleep(retry_delay)
-                else:
-                    print(f"[NATS] Failed to connect after {max_retries} attempts: {e}")
-                    print(
-                        "[NATS] API will continue without NATS. Start NATS and restart API."
-                    )
-                    raise
+                # Full jitter keeps restarted replicas from retrying in step
+                delay = random.uniform(0, min(max_delay, base_delay * 2**attempt))
+                attempt += 1
+                logger.warning(
+                    "Connection attempt %d failed: %s; retrying in %.1f seconds",
+                    attempt,
+                    e,
+                    delay,
+                )
+                await asyncio.sleep(delay)
+
+    async def _ensure_streams(self):
+        for stream_name, subjects in self.streams.items():
+            await self.ensure_stream(stream_name, subjects)
+
+    async def _on_disconnected(self):
+        self.ready.clear()
+        if self.nc.is_draining or self.nc.is_closed:
+            return
+        logger.warning("Disconnected from %s, reconnecting", self.url)
+
+    async def _on_reconnected(self):
+        try:
+            await self._ensure_streams()
+        except Exception as e:
+            logger.exception("Stream setup after reconnect failed: %s", e)
+            return
+        self.ready.set()
+        logger.info("Reconnected to %s", self.url)
+
+    def _require_js(self) -> JetStreamContext:
+        if not self.js:
+            raise NATSUnavailableError(f"Not connected to NATS at {self.url}")
+        return self.js
 
     async def disconnect(self):
         """Disconnect from NATS server"""
+        self.ready.clear()
         if self.nc and self.nc.is_connected:
             await self.nc.drain()
-            print("[NATS] Disconnected")
+            logger.info("Disconnected")
 
     async def ensure_stream(self, stream_name: str, subjects: list[str]):
         """Ensure a JetStream stream exists"""
-        if not self.js:
-            await self.connect()
+        self._require_js()
 
         try:
             await self.js.stream_info(stream_name)
-            print(f"[NATS] Stream '{stream_name}' already exists")
+            logger.debug("Stream '%s' already exists", stream_name)
         except:
             # Stream doesn't exist, create it
             await self.js.add_stream(
                 name=stream_name,
                 subjects=subjects,
             )
-            print(f"[NATS] Created stream '{stream_name}' for subjects: {subjects}")
+            logger.info("Created stream '%s' for subjects: %s", stream_name, subjects)
 
     async def publish(self, subject: str, data: dict[str, Any]):
         """Publish a message to JetStream"""
-        if not self.js:
-            await self.connect()
+        self._require_js()
 
         payload = json.dumps(data).encode()
-        ack = await self.js.publish(subject, payload)
-        print(f"[NATS] Published to {subject}: {data} (seq: {ack.seq})")
+        with get_tracer().start_as_current_span(
+            f"{subject_template(subject)} publish",
+            kind=SpanKind.PRODUCER,
+            attributes={"messaging.destination.name": subject},
+        ):
+            # Consumers parent their spans on this one through the headers
+            ack = await self.js.publish(
+                subject, payload, headers=current_trace_context()
+            )
+        # Payloads only at DEBUG: rendering one per publish is not free
+        logger.info("Published to %s (seq: %s)", subject, ack.seq)
+        logger.debug("Payload for %s: %s", subject, data)
         return ack
 
     async def subscribe(
@@ -89,8 +173,7 @@ class NATSManager:
         callback: Callable,
     ):
         """Subscribe to JetStream stream with durable consumer"""
-        if not self.js:
-            await self.connect()
+        self._require_js()
 
         # Ensure stream exists
         await self.ensure_stream(stream_name, subjects)
@@ -101,7 +184,7 @@ class NATSManager:
                 await callback(data)
                 await msg.ack()
             except Exception as e:
-                print(f"[NATS] Error processing message: {e}")
+                logger.exception("Error processing message: %s", e)
                 await msg.nak()
 
         # Create pull-based consumer
@@ -109,7 +192,7 @@ class NATSManager:
             durable=consumer_name,
             stream=stream_name,
         )
-        print(f"[NATS] Subscribed to stream '{stream_name}' as '{consumer_name}'")
+        logger.info("Subscribed to stream '%s' as '%s'", stream_name, consumer_name)
         return psub
 
     async def create_consumer(
@@ -119,23 +202,23 @@ class NATSManager:
         filter_subject: str | None = None,
     ):
         """Create a durable consumer if it doesn't exist"""
-        if not self.js:
-            await self.connect()
+        self._require_js()
 
         try:
             await self.js.consumer_info(stream_name, consumer_name)
-            print(f"[NATS] Consumer '{consumer_name}' already exists")
+            logger.debug("Consumer '%s' already exists", consumer_name)
         except:
             config = {"durable_name": consumer_name}
             if filter_subject:
                 config["filter_subject"] = filter_subject
 
             await self.js.add_consumer(stream_name, **config)
-            print(
-                f"[NATS] Created consumer '{consumer_name}' on stream '{stream_name}'"
+            logger.info(
+                "Created consumer '%s' on stream '%s'", consumer_name, stream_name
             )
 
     async def purge_stream(self, stream_name: str):
         """Purge all messages from a stream"""
+        self._require_js()
         await self.js.purge_stream(stream_name)
-        print(f"[NATS] Purged stream: {stream_name}")
+        logger.info("Purged stream: %s", stream_name)
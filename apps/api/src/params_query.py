@@ -0,0 +1,104 @@
+"""
+Finding jobs by their params
+
+``GET /jobs`` filters on ``params`` in two ways, both served by the
+``jsonb_path_ops`` GIN indexes on ``jobs`` and ``jobs_history``:
+
+- ``params``: a JSON object the job's params must contain (``@>``), e.g.
+  ``{"scene_id": "S2A_T32TQM"}`` or ``{"model": {"version": "v3"}}``.
+- ``params_path``: a JSONPath predicate (``@@``), equality tests joined by
+  ``&&``, e.g. ``$.aoi == "alps" && $.tiles[*] == 12``.
+
+A ``jsonb_path_ops`` index holds a hash of the path to every scalar in
+params, so it can only look up scalars at known paths: containment of at
+least one scalar, and ``accessors == constant`` clauses where the accessors
+are ``.key``, ``[*]`` or ``[n]``. Other comparisons (``<``, ``!=``...) may be
+added to such a clause with ``&&`` and are checked on the rows it finds.
+Anything else (an empty object, ``||``, ``!``, wildcards, filter
+expressions) would read every row, so it is rejected with a 422 instead of
+run.
+"""
+
+import json
+import re
+from typing import Any
+
+from sqlalchemy import Boolean, cast
+from sqlalchemy.dialects.postgresql import JSONB, JSONPATH
+
+MAX_FILTER_LENGTH = 1024
+
+_STRING = r'"(?:[^"\\]|\\.)*"'
+_PATH = rf"\$(?:\.[A-Za-z_][A-Za-z0-9_]*|\.{_STRING}|\[\*\]|\[\d+\])+"
+_LITERAL = rf"{_STRING}|-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?|true|false|null"
+_CLAUSE = re.compile(
+    rf"\s*(?P<path>{_PATH})\s*(?P<op>==|!=|<>|<=|>=|<|>)\s*(?P<value>{_LITERAL})\s*"
+)
+_AND = re.compile(r"&&")
+
+
+class ParamsQueryError(ValueError):
+    """A params filter the index cannot serve, or that does not parse"""
+
+
+def _has_scalar(value: Any) -> bool:
+    if isinstance(value, dict):
+        return any(_has_scalar(v) for v in value.values())
+    if isinstance(value, list):
+        return any(_has_scalar(v) for v in value)
+    return True
+
+
+def parse_containment(raw: str) -> dict:
+    """The ``params`` filter: a JSON object with at least one scalar in it"""
+    if len(raw) > MAX_FILTER_LENGTH:
+        raise ParamsQueryError(f"params filter is longer than {MAX_FILTER_LENGTH}")
+    try:
+        value = json.loads(raw)
+    except ValueError as e:
+        raise ParamsQueryError(f"params filter is not JSON: {e}") from e
+    if not isinstance(value, dict):
+        raise ParamsQueryError("params filter must be a JSON object")
+    if not _has_scalar(value):
+        raise ParamsQueryError("params filter must contain at least one value")
+    return value
+
+
+def parse_path_predicate(raw: str) -> str:
+    """The ``params_path`` filter, checked to be index-servable"""
+    if len(raw) > MAX_FILTER_LENGTH:
+        raise ParamsQueryError(f"params_path is longer than {MAX_FILTER_LENGTH}")
+
+    position, equalities = 0, 0
+    while True:
+        clause = _CLAUSE.match(raw, position)
+        if not clause:
+            raise ParamsQueryError(
+                "params_path must be comparisons of a path ($.key, [*], [n])"
+                " with a constant, joined by &&"
+            )
+        equalities += clause["op"] == "=="
+        position = clause.end()
+        if position == len(raw):
+            break
+        if not _AND.match(raw, position):
+            raise ParamsQueryError(f"Unsupported params_path at: {raw[position:]!r}")
+        position += 2
+
+    if not equalities:
+        raise ParamsQueryError("params_path needs at least one == comparison")
+    return raw.strip()
+
+
+def params_criteria(
+    table, contains: dict | None = None, path: str | None = None
+) -> list:
+    """WHERE clauses on ``table.c.params`` for already parsed filters"""
+    criteria = []
+    if contains is not None:
+        criteria.append(table.c.params.op("@>")(cast(contains, JSONB)))
+    if path is not None:
+        criteria.append(
+            table.c.params.op("@@", return_type=Boolean)(cast(path, JSONPATH))
+        )
+    return criteria
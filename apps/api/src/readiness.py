@@ -0,0 +1,94 @@
+"""
+Readiness checks for /ready
+
+/health only says the process is up. /ready says whether this replica should
+take traffic: a database round trip through the connection pool and the NATS
+connection state. Probes from load balancers and autoscalers arrive often, so
+results are cached for a short TTL and concurrent probes share one check.
+
+NATS is reported but only gates readiness with ``READINESS_REQUIRES_NATS``:
+without it the API still serves everything except /events.
+"""
+
+import asyncio
+import time
+from datetime import UTC, datetime
+
+from sqlalchemy import Engine, text
+
+
+def pool_status(engine: Engine) -> dict:
+    """Connection counts for pools that track them"""
+    pool = engine.pool
+    status = {"class": type(pool).__name__}
+    if hasattr(pool, "status_counts"):
+        status.update(pool.status_counts())
+    return status
+
+
+class ReadinessProbe:
+    """Database and NATS checks, cached for `ttl` seconds"""
+
+    def __init__(
+        self,
+        engine: Engine,
+        nats_manager,
+        ttl: float = 2.0,
+        db_timeout: float = 1.0,
+        requires_nats: bool = False,
+        on_nats_status=None,
+    ):
+        self.engine = engine
+        self.nats_manager = nats_manager
+        self.ttl = ttl
+        self.db_timeout = db_timeout
+        self.requires_nats = requires_nats
+        self.on_nats_status = on_nats_status
+        self._report: dict | None = None
+        self._expires = 0.0
+        self._lock = asyncio.Lock()
+
+    def _ping_database(self):
+        with self.engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+
+    async def _check_database(self) -> dict:
+        started = time.monotonic()
+        try:
+            # A hung connect keeps its thread, but the probe still answers
+            await asyncio.wait_for(
+                asyncio.to_thread(self._ping_database), timeout=self.db_timeout
+            )
+            check = {"ok": True}
+        except TimeoutError:
+            check = {"ok": False, "error": f"timed out after {self.db_timeout}s"}
+        except Exception as e:
+            check = {"ok": False, "error": str(e)}
+        check["latency_ms"] = round((time.monotonic() - started) * 1000, 1)
+        check["pool"] = pool_status(self.engine)
+        return check
+
+    def _check_nats(self) -> dict:
+        connected = self.nats_manager.is_connected
+        if self.on_nats_status:
+            self.on_nats_status(connected)
+        return {"ok": connected, "required": self.requires_nats}
+
+    async def check(self) -> dict:
+        """The latest report, re-checking once it is older than the TTL"""
+        if self._report is not None and time.monotonic() < self._expires:
+            return self._report
+        async with self._lock:
+            if self._report is not None and time.monotonic() < self._expires:
+                return self._report
+
+            database = await self._check_database()
+            nats = self._check_nats()
+            ready = database["ok"] and (nats["ok"] or not self.requires_nats)
+            self._report = {
+                "status": "ready" if ready else "not_ready",
+                "checked_at": datetime.now(UTC).isoformat(),
+                "checks": {"database": database, "nats": nats},
+            }
+            self._expires = time.monotonic() + self.ttl
+            return self._report
@@ -0,0 +1,25 @@
+"""
+Scheduled jobs
+
+A job submitted with a future ``run_at`` is stored ``scheduled`` with
+``next_run_at = run_at`` instead of ``queued``. Workers move scheduled jobs
+to ``queued`` once they are due, so until then they are neither claimable
+nor counted in the backlog. Failed runs that the worker retries wait in the
+same state until their backoff has passed.
+"""
+
+from datetime import UTC, datetime
+
+from .models import Job
+
+SCHEDULED_STATE = "scheduled"
+
+
+def schedule(job: Job, run_at: datetime | None) -> bool:
+    """Hold a new job until `run_at` if that is in the future"""
+    job.run_at = run_at
+    if run_at is None or run_at <= datetime.now(UTC):
+        return False
+    job.state = SCHEDULED_STATE
+    job.next_run_at = run_at
+    return True
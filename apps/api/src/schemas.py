@@ -6,7 +6,7 @@ from datetime import datetime
 from typing import Any
 from uuid import UUID
 
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import AwareDatetime, BaseModel, ConfigDict, Field
 
 
 class JobCreate(BaseModel):
@@ -20,6 +20,33 @@ class JobCreate(BaseModel):
         default=0, description="Job priority (higher = more important)"
     )
     submitted_by: str | None = Field(None, description="Who submitted the job")
+    memoize: bool = Field(
+        default=False,
+        description="Reuse the result of an identical (name, params) job if available",
+    )
+    gpu_memory_mb: int | None = Field(
+        None,
+        gt=0,
+        description="GPU memory the job needs in MB (rejected if no live GPU has it)",
+    )
+    gpu_count: int = Field(
+        1,
+        ge=1,
+        description="GPUs the job needs, all on one worker (gang scheduled)",
+    )
+    max_runtime_seconds: int | None = Field(
+        None,
+        gt=0,
+        description="Stop the job (failed) if a run takes longer than this",
+    )
+    run_at: AwareDatetime | None = Field(
+        None, description="Hold the job until this time (with a timezone)"
+    )
+    max_retries: int | None = Field(
+        None,
+        ge=0,
+        description="Times a failed run is retried (default: the worker's setting)",
+    )
 
 
 class JobUpdate(BaseModel):
@@ -43,5 +70,134 @@ class JobResponse(BaseModel):
     state: str
     created_at: datetime
     submitted_by: str | None
+    result: dict[str, Any] | None = None
+    memo_key: str | None = None
+    memoized_from: UUID | None = None
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+    gpu_memory_mb: int | None = None
+    gpu_count: int = 1
+    max_runtime_seconds: int | None = None
+    checkpoint: dict[str, Any] | None = None
+    preemptions: int = 0
+    run_at: datetime | None = None
+    next_run_at: datetime | None = None
+    retries: int = 0
+    max_retries: int | None = None
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class ThroughputBucket(BaseModel):
+    """Finished jobs in one time bucket"""
+
+    bucket: datetime
+    completed: int
+    failed: int
+
+
+class WaitTimeStats(BaseModel):
+    """Queue wait percentiles (seconds from submission to start) for a job name"""
+
+    name: str
+    jobs: int
+    p50: float
+    p95: float
+    p99: float
+
+
+class FailureRate(BaseModel):
+    """Failed share of finished jobs for a job name"""
+
+    name: str
+    finished: int
+    failed: int
+    failure_rate: float
+
+
+class UsageTotals(BaseModel):
+    """GPU-seconds and job counts summed over usage rollups"""
+
+    gpu_seconds: float
+    jobs: int
+    failed_jobs: int
+
+
+class JobNameUsage(UsageTotals):
+    job_name: str
+
+
+class UsageBucket(UsageTotals):
+    bucket: datetime
+
+
+class AccountUsage(UsageTotals):
+    """Usage for one submitter over a time window"""
+
+    submitted_by: str
+    since: datetime
+    until: datetime
+    by_job_name: list[JobNameUsage]
+    series: list[UsageBucket]
+
+
+class LeaderboardEntry(UsageTotals):
+    submitted_by: str
+
+
+class GPUStatus(BaseModel):
+    """One GPU as reported in a worker heartbeat (``GPUManager.get_status``)"""
+
+    id: int
+    name: str
+    memory_used_mb: int
+    memory_total_mb: int
+    utilization_percent: int
+    temperature_c: int | None = None
+    available: bool
+
+
+class InputCacheStatus(BaseModel):
+    """A worker's local input cache as reported in its heartbeat"""
+
+    keys: list[str]  # most recently used first, up to the worker's limit
+    entries: int
+    bytes: int
+    max_bytes: int
+    hit_rate: float | None = None
+    bytes_saved: int = 0
+
+
+class WorkerCapacity(BaseModel):
+    """A live worker and its GPUs as of its latest heartbeat"""
+
+    worker_id: str
+    age_seconds: float
+    gpus: list[GPUStatus]
+    input_cache: InputCacheStatus | None = None
+
+
+class FleetTotals(BaseModel):
+    workers: int
+    gpus: int
+    available_gpus: int
+    memory_total_mb: int
+    memory_used_mb: int
+
+
+class FleetCapacity(BaseModel):
+    """GPU capacity across every worker with a fresh heartbeat"""
+
+    workers: list[WorkerCapacity]
+    totals: FleetTotals
+
+
+class QueueBacklog(BaseModel):
+    """Queue backlog for autoscaling, from trigger-maintained counters"""
+
+    queued: int
+    bands: dict[str, int]
+    oldest_queued_seconds: float
+    completion_rate_per_second: float | None = None
+    estimated_drain_seconds: float | None = None
+    checked_at: datetime
@@ -0,0 +1,143 @@
+"""
+OpenTelemetry tracing for the job lifecycle
+
+One trace follows a job from ``POST /jobs`` to its last event:
+
+- FastAPIInstrumentor and SQLAlchemyInstrumentor (set up with the metrics)
+  create the request and query spans once a tracer provider is installed
+- ``create_job`` stores the request's W3C trace context in
+  ``jobs.trace_context``; the worker continues the trace from there
+- ``NATSManager.publish`` injects the current context into message headers,
+  and /events starts a delivery span from those headers for each message
+
+``TRACING_EXPORTER`` selects where spans go: ``none`` (tracing off, the
+default), ``console``, ``file`` (JSON lines at ``TRACING_FILE_PATH``),
+``memory`` (kept in-process, for tests), ``otlp`` (needs
+opentelemetry-exporter-otlp-proto-http) or ``module:factory`` for any other
+SpanExporter. ``TRACING_SAMPLE_RATIO`` samples root traces; spans with a
+parent follow the parent's decision.
+"""
+
+import importlib
+import logging
+import threading
+from collections.abc import Sequence
+
+from opentelemetry import context, propagate, trace
+from opentelemetry.sdk.resources import SERVICE_NAME, Resource
+from opentelemetry.sdk.trace import ReadableSpan, TracerProvider
+from opentelemetry.sdk.trace.export import (
+    BatchSpanProcessor,
+    ConsoleSpanExporter,
+    SimpleSpanProcessor,
+    SpanExporter,
+    SpanExportResult,
+)
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+    InMemorySpanExporter,
+)
+from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+
+TRACER_NAME = "overflying.api"
+
+logger = logging.getLogger(__name__)
+
+# Installed by setup_tracing(); the global provider can only be set once
+tracer_provider: TracerProvider | None = None
+span_exporter: SpanExporter | None = None
+
+
+class JsonLinesSpanExporter(SpanExporter):
+    """Appends finished spans to a file, one JSON object per line"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        lines = "".join(span.to_json(indent=None) + "\n" for span in spans)
+        with self._lock, open(self.path, "a") as f:
+            f.write(lines)
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self):
+        pass
+
+
+def build_exporter(name: str, file_path: str) -> SpanExporter | None:
+    """The SpanExporter selected by `name` (None when tracing is off)"""
+    if name == "none":
+        return None
+    if name == "console":
+        return ConsoleSpanExporter()
+    if name == "file":
+        return JsonLinesSpanExporter(file_path)
+    if name == "memory":
+        return InMemorySpanExporter()
+    if name == "otlp":
+        try:
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
+                OTLPSpanExporter,
+            )
+        except ImportError as e:
+            raise ValueError(
+                "TRACING_EXPORTER=otlp needs opentelemetry-exporter-otlp-proto-http"
+            ) from e
+        return OTLPSpanExporter()
+    if ":" in name:
+        module, factory = name.split(":", 1)
+        return getattr(importlib.import_module(module), factory)()
+    raise ValueError(f"Unknown tracing exporter: {name!r}")
+
+
+def setup_tracing(
+    service_name: str,
+    exporter: str = "none",
+    sample_ratio: float = 1.0,
+    file_path: str = "spans.jsonl",
+) -> TracerProvider | None:
+    """Install the global tracer provider once; later calls return it"""
+    global tracer_provider, span_exporter
+    if tracer_provider is not None:
+        return tracer_provider
+
+    span_exporter = build_exporter(exporter, file_path)
+    if span_exporter is None:
+        return None
+
+    tracer_provider = TracerProvider(
+        resource=Resource(attributes={SERVICE_NAME: service_name}),
+        sampler=ParentBased(TraceIdRatioBased(sample_ratio)),
+    )
+    # In-memory spans must be visible as soon as they end
+    processor = (
+        SimpleSpanProcessor(span_exporter)
+        if exporter == "memory"
+        else BatchSpanProcessor(span_exporter)
+    )
+    tracer_provider.add_span_processor(processor)
+    trace.set_tracer_provider(tracer_provider)
+    logger.info("Exporting spans via %s (sample ratio %s)", exporter, sample_ratio)
+    return tracer_provider
+
+
+def flush_tracing():
+    """Export buffered spans (shutdown, tests)"""
+    if tracer_provider is not None:
+        tracer_provider.force_flush()
+
+
+def get_tracer() -> trace.Tracer:
+    return trace.get_tracer(TRACER_NAME)
+
+
+def current_trace_context() -> dict[str, str] | None:
+    """W3C headers for the active span, or None when nothing is traced"""
+    carrier: dict[str, str] = {}
+    propagate.inject(carrier)
+    return carrier or None
+
+
+def extract_context(carrier: dict[str, str] | None) -> context.Context:
+    """Context to parent spans on, from stored or received W3C headers"""
+    return propagate.extract(carrier or {})
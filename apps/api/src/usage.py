@@ -0,0 +1,305 @@
+"""
+GPU usage accounting from job completion events
+
+Workers publish ``jobs.{id}.completed`` / ``.failed`` / ``.cancelled`` events carrying
+``gpu_id``, ``execution_time`` and ``submitted_by``, and the same for each run
+cut short by preemption (``jobs.{id}.preempted``) or that failed and will be
+retried (``jobs.{id}.retrying``), which is charged its GPU time without
+counting as a job. A gang run is charged ``execution_time`` on each of its
+``gpu_count`` GPUs. The accountant consumes
+them through a durable JetStream consumer and folds each one into hourly
+``usage_rollups`` rows per submitter and job name.
+
+Delivery is at-least-once, so every event's stream sequence is recorded in
+``usage_applied_events`` in the same transaction as its rollup upsert; a
+redelivered event finds its sequence already there and is skipped. Messages
+are acked only after that transaction commits.
+
+The usage endpoints read only the rollup tables, so chargeback queries cost a
+primary-key range scan over (submitter, hour) rather than a scan of job
+history.
+"""
+
+import asyncio
+import json
+import logging
+import random
+from datetime import datetime
+
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session
+
+from .database import SessionLocal
+from .models import UsageRollup
+
+logger = logging.getLogger(__name__)
+
+USAGE_STATES = ("completed", "failed", "cancelled", "preempted", "retrying")
+
+# Runs that end without the job ending: charged, but not counted as jobs
+INTERRUPTED_STATES = ("preempted", "retrying")
+
+CONSUMER_NAME = "api-usage-rollups"
+
+MARK_APPLIED = text("""
+    INSERT INTO usage_applied_events (stream_seq) VALUES (:seq)
+    ON CONFLICT (stream_seq) DO NOTHING
+    RETURNING stream_seq
+""")
+
+UPSERT_ROLLUP = text("""
+    INSERT INTO usage_rollups
+        (submitted_by, bucket_start, job_name, gpu_seconds, jobs, failed_jobs)
+    VALUES (
+        :submitted_by, date_trunc('hour', CAST(:finished_at AS timestamptz), 'UTC'),
+        :job_name, :gpu_seconds, :jobs, :failed
+    )
+    ON CONFLICT (submitted_by, bucket_start, job_name) DO UPDATE
+    SET gpu_seconds = usage_rollups.gpu_seconds + EXCLUDED.gpu_seconds,
+        jobs = usage_rollups.jobs + EXCLUDED.jobs,
+        failed_jobs = usage_rollups.failed_jobs + EXCLUDED.failed_jobs
+""")
+
+
+def is_usage_event(event: dict) -> bool:
+    """Terminal, preempted or retried runs of jobs that actually held a GPU"""
+    return event.get("state") in USAGE_STATES and "gpu_id" in event
+
+
+def apply_event(db: Session, stream_seq: int, event: dict) -> bool:
+    """
+    Fold one event into the rollups unless its sequence was already applied.
+
+    Does not commit; returns True if the rollups changed.
+    """
+    if not is_usage_event(event):
+        return False
+
+    if db.execute(MARK_APPLIED, {"seq": stream_seq}).scalar() is None:
+        return False  # redelivery
+
+    db.execute(
+        UPSERT_ROLLUP,
+        {
+            "submitted_by": event.get("submitted_by") or "",
+            "finished_at": event["timestamp"],
+            "job_name": event.get("name") or "",
+            "gpu_seconds": float(event.get("execution_time") or 0)
+            * int(event.get("gpu_count") or 1),
+            "jobs": int(event["state"] not in INTERRUPTED_STATES),
+            "failed": int(event["state"] == "failed"),
+        },
+    )
+    return True
+
+
+def apply_batch(db: Session, events: list[tuple[int, dict]]) -> int:
+    """Apply a batch of (stream_seq, event) in one transaction"""
+    applied = sum(apply_event(db, seq, event) for seq, event in events)
+    db.commit()
+    return applied
+
+
+def prune_applied_events(db: Session, retention_hours: int) -> int:
+    """Forget sequences older than any redelivery could be"""
+    deleted = db.execute(
+        text("""
+            DELETE FROM usage_applied_events
+            WHERE applied_at < now() - make_interval(hours => :hours)
+        """),
+        {"hours": retention_hours},
+    ).rowcount
+    db.commit()
+    return deleted
+
+
+def usage_totals(db: Session, group_by, *filters):
+    """Summed rollup columns grouped by `group_by` (a column expression)"""
+    return db.execute(
+        select(
+            group_by.label("key"),
+            func.sum(UsageRollup.gpu_seconds).label("gpu_seconds"),
+            func.sum(UsageRollup.jobs).label("jobs"),
+            func.sum(UsageRollup.failed_jobs).label("failed_jobs"),
+        )
+        .where(*filters)
+        .group_by(group_by)
+    ).all()
+
+
+def account_usage(
+    db: Session,
+    submitted_by: str,
+    since: datetime,
+    until: datetime,
+    bucket: str = "day",
+) -> dict:
+    """Usage for one submitter: totals, per job name and per time bucket"""
+    window = (
+        UsageRollup.submitted_by == submitted_by,
+        UsageRollup.bucket_start >= since,
+        UsageRollup.bucket_start < until,
+    )
+    by_name = usage_totals(db, UsageRollup.job_name, *window)
+    series = usage_totals(
+        db, func.date_trunc(bucket, UsageRollup.bucket_start, "UTC"), *window
+    )
+
+    def totals(row):
+        return {
+            "gpu_seconds": row.gpu_seconds,
+            "jobs": row.jobs,
+            "failed_jobs": row.failed_jobs,
+        }
+
+    return {
+        "submitted_by": submitted_by,
+        "since": since,
+        "until": until,
+        "gpu_seconds": sum(r.gpu_seconds for r in by_name),
+        "jobs": sum(r.jobs for r in by_name),
+        "failed_jobs": sum(r.failed_jobs for r in by_name),
+        "by_job_name": sorted(
+            ({"job_name": r.key, **totals(r)} for r in by_name),
+            key=lambda r: r["gpu_seconds"],
+            reverse=True,
+        ),
+        "series": sorted(
+            ({"bucket": r.key, **totals(r)} for r in series),
+            key=lambda r: r["bucket"],
+        ),
+    }
+
+
+def leaderboard(db: Session, since: datetime, until: datetime, limit: int = 10):
+    """Submitters ranked by GPU-seconds in the window"""
+    gpu_seconds = func.sum(UsageRollup.gpu_seconds)
+    rows = db.execute(
+        select(
+            UsageRollup.submitted_by,
+            gpu_seconds.label("gpu_seconds"),
+            func.sum(UsageRollup.jobs).label("jobs"),
+            func.sum(UsageRollup.failed_jobs).label("failed_jobs"),
+        )
+        .where(UsageRollup.bucket_start >= since, UsageRollup.bucket_start < until)
+        .group_by(UsageRollup.submitted_by)
+        .order_by(gpu_seconds.desc(), UsageRollup.submitted_by)
+        .limit(limit)
+    ).all()
+    return [row._asdict() for row in rows]
+
+
+class UsageAccountant:
+    """Durable JetStream consumer that maintains usage_rollups"""
+
+    def __init__(
+        self,
+        batch_size: int = 100,
+        fetch_timeout: float = 5.0,
+        retention_hours: int = 168,
+        prune_interval_seconds: float = 3600.0,
+        retry_base_delay: float = 0.5,
+        retry_max_delay: float = 30.0,
+    ):
+        self.batch_size = batch_size
+        self.fetch_timeout = fetch_timeout
+        self.retention_hours = retention_hours
+        self.prune_interval_seconds = prune_interval_seconds
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.failures = 0
+        self.next_prune = 0.0
+
+    def _apply(self, events: list[tuple[int, dict]]) -> int:
+        db = SessionLocal()
+        try:
+            return apply_batch(db, events)
+        finally:
+            db.close()
+
+    def _prune(self) -> int:
+        db = SessionLocal()
+        try:
+            return prune_applied_events(db, self.retention_hours)
+        finally:
+            db.close()
+
+    async def run(self, nats_manager):
+        """
+        Consume job events until cancelled (API lifespan task).
+
+        Any failure to bind or fetch (stream not there yet, disconnect,
+        consumer deleted) is logged and retried with exponential backoff,
+        waiting for NATS to be ready and binding the consumer again.
+        """
+        while True:
+            try:
+                await self._consume(nats_manager)
+            except Exception as e:
+                # Full jitter, as for the NATS connection itself
+                delay = random.uniform(
+                    0,
+                    min(
+                        self.retry_max_delay,
+                        self.retry_base_delay * 2**self.failures,
+                    ),
+                )
+                self.failures += 1
+                logger.exception(
+                    "Usage consumer failed (attempt %d): %s; retrying in %.1f seconds",
+                    self.failures,
+                    e,
+                    delay,
+                )
+                await asyncio.sleep(delay)
+
+    async def _consume(self, nats_manager):
+        """Bind the durable consumer and apply batches until something fails"""
+        await nats_manager.ready.wait()
+        await nats_manager.create_consumer(
+            "JOBS", CONSUMER_NAME, filter_subject="jobs.>"
+        )
+        psub = await nats_manager.js.pull_subscribe_bind(
+            durable=CONSUMER_NAME, stream="JOBS"
+        )
+        logger.info("Consuming job events as '%s'", CONSUMER_NAME)
+
+        loop = asyncio.get_running_loop()
+        while True:
+            if loop.time() >= self.next_prune:
+                try:
+                    await asyncio.to_thread(self._prune)
+                except Exception as e:
+                    logger.exception("Ledger prune failed: %s", e)
+                self.next_prune = loop.time() + self.prune_interval_seconds
+
+            try:
+                msgs = await psub.fetch(
+                    batch=self.batch_size, timeout=self.fetch_timeout
+                )
+            except TimeoutError:
+                msgs = []
+            self.failures = 0
+            if not msgs:
+                continue
+
+            events = []
+            for msg in msgs:
+                try:
+                    event = json.loads(msg.data.decode())
+                except ValueError:
+                    logger.warning("Skipping malformed event on %s", msg.subject)
+                    event = {}
+                events.append((msg.metadata.sequence.stream, event))
+
+            try:
+                await asyncio.to_thread(self._apply, events)
+            except Exception as e:
+                # Unacked messages are redelivered after the ack wait
+                logger.exception("Failed to apply %d events: %s", len(events), e)
+                for msg in msgs:
+                    await msg.nak(delay=self.fetch_timeout)
+                continue
+
+            for msg in msgs:
+                await msg.ack()
@@ -9,6 +9,7 @@ import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import Session, sessionmaker
+from src.config import settings
 from src.database import Base, get_db
 from src.main import app
 
@@ -18,6 +19,18 @@ TEST_DATABASE_URL = os.getenv(
 )
 
 
+@pytest.fixture(scope="session", autouse=True)
+def no_usage_consumer():
+    """
+    Keep the lifespan from starting the usage consumer: it commits through
+    its own sessions, outside the per-test rollback.
+    """
+    enabled = settings.usage_rollups_enabled
+    settings.usage_rollups_enabled = False
+    yield
+    settings.usage_rollups_enabled = enabled
+
+
 @pytest.fixture(scope="session")
 def test_db_engine():
     """
@@ -0,0 +1,101 @@
+"""
+Tests for adaptive admission control on write endpoints
+"""
+
+from collections.abc import Generator
+
+import pytest
+from fastapi.testclient import TestClient
+from src.admission import AdmissionController, admission_controller
+
+
+@pytest.fixture
+def controller() -> Generator[AdmissionController, None, None]:
+    """Snapshot and restore the global controller's adaptive state"""
+    saved = dict(vars(admission_controller))
+    yield admission_controller
+    vars(admission_controller).update(saved)
+
+
+class TestAdmissionController:
+    """Tests for the AIMD limit"""
+
+    def test_acquire_up_to_limit(self):
+        """Test that slots are granted until the limit is reached"""
+        ctl = AdmissionController(initial_limit=2, min_limit=1)
+
+        assert ctl.try_acquire()
+        assert ctl.try_acquire()
+        assert not ctl.try_acquire()
+
+    def test_fast_requests_increase_limit(self):
+        """Test additive increase while the limit is in use"""
+        ctl = AdmissionController(initial_limit=4, latency_target=0.1)
+        for _ in range(4):
+            ctl.try_acquire()
+        for _ in range(4):
+            ctl.release(latency=0.01)
+
+        assert ctl.limit > 4
+
+    def test_slow_request_decreases_limit(self):
+        """Test multiplicative decrease on a latency breach"""
+        ctl = AdmissionController(initial_limit=20, decrease_factor=0.5)
+        ctl.try_acquire()
+        ctl.release(latency=10.0)
+
+        assert ctl.limit == 10
+
+    def test_decrease_respects_min_limit(self):
+        """Test that errors never push the limit below the floor"""
+        ctl = AdmissionController(initial_limit=5, min_limit=4, latency_target=0)
+        for _ in range(10):
+            ctl.try_acquire()
+            ctl.release(latency=0, ok=False)
+
+        assert ctl.limit == 4
+
+
+class TestAdmissionShedding:
+    """Tests for 429/503 responses"""
+
+    def test_saturated_limit_returns_429(
+        self, client: TestClient, controller: AdmissionController
+    ):
+        """Test that writes over the concurrency limit are shed"""
+        controller.inflight = int(controller.limit)
+
+        response = client.post("/jobs", json={"name": "Test Job"})
+
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "1"
+
+    def test_reads_are_not_shed(
+        self, client: TestClient, controller: AdmissionController
+    ):
+        """Test that read endpoints bypass admission control"""
+        controller.inflight = int(controller.limit)
+
+        assert client.get("/jobs").status_code == 200
+
+    def test_deep_queue_returns_503(
+        self, client: TestClient, controller: AdmissionController
+    ):
+        """Test that submission is shed once the backlog is too deep"""
+        controller.max_queue_depth = 1
+        controller.queue_depth_ttl = 0
+        client.post("/jobs", json={"name": "Job 1"})
+
+        response = client.post("/jobs", json={"name": "Job 2"})
+
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "30"
+
+    def test_slot_released_after_request(
+        self, client: TestClient, controller: AdmissionController
+    ):
+        """Test that successful and failed writes both release their slot"""
+        client.post("/jobs", json={"name": "Test Job"})
+        client.delete("/jobs/00000000-0000-0000-0000-000000000000")
+
+        assert controller.inflight == 0
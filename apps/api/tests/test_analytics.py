@@ -0,0 +1,183 @@
+"""
+Tests for DuckDB analytics over the exported Parquet dataset
+"""
+
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+import duckdb
+import pytest
+from fastapi.testclient import TestClient
+from src import main
+from src.analytics import AnalyticsUnavailableError, JobAnalytics
+
+NOW = datetime(2025, 11, 17, 12, 0, tzinfo=UTC)
+
+
+def write_dataset(path: Path, rows: list[tuple]):
+    """Write rows (id, name, state, created, started, finished, updated) as Parquet"""
+    conn = duckdb.connect()
+    conn.execute("SET TimeZone = 'UTC'")
+    conn.execute("""
+        CREATE TABLE jobs (
+            id VARCHAR, name VARCHAR, state VARCHAR,
+            created_at TIMESTAMPTZ, started_at TIMESTAMPTZ,
+            finished_at TIMESTAMPTZ, updated_at TIMESTAMPTZ
+        )
+    """)
+    for row in rows:
+        conn.execute(
+            "INSERT INTO jobs VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [v.isoformat() if isinstance(v, datetime) else v for v in row],
+        )
+    conn.execute(f"""
+        COPY (SELECT *, CAST(created_at AS DATE) AS created_date FROM jobs)
+        TO '{path}' (FORMAT parquet, PARTITION_BY (created_date),
+                     COMPRESSION zstd, OVERWRITE_OR_IGNORE, FILENAME_PATTERN 'part-{{uuid}}')
+    """)
+    conn.close()
+
+
+def finished_job(job_id, name, state, created_ago, wait, run, updated=None):
+    created = NOW - created_ago
+    started = created + wait
+    finished = started + run
+    return (job_id, name, state, created, started, finished, updated or finished)
+
+
+@pytest.fixture
+def dataset(tmp_path: Path) -> Path:
+    rows = [
+        finished_job(
+            "a",
+            "train",
+            "completed",
+            timedelta(hours=3),
+            timedelta(seconds=10),
+            timedelta(minutes=5),
+        ),
+        finished_job(
+            "b",
+            "train",
+            "failed",
+            timedelta(hours=3),
+            timedelta(seconds=20),
+            timedelta(minutes=5),
+        ),
+        finished_job(
+            "c",
+            "infer",
+            "completed",
+            timedelta(hours=1),
+            timedelta(seconds=30),
+            timedelta(minutes=5),
+        ),
+        # "d" was exported while running, then again once it failed
+        (
+            "d",
+            "infer",
+            "running",
+            NOW - timedelta(hours=1),
+            NOW - timedelta(minutes=59),
+            None,
+            NOW - timedelta(minutes=59),
+        ),
+        finished_job(
+            "d",
+            "infer",
+            "failed",
+            timedelta(hours=1),
+            timedelta(seconds=60),
+            timedelta(minutes=10),
+        ),
+        # Submitted two days ago, outside the default window for wait times
+        finished_job(
+            "e",
+            "train",
+            "completed",
+            timedelta(days=2),
+            timedelta(hours=1),
+            timedelta(hours=1),
+        ),
+    ]
+    write_dataset(tmp_path, rows)
+    return tmp_path
+
+
+class TestJobAnalytics:
+    """Tests for the report queries"""
+
+    def test_throughput_per_hour(self, dataset: Path):
+        """Test that finished jobs are bucketed by hour and state"""
+        buckets = JobAnalytics(dataset).throughput(NOW - timedelta(hours=6), NOW)
+
+        assert [(b["bucket"].hour, b["completed"], b["failed"]) for b in buckets] == [
+            (9, 1, 1),
+            (11, 1, 1),
+        ]
+        assert buckets[0]["bucket"].tzinfo == UTC
+
+    def test_latest_version_wins(self, dataset: Path):
+        """Test that a re-exported job is only counted in its newest state"""
+        rates = JobAnalytics(dataset).failure_rate(NOW - timedelta(hours=6), NOW)
+
+        by_name = {r["name"]: r for r in rates}
+        assert by_name["infer"]["finished"] == 2
+        assert by_name["infer"]["failed"] == 1
+        assert by_name["infer"]["failure_rate"] == 0.5
+
+    def test_wait_time_percentiles(self, dataset: Path):
+        """Test wait percentiles per name for jobs submitted in the window"""
+        stats = JobAnalytics(dataset).wait_times(NOW - timedelta(hours=6), NOW)
+
+        by_name = {s["name"]: s for s in stats}
+        assert by_name["train"]["jobs"] == 2
+        assert by_name["train"]["p50"] == pytest.approx(15.0)
+        assert by_name["infer"]["p99"] == pytest.approx(59.7)
+
+    def test_wait_times_filtered_by_name(self, dataset: Path):
+        stats = JobAnalytics(dataset).wait_times(
+            NOW - timedelta(days=3), NOW, name="train"
+        )
+
+        assert [(s["name"], s["jobs"]) for s in stats] == [("train", 3)]
+
+    def test_missing_dataset(self, tmp_path: Path):
+        """Test that an empty dataset directory is reported as unavailable"""
+        with pytest.raises(AnalyticsUnavailableError):
+            JobAnalytics(tmp_path).failure_rate(NOW - timedelta(hours=1), NOW)
+
+
+class TestAnalyticsEndpoints:
+    """Tests for the /analytics endpoints"""
+
+    @pytest.fixture(autouse=True)
+    def use_dataset(self, dataset: Path, monkeypatch: pytest.MonkeyPatch):
+        monkeypatch.setattr(main, "job_analytics", JobAnalytics(dataset))
+
+    def test_failure_rate_endpoint(self, client: TestClient):
+        response = client.get(
+            "/analytics/failure-rate",
+            params={"since": "2025-11-17T06:00:00Z", "until": "2025-11-17T12:00:00Z"},
+        )
+
+        assert response.status_code == 200
+        assert {r["name"] for r in response.json()} == {"train", "infer"}
+
+    def test_invalid_window(self, client: TestClient):
+        response = client.get(
+            "/analytics/throughput",
+            params={"since": "2025-11-17T12:00:00Z", "until": "2025-11-17T06:00:00Z"},
+        )
+
+        assert response.status_code == 422
+
+    def test_unavailable_dataset(
+        self, client: TestClient, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ):
+        """Test that a missing dataset returns 503 rather than an error"""
+        monkeypatch.setattr(main, "job_analytics", JobAnalytics(tmp_path / "none"))
+
+        response = client.get("/analytics/wait-times")
+
+        assert response.status_code == 503
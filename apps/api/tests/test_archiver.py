@@ -0,0 +1,163 @@
+"""
+Tests for archiving terminal jobs into partitioned history
+"""
+
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from src.archiver import ARCHIVER_LOCK_ID, JobArchiver, month_start, partition_name
+from src.models import Job, JobHistory
+
+
+@pytest.fixture
+def archiver(db_session: Session) -> JobArchiver:
+    """Archiver with a one-hour hot window and the default partition in place"""
+    archiver = JobArchiver(archive_after_seconds=3600, retention_days=90)
+    archiver.ensure_default_partition(db_session)
+    return archiver
+
+
+def add_job(db_session: Session, state: str, finished_ago: timedelta | None):
+    job = Job(name=f"{state} job", state=state)
+    if finished_ago is not None:
+        job.finished_at = datetime.now(UTC) - finished_ago
+    db_session.add(job)
+    db_session.commit()
+    db_session.refresh(job)
+    return job
+
+
+class TestJobArchiver:
+    """Tests for batch archival and retention"""
+
+    def test_archives_only_old_terminal_jobs(
+        self, db_session: Session, archiver: JobArchiver
+    ):
+        """Test that queued and recently finished jobs stay hot"""
+        old_id = add_job(db_session, "completed", timedelta(days=2)).id
+        recent_id = add_job(db_session, "failed", timedelta(minutes=5)).id
+        queued_id = add_job(db_session, "queued", None).id
+
+        assert archiver.archive_batch(db_session) == 1
+
+        hot_ids = {job.id for job in db_session.query(Job).all()}
+        assert hot_ids == {recent_id, queued_id}
+        archived = db_session.query(JobHistory).one()
+        assert archived.id == old_id
+        assert archived.name == "completed job"
+
+    def test_archive_creates_monthly_partition(
+        self, db_session: Session, archiver: JobArchiver
+    ):
+        """Test that rows land in their month's partition, not the default"""
+        job = add_job(db_session, "completed", timedelta(days=40))
+        job_id, finished_at = job.id, job.finished_at
+        archiver.archive_batch(db_session)
+
+        partition = db_session.execute(
+            text("SELECT tableoid::regclass::text FROM jobs_history WHERE id = :id"),
+            {"id": job_id},
+        ).scalar()
+        assert (
+            partition == f"jobs_history_{month_start(finished_at.astimezone(UTC)):%Y%m}"
+        )
+
+    def test_archive_respects_batch_size(
+        self, db_session: Session, archiver: JobArchiver
+    ):
+        """Test that one batch moves at most batch_size rows"""
+        archiver.batch_size = 2
+        for _ in range(3):
+            add_job(db_session, "completed", timedelta(days=2))
+
+        assert archiver.archive_batch(db_session) == 2
+        assert archiver.archive_batch(db_session) == 1
+
+    def test_purge_drops_expired_partitions(
+        self, db_session: Session, archiver: JobArchiver
+    ):
+        """Test that partitions past retention are dropped whole"""
+        add_job(db_session, "completed", timedelta(days=200))
+        add_job(db_session, "completed", timedelta(days=2))
+        archiver.archive_batch(db_session)
+
+        dropped = archiver.purge_expired(db_session)
+
+        assert len(dropped) == 1
+        assert db_session.query(JobHistory).count() == 1
+
+    def test_transaction_locks_yield_to_another_replica(
+        self, db_session: Session, archiver: JobArchiver, test_db_engine
+    ):
+        """Test the PgBouncer-safe lock: a batch waits for the holder's commit"""
+        archiver.transaction_locks = True
+        add_job(db_session, "completed", timedelta(days=2))
+
+        with test_db_engine.connect() as other:
+            other.execute(
+                text("SELECT pg_advisory_xact_lock(:id)"), {"id": ARCHIVER_LOCK_ID}
+            )
+            assert archiver.archive_batch(db_session) == 0
+            other.rollback()
+
+        assert archiver.archive_batch(db_session) == 1
+
+    def test_partitions_follow_the_locked_batch(self, test_db_engine):
+        """Test that a row skipped as locked does not pick the batch's months"""
+        # Commits for real, so that another connection can lock the row
+        archiver = JobArchiver(archive_after_seconds=3600, batch_size=1)
+        with Session(test_db_engine) as db, test_db_engine.connect() as other:
+            archiver.ensure_default_partition(db)
+            skipped = add_job(db, "completed", timedelta(days=70))
+            job = add_job(db, "completed", timedelta(days=2))
+            ids = [skipped.id, job.id]
+            months = [
+                month_start(j.finished_at.astimezone(UTC)) for j in (skipped, job)
+            ]
+            other.execute(
+                text("SELECT 1 FROM jobs WHERE id = :id FOR UPDATE"), {"id": ids[0]}
+            )
+            try:
+                assert archiver.archive_batch(db) == 1
+                partition = db.execute(
+                    text("SELECT tableoid::regclass::text FROM jobs_history"),
+                ).scalar()
+                assert partition == partition_name(months[1])
+            finally:
+                other.rollback()
+                db.rollback()
+                for name in [*map(partition_name, months), "jobs_history_default"]:
+                    db.execute(text(f"DROP TABLE IF EXISTS {name}"))
+                db.query(Job).filter(Job.id.in_(ids)).delete()
+                db.commit()
+
+
+class TestHistoryReads:
+    """Tests for endpoints reading hot and archived jobs transparently"""
+
+    def test_list_includes_archived_jobs(
+        self, client: TestClient, db_session: Session, archiver: JobArchiver
+    ):
+        """Test that GET /jobs merges both tables by created_at"""
+        add_job(db_session, "completed", timedelta(days=2))
+        add_job(db_session, "queued", None)
+        archiver.archive_batch(db_session)
+
+        data = client.get("/jobs").json()
+
+        assert [job["state"] for job in data] == ["queued", "completed"]
+
+    def test_get_and_delete_archived_job(
+        self, client: TestClient, db_session: Session, archiver: JobArchiver
+    ):
+        """Test that archived jobs can be fetched and deleted but not updated"""
+        job_id = add_job(db_session, "completed", timedelta(days=2)).id
+        archiver.archive_batch(db_session)
+
+        assert client.get(f"/jobs/{job_id}").json()["state"] == "completed"
+        assert client.put(f"/jobs/{job_id}", json={"priority": 1}).status_code == 409
+        assert client.delete(f"/jobs/{job_id}").status_code == 204
+        assert client.get(f"/jobs/{job_id}").status_code == 404
@@ -0,0 +1,149 @@
+"""
+Tests for the trigger-maintained queue counters and GET /queue/backlog
+"""
+
+from datetime import UTC, datetime, timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from src.backlog import BacklogMonitor
+from src.models import Job
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def add_jobs(db_session: Session, *priorities: int) -> list[Job]:
+    jobs = [Job(name="tile", priority=priority) for priority in priorities]
+    db_session.add_all(jobs)
+    db_session.flush()
+    return jobs
+
+
+def finish(db_session: Session, job: Job, state: str = "completed"):
+    job.state = "running"
+    db_session.flush()
+    job.state = state
+    db_session.flush()
+
+
+class TestQueueCounters:
+    """Tests for the counting triggers on jobs"""
+
+    def test_queued_jobs_counted_by_band(self, db_session: Session):
+        add_jobs(db_session, -1, 0, 0, 5, 20)
+
+        report = BacklogMonitor().refresh(db_session)
+
+        assert report["queued"] == 5
+        assert report["bands"] == {"low": 1, "normal": 2, "high": 1, "urgent": 1}
+
+    def test_counters_follow_state_and_priority_changes(self, db_session: Session):
+        claimed, reprioritized, deleted = add_jobs(db_session, 0, 0, 0)
+
+        claimed.state = "running"
+        reprioritized.priority = 10
+        db_session.flush()
+        db_session.delete(deleted)
+        db_session.flush()
+
+        report = BacklogMonitor().refresh(db_session)
+        assert report["bands"] == {"low": 0, "normal": 0, "high": 0, "urgent": 1}
+
+        # A requeued job counts again
+        claimed.state = "queued"
+        db_session.flush()
+        assert BacklogMonitor().refresh(db_session)["bands"]["normal"] == 1
+
+    def test_oldest_queued_age(self, db_session: Session):
+        (job,) = add_jobs(db_session, 0)
+        job.queued_at = datetime.now(UTC) - timedelta(minutes=10)
+        db_session.flush()
+
+        report = BacklogMonitor().refresh(db_session)
+
+        assert 590 < report["oldest_queued_seconds"] < 700
+
+    def test_oldest_queued_age_counts_from_entering_the_queue(
+        self, db_session: Session
+    ):
+        """Test that a scheduled job that just came due is not aged by its wait"""
+        day_ago = datetime.now(UTC) - timedelta(days=1)
+        job = Job(name="tile", state="scheduled", created_at=day_ago)
+        db_session.add(job)
+        db_session.flush()
+        assert job.queued_at is None
+
+        job.state = "queued"
+        db_session.flush()
+        db_session.refresh(job)
+
+        assert job.queued_at > day_ago
+        assert BacklogMonitor().refresh(db_session)["oldest_queued_seconds"] < 60
+
+
+class TestBacklogMonitor:
+    """Tests for the completion rate and drain estimate"""
+
+    def test_drain_time_from_completion_rate(self, db_session: Session):
+        clock = FakeClock()
+        monitor = BacklogMonitor(clock=clock)
+        jobs = add_jobs(db_session, *[0] * 12)
+
+        first = monitor.refresh(db_session)
+        for job in jobs[:2]:
+            finish(db_session, job)
+        finish(db_session, jobs[2], "failed")
+        clock.now += 30
+        report = monitor.refresh(db_session)
+
+        assert first["completion_rate_per_second"] is None
+        assert first["estimated_drain_seconds"] is None
+        assert report["queued"] == 9
+        assert report["completion_rate_per_second"] == 0.1
+        assert report["estimated_drain_seconds"] == 90.0
+
+    def test_rate_covers_only_the_window(self, db_session: Session):
+        clock = FakeClock()
+        monitor = BacklogMonitor(rate_window_seconds=60, clock=clock)
+        jobs = add_jobs(db_session, *[0] * 5)
+
+        monitor.refresh(db_session)
+        for job in jobs[:4]:
+            finish(db_session, job)
+        clock.now += 60
+        monitor.refresh(db_session)
+        clock.now += 60
+        report = monitor.refresh(db_session)
+
+        # The burst is older than the window: nothing is finishing now
+        assert report["completion_rate_per_second"] == 0
+        assert report["estimated_drain_seconds"] is None
+
+    def test_empty_queue_reports_zeros(self, db_session: Session):
+        report = BacklogMonitor().refresh(db_session)
+
+        assert report["queued"] == 0
+        assert report["oldest_queued_seconds"] == 0
+        assert report["estimated_drain_seconds"] == 0
+
+
+class TestBacklogEndpoint:
+    """Tests for GET /queue/backlog"""
+
+    def test_reports_submitted_jobs(self, client: TestClient):
+        client.post("/jobs", json={"name": "render", "priority": 3})
+        client.post("/jobs", json={"name": "render"})
+
+        data = client.get("/queue/backlog").json()
+
+        assert data["queued"] == 2
+        assert data["bands"]["high"] == 1
+        assert data["bands"]["normal"] == 1
+        assert data["oldest_queued_seconds"] >= 0
+        assert "estimated_drain_seconds" in data
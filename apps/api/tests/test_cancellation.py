@@ -0,0 +1,122 @@
+"""
+Tests for POST /jobs/{id}/cancel and job deadlines
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from src import main
+from src.models import Job
+
+
+@pytest.fixture
+def published(monkeypatch: pytest.MonkeyPatch) -> list[tuple[str, dict]]:
+    messages = []
+
+    async def publish(subject, data):
+        messages.append((subject, data))
+
+    monkeypatch.setattr(main.nats_manager, "publish", publish)
+    return messages
+
+
+def add_job(db_session: Session, state: str = "queued") -> Job:
+    job = Job(name="render", state=state)
+    db_session.add(job)
+    db_session.commit()
+    return job
+
+
+class TestCancelJob:
+    """Tests for the cancel endpoint"""
+
+    def test_cancel_queued_job(
+        self, client: TestClient, db_session: Session, published
+    ):
+        job = add_job(db_session)
+
+        response = client.post(f"/jobs/{job.id}/cancel")
+
+        assert response.status_code == 200
+        assert response.json()["state"] == "cancelled"
+        assert response.json()["finished_at"] is not None
+        assert published[0][0] == f"jobs.{job.id}.cancelled"
+
+    def test_cancel_running_job_asks_the_worker(
+        self, client: TestClient, db_session: Session, published
+    ):
+        job = add_job(db_session, state="running")
+
+        response = client.post(f"/jobs/{job.id}/cancel")
+
+        assert response.status_code == 202
+        assert response.json()["state"] == "cancelling"
+        assert published == [
+            (f"jobs.{job.id}.cancel", published[0][1]),
+        ]
+        assert published[0][1]["state"] == "cancelling"
+
+        # Cancelling again is harmless
+        assert client.post(f"/jobs/{job.id}/cancel").status_code == 202
+
+    def test_cancel_finished_job_conflicts(
+        self, client: TestClient, db_session: Session, published
+    ):
+        job = add_job(db_session, state="completed")
+
+        response = client.post(f"/jobs/{job.id}/cancel")
+
+        assert response.status_code == 409
+        assert published == []
+
+    def test_cancel_unknown_job(self, client: TestClient, published):
+        response = client.post("/jobs/00000000-0000-0000-0000-000000000000/cancel")
+
+        assert response.status_code == 404
+
+    def test_cancel_survives_nats_outage(
+        self,
+        client: TestClient,
+        db_session: Session,
+        monkeypatch: pytest.MonkeyPatch,
+    ):
+        async def publish(subject, data):
+            raise ConnectionError("nats down")
+
+        monkeypatch.setattr(main.nats_manager, "publish", publish)
+        job = add_job(db_session, state="running")
+
+        response = client.post(f"/jobs/{job.id}/cancel")
+
+        assert response.status_code == 202
+        db_session.refresh(job)
+        assert job.state == "cancelling"
+
+    def test_delete_running_job_conflicts(
+        self, client: TestClient, db_session: Session
+    ):
+        job = add_job(db_session, state="running")
+
+        response = client.delete(f"/jobs/{job.id}")
+
+        assert response.status_code == 409
+        assert db_session.get(Job, job.id) is not None
+
+
+class TestMaxRuntime:
+    """Tests for the per-job deadline"""
+
+    def test_create_job_with_max_runtime(self, client: TestClient):
+        response = client.post(
+            "/jobs", json={"name": "render", "max_runtime_seconds": 600}
+        )
+
+        assert response.status_code == 201
+        assert response.json()["max_runtime_seconds"] == 600
+
+    def test_max_runtime_must_be_positive(self, client: TestClient):
+        response = client.post(
+            "/jobs", json={"name": "render", "max_runtime_seconds": 0}
+        )
+
+        assert response.status_code == 422
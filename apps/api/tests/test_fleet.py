@@ -0,0 +1,166 @@
+"""
+Tests for the GPU fleet registry, GET /gpus and the submission fit check
+"""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+from src import main
+from src.fleet import FleetRegistry
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def heartbeat(worker_id="w1", memory=(24576, 24576), ttl=15.0, **extra):
+    return {
+        "worker_id": worker_id,
+        "ttl_seconds": ttl,
+        "gpus": [
+            {
+                "id": i,
+                "name": "NVIDIA RTX 4090",
+                "memory_used_mb": 0,
+                "memory_total_mb": total,
+                "utilization_percent": 0,
+                "temperature_c": 45,
+                "available": i != 0,
+            }
+            for i, total in enumerate(memory)
+        ],
+        **extra,
+    }
+
+
+@pytest.fixture
+def fleet():
+    """The app's registry, emptied around each test"""
+    main.gpu_fleet.workers.clear()
+    yield main.gpu_fleet
+    main.gpu_fleet.workers.clear()
+
+
+class TestFleetRegistry:
+    """Tests for heartbeat bookkeeping and expiry"""
+
+    def test_workers_expire_after_their_ttl(self):
+        clock = FakeClock()
+        registry = FleetRegistry(clock=clock)
+        registry.observe(heartbeat("short", ttl=5))
+        registry.observe(heartbeat("long", ttl=30))
+
+        clock.now += 10
+
+        assert [beat.worker_id for beat in registry.live()] == ["long"]
+        assert "short" not in registry.workers
+
+    def test_stopping_worker_is_dropped_at_once(self):
+        registry = FleetRegistry()
+        registry.observe(heartbeat("w1"))
+
+        registry.observe({"worker_id": "w1", "stopping": True})
+
+        assert registry.live() == []
+
+    def test_snapshot_totals(self):
+        registry = FleetRegistry()
+        registry.observe(heartbeat("w1"))
+        registry.observe(heartbeat("w2", memory=(81920,)))
+
+        totals = registry.snapshot()["totals"]
+
+        assert totals == {
+            "workers": 2,
+            "gpus": 3,
+            "available_gpus": 1,
+            "memory_total_mb": 24576 * 2 + 81920,
+            "memory_used_mb": 0,
+        }
+
+    def test_fits_is_unknown_without_live_workers(self):
+        """Test that an empty fleet never rejects: capacity is unknown"""
+        registry = FleetRegistry()
+        assert registry.fits(1) is None
+
+        registry.observe(heartbeat(memory=(24576,)))
+        assert registry.fits(24576) is True
+        assert registry.fits(40000) is False
+
+    def test_gang_fits_one_worker(self):
+        """Test that a gang needs enough GPUs on a single worker"""
+        registry = FleetRegistry()
+        registry.observe(heartbeat("w1", memory=(24576, 81920)))
+        registry.observe(heartbeat("w2", memory=(81920,)))
+
+        assert registry.fits(None, 2) is True
+        assert registry.fits(40000, 2) is False  # one 80 GB GPU on each
+        assert registry.fits(None, 3) is False
+
+    def test_malformed_heartbeats_are_skipped(self):
+        registry = FleetRegistry()
+        bad = SimpleNamespace(
+            subject="gpus.w1", data=b'{"worker_id": "w1", "gpus": [{}]}'
+        )
+        good = SimpleNamespace(
+            subject="gpus.w2", data=json.dumps(heartbeat("w2")).encode()
+        )
+
+        asyncio.run(registry.on_message(bad))
+        asyncio.run(registry.on_message(good))
+
+        assert list(registry.workers) == ["w2"]
+
+
+class TestGpusEndpoint:
+    """Tests for GET /gpus and the gpu_memory_mb check on POST /jobs"""
+
+    def test_lists_live_gpus(self, client: TestClient, fleet: FleetRegistry):
+        fleet.observe(heartbeat("w1"))
+
+        data = client.get("/gpus").json()
+
+        assert data["totals"]["gpus"] == 2
+        assert data["workers"][0]["worker_id"] == "w1"
+        assert data["workers"][0]["gpus"][1]["available"] is True
+
+    def test_rejects_jobs_no_gpu_can_hold(
+        self, client: TestClient, fleet: FleetRegistry
+    ):
+        fleet.observe(heartbeat("w1"))
+
+        too_big = client.post("/jobs", json={"name": "llm", "gpu_memory_mb": 81920})
+        fits = client.post("/jobs", json={"name": "llm", "gpu_memory_mb": 20000})
+
+        assert too_big.status_code == 422
+        assert "81920 MB" in too_big.json()["detail"]
+        assert fits.status_code == 201
+        assert fits.json()["gpu_memory_mb"] == 20000
+
+    def test_accepts_while_fleet_is_unknown(
+        self, client: TestClient, fleet: FleetRegistry
+    ):
+        """Test that jobs wait in the queue while no worker has reported"""
+        response = client.post("/jobs", json={"name": "llm", "gpu_memory_mb": 81920})
+
+        assert response.status_code == 201
+
+    def test_rejects_gangs_no_worker_can_hold(
+        self, client: TestClient, fleet: FleetRegistry
+    ):
+        fleet.observe(heartbeat("w1"))
+
+        too_big = client.post("/jobs", json={"name": "train", "gpu_count": 4})
+        fits = client.post("/jobs", json={"name": "train", "gpu_count": 2})
+
+        assert too_big.status_code == 422
+        assert "4 GPU(s)" in too_big.json()["detail"]
+        assert fits.status_code == 201
+        assert fits.json()["gpu_count"] == 2
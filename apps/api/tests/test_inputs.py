@@ -0,0 +1,103 @@
+"""
+Tests for job input keys and the input caches workers advertise
+"""
+
+import hashlib
+
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from src import main
+from src.inputs import input_keys
+from src.models import Job
+
+
+def key(uri: str) -> str:
+    return hashlib.sha256(uri.encode()).hexdigest()
+
+
+class TestInputKeys:
+    """Tests for the cache keys stored on jobs"""
+
+    def test_keys_from_uris_and_digests(self):
+        digest = "AB" * 32
+
+        keys = input_keys(
+            {"inputs": ["s3://scenes/a.tif", {"uri": "s3://b", "sha256": digest}]}
+        )
+
+        assert keys == sorted([key("s3://scenes/a.tif"), digest.lower()])
+        assert input_keys({"scene": "a"}) is None
+
+    def test_malformed_digests_are_skipped(self):
+        keys = input_keys(
+            {
+                "inputs": [
+                    {"uri": "s3://a", "sha256": "../../etc/passwd"},
+                    {"uri": "s3://b", "sha256": "ab" * 31},
+                    {"uri": "s3://c", "sha256": 12},
+                ]
+            }
+        )
+
+        assert keys is None
+
+    def test_malformed_digest_is_rejected(self, client: TestClient):
+        """Test that a sha256 that is not 64 hex digits is a 422 on submit and update"""
+        bad = {"inputs": [{"uri": "s3://a", "sha256": "../../../tmp/x" + "0" * 50}]}
+
+        response = client.post("/jobs", json={"name": "tile", "params": bad})
+        assert response.status_code == 422
+        assert "64 hex digits" in response.json()["detail"]
+
+        job_id = client.post("/jobs", json={"name": "tile"}).json()["id"]
+        response = client.put(f"/jobs/{job_id}", json={"params": bad})
+        assert response.status_code == 422
+
+    def test_submission_stores_the_keys(self, client: TestClient, db_session: Session):
+        response = client.post(
+            "/jobs", json={"name": "tile", "params": {"inputs": ["s3://scenes/a"]}}
+        )
+
+        job = db_session.get(Job, response.json()["id"])
+        assert job.input_keys == [key("s3://scenes/a")]
+
+    def test_updated_params_update_the_keys(
+        self, client: TestClient, db_session: Session
+    ):
+        job_id = client.post(
+            "/jobs", json={"name": "tile", "params": {"inputs": ["s3://scenes/a"]}}
+        ).json()["id"]
+
+        client.put(f"/jobs/{job_id}", json={"params": {"inputs": ["s3://scenes/b"]}})
+
+        db_session.expire_all()
+        assert db_session.get(Job, job_id).input_keys == [key("s3://scenes/b")]
+
+
+class TestAdvertisedCaches:
+    """Tests for the input cache section of worker heartbeats"""
+
+    def test_gpus_lists_each_workers_cache(self, client: TestClient):
+        main.gpu_fleet.workers.clear()
+        main.gpu_fleet.observe(
+            {
+                "worker_id": "w1",
+                "gpus": [],
+                "input_cache": {
+                    "keys": [key("s3://scenes/a")],
+                    "entries": 1,
+                    "bytes": 4096,
+                    "max_bytes": 2**30,
+                    "hit_rate": 0.75,
+                    "bytes_saved": 12288,
+                },
+            }
+        )
+        main.gpu_fleet.observe({"worker_id": "w2", "gpus": []})
+
+        workers = client.get("/gpus").json()["workers"]
+        main.gpu_fleet.workers.clear()
+
+        assert workers[0]["input_cache"]["hit_rate"] == 0.75
+        assert workers[0]["input_cache"]["keys"] == [key("s3://scenes/a")]
+        assert workers[1]["input_cache"] is None
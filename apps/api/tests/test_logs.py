@@ -0,0 +1,183 @@
+"""
+Tests for structured logging, correlation IDs and sampling
+"""
+
+import io
+import json
+import logging
+import queue
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from src.logs import (
+    NonBlockingQueueHandler,
+    RequestIdMiddleware,
+    SamplingFilter,
+    log_context,
+    parse_levels,
+    setup_logging,
+    shutdown_logging,
+)
+
+logger = logging.getLogger("tests.logs")
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_record(msg="Published to %s", args=("jobs.created",)):
+    return logging.LogRecord("tests.logs", logging.INFO, __file__, 1, msg, args, None)
+
+
+@pytest.fixture
+def restore_logging():
+    yield
+    # Back to stdout, as configured at import by src.main
+    setup_logging()
+
+
+@pytest.fixture
+def log_lines(restore_logging):
+    """Logging into a buffer; returns a callable that flushes and parses it"""
+    buffer = io.StringIO()
+    setup_logging(sample_rate=0, stream=buffer)
+
+    def lines():
+        shutdown_logging()
+        return [json.loads(line) for line in buffer.getvalue().splitlines()]
+
+    return lines
+
+
+class TestJsonLogging:
+    """Tests for the JSON records written by the listener"""
+
+    def test_records_carry_context_and_extras(self, log_lines):
+        with log_context(job_id="job-1", request_id="req-1"):
+            logger.info("Claimed %s", "job-1", extra={"gpu_id": 3})
+        logger.info("Outside")
+
+        inside, outside = log_lines()
+        assert inside["message"] == "Claimed job-1"
+        assert inside["level"] == "INFO"
+        assert inside["logger"] == "tests.logs"
+        assert (inside["job_id"], inside["request_id"], inside["gpu_id"]) == (
+            "job-1",
+            "req-1",
+            3,
+        )
+        assert "job_id" not in outside
+
+    def test_exceptions_are_rendered_before_queueing(self, log_lines):
+        try:
+            raise RuntimeError("boom")
+        except RuntimeError:
+            logger.exception("Failed")
+
+        (record,) = log_lines()
+        assert "RuntimeError: boom" in record["exception"]
+
+    def test_per_logger_levels(self, restore_logging):
+        buffer = io.StringIO()
+        setup_logging(levels="tests.logs.quiet=WARNING", sample_rate=0, stream=buffer)
+        quiet = logging.getLogger("tests.logs.quiet")
+        quiet.info("hidden")
+        quiet.warning("shown")
+        logger.info("default level")
+        shutdown_logging()
+        quiet.setLevel(logging.NOTSET)
+
+        messages = [
+            json.loads(line)["message"] for line in buffer.getvalue().splitlines()
+        ]
+        assert messages == ["shown", "default level"]
+
+    def test_level_overrides_are_parsed(self):
+        assert parse_levels(" a=debug, b.c=WARNING ") == {
+            "a": "DEBUG",
+            "b.c": "WARNING",
+        }
+        with pytest.raises(ValueError, match="expected name=LEVEL"):
+            parse_levels("DEBUG")
+
+
+class TestSampling:
+    """Tests for rate-limited sampling of repeated messages"""
+
+    def test_repeats_past_the_burst_are_suppressed_and_counted(self):
+        clock = FakeClock()
+        sampler = SamplingFilter(rate=1.0, burst=2, clock=clock)
+
+        passed = [sampler.filter(make_record()) for _ in range(5)]
+        assert passed == [True, True, False, False, False]
+
+        clock.now = 1.0
+        record = make_record()
+        assert sampler.filter(record)
+        assert record.suppressed == 3
+
+    def test_messages_are_sampled_separately(self):
+        sampler = SamplingFilter(rate=1.0, burst=1, clock=FakeClock())
+
+        assert sampler.filter(make_record("Published to %s"))
+        assert sampler.filter(make_record("Claimed %s"))
+        assert not sampler.filter(make_record("Published to %s"))
+
+    def test_zero_rate_disables_sampling(self):
+        sampler = SamplingFilter(rate=0, burst=0)
+
+        assert all(sampler.filter(make_record()) for _ in range(100))
+
+
+class TestQueueHandler:
+    """Tests for the never-blocking enqueue"""
+
+    def test_full_queue_drops_and_reports(self):
+        log_queue = queue.Queue(1)
+        handler = NonBlockingQueueHandler(log_queue)
+
+        handler.handle(make_record())
+        handler.handle(make_record())
+        assert handler.dropped == 1
+
+        log_queue.get_nowait()
+        handler.handle(make_record())
+        assert log_queue.get_nowait().dropped == 1
+
+
+@pytest.fixture
+def request_app():
+    app = FastAPI()
+    app.add_middleware(RequestIdMiddleware)
+
+    @app.get("/log")
+    def log_something():
+        logger.info("Handling request")
+        return {}
+
+    with TestClient(app) as client:
+        yield client
+
+
+class TestRequestId:
+    """Tests for X-Request-ID binding"""
+
+    def test_client_request_id_is_logged_and_echoed(self, request_app, log_lines):
+        response = request_app.get("/log", headers={"X-Request-ID": "abc-123"})
+
+        assert response.headers["x-request-id"] == "abc-123"
+        (record,) = [r for r in log_lines() if r["message"] == "Handling request"]
+        assert record["request_id"] == "abc-123"
+
+    def test_request_id_is_generated(self, request_app):
+        first = request_app.get("/log").headers["x-request-id"]
+        second = request_app.get("/log").headers["x-request-id"]
+
+        assert len(first) == 32
+        assert first != second
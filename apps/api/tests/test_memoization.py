@@ -0,0 +1,169 @@
+"""
+Tests for opt-in result memoization at submission time
+"""
+
+from datetime import UTC, datetime, timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from src.memoization import compute_memo_key
+from src.models import Job, JobResultCache
+
+
+class TestMemoKey:
+    """Tests for the canonical memo key"""
+
+    def test_key_ignores_param_order(self):
+        """Test that dict key order does not change the key"""
+        assert compute_memo_key("tile", {"a": 1, "b": {"x": 1, "y": 2}}) == (
+            compute_memo_key("tile", {"b": {"y": 2, "x": 1}, "a": 1})
+        )
+
+    def test_key_normalizes_integral_floats(self):
+        """Test that 2.0 and 2 produce the same key"""
+        assert compute_memo_key("tile", {"zoom": 2.0}) == compute_memo_key(
+            "tile", {"zoom": 2}
+        )
+
+    def test_key_depends_on_name_and_params(self):
+        """Test that different names or params produce different keys"""
+        base = compute_memo_key("tile", {"zoom": 2})
+        assert base != compute_memo_key("mosaic", {"zoom": 2})
+        assert base != compute_memo_key("tile", {"zoom": 3})
+
+
+class TestMemoizedSubmission:
+    """Tests for POST /jobs with memoize=true"""
+
+    def test_memoize_disabled_by_default(self, client: TestClient):
+        """Test that jobs are not keyed unless they opt in"""
+        response = client.post("/jobs", json={"name": "tile", "params": {"z": 1}})
+
+        assert response.status_code == 201
+        assert response.json()["memo_key"] is None
+
+    def test_cache_miss_queues_job(self, client: TestClient):
+        """Test that the first memoized submission is queued normally"""
+        response = client.post(
+            "/jobs", json={"name": "tile", "params": {"z": 1}, "memoize": True}
+        )
+
+        assert response.status_code == 201
+        data = response.json()
+        assert data["state"] == "queued"
+        assert data["memo_key"] == compute_memo_key("tile", {"z": 1})
+        assert data["memoized_from"] is None
+
+    def test_cache_hit_completes_immediately(
+        self, client: TestClient, db_session: Session
+    ):
+        """Test that a cached result completes the job without queueing it"""
+        original = Job(name="tile", state="completed")
+        db_session.add(original)
+        db_session.commit()
+        db_session.refresh(original)
+        db_session.add(
+            JobResultCache(
+                memo_key=compute_memo_key("tile", {"z": 1}),
+                job_id=original.id,
+                result={"success": True, "duration_seconds": 12.5},
+                expires_at=datetime.now(UTC) + timedelta(hours=1),
+            )
+        )
+        db_session.commit()
+
+        response = client.post(
+            "/jobs", json={"name": "tile", "params": {"z": 1}, "memoize": True}
+        )
+
+        data = response.json()
+        assert data["state"] == "completed"
+        assert data["result"] == {"success": True, "duration_seconds": 12.5}
+        assert data["memoized_from"] == str(original.id)
+
+    def test_expired_cache_entry_is_ignored(
+        self, client: TestClient, db_session: Session
+    ):
+        """Test that entries past their TTL are treated as misses"""
+        original = Job(name="tile", state="completed")
+        db_session.add(original)
+        db_session.commit()
+        db_session.refresh(original)
+        db_session.add(
+            JobResultCache(
+                memo_key=compute_memo_key("tile", {"z": 1}),
+                job_id=original.id,
+                result={"success": True},
+                expires_at=datetime.now(UTC) - timedelta(seconds=1),
+            )
+        )
+        db_session.commit()
+
+        response = client.post(
+            "/jobs", json={"name": "tile", "params": {"z": 1}, "memoize": True}
+        )
+
+        assert response.json()["state"] == "queued"
+
+    def test_duplicate_links_to_inflight_original(self, client: TestClient):
+        """Test that a duplicate of a queued job is linked instead of queued"""
+        payload = {"name": "tile", "params": {"z": 1}, "memoize": True}
+        first = client.post("/jobs", json=payload).json()
+        second = client.post("/jobs", json=payload).json()
+
+        assert second["state"] == "linked"
+        assert second["memoized_from"] == first["id"]
+
+    def test_delete_original_requeues_linked(
+        self, client: TestClient, db_session: Session
+    ):
+        """Test that deleting an original releases its linked duplicates"""
+        payload = {"name": "tile", "params": {"z": 1}, "memoize": True}
+        first = client.post("/jobs", json=payload).json()
+        second = client.post("/jobs", json=payload).json()
+
+        client.delete(f"/jobs/{first['id']}")
+
+        data = client.get(f"/jobs/{second['id']}").json()
+        assert data["state"] == "queued"
+        assert data["memoized_from"] is None
+
+    def test_edited_params_rekey_the_job(self, client: TestClient):
+        """Test that an edited job no longer answers for its old params"""
+        payload = {"name": "tile", "params": {"z": 1}, "memoize": True}
+        edited = client.post("/jobs", json=payload).json()
+
+        response = client.put(f"/jobs/{edited['id']}", json={"params": {"z": 2}})
+        assert response.json()["memo_key"] == compute_memo_key("tile", {"z": 2})
+
+        same_as_before = client.post("/jobs", json=payload).json()
+        assert same_as_before["state"] == "queued"
+        assert same_as_before["memoized_from"] is None
+        same_as_edited = client.post(
+            "/jobs", json={**payload, "params": {"z": 2}}
+        ).json()
+        assert same_as_edited["memoized_from"] == edited["id"]
+
+    def test_editing_an_original_releases_its_duplicates(self, client: TestClient):
+        """Test that duplicates stop waiting on a job whose params changed"""
+        payload = {"name": "tile", "params": {"z": 1}, "memoize": True}
+        first = client.post("/jobs", json=payload).json()
+        second = client.post("/jobs", json=payload).json()
+
+        client.put(f"/jobs/{first['id']}", json={"name": "mosaic"})
+
+        data = client.get(f"/jobs/{second['id']}").json()
+        assert data["state"] == "queued"
+        assert data["memoized_from"] is None
+
+    def test_editing_a_duplicate_unlinks_it(self, client: TestClient):
+        """Test that an edited duplicate is queued to run on its own"""
+        payload = {"name": "tile", "params": {"z": 1}, "memoize": True}
+        client.post("/jobs", json=payload)
+        second = client.post("/jobs", json=payload).json()
+
+        data = client.put(f"/jobs/{second['id']}", json={"params": {"z": 2}}).json()
+
+        assert data["state"] == "queued"
+        assert data["memoized_from"] is None
+        assert data["memo_key"] == compute_memo_key("tile", {"z": 2})
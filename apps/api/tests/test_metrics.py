@@ -0,0 +1,166 @@
+"""
+Tests for metric attribute cardinality limits and the /metrics cache
+"""
+
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from prometheus_client import CollectorRegistry, Counter
+from src.cardinality import OVERFLOW_VALUE, AttributeGuard, path_template
+from src.metrics import (
+    UNMATCHED_ROUTE,
+    ExpositionCache,
+    MetricsManager,
+    TimingMiddleware,
+)
+
+JOB_ID = "3f2b7a9e-1c44-4d0a-9a55-0d6c2f7e8b11"
+
+
+class TestAttributeGuard:
+    """Tests for allow-lists, normalisation and the overflow bucket"""
+
+    def test_unlisted_attributes_are_dropped(self):
+        guard = AttributeGuard({"outcome": None})
+
+        assert guard({"outcome": "hit", "job_id": JOB_ID}) == {"outcome": "hit"}
+
+    def test_ids_are_normalised_out_of_paths(self):
+        """Test that every job's URL maps to one route template"""
+        assert path_template(f"/jobs/{JOB_ID}") == "/jobs/{id}"
+        assert path_template("/jobs/42/results") == "/jobs/{id}/results"
+        assert path_template("/analytics/wait-times") == "/analytics/wait-times"
+
+    def test_values_past_the_budget_overflow(self):
+        """Test that new values beyond max_values share one series"""
+        guard = AttributeGuard({"submitted_by": None}, max_values=2)
+
+        assert guard({"submitted_by": "alice"})["submitted_by"] == "alice"
+        assert guard({"submitted_by": "bob"})["submitted_by"] == "bob"
+        assert guard({"submitted_by": "carol"})["submitted_by"] == OVERFLOW_VALUE
+        assert guard({"submitted_by": "alice"})["submitted_by"] == "alice"
+
+    def test_fixed_value_sets(self):
+        guard = AttributeGuard({"outcome": {"hit", "miss"}})
+
+        assert guard({"outcome": "miss"}) == {"outcome": "miss"}
+        assert guard({"outcome": "bogus"}) == {"outcome": OVERFLOW_VALUE}
+
+    def test_request_attributes_stay_bounded(self):
+        """Test that a stream of distinct job URLs adds no new route values"""
+        manager = MetricsManager(max_attribute_values=5)
+        for n in range(50):
+            attributes = manager.request_attributes(
+                {
+                    "http.method": "GET",
+                    "http.route": f"/jobs/{n:032x}",
+                    "http.status_code": 200,
+                }
+            )
+            assert attributes["http.route"] == "/jobs/{id}"
+
+        assert (
+            manager.request_attributes(
+                {"http.method": "BREW", "http.route": "/", "http.status_code": 418}
+            )["http.method"]
+            == OVERFLOW_VALUE
+        )
+
+
+class TestExpositionCache:
+    """Tests for the shared /metrics payload"""
+
+    def test_scrapes_within_ttl_share_one_render(self):
+        registry = CollectorRegistry()
+        counter = Counter("bench_events", "events", registry=registry)
+        cache = ExpositionCache(registry=registry, ttl=60)
+
+        first = asyncio.run(cache.get())
+        counter.inc()
+
+        assert asyncio.run(cache.get()) is first
+
+    def test_expired_payload_is_rendered_again(self):
+        registry = CollectorRegistry()
+        counter = Counter("bench_events", "events", registry=registry)
+        cache = ExpositionCache(registry=registry, ttl=0)
+
+        asyncio.run(cache.get())
+        counter.inc()
+
+        assert b"bench_events_total 1.0" in asyncio.run(cache.get())
+
+
+class RecordingMetrics:
+    """Stands in for MetricsManager and keeps what the middleware records"""
+
+    def __init__(self):
+        self.requests = []
+        self.streams = []
+
+    def record_request_duration(self, method, route, status_code, duration):
+        self.requests.append((method, route, status_code, duration))
+
+    def record_stream_duration(self, route, status_code, duration):
+        self.streams.append((route, status_code, duration))
+
+
+@pytest.fixture
+def timed():
+    """A small app behind TimingMiddleware, plus the recorded timings"""
+    app = FastAPI()
+    recorded = RecordingMetrics()
+    app.add_middleware(TimingMiddleware, metrics=recorded)
+
+    @app.get("/jobs/{job_id}")
+    def get_job(job_id: str):
+        return {"id": job_id}
+
+    @app.get("/stream")
+    def stream():
+        async def chunks():
+            yield b"first"
+            await asyncio.sleep(0.05)
+            yield b"last"
+
+        return StreamingResponse(chunks())
+
+    with TestClient(app) as client:
+        yield client, recorded
+
+
+class TestTimingMiddleware:
+    """Tests for route-template request timing"""
+
+    def test_labels_by_route_template(self, timed):
+        client, recorded = timed
+
+        client.get(f"/jobs/{JOB_ID}")
+        client.get("/jobs/another")
+
+        assert [r[:3] for r in recorded.requests] == [
+            ("GET", "/jobs/{job_id}", 200),
+            ("GET", "/jobs/{job_id}", 200),
+        ]
+        assert recorded.streams == []
+
+    def test_unmatched_paths_share_a_label(self, timed):
+        client, recorded = timed
+
+        client.get("/nope/123")
+
+        assert recorded.requests[0][:3] == ("GET", UNMATCHED_ROUTE, 404)
+
+    def test_streams_time_first_byte_and_completion(self, timed):
+        """Test that a stream records its first chunk and lifetime separately"""
+        client, recorded = timed
+
+        assert client.get("/stream").content == b"firstlast"
+
+        ((_, route, status, first_byte),) = recorded.requests
+        ((_, _, lifetime),) = recorded.streams
+        assert (route, status) == ("/stream", 200)
+        assert first_byte < 0.05 <= lifetime
@@ -0,0 +1,122 @@
+"""
+Tests for filtering GET /jobs by params
+"""
+
+import json
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from src.models import Job
+from src.params_query import (
+    ParamsQueryError,
+    parse_containment,
+    parse_path_predicate,
+)
+
+
+@pytest.fixture
+def tiles(db_session: Session):
+    now = datetime.now(UTC)
+    db_session.add_all(
+        [
+            Job(
+                name="tile",
+                params={"scene_id": "S2A_1", "aoi": "alps", "zoom": 12},
+                created_at=now - timedelta(minutes=2),
+            ),
+            Job(
+                name="tile",
+                params={"scene_id": "S2A_2", "aoi": "alps", "zoom": 14},
+                created_at=now - timedelta(minutes=1),
+            ),
+            Job(
+                name="detect",
+                params={"aoi": "andes", "model": {"version": "v3"}, "tiles": [1, 2]},
+            ),
+        ]
+    )
+    db_session.commit()
+
+
+def names(response) -> list[str]:
+    assert response.status_code == 200
+    return sorted(job["params"].get("scene_id", job["name"]) for job in response.json())
+
+
+class TestParamsGuardrails:
+    """Tests for rejecting filters the GIN index cannot serve"""
+
+    def test_containment_needs_a_value(self):
+        assert parse_containment('{"model": {"version": "v3"}}')
+
+        for raw in ("{}", '{"model": {}}', '["a"]', "not json", "{" * 2000):
+            with pytest.raises(ParamsQueryError):
+                parse_containment(raw)
+
+    def test_path_predicates_are_equality_chains(self):
+        accepted = [
+            '$.aoi == "alps"',
+            '$.model.version == "v3" && $.zoom >= 12',
+            '$."scene id" == "x" && $.tiles[*] == 2 && $.tiles[0] == 1',
+        ]
+        rejected = [
+            "$.zoom > 12",  # no equality to look up
+            '$.aoi == "alps" || $.aoi == "andes"',
+            '!($.aoi == "alps")',
+            '$.* == "alps"',
+            '$.** == "alps"',
+            "$.tiles[*] ? (@ > 1) == 2",
+            "exists($.aoi)",
+            '$.aoi like_regex "^al"',
+            "$.aoi == $.name",
+        ]
+
+        for raw in accepted:
+            assert parse_path_predicate(raw) == raw
+        for raw in rejected:
+            with pytest.raises(ParamsQueryError):
+                parse_path_predicate(raw)
+
+
+class TestParamsFilters:
+    """Tests for GET /jobs?params=...&params_path=..."""
+
+    def test_containment(self, client: TestClient, tiles):
+        response = client.get("/jobs", params={"params": '{"aoi": "alps"}'})
+        assert names(response) == ["S2A_1", "S2A_2"]
+
+        nested = json.dumps({"model": {"version": "v3"}, "tiles": [2]})
+        assert names(client.get("/jobs", params={"params": nested})) == ["detect"]
+
+    def test_path_predicate(self, client: TestClient, tiles):
+        response = client.get(
+            "/jobs", params={"params_path": '$.aoi == "alps" && $.zoom > 12'}
+        )
+        assert names(response) == ["S2A_2"]
+
+        response = client.get("/jobs", params={"params_path": "$.tiles[*] == 1"})
+        assert names(response) == ["detect"]
+
+    def test_filters_combine(self, client: TestClient, tiles):
+        response = client.get(
+            "/jobs",
+            params={
+                "params": '{"aoi": "alps"}',
+                "params_path": '$.scene_id == "S2A_1"',
+            },
+        )
+        assert names(response) == ["S2A_1"]
+
+    def test_unservable_filter_is_rejected(self, client: TestClient, tiles):
+        response = client.get("/jobs", params={"params_path": "$.zoom > 12"})
+
+        assert response.status_code == 422
+        assert "==" in response.json()["detail"]
+
+    def test_filtered_results_are_limited(self, client: TestClient, tiles):
+        response = client.get("/jobs", params={"params": '{"aoi": "alps"}', "limit": 1})
+
+        assert len(response.json()) == 1
+        assert response.json()[0]["params"]["scene_id"] == "S2A_2"  # newest
@@ -0,0 +1,128 @@
+"""
+Tests for pool configuration, statement timeouts and pool metrics
+"""
+
+import pytest
+from opentelemetry.sdk.metrics import MeterProvider
+from opentelemetry.sdk.metrics.export import InMemoryMetricReader
+from sqlalchemy import exc, text
+from src.metrics import MetricsManager
+from src.pool import InstrumentedQueuePool, create_pooled_engine
+
+
+@pytest.fixture
+def database_url(test_db_engine) -> str:
+    return test_db_engine.url.render_as_string(hide_password=False)
+
+
+class RecordingObserver:
+    def __init__(self):
+        self.waits = []
+        self.timeouts = []
+
+    def record_pool_wait(self, pool_name, seconds):
+        self.waits.append((pool_name, seconds))
+
+    def record_pool_timeout(self, pool_name):
+        self.timeouts.append(pool_name)
+
+
+def metric_names(reader: InMemoryMetricReader) -> set[str]:
+    data = reader.get_metrics_data()
+    return {
+        metric.name
+        for resource in data.resource_metrics
+        for scope in resource.scope_metrics
+        for metric in scope.metrics
+    }
+
+
+class TestStatementTimeout:
+    """Tests for per-statement timeouts in both connection modes"""
+
+    def test_direct_mode_sets_session_timeout(self, database_url):
+        engine = create_pooled_engine(database_url, statement_timeout_ms=150)
+        try:
+            with engine.connect() as conn:
+                assert conn.execute(text("SHOW statement_timeout")).scalar() == "150ms"
+                with pytest.raises(exc.OperationalError, match="statement timeout"):
+                    conn.execute(text("SELECT pg_sleep(1)"))
+        finally:
+            engine.dispose()
+
+    def test_pgbouncer_mode_scopes_timeout_to_transactions(self, database_url):
+        """Test that nothing outlives the transaction on the server connection"""
+        engine = create_pooled_engine(
+            database_url, statement_timeout_ms=150, pgbouncer=True
+        )
+        try:
+            with engine.connect() as conn:
+                assert conn.execute(text("SHOW statement_timeout")).scalar() == "150ms"
+
+            raw = engine.raw_connection()
+            try:
+                cursor = raw.cursor()
+                cursor.execute("SHOW statement_timeout")
+                assert cursor.fetchone()[0] == "0"
+            finally:
+                raw.close()
+        finally:
+            engine.dispose()
+
+
+class TestInstrumentedPool:
+    """Tests for checkout timing, timeouts and pool counts"""
+
+    def test_checkouts_and_timeouts_are_reported(self, database_url):
+        engine = create_pooled_engine(
+            database_url,
+            pool_name="test",
+            pool_size=1,
+            max_overflow=0,
+            pool_timeout=0.1,
+        )
+        observer = RecordingObserver()
+        engine.pool.observer = observer
+        try:
+            with engine.connect():
+                assert engine.pool.status_counts()["checked_out"] == 1
+                with pytest.raises(exc.TimeoutError):
+                    engine.connect()
+
+            assert observer.timeouts == ["test"]
+            assert [name for name, _ in observer.waits] == ["test"]
+            counts = engine.pool.status_counts()
+            assert counts["checked_out"] == counts["pending"] == 0
+            assert counts["max"] == 1
+        finally:
+            engine.dispose()
+
+    def test_recreated_pool_keeps_its_observer(self, database_url):
+        engine = create_pooled_engine(database_url, pool_name="test")
+        observer = RecordingObserver()
+        engine.pool.observer = observer
+
+        engine.dispose()
+
+        assert isinstance(engine.pool, InstrumentedQueuePool)
+        assert (engine.pool.pool_name, engine.pool.observer) == ("test", observer)
+
+    def test_pool_metrics_are_exported(self, database_url):
+        reader = InMemoryMetricReader()
+        manager = MetricsManager()
+        manager.meter = MeterProvider(metric_readers=[reader]).get_meter("test")
+        engine = create_pooled_engine(database_url, pool_name="test")
+        manager.instrument_pool(engine)
+        try:
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+
+            assert {
+                "db.client.connection.count",
+                "db.client.connection.max",
+                "db.client.connection.pending_requests",
+                "db.client.connection.wait_time",
+                "overflying.db.client.connection.overflow",
+            } <= metric_names(reader)
+        finally:
+            engine.dispose()
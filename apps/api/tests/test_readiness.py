@@ -0,0 +1,128 @@
+"""
+Tests for /ready and the background NATS connection
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from src.nats_client import NATSManager, NATSUnavailableError
+from src.readiness import ReadinessProbe
+
+
+def nats_status(connected: bool):
+    return SimpleNamespace(is_connected=connected)
+
+
+class CountingProbe(ReadinessProbe):
+    pings = 0
+
+    def _ping_database(self):
+        self.pings += 1
+        super()._ping_database()
+
+
+class TestReadinessProbe:
+    """Tests for the cached dependency checks"""
+
+    def test_ready_without_nats_unless_required(self, test_db_engine):
+        report = asyncio.run(ReadinessProbe(test_db_engine, nats_status(False)).check())
+
+        assert report["status"] == "ready"
+        assert report["checks"]["database"]["ok"]
+        assert report["checks"]["database"]["pool"]["class"] == "QueuePool"
+        assert "checked_out" not in report["checks"]["database"]["pool"]
+        assert not report["checks"]["nats"]["ok"]
+
+        strict = ReadinessProbe(test_db_engine, nats_status(False), requires_nats=True)
+        assert asyncio.run(strict.check())["status"] == "not_ready"
+
+    def test_unreachable_database_is_not_ready(self):
+        engine = create_engine("postgresql://nobody@127.0.0.1:1/none")
+
+        report = asyncio.run(ReadinessProbe(engine, nats_status(True)).check())
+
+        assert report["status"] == "not_ready"
+        assert "error" in report["checks"]["database"]
+
+    def test_probes_are_cached(self, test_db_engine):
+        """Test that probes within the TTL share one database round trip"""
+        probe = CountingProbe(test_db_engine, nats_status(True), ttl=60)
+
+        async def burst():
+            return await asyncio.gather(*(probe.check() for _ in range(20)))
+
+        reports = asyncio.run(burst())
+
+        assert probe.pings == 1
+        assert all(report is reports[0] for report in reports)
+
+    def test_nats_status_is_forwarded(self, test_db_engine):
+        seen = []
+        probe = ReadinessProbe(
+            test_db_engine, nats_status(True), on_nats_status=seen.append
+        )
+
+        asyncio.run(probe.check())
+
+        assert seen == [True]
+
+
+class TestReadyEndpoint:
+    """Tests for /ready next to /health"""
+
+    def test_ready_reports_checks(self, client: TestClient):
+        response = client.get("/ready")
+
+        assert response.status_code == 200
+        assert set(response.json()["checks"]) == {"database", "nats"}
+        assert client.get("/health").status_code == 200
+
+
+class FlakyNATSManager(NATSManager):
+    """Fails to connect `failures` times, then succeeds"""
+
+    def __init__(self, failures: int):
+        super().__init__("nats://127.0.0.1:1")
+        self.failures = failures
+        self.attempts = 0
+
+    async def connect(self):
+        self.attempts += 1
+        if self.attempts <= self.failures:
+            raise OSError("connection refused")
+        self.ready.set()
+
+
+class TestBackgroundConnect:
+    """Tests for connecting to NATS off the startup path"""
+
+    def test_retries_until_connected(self):
+        manager = FlakyNATSManager(failures=3)
+
+        asyncio.run(manager.run({"JOBS": ["jobs.>"]}, base_delay=0.001))
+
+        assert manager.attempts == 4
+        assert manager.ready.is_set()
+        assert manager.streams == {"JOBS": ["jobs.>"]}
+
+    def test_unreachable_server_does_not_block(self):
+        """Test that startup can proceed while NATS is still unreachable"""
+        manager = NATSManager("nats://127.0.0.1:1")
+
+        async def start():
+            task = asyncio.create_task(manager.run({}, base_delay=0.01))
+            await asyncio.sleep(0.05)
+            connected = manager.is_connected
+            task.cancel()
+            return connected
+
+        assert asyncio.run(start()) is False
+
+    def test_operations_fail_fast_while_disconnected(self):
+        manager = NATSManager("nats://127.0.0.1:1")
+
+        with pytest.raises(NATSUnavailableError, match="Not connected"):
+            asyncio.run(manager.purge_stream("JOBS"))
@@ -0,0 +1,106 @@
+"""
+Tests for scheduled submission (run_at) and retry accounting
+"""
+
+from datetime import UTC, datetime, timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from src.backlog import BacklogMonitor
+from src.models import Job, UsageRollup
+from src.usage import apply_batch
+
+
+class TestScheduledJobs:
+    """Tests for jobs submitted with run_at"""
+
+    def test_future_run_at_schedules_the_job(self, client: TestClient):
+        run_at = datetime.now(UTC) + timedelta(hours=2)
+
+        response = client.post(
+            "/jobs", json={"name": "nightly", "run_at": run_at.isoformat()}
+        )
+
+        assert response.status_code == 201
+        data = response.json()
+        assert data["state"] == "scheduled"
+        assert datetime.fromisoformat(data["next_run_at"]) == run_at
+        assert datetime.fromisoformat(data["run_at"]) == run_at
+
+    def test_past_run_at_queues_the_job(self, client: TestClient):
+        run_at = datetime.now(UTC) - timedelta(minutes=1)
+
+        response = client.post(
+            "/jobs", json={"name": "late", "run_at": run_at.isoformat()}
+        )
+
+        assert response.json()["state"] == "queued"
+
+    def test_run_at_needs_a_timezone(self, client: TestClient):
+        response = client.post(
+            "/jobs", json={"name": "nightly", "run_at": "2030-01-01T02:00:00"}
+        )
+
+        assert response.status_code == 422
+
+    def test_max_retries(self, client: TestClient):
+        response = client.post("/jobs", json={"name": "flaky", "max_retries": 5})
+        assert response.json()["max_retries"] == 5
+        assert response.json()["retries"] == 0
+
+        response = client.post("/jobs", json={"name": "flaky", "max_retries": -1})
+        assert response.status_code == 422
+
+    def test_scheduled_jobs_are_not_backlog(self, db_session: Session):
+        db_session.add_all(
+            [
+                Job(name="now"),
+                Job(
+                    name="later",
+                    state="scheduled",
+                    next_run_at=datetime.now(UTC) + timedelta(hours=1),
+                ),
+            ]
+        )
+        db_session.flush()
+
+        assert BacklogMonitor().refresh(db_session)["queued"] == 1
+
+    def test_cancel_scheduled_job(self, client: TestClient, db_session: Session):
+        job = Job(
+            name="later",
+            state="scheduled",
+            next_run_at=datetime.now(UTC) + timedelta(hours=1),
+        )
+        db_session.add(job)
+        db_session.commit()
+
+        response = client.post(f"/jobs/{job.id}/cancel")
+
+        assert response.status_code == 200
+        assert response.json()["state"] == "cancelled"
+
+
+class TestRetryUsage:
+    """Tests for billing runs that failed and were retried"""
+
+    def test_retried_runs_are_charged_but_not_counted(self, db_session: Session):
+        def event(state, seconds):
+            return {
+                "state": state,
+                "name": "flaky",
+                "submitted_by": "alice",
+                "gpu_id": 0,
+                "execution_time": seconds,
+                "timestamp": "2025-11-20T10:15:00+00:00",
+            }
+
+        apply_batch(
+            db_session,
+            [(1, event("retrying", 30.0)), (2, event("completed", 20.0))],
+        )
+
+        row = db_session.query(UsageRollup).one()
+        assert row.gpu_seconds == 50.0
+        assert row.jobs == 1
+        assert row.failed_jobs == 0
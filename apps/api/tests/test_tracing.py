@@ -0,0 +1,104 @@
+"""
+Tests for trace context propagation from requests to jobs and NATS messages
+"""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+from opentelemetry import trace
+from sqlalchemy.orm import Session
+from src import tracing
+from src.models import Job
+from src.nats_client import NATSManager
+
+
+@pytest.fixture
+def spans():
+    """In-memory span exporter (the global provider is installed once)"""
+    tracing.setup_tracing("overflying-api-test", exporter="memory")
+    if not hasattr(tracing.span_exporter, "get_finished_spans"):
+        pytest.skip("tracing already set up with another exporter")
+    tracing.span_exporter.clear()
+    yield tracing.span_exporter
+    tracing.span_exporter.clear()
+
+
+class FakeJetStream:
+    """Records what would have been published"""
+
+    def __init__(self):
+        self.published = []
+
+    async def publish(self, subject, payload, headers=None):
+        self.published.append((subject, json.loads(payload), headers))
+        return SimpleNamespace(seq=len(self.published))
+
+
+def trace_id(traceparent: str) -> int:
+    return int(traceparent.split("-")[1], 16)
+
+
+class TestTraceContext:
+    """Tests for storing and forwarding W3C trace context"""
+
+    def test_job_stores_request_trace(
+        self, client: TestClient, db_session: Session, spans
+    ):
+        """Test that a created job carries the trace of its POST request"""
+        response = client.post("/jobs", json={"name": "traced"})
+
+        job = db_session.get(Job, response.json()["id"])
+        assert "traceparent" in job.trace_context
+        server_spans = [s for s in spans.get_finished_spans() if s.name == "POST /jobs"]
+        assert server_spans
+        assert trace_id(job.trace_context["traceparent"]) == (
+            server_spans[0].context.trace_id
+        )
+
+    def test_no_context_outside_a_span(self):
+        """Test that nothing is stored for jobs created while untraced"""
+        assert tracing.current_trace_context() is None
+
+    def test_publish_injects_headers(self, spans):
+        """Test that NATS messages carry the publish span's context"""
+        manager = NATSManager()
+        manager.js = FakeJetStream()
+        tracer = tracing.get_tracer()
+
+        async def publish():
+            with tracer.start_as_current_span("request"):
+                await manager.publish(
+                    "jobs.0a1b2c3d4e5f60718293a4b5c6d7e8f9.queued", {}
+                )
+
+        asyncio.run(publish())
+
+        ((_, _, headers),) = manager.js.published
+        publish_span = next(
+            s for s in spans.get_finished_spans() if s.name == "jobs.*.queued publish"
+        )
+        assert trace_id(headers["traceparent"]) == publish_span.context.trace_id
+        received = trace.get_current_span(tracing.extract_context(headers))
+        assert received.get_span_context().span_id == publish_span.context.span_id
+
+
+class TestExporters:
+    """Tests for exporter selection"""
+
+    def test_file_exporter_writes_json_lines(self, tmp_path, spans):
+        exporter = tracing.build_exporter("file", str(tmp_path / "spans.jsonl"))
+        with tracing.get_tracer().start_as_current_span("offline"):
+            pass
+
+        exporter.export(spans.get_finished_spans())
+
+        lines = (tmp_path / "spans.jsonl").read_text().splitlines()
+        assert json.loads(lines[0])["name"] == "offline"
+
+    def test_tracing_off_and_unknown_exporters(self):
+        assert tracing.build_exporter("none", "unused") is None
+        with pytest.raises(ValueError, match="Unknown tracing exporter"):
+            tracing.build_exporter("carrier-pigeon", "unused")
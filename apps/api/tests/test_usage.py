@@ -0,0 +1,234 @@
+"""
+Tests for GPU usage rollups built from job completion events
+"""
+
+import asyncio
+import json
+from datetime import UTC, datetime
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from src.models import UsageAppliedEvent, UsageRollup
+from src.usage import UsageAccountant, apply_batch, apply_event
+
+
+def event(
+    state="completed",
+    submitted_by="alice",
+    name="train",
+    seconds=10.0,
+    at="2025-11-19T10:15:00+00:00",
+):
+    return {
+        "job_id": "00000000-0000-0000-0000-000000000001",
+        "state": state,
+        "timestamp": at,
+        "name": name,
+        "submitted_by": submitted_by,
+        "gpu_id": 0,
+        "execution_time": seconds,
+    }
+
+
+@pytest.fixture
+def rollups(db_session: Session):
+    """A few hours of usage for two submitters"""
+    apply_batch(
+        db_session,
+        [
+            (1, event(seconds=100.0)),
+            (2, event(seconds=50.0, at="2025-11-19T10:45:00+00:00")),
+            (3, event(state="failed", name="infer", seconds=5.0)),
+            (4, event(seconds=30.0, at="2025-11-20T08:00:00+00:00")),
+            (5, event(submitted_by="bob", seconds=400.0)),
+        ],
+    )
+
+
+class TestUsageRollups:
+    """Tests for folding events into rollups"""
+
+    def test_events_accumulate_per_hour(self, db_session: Session, rollups):
+        """Test that events in the same hour, submitter and name share a row"""
+        row = (
+            db_session.query(UsageRollup)
+            .filter_by(submitted_by="alice", job_name="train")
+            .order_by(UsageRollup.bucket_start)
+            .first()
+        )
+
+        assert row.bucket_start == datetime(2025, 11, 19, 10, tzinfo=UTC)
+        assert row.gpu_seconds == 150.0
+        assert row.jobs == 2
+        assert row.failed_jobs == 0
+
+    def test_redelivered_event_is_ignored(self, db_session: Session):
+        """Test that the same stream sequence is only counted once"""
+        assert apply_event(db_session, 42, event(seconds=10.0)) is True
+        assert apply_event(db_session, 42, event(seconds=10.0)) is False
+
+        row = db_session.query(UsageRollup).one()
+        assert row.gpu_seconds == 10.0
+        assert row.jobs == 1
+
+    def test_non_usage_events_are_skipped(self, db_session: Session):
+        """Test that created/running events and memoized completions are ignored"""
+        running = event(state="running")
+        memoized = {**event(), "memoized": True}
+        del memoized["gpu_id"]
+
+        assert apply_batch(db_session, [(1, running), (2, memoized)]) == 0
+        assert db_session.query(UsageRollup).count() == 0
+        assert db_session.query(UsageAppliedEvent).count() == 0
+
+    def test_preempted_runs_are_charged_but_not_counted(self, db_session: Session):
+        """Test that each run of a preempted job is billed, the job once"""
+        apply_batch(
+            db_session,
+            [(1, event(state="preempted", seconds=30.0)), (2, event(seconds=20.0))],
+        )
+
+        row = db_session.query(UsageRollup).one()
+        assert row.gpu_seconds == 50.0
+        assert row.jobs == 1
+
+    def test_gang_runs_are_charged_per_gpu(self, db_session: Session):
+        apply_event(db_session, 1, {**event(seconds=10.0), "gpu_count": 4})
+
+        assert db_session.query(UsageRollup).one().gpu_seconds == 40.0
+
+    def test_anonymous_submitter(self, db_session: Session):
+        apply_event(db_session, 1, event(submitted_by=None))
+
+        assert db_session.query(UsageRollup).one().submitted_by == ""
+
+
+class TestUsageEndpoints:
+    """Tests for the usage API"""
+
+    def test_account_usage(self, client: TestClient, rollups):
+        """Test totals, per-name breakdown and daily series for one account"""
+        response = client.get(
+            "/usage/accounts/alice",
+            params={"since": "2025-11-19T00:00:00Z", "until": "2025-11-21T00:00:00Z"},
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["gpu_seconds"] == 185.0
+        assert data["jobs"] == 4
+        assert data["failed_jobs"] == 1
+        assert [(r["job_name"], r["gpu_seconds"]) for r in data["by_job_name"]] == [
+            ("train", 180.0),
+            ("infer", 5.0),
+        ]
+        assert [(r["bucket"][:10], r["jobs"]) for r in data["series"]] == [
+            ("2025-11-19", 3),
+            ("2025-11-20", 1),
+        ]
+
+    def test_account_usage_window(self, client: TestClient, rollups):
+        response = client.get(
+            "/usage/accounts/alice",
+            params={"since": "2025-11-20T00:00:00Z", "until": "2025-11-21T00:00:00Z"},
+        )
+
+        assert response.json()["gpu_seconds"] == 30.0
+
+    def test_unknown_account_is_empty(self, client: TestClient, rollups):
+        response = client.get(
+            "/usage/accounts/nobody",
+            params={"since": "2025-11-19T00:00:00Z", "until": "2025-11-21T00:00:00Z"},
+        )
+
+        assert response.status_code == 200
+        assert response.json()["jobs"] == 0
+        assert response.json()["by_job_name"] == []
+
+    def test_leaderboard(self, client: TestClient, rollups):
+        """Test that submitters are ranked by GPU-seconds"""
+        response = client.get(
+            "/usage/leaderboard",
+            params={
+                "since": "2025-11-19T00:00:00Z",
+                "until": "2025-11-21T00:00:00Z",
+                "limit": 5,
+            },
+        )
+
+        assert response.status_code == 200
+        assert [(r["submitted_by"], r["gpu_seconds"]) for r in response.json()] == [
+            ("bob", 400.0),
+            ("alice", 185.0),
+        ]
+
+
+class FlakySubscription:
+    """Pull subscription whose first fetch fails, then delivers one batch"""
+
+    def __init__(self, error, msgs):
+        self.fetches = [error, msgs]
+
+    async def fetch(self, batch, timeout):
+        if not self.fetches:
+            await asyncio.sleep(timeout)
+            raise TimeoutError
+        outcome = self.fetches.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+class FakeMessage:
+    def __init__(self, seq, event):
+        self.subject = "jobs.1.completed"
+        self.data = json.dumps(event).encode()
+        self.metadata = SimpleNamespace(sequence=SimpleNamespace(stream=seq))
+        self.acked = False
+
+    async def ack(self):
+        self.acked = True
+
+
+class FakeNATS:
+    """Just enough of NATSManager for the accountant, counting binds"""
+
+    def __init__(self, subscription):
+        self.ready = asyncio.Event()
+        self.ready.set()
+        self.binds = 0
+        self.js = SimpleNamespace(pull_subscribe_bind=self.pull_subscribe_bind)
+        self.subscription = subscription
+
+    async def create_consumer(self, stream, name, filter_subject):
+        pass
+
+    async def pull_subscribe_bind(self, durable, stream):
+        self.binds += 1
+        return self.subscription
+
+
+class TestUsageAccountant:
+    """Tests for the consumer loop"""
+
+    def test_consumer_survives_a_failed_fetch(self):
+        """Test that a fetch error rebinds the consumer instead of ending it"""
+        msg = FakeMessage(7, event())
+        nats = FakeNATS(FlakySubscription(ConnectionError("gone"), [msg]))
+        accountant = UsageAccountant(fetch_timeout=0.01, retry_base_delay=0.01)
+        applied = []
+        accountant._apply = applied.extend
+        accountant._prune = lambda: 0
+
+        async def consume_until_acked():
+            task = asyncio.create_task(accountant.run(nats))
+            while not msg.acked:
+                await asyncio.sleep(0.01)
+            task.cancel()
+
+        asyncio.run(asyncio.wait_for(consume_until_acked(), timeout=5))
+
+        assert nats.binds == 2
+        assert applied == [(7, event())]
@@ -0,0 +1,3 @@
+"""
+Offline benchmarks for the worker (run from apps/worker: python -m benchmarks.<name>)
+"""
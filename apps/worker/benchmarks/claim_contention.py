@@ -0,0 +1,393 @@
+"""Claim throughput and contention with many concurrent worker loops
+
+Seeds a queue, then runs N worker loops (processes by default, or threads)
+that each repeat what ``Worker.poll_jobs`` and ``Worker.process_job`` do to
+the database, with a zero-duration executor: claim, then mark the job
+completed and charge usage. The run ends when the queue is drained or
+``--duration`` elapses.
+
+Which code path claims is chosen with ``--path``:
+
+- ``store`` (default): the worker's own path, a ``JobStore`` per loop
+  claiming with the policy's ``claim_prepared`` over asyncpg and prepared
+  statements, the ``finish`` transition, and usage through ``bookkeeping``.
+- ``session``: the policy's synchronous ``claim(session)`` on a SQLAlchemy
+  session, claim and completion each committed. The worker does not claim
+  this way; use it to compare the two paths or the SQL alone.
+
+Reported per claim policy and worker count:
+
+- claims/s and claim latency percentiles
+- empty-poll ratio: polls that found nothing although jobs were still queued
+  (every remaining head row was locked by another worker)
+- database time from sampling pg_stat_activity: average active sessions,
+  split by wait event type ("CPU" when not waiting, "Lock" for lock waits)
+- dead tuples, HOT updates and size growth of jobs and submitter_usage
+
+Usage:
+    DATABASE_URL=postgresql://.../bench_db python -m benchmarks.claim_contention \\
+        --jobs 50000 --workers 1,10,50 --policies priority,fair_share \\
+        --output contention.json
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import queue
+import threading
+import time
+from collections import Counter
+
+import asyncpg
+from sqlalchemy import bindparam, create_engine, make_url, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import sessionmaker
+from src.database import engine
+from src.scheduling import FairShareClaimPolicy, PriorityClaimPolicy, record_usage
+from src.store import JobStore, StoreUnavailableError
+
+from .common import (
+    drop_claim_indexes,
+    guard_database,
+    percentiles,
+    prepare_schema,
+    progress,
+    reset_tables,
+    seed_jobs,
+    write_results,
+)
+
+APPLICATION_NAME = "claim-bench"
+
+COMPLETE_JOB = text(
+    "UPDATE jobs SET state = 'completed', result = :result, "
+    "finished_at = now() WHERE id = :id"
+).bindparams(bindparam("result", type_=JSONB))
+
+# Active benchmark backends by what they wait on ("CPU" when not waiting)
+ACTIVITY_SAMPLE = text("""
+    SELECT COALESCE(wait_event_type, 'CPU') AS waiting_on, count(*) AS sessions
+    FROM pg_stat_activity
+    WHERE application_name = :app AND state = 'active'
+    GROUP BY 1
+""")
+
+QUEUE_EMPTY_SQL = "SELECT NOT EXISTS (SELECT 1 FROM jobs WHERE state = 'queued')"
+QUEUE_EMPTY = text(QUEUE_EMPTY_SQL)
+
+TABLE_STATS = text("""
+    SELECT relname, n_live_tup, n_dead_tup, n_tup_upd, n_tup_hot_upd,
+           autovacuum_count, pg_total_relation_size(relid) AS bytes
+    FROM pg_stat_user_tables
+    WHERE relname IN ('jobs', 'submitter_usage')
+""")
+
+
+def build_policy(name: str, args):
+    if name == "priority":
+        return PriorityClaimPolicy()
+    return FairShareClaimPolicy(half_life_seconds=args.half_life)
+
+
+def loop_engine(url):
+    """A one-connection engine tagged for the activity sampler"""
+    return create_engine(
+        url,
+        pool_size=1,
+        max_overflow=0,
+        connect_args={"application_name": APPLICATION_NAME},
+    )
+
+
+def worker_loop(url, policy_name, args, start, stop, results):
+    """One simulated worker: claim, complete with zero duration, repeat"""
+    policy = build_policy(policy_name, args)
+    if args.path == "store":
+        counts = asyncio.run(store_loop(url, policy, args, start, stop))
+    else:
+        counts = session_loop(url, policy, args, start, stop)
+    results.put(counts)
+
+
+def new_counts() -> dict:
+    return {
+        "claims": 0,
+        "empty_polls": 0,
+        "idle_polls": 0,
+        "errors": Counter(),
+        "latencies": [],
+    }
+
+
+async def store_loop(url, policy, args, start, stop) -> dict:
+    """The worker's path: claim_prepared on a JobStore (asyncpg)"""
+    dsn = make_url(url).update_query_dict({"application_name": APPLICATION_NAME})
+    bookkeeping_engine = loop_engine(url)
+    store = JobStore(
+        dsn.render_as_string(hide_password=False),
+        policy,
+        session_factory=sessionmaker(bind=bookkeeping_engine),
+        statements={"queue_empty": QUEUE_EMPTY_SQL},
+    )
+    counts = new_counts()
+
+    await store.connection()  # connect and prepare before the start signal
+    with bookkeeping_engine.connect():
+        pass
+    start.wait()
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        try:
+            row = await store.claim()
+        except (StoreUnavailableError, asyncpg.PostgresError) as e:
+            counts["errors"][type(e.__cause__ or e).__name__] += 1
+            continue
+        counts["latencies"].append(time.perf_counter() - t0)
+
+        if row is None:
+            # Contention only if work remained; polls after the drain are idle
+            empty = (await store.fetchrow("queue_empty"))[0]
+            counts["idle_polls" if empty else "empty_polls"] += 1
+            if args.poll_interval:
+                await asyncio.sleep(args.poll_interval)
+            continue
+
+        counts["claims"] += 1
+        await store.transition(
+            "finish", id=row.id, state="completed", result={"success": True}
+        )
+        if args.record_usage:
+            await store.bookkeeping(record_usage, row.submitted_by, 1.0, args.half_life)
+
+    await store.close()
+    bookkeeping_engine.dispose()
+    return {**counts, "errors": dict(counts["errors"])}
+
+
+def session_loop(url, policy, args, start, stop) -> dict:
+    """The synchronous path: policy.claim(session), committed per step"""
+    worker_engine = loop_engine(url)
+    session = sessionmaker(bind=worker_engine)()
+    counts = new_counts()
+
+    session.execute(text("SELECT 1"))  # connect before the start signal
+    session.commit()
+    start.wait()
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        try:
+            row = policy.claim(session)
+            session.commit()
+        except DBAPIError as e:
+            session.rollback()
+            counts["errors"][type(e.orig).__name__] += 1
+            continue
+        counts["latencies"].append(time.perf_counter() - t0)
+
+        if row is None:
+            # Contention only if work remained; polls after the drain are idle
+            empty = session.execute(QUEUE_EMPTY).scalar()
+            counts["idle_polls" if empty else "empty_polls"] += 1
+            session.commit()
+            if args.poll_interval:
+                time.sleep(args.poll_interval)
+            continue
+
+        counts["claims"] += 1
+        session.execute(COMPLETE_JOB, {"id": row.id, "result": {"success": True}})
+        if args.record_usage:
+            record_usage(session, row.submitted_by, 1.0, half_life=args.half_life)
+        session.commit()
+
+    session.close()
+    worker_engine.dispose()
+    return {**counts, "errors": dict(counts["errors"])}
+
+
+def table_stats(conn) -> dict:
+    return {row.relname: row._asdict() for row in conn.execute(TABLE_STATS)}
+
+
+def run_once(policy_name: str, workers: int, args) -> dict:
+    reset_tables(engine)
+    per_submitter = args.jobs // args.submitters
+    for i in range(args.submitters):
+        seed_jobs(engine, per_submitter, f"submitter-{i}", args.max_priority)
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        toggle = "false" if args.no_autovacuum else "true"
+        for table in ("jobs", "submitter_usage"):
+            conn.execute(
+                text(f"ALTER TABLE {table} SET (autovacuum_enabled = {toggle})")
+            )
+        conn.execute(text("VACUUM ANALYZE jobs, submitter_usage"))
+        time.sleep(1.5)  # let the stats from seeding land before the baseline
+        before = table_stats(conn)
+
+    if args.mode == "process":
+        ctx = multiprocessing.get_context("spawn")
+        start, stop, results = ctx.Event(), ctx.Event(), ctx.Queue()
+        spawn = ctx.Process
+    else:
+        start, stop, results = threading.Event(), threading.Event(), queue.Queue()
+        spawn = threading.Thread
+
+    url = engine.url.render_as_string(hide_password=False)
+    loops = [
+        spawn(target=worker_loop, args=(url, policy_name, args, start, stop, results))
+        for _ in range(workers)
+    ]
+    for loop in loops:
+        loop.start()
+    # Give every loop time to import and connect before timing starts
+    time.sleep(args.startup_seconds)
+
+    samples = Counter()
+    sample_count = 0
+    started = time.perf_counter()
+    start.set()
+    with engine.connect() as conn:
+        while time.perf_counter() - started < args.duration:
+            time.sleep(args.sample_interval)
+            for waiting_on, sessions in conn.execute(
+                ACTIVITY_SAMPLE, {"app": APPLICATION_NAME}
+            ):
+                samples[waiting_on] += sessions
+            sample_count += 1
+            remaining = conn.execute(
+                text("SELECT count(*) FROM jobs WHERE state = 'queued'")
+            ).scalar()
+            conn.commit()
+            if remaining == 0:
+                break
+    elapsed = time.perf_counter() - started
+    stop.set()
+
+    per_loop = [results.get(timeout=60) for _ in loops]
+    for loop in loops:
+        loop.join()
+
+    time.sleep(1.5)  # table statistics are flushed about once a second
+    with engine.connect() as conn:
+        after = table_stats(conn)
+
+    claims = sum(r["claims"] for r in per_loop)
+    empty = sum(r["empty_polls"] for r in per_loop)
+    idle = sum(r["idle_polls"] for r in per_loop)
+    errors = sum((Counter(r["errors"]) for r in per_loop), Counter())
+    latencies = [sample for r in per_loop for sample in r["latencies"]]
+    aas = {k: v / sample_count for k, v in samples.items()} if sample_count else {}
+
+    return {
+        "workers": workers,
+        "claims": claims,
+        "drained": remaining == 0,
+        "elapsed_seconds": elapsed,
+        "claims_per_second": claims / elapsed if elapsed else 0.0,
+        "empty_poll_ratio": empty / (claims + empty) if claims + empty else 0.0,
+        "idle_polls": idle,
+        "errors": dict(errors),
+        "claim_latency_ms": {k: v * 1000 for k, v in percentiles(latencies).items()},
+        # Average active sessions: total is DB time per wall second
+        "db_active_sessions": {
+            "total": sum(aas.values()),
+            **dict(sorted(aas.items())),
+        },
+        "tables": {
+            name: {
+                "dead_tuples": after[name]["n_dead_tup"],
+                "dead_tuple_growth": after[name]["n_dead_tup"]
+                - before[name]["n_dead_tup"],
+                "updates": after[name]["n_tup_upd"] - before[name]["n_tup_upd"],
+                "hot_updates": after[name]["n_tup_hot_upd"]
+                - before[name]["n_tup_hot_upd"],
+                "autovacuums": after[name]["autovacuum_count"]
+                - before[name]["autovacuum_count"],
+                "size_growth_bytes": after[name]["bytes"] - before[name]["bytes"],
+            }
+            for name in after
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=50_000)
+    parser.add_argument("--submitters", type=int, default=20)
+    parser.add_argument("--max-priority", type=int, default=9)
+    parser.add_argument(
+        "--workers",
+        type=lambda s: [int(n) for n in s.split(",")],
+        default=[1, 10, 50],
+    )
+    parser.add_argument(
+        "--policies",
+        type=lambda s: s.split(","),
+        default=["priority", "fair_share"],
+    )
+    parser.add_argument("--mode", choices=["process", "thread"], default="process")
+    parser.add_argument(
+        "--path",
+        choices=["store", "session"],
+        default="store",
+        help="Claim through the worker's JobStore (asyncpg) or a sync session",
+    )
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--poll-interval", type=float, default=0.0)
+    parser.add_argument("--sample-interval", type=float, default=0.1)
+    parser.add_argument("--startup-seconds", type=float, default=3.0)
+    parser.add_argument("--half-life", type=float, default=3600.0)
+    parser.add_argument(
+        "--no-record-usage",
+        dest="record_usage",
+        action="store_false",
+        help="Skip the per-job submitter_usage upsert",
+    )
+    parser.add_argument(
+        "--without-claim-indexes",
+        action="store_true",
+        help="Drop the partial claim indexes (schema variant)",
+    )
+    parser.add_argument(
+        "--no-autovacuum",
+        action="store_true",
+        help="Disable autovacuum on the benchmark tables to see raw bloat",
+    )
+    parser.add_argument("--output", help="Write JSON here instead of stdout")
+    parser.add_argument("--force", action="store_true", help="Skip the DB name guard")
+    args = parser.parse_args()
+
+    unknown = set(args.policies) - {"priority", "fair_share"}
+    if unknown:
+        parser.error(f"unknown policies: {sorted(unknown)}")
+
+    guard_database(engine, args.force)
+    with engine.connect() as conn:
+        max_connections = int(conn.execute(text("SHOW max_connections")).scalar())
+    if max(args.workers) + 5 > max_connections:
+        parser.error(
+            f"{max(args.workers)} workers need more than max_connections="
+            f"{max_connections}; raise it or use fewer workers"
+        )
+
+    prepare_schema(engine)
+    if args.without_claim_indexes:
+        drop_claim_indexes(engine)
+
+    results = {}
+    for policy_name in args.policies:
+        results[policy_name] = []
+        for workers in args.workers:
+            progress(
+                f"{policy_name} with {workers} {args.mode} workers ({args.path} path)"
+            )
+            results[policy_name].append(run_once(policy_name, workers, args))
+
+    reset_tables(engine)
+    engine.dispose()
+    write_results("claim_contention", vars(args), results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Compare claim-ordering policies on a skewed queue
+
+One heavy submitter drops a large backlog first, then several light
+submitters queue a handful of jobs each. Every policy claims the same number
+of jobs from an identical queue; each claim is charged a fixed amount of GPU
+time so fair-share sees realistic usage. Reported per policy:
+
+- claim latency percentiles and claims/s (cost of the policy's SQL)
+- claims served per submitter and Jain's fairness index over them
+- how many claims each light submitter waited before its first job ran
+
+Usage:
+    DATABASE_URL=postgresql://.../bench_db python -m benchmarks.claim_policy \\
+        --heavy-jobs 100000 --claims 500 --output claim_policy.json
+"""
+
+import argparse
+import time
+from collections import Counter
+
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+from src.database import engine
+from src.scheduling import FairShareClaimPolicy, PriorityClaimPolicy, record_usage
+
+from .common import (
+    guard_database,
+    jain_index,
+    percentiles,
+    prepare_schema,
+    reset_tables,
+    seed_jobs,
+    write_results,
+)
+
+
+def seed_scenario(engine, args):
+    seed_jobs(engine, args.heavy_jobs, "heavy", args.max_priority, age_seconds=3600)
+    for i in range(args.light_submitters):
+        seed_jobs(engine, args.light_jobs, f"light-{i}", args.max_priority)
+
+
+def run_policy(engine, policy, args) -> dict:
+    reset_tables(engine)
+    seed_scenario(engine, args)
+    session = sessionmaker(bind=engine)()
+
+    latencies = []
+    served = Counter()
+    first_claim = {}
+    started = time.perf_counter()
+    for n in range(args.claims):
+        t0 = time.perf_counter()
+        row = policy.claim(session)
+        session.commit()
+        latencies.append(time.perf_counter() - t0)
+        if row is None:
+            break
+
+        served[row.submitted_by] += 1
+        first_claim.setdefault(row.submitted_by, n)
+        session.execute(
+            text("UPDATE jobs SET state = 'completed' WHERE id = :id"), {"id": row.id}
+        )
+        record_usage(
+            session, row.submitted_by, args.job_seconds, half_life=args.half_life
+        )
+        session.commit()
+    elapsed = time.perf_counter() - started
+    session.close()
+
+    submitters = ["heavy"] + [f"light-{i}" for i in range(args.light_submitters)]
+    light_waits = [first_claim.get(s, args.claims) for s in submitters[1:]]
+    return {
+        "claims": len(latencies),
+        "claims_per_second": len(latencies) / elapsed if elapsed else 0.0,
+        "latency_ms": {k: v * 1000 for k, v in percentiles(latencies).items()},
+        "served": {s: served.get(s, 0) for s in submitters},
+        "jain_index": jain_index([served.get(s, 0) for s in submitters]),
+        "light_first_claim": {
+            "mean": sum(light_waits) / len(light_waits) if light_waits else 0.0,
+            "max": max(light_waits, default=0),
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--heavy-jobs", type=int, default=100_000)
+    parser.add_argument("--light-submitters", type=int, default=9)
+    parser.add_argument("--light-jobs", type=int, default=100)
+    parser.add_argument("--max-priority", type=int, default=0)
+    parser.add_argument("--claims", type=int, default=500)
+    parser.add_argument("--job-seconds", type=float, default=10.0)
+    parser.add_argument("--half-life", type=float, default=3600.0)
+    parser.add_argument("--output", help="Write JSON here instead of stdout")
+    parser.add_argument("--force", action="store_true", help="Skip the DB name guard")
+    args = parser.parse_args()
+
+    guard_database(engine, args.force)
+    prepare_schema(engine)
+
+    policies = [
+        PriorityClaimPolicy(),
+        FairShareClaimPolicy(half_life_seconds=args.half_life),
+    ]
+    results = {policy.name: run_policy(engine, policy, args) for policy in policies}
+    reset_tables(engine)
+    engine.dispose()
+
+    write_results("claim_policy", vars(args), results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""Shared helpers for worker benchmarks
+
+Benchmarks use the worker's own settings (DATABASE_URL) and own that
+database: every run truncates the jobs-related tables. As a guard they refuse
+to run unless the database name contains "bench" or "test" (or --force).
+"""
+
+import json
+import math
+import platform
+import sys
+from datetime import UTC, datetime
+
+from sqlalchemy import Engine, text
+
+# Same indexes as the migrations on the worker's tables (keep in step with
+# db/migrations), so claim plans match production and each claim, promotion
+# and transition pays for the same index maintenance
+JOB_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS ix_jobs_state ON jobs (state)",
+    "CREATE INDEX IF NOT EXISTS ix_jobs_created_at ON jobs (created_at)",
+    "CREATE INDEX IF NOT EXISTS ix_jobs_updated_at ON jobs (updated_at)",
+    """
+    CREATE INDEX IF NOT EXISTS ix_jobs_memo_key
+    ON jobs (memo_key) WHERE memo_key IS NOT NULL
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS ix_jobs_memoized_from
+    ON jobs (memoized_from) WHERE memoized_from IS NOT NULL
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS ix_jobs_queued_priority
+    ON jobs (priority DESC, created_at) WHERE state = 'queued'
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS ix_jobs_queued_submitter_priority
+    ON jobs ((COALESCE(submitted_by, '')), priority DESC, created_at)
+    WHERE state = 'queued'
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS ix_jobs_queued_submitter_created
+    ON jobs ((COALESCE(submitted_by, '')), created_at) WHERE state = 'queued'
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS ix_jobs_terminal_finished_at
+    ON jobs (finished_at) WHERE state IN ('completed', 'failed', 'cancelled')
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS ix_jobs_queued_queued_at
+    ON jobs (queued_at) WHERE state = 'queued'
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS ix_jobs_scheduled_next_run
+    ON jobs (next_run_at) WHERE state = 'scheduled'
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS ix_jobs_queued_input_keys
+    ON jobs USING gin (input_keys) WHERE state = 'queued'
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS ix_jobs_params
+    ON jobs USING gin (params jsonb_path_ops)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS ix_job_result_cache_expires_at
+    ON job_result_cache (expires_at)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS ix_job_result_cache_created_at
+    ON job_result_cache (created_at)
+    """,
+]
+
+# The partial indexes claims read (--without-claim-indexes drops them)
+CLAIM_INDEX_NAMES = [
+    "ix_jobs_queued_priority",
+    "ix_jobs_queued_submitter_priority",
+    "ix_jobs_queued_submitter_created",
+    "ix_jobs_queued_input_keys",
+]
+
+
+def progress(message: str):
+    """Progress line on stderr, leaving stdout to the JSON results"""
+    print(f"[Bench] {message}", file=sys.stderr, flush=True)
+
+
+def guard_database(engine: Engine, force: bool = False):
+    """Refuse to truncate anything that does not look like a scratch database"""
+    name = engine.url.database or ""
+    if not force and "bench" not in name and "test" not in name:
+        raise SystemExit(
+            f"Refusing to benchmark against database {name!r}: it will be "
+            "truncated. Use a *bench*/*test* database or pass --force."
+        )
+
+
+def prepare_schema(engine: Engine):
+    """Create the worker tables and production indexes if they are missing"""
+    from src.database import Base  # needs DATABASE_URL; the simulator does not
+
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        for ddl in JOB_INDEXES:
+            conn.execute(text(ddl))
+
+
+def drop_claim_indexes(engine: Engine):
+    """Schema variant without the partial claim indexes (baseline comparison)"""
+    with engine.begin() as conn:
+        for name in CLAIM_INDEX_NAMES:
+            conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+
+
+def reset_tables(engine: Engine):
+    """Empty every table a benchmark writes to"""
+    with engine.begin() as conn:
+        conn.execute(text("TRUNCATE jobs, submitter_usage, job_result_cache"))
+
+
+def seed_jobs(
+    engine: Engine,
+    count: int,
+    submitted_by: str,
+    max_priority: int = 0,
+    age_seconds: float = 0.0,
+):
+    """Insert `count` queued jobs server-side, the newest `age_seconds` old"""
+    with engine.begin() as conn:
+        conn.execute(
+            text("""
+                INSERT INTO jobs (id, name, params, priority, state, created_at, submitted_by)
+                SELECT gen_random_uuid(), 'bench', '{}'::jsonb,
+                       floor(random() * (:max_priority + 1))::int, 'queued',
+                       now() - make_interval(secs => :age + g * 0.001),
+                       :submitted_by
+                FROM generate_series(1, :count) g
+            """),
+            {
+                "count": count,
+                "submitted_by": submitted_by,
+                "max_priority": max_priority,
+                "age": age_seconds,
+            },
+        )
+        conn.execute(text("ANALYZE jobs"))
+
+
+def percentiles(samples: list[float], points=(50, 95, 99)) -> dict[str, float]:
+    """Nearest-rank percentiles, keyed p50/p95/p99"""
+    if not samples:
+        return {f"p{p}": 0.0 for p in points}
+    ordered = sorted(samples)
+    return {
+        f"p{p}": ordered[min(len(ordered) - 1, math.ceil(p / 100 * len(ordered)) - 1)]
+        for p in points
+    }
+
+
+def jain_index(values: list[float]) -> float:
+    """Jain's fairness index: 1.0 is perfectly even, 1/n is one winner"""
+    if not values or not any(values):
+        return 1.0
+    return sum(values) ** 2 / (len(values) * sum(v * v for v in values))
+
+
+def write_results(name: str, params: dict, results: dict, output: str | None):
+    """Emit a machine-readable result document (stdout when no path)"""
+    document = {
+        "benchmark": name,
+        "timestamp": datetime.now(UTC).isoformat(),
+        "host": {"python": sys.version.split()[0], "platform": platform.platform()},
+        "params": params,
+        "results": results,
+    }
+    payload = json.dumps(document, indent=2, default=str)
+    if output:
+        with open(output, "w") as f:
+            f.write(payload + "\n")
+        progress(f"Results written to {output}")
+    else:
+        print(payload)
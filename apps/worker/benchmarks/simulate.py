@@ -0,0 +1,167 @@
+"""Offline claim-policy comparison with the discrete-event simulator
+
+Generates one seeded synthetic workload (1M jobs over 30 days by default) and
+replays it through ``src.simulator`` once per policy, on a virtual clock and
+without a database. Every job takes one GPU: gang jobs and backfill are not
+modelled, so do not use the results to choose gang or backfill settings.
+Reported per policy:
+
+- GPU utilisation (workers run a job on each free GPU, as the worker does)
+- queue-wait percentiles overall and per priority
+- per-submitter mean/p95 wait and bounded slowdown, and Jain's fairness
+  index over the submitters' mean slowdown
+- simulator cost: events handled and wall-clock seconds
+
+Usage:
+    python -m benchmarks.simulate --jobs 1000000 --days 30 --workers 8 \\
+        --load 0.85 --burst 20 --output simulate.json
+"""
+
+import argparse
+from types import SimpleNamespace
+
+from src.scheduling import build_claim_policy
+from src.simulator import Workload, generate_workload, simulate
+
+from .common import jain_index, percentiles, progress, write_results
+
+# Bounded slowdown: short jobs count as this long so tiny runtimes do not dominate
+SLOWDOWN_FLOOR_SECONDS = 10.0
+
+WAIT_POINTS = (50, 90, 99)
+
+
+def wait_stats(waits: list[float], points=WAIT_POINTS) -> dict:
+    return {
+        "mean": sum(waits) / len(waits) if waits else 0.0,
+        **percentiles(waits, points),
+        "max": max(waits, default=0.0),
+    }
+
+
+def summarize(workload: Workload, run) -> dict:
+    by_submitter = [[] for _ in workload.submitters]
+    slowdowns = [0.0] * len(workload.submitters)
+    demand = [0.0] * len(workload.submitters)
+    by_priority = {}
+    waits = []
+    for job, (start, arrival) in enumerate(
+        zip(run.start, workload.arrival, strict=True)
+    ):
+        wait = start - arrival
+        duration = workload.duration[job]
+        s = workload.submitter[job]
+        waits.append(wait)
+        by_submitter[s].append(wait)
+        by_priority.setdefault(workload.priority[job], []).append(wait)
+        floor = max(duration, SLOWDOWN_FLOOR_SECONDS)
+        slowdowns[s] += (wait + floor) / floor
+        demand[s] += duration
+
+    submitters = [
+        {
+            "submitter": name,
+            "jobs": len(by_submitter[s]),
+            "demand_share": demand[s] / run.busy_seconds,
+            "mean_wait_seconds": wait_stats(by_submitter[s])["mean"],
+            "p95_wait_seconds": percentiles(by_submitter[s], (95,))["p95"],
+            "mean_slowdown": slowdowns[s] / len(by_submitter[s]),
+        }
+        for s, name in enumerate(workload.submitters)
+        if by_submitter[s]
+    ]
+
+    return {
+        "policy": run.policy,
+        "jobs": len(workload),
+        "simulated_days": run.makespan / 86400,
+        "gpu_utilization": run.busy_seconds / (run.gpus * run.makespan),
+        "wait_seconds": wait_stats(waits),
+        "wait_by_priority": {
+            str(p): {"jobs": len(w), **wait_stats(w, (95,))}
+            for p, w in sorted(by_priority.items(), reverse=True)
+        },
+        "fairness": {
+            "jain_slowdown": jain_index([s["mean_slowdown"] for s in submitters]),
+            "worst_p95_wait_seconds": max(s["p95_wait_seconds"] for s in submitters),
+        },
+        "submitters": submitters,
+        "engine": {
+            "events": run.events,
+            "wall_seconds": run.wall_seconds,
+            "jobs_per_second": len(workload) / run.wall_seconds,
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=1_000_000)
+    parser.add_argument("--days", type=float, default=30.0)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--load", type=float, default=0.85, help="Offered load per GPU")
+    parser.add_argument("--submitters", type=int, default=20)
+    parser.add_argument("--skew", type=float, default=1.0, help="Zipf exponent")
+    parser.add_argument(
+        "--burst", type=float, default=1.0, help="Mean jobs per submission"
+    )
+    parser.add_argument("--max-priority", type=int, default=9)
+    parser.add_argument("--duration-sigma", type=float, default=1.0)
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=5.0,
+        help="Idle worker sleep; 0 wakes idle workers on arrival",
+    )
+    parser.add_argument(
+        "--policies",
+        type=lambda s: s.split(","),
+        default=["priority", "fair_share"],
+    )
+    parser.add_argument("--half-life", type=float, default=3600.0)
+    parser.add_argument("--fair-share-weight", type=float, default=10.0)
+    parser.add_argument("--aging-per-hour", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    unknown = set(args.policies) - {"priority", "fair_share"}
+    if unknown:
+        parser.error(f"unknown policies: {sorted(unknown)}")
+
+    workload = generate_workload(
+        args.jobs,
+        days=args.days,
+        workers=args.workers,
+        load=args.load,
+        submitters=args.submitters,
+        skew=args.skew,
+        burst=args.burst,
+        max_priority=args.max_priority,
+        duration_sigma=args.duration_sigma,
+        seed=args.seed,
+    )
+
+    results = {}
+    for name in args.policies:
+        policy = build_claim_policy(
+            SimpleNamespace(
+                claim_policy=name,
+                fair_share_half_life_seconds=args.half_life,
+                fair_share_weight=args.fair_share_weight,
+                priority_aging_per_hour=args.aging_per_hour,
+                fair_share_candidates=1,
+            )
+        )
+        progress(f"Simulating {args.jobs} jobs with {name}")
+        run = simulate(
+            workload, policy, args.workers, args.poll_interval, seed=args.seed
+        )
+        results[name] = summarize(workload, run)
+        progress(f"{name}: {run.wall_seconds:.1f}s for {run.events} events")
+
+    write_results("simulate", vars(args), results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Cancellation and deadlines for running jobs
+
+``POST /jobs/{id}/cancel`` on the API marks a running job ``cancelling`` and
+publishes on ``jobs.{id}.cancel``. Every worker subscribes to those subjects;
+the one running the job sets its stop signal, the executor abandons the job
+at once, the GPU is released and the job is recorded ``cancelled``.
+
+A cancel published while NATS was unreachable, or just before the worker
+started watching, would otherwise be missed, so each running job's state is
+also polled every ``check_interval_seconds`` as a backstop.
+
+Deadlines (``max_runtime_seconds`` on the job, capped by the worker's
+``job_max_runtime_seconds``) stop a run the same way; the job is recorded
+``failed`` with ``max_runtime_exceeded``.
+"""
+
+import asyncio
+import logging
+
+from .executor import StopSignal
+
+logger = logging.getLogger(__name__)
+
+CANCEL_SUBJECT = "jobs.*.cancel"
+
+CANCELLING_STATE = "cancelling"
+CANCELLED_STATE = "cancelled"
+
+STATE_PROBE = "SELECT state FROM jobs WHERE id = :id"
+
+
+def max_runtime(job_max_runtime: int | None, worker_max_runtime: float) -> float:
+    """The tighter of the job's and the worker's limits; 0 when neither is set"""
+    limits = [limit for limit in (job_max_runtime, worker_max_runtime) if limit]
+    return min(limits, default=0)
+
+
+class RunningJobs:
+    """Stop signals of the jobs this worker is running, by job id"""
+
+    statements = {"job_state": STATE_PROBE}
+
+    def __init__(self, check_interval_seconds: float = 5.0):
+        self.check_interval_seconds = check_interval_seconds
+        self.signals: dict[str, StopSignal] = {}
+
+    def start(self, job_id) -> StopSignal:
+        signal = self.signals[str(job_id)] = StopSignal()
+        return signal
+
+    def finish(self, job_id):
+        self.signals.pop(str(job_id), None)
+
+    def stop(self, job_id, reason: str) -> bool:
+        """Ask a running job to stop; False if it is not running here"""
+        signal = self.signals.get(str(job_id))
+        if signal is None:
+            return False
+        logger.info("Stopping job %s (%s)", job_id, reason)
+        signal.request(reason)
+        return True
+
+    async def on_cancel(self, msg):
+        """NATS callback for ``CANCEL_SUBJECT``"""
+        self.stop(msg.subject.split(".")[1], "cancel")
+
+    async def watch_state(self, store, job_id):
+        """Backstop for missed cancel messages; runs until cancelled"""
+        if not self.check_interval_seconds:
+            return
+        while True:
+            await asyncio.sleep(self.check_interval_seconds)
+            try:
+                row = await store.fetchrow("job_state", id=job_id)
+            except Exception as e:
+                logger.warning("Cancellation probe failed: %s", e)
+                continue
+            if row and row.state == CANCELLING_STATE:
+                self.stop(job_id, "cancel")
+                return
@@ -0,0 +1,81 @@
+"""
+Cardinality limits for metric attributes
+
+Every distinct attribute set on an instrument is a separate Prometheus time
+series that lives for the life of the process. Attributes built from job IDs,
+raw URLs or error messages therefore grow memory and /metrics scrape time with
+every job. ``AttributeGuard`` bounds them per instrument:
+
+- only allow-listed attribute keys are kept
+- values can be normalised first (``/jobs/<uuid>`` -> ``/jobs/{id}``)
+- a key may be restricted to a fixed set of values
+- each key keeps at most ``max_values`` distinct values; later newcomers are
+  reported as ``OVERFLOW_VALUE`` instead of creating new series
+"""
+
+import re
+import threading
+from collections.abc import Callable, Collection
+
+OVERFLOW_VALUE = "_other"
+
+_ID_TOKEN = re.compile(
+    r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}"
+    r"|\d+|[0-9a-fA-F]{16,}"
+)
+
+HTTP_METHODS = frozenset(
+    {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS", "TRACE", "CONNECT"}
+)
+
+
+def _is_id(token: str) -> bool:
+    return _ID_TOKEN.fullmatch(token) is not None
+
+
+def subject_template(subject: str) -> str:
+    """``jobs.<uuid>.completed`` -> ``jobs.*.completed``"""
+    return ".".join("*" if _is_id(t) else t for t in subject.split("."))
+
+
+def path_template(path: str) -> str:
+    """``/jobs/<uuid>`` -> ``/jobs/{id}``"""
+    return "/".join("{id}" if _is_id(s) else s for s in path.split("/"))
+
+
+# None: any value (bounded); callable: normaliser; collection: allowed values
+AttributeRule = Callable[[str], str] | Collection[str] | None
+
+
+class AttributeGuard:
+    """Keeps one instrument's attribute sets within a fixed budget"""
+
+    def __init__(self, rules: dict[str, AttributeRule], max_values: int = 100):
+        self.rules = rules
+        self.max_values = max_values
+        self._seen: dict[str, set[str]] = {key: set() for key in rules}
+        self._lock = threading.Lock()
+
+    def __call__(self, attributes: dict) -> dict[str, str]:
+        bounded = {}
+        for key, value in attributes.items():
+            if key not in self.rules:
+                continue
+            bounded[key] = self._bound(key, str(value))
+        return bounded
+
+    def _bound(self, key: str, value: str) -> str:
+        rule = self.rules[key]
+        if callable(rule):
+            value = rule(value)
+        elif rule is not None and value not in rule:
+            return OVERFLOW_VALUE
+
+        seen = self._seen[key]
+        if value in seen:
+            return value
+        with self._lock:
+            if len(seen) >= self.max_values:
+                return OVERFLOW_VALUE
+            seen.add(value)
+        return value
@@ -8,6 +8,85 @@ class Settings(BaseSettings):
     poll_interval: int = 5
     gpu_simulation: bool = True
     nats_url: str = "nats://localhost:4222"
+    memoization_ttl_seconds: int = 86400
+    memoization_max_entries: int = 10000
+
+    # GPU capacity heartbeats on gpus.<worker_id> (default: the hostname);
+    # the API forgets a worker after three missed heartbeats
+    worker_id: str = ""
+    gpu_heartbeat_interval_seconds: float = 5.0
+
+    # Connection pool: size plus overflow (one claim loop needs few),
+    # checkout timeout, recycle age; statement timeout in ms (0 disables);
+    # set db_pgbouncer behind PgBouncer in transaction pooling mode
+    db_pool_size: int = 2
+    db_max_overflow: int = 2
+    db_pool_timeout_seconds: float = 30.0
+    db_pool_recycle_seconds: int = 1800
+    db_pool_pre_ping: bool = True
+    db_statement_timeout_ms: int = 30000
+    db_pgbouncer: bool = False
+
+    # Claim connection (asyncpg, outside the pool): connect timeout, and the
+    # cap on the loop's backoff while the database is unreachable
+    db_connect_timeout_seconds: float = 5.0
+    db_reconnect_max_backoff_seconds: float = 30.0
+
+    # Claim ordering: "priority" (strict) or "fair_share"
+    claim_policy: str = "priority"
+    fair_share_half_life_seconds: float = 3600.0
+    fair_share_weight: float = 10.0
+    priority_aging_per_hour: float = 1.0
+    fair_share_candidates: int = 4
+
+    # Preemption: checkpoint and requeue a running job when one at least
+    # min_priority_gap more urgent is queued, once it has run
+    # min_runtime_seconds; a job is preempted at most max_per_job times
+    preemption_enabled: bool = True
+    preemption_min_priority_gap: int = 10
+    preemption_min_runtime_seconds: float = 30.0
+    preemption_max_per_job: int = 3
+    preemption_check_interval_seconds: float = 2.0
+
+    # Cancellation and deadlines: how often a running job's row is checked
+    # for a missed cancel (0 disables), and a cap on any job's run time in
+    # seconds on top of its own max_runtime_seconds (0: no cap)
+    cancel_check_interval_seconds: float = 5.0
+    job_max_runtime_seconds: float = 0.0
+
+    # Retries of failed runs (a job's own max_retries overrides max_retries),
+    # after base * 2^n seconds capped at max, jittered down by up to half;
+    # the next scheduled job's due time is re-read at least every poll_interval
+    max_retries: int = 2
+    retry_base_delay_seconds: float = 10.0
+    retry_max_delay_seconds: float = 600.0
+    schedule_batch_size: int = 100
+
+    # Input cache: directory (default: under the system temp dir) and size
+    # bound for staged job inputs, the most recently used keys advertised in
+    # heartbeats and preferred by claims, and how many priority points below
+    # the queue head a job with cached inputs may be (negative: no affinity)
+    input_cache_dir: str = ""
+    input_cache_max_bytes: int = 10 * 2**30
+    input_cache_advertise_keys: int = 256
+    input_cache_affinity_skew: int = 1
+
+    # Metrics: distinct values per attribute before "_other", /metrics cache TTL
+    metrics_max_attribute_values: int = 100
+    metrics_scrape_cache_seconds: float = 1.0
+
+    # Logging: level, json|text, per-logger levels ("src.nats_client=DEBUG"),
+    # and records per second per repeated message after a burst (0 disables)
+    log_level: str = "INFO"
+    log_format: str = "json"
+    log_levels: str = ""
+    log_sample_rate: float = 10.0
+    log_sample_burst: int = 20
+
+    # Tracing: exporter none|console|file|memory|otlp|module:factory
+    tracing_exporter: str = "none"
+    tracing_sample_ratio: float = 1.0
+    tracing_file_path: str = "spans.jsonl"
 
     model_config = SettingsConfigDict(
         env_file=".env", env_file_encoding="utf-8", case_sensitive=False, extra="ignore"
@@ -1,11 +1,24 @@
 """Database connection for worker"""
 
-from src.config import settings
-from sqlalchemy import TIMESTAMP, Column, Integer, Text, create_engine
-from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy import TIMESTAMP, Column, Float, Integer, Text, text
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, UUID
 from sqlalchemy.orm import declarative_base, sessionmaker
 
-engine = create_engine(settings.database_url, echo=False)
+from src.config import settings
+from src.pool import create_pooled_engine
+
+engine = create_pooled_engine(
+    settings.database_url,
+    pool_name="worker",
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    pool_timeout=settings.db_pool_timeout_seconds,
+    pool_recycle=settings.db_pool_recycle_seconds,
+    pre_ping=settings.db_pool_pre_ping,
+    statement_timeout_ms=settings.db_statement_timeout_ms,
+    pgbouncer=settings.db_pgbouncer,
+    echo=False,
+)
 SessionLocal = sessionmaker(bind=engine)
 Base = declarative_base()
 
@@ -20,6 +33,46 @@ class Job(Base):
     state = Column(Text)
     created_at = Column(TIMESTAMP(timezone=True))
     submitted_by = Column(Text)
+    memo_key = Column(Text)
+    result = Column(JSONB)
+    memoized_from = Column(UUID(as_uuid=True))
+    finished_at = Column(TIMESTAMP(timezone=True))
+    started_at = Column(TIMESTAMP(timezone=True))
+    trace_context = Column(JSONB)
+    gpu_memory_mb = Column(Integer)
+    max_runtime_seconds = Column(Integer)
+    checkpoint = Column(JSONB)
+    preemptions = Column(Integer, nullable=False, server_default=text("0"))
+    run_at = Column(TIMESTAMP(timezone=True))
+    next_run_at = Column(
+        TIMESTAMP(timezone=True), nullable=False, server_default=text("now()")
+    )
+    retries = Column(Integer, nullable=False, server_default=text("0"))
+    max_retries = Column(Integer)
+    queued_at = Column(TIMESTAMP(timezone=True))
+    gpu_count = Column(Integer, nullable=False, server_default=text("1"))
+    input_keys = Column(ARRAY(Text))
+    updated_at = Column(
+        TIMESTAMP(timezone=True), server_default=text("now()"), onupdate=text("now()")
+    )
+
+
+class JobResultCache(Base):
+    __tablename__ = "job_result_cache"
+
+    memo_key = Column(Text, primary_key=True)
+    job_id = Column(UUID(as_uuid=True), nullable=False)
+    result = Column(JSONB, nullable=False)
+    created_at = Column(TIMESTAMP(timezone=True), server_default=text("now()"))
+    expires_at = Column(TIMESTAMP(timezone=True), nullable=False)
+
+
+class SubmitterUsage(Base):
+    __tablename__ = "submitter_usage"
+
+    submitted_by = Column(Text, primary_key=True)
+    gpu_seconds = Column(Float, nullable=False, server_default=text("0"))
+    updated_at = Column(TIMESTAMP(timezone=True), server_default=text("now()"))
 
 
 def get_db():
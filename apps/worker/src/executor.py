@@ -1,30 +1,160 @@
-"""Job executor - runs jobs on GPUs"""
+"""
+Job executor - runs jobs on GPUs
 
+Work proceeds in steps, and the executor waits on the ``stop`` signal it was
+handed rather than sleeping, so a stop request takes effect at once:
+
+- ``preempt``: save a checkpoint of the completed steps and raise
+  ``PreemptedError`` so the worker can requeue the job and free the GPU.
+  Work done in the interrupted step is lost (wasted work). Given the
+  checkpoint back on a later run, the job resumes after the last saved step.
+- ``cancel`` / ``deadline``: abandon the job and raise ``JobStoppedError``.
+
+A checkpoint is a small JSON document stored on the job row; for real
+workloads it carries a reference (``ref``) to state saved elsewhere.
+"""
+
+import logging
 import random
+import threading
 import time
+from pathlib import Path
 from uuid import UUID
 
+logger = logging.getLogger(__name__)
+
+STOP_REASONS = ("preempt", "cancel", "deadline")
+
+
+class StopSignal(threading.Event):
+    """Asks a running job to stop, remembering why and since when"""
+
+    reason: str | None = None
+    requested_at: float | None = None
+
+    def request(self, reason: str):
+        """Stop for `reason`; cancel and deadline override an earlier preempt"""
+        if reason not in STOP_REASONS:
+            raise ValueError(f"Unknown stop reason: {reason!r}")
+        if self.is_set() and (reason == "preempt" or self.reason != "preempt"):
+            return
+        self.reason = reason
+        if self.requested_at is None:
+            self.requested_at = time.monotonic()
+        self.set()
+
+
+class JobStoppedError(Exception):
+    """A job was abandoned on request (cancelled or past its deadline)"""
+
+    def __init__(self, reason: str, elapsed: float):
+        super().__init__(f"Stopped: {reason}")
+        self.reason = reason
+        self.elapsed = elapsed
+
+
+class PreemptedError(Exception):
+    """A job stopped at a checkpoint because the worker asked it to"""
+
+    def __init__(self, checkpoint: dict, elapsed: float, wasted: float):
+        super().__init__(f"Preempted at step {checkpoint['step']}")
+        self.checkpoint = checkpoint
+        self.elapsed = elapsed
+        self.wasted = wasted
+
 
 class JobExecutor:
-    def execute(self, job_id: UUID, job_name: str, gpu_id: int) -> dict:
-        """Execute job on GPU (simulated workload)"""
-        print(f"[GPU {gpu_id}] Starting job {job_name} ({job_id})")
+    def __init__(self, step_seconds: float = 1.0):
+        self.step_seconds = step_seconds
+
+    def execute(
+        self,
+        job_id: UUID,
+        job_name: str,
+        gpu_id: int,
+        checkpoint: dict | None = None,
+        stop: StopSignal | None = None,
+        gpu_ids: list[int] | None = None,
+        inputs: dict[str, Path] | None = None,
+    ) -> dict:
+        """
+        Execute job on GPU (simulated workload), from `checkpoint` if given.
+
+        A gang job gets all its GPUs in `gpu_ids`; `gpu_id` is the first.
+        `inputs` maps each input URI to its staged local copy.
+        """
+        stop = stop or StopSignal()
+        gpu_ids = gpu_ids or [gpu_id]
+        if checkpoint:
+            duration = checkpoint["duration_seconds"]
+            done = checkpoint["step"]
+            logger.info(
+                "Resuming job %s (%s) on GPU %d from step %d",
+                job_name,
+                job_id,
+                gpu_id,
+                done,
+            )
+        else:
+            duration = random.uniform(5, 15)
+            done = 0
+            logger.info("Starting job %s (%s) on GPU %d", job_name, job_id, gpu_id)
+
+        # Simulate processing time, one step at a time
+        steps = max(1, round(duration / self.step_seconds))
+        step_seconds = duration / steps
+        started = time.monotonic()
+        resumed_at = done
+        while done < steps:
+            step_started = time.monotonic()
+            if stop.wait(step_seconds):
+                if stop.reason != "preempt":
+                    logger.info(
+                        "Stopped job %s on GPU %d (%s)", job_name, gpu_id, stop.reason
+                    )
+                    raise JobStoppedError(stop.reason, time.monotonic() - started)
 
-        # Simulate processing time
-        duration = random.uniform(5, 15)
-        time.sleep(duration)
+                checkpoint = {
+                    "step": done,
+                    "duration_seconds": duration,
+                    "ref": f"sim://checkpoints/{job_id}/step-{done}",
+                }
+                logger.info(
+                    "Checkpointed job %s on GPU %d at step %d of %d",
+                    job_name,
+                    gpu_id,
+                    done,
+                    steps,
+                )
+                raise PreemptedError(
+                    checkpoint,
+                    elapsed=time.monotonic() - started,
+                    wasted=time.monotonic() - step_started,
+                )
+            done += 1
 
         # Simulate success/failure
         success = random.random() > 0.1  # 90% success rate
 
         result = {
             "success": success,
-            "duration_seconds": duration,
+            # This run's GPU time; earlier runs were charged when preempted
+            "duration_seconds": time.monotonic() - started,
             "gpu_id": gpu_id,
             "output": f"Processed {job_name} on GPU {gpu_id}",
         }
+        if len(gpu_ids) > 1:
+            result["gpu_ids"] = gpu_ids
+            result["output"] = f"Processed {job_name} on GPUs {gpu_ids}"
+        if resumed_at:
+            result["resumed_from_step"] = resumed_at
+        if inputs:
+            result["input_bytes"] = sum(path.stat().st_size for path in inputs.values())
 
-        print(
-            f"[GPU {gpu_id}] Finished job {job_name} - {'SUCCESS' if success else 'FAILED'}"
+        logger.info(
+            "Finished job %s on GPU %d - %s",
+            job_name,
+            gpu_id,
+            "SUCCESS" if success else "FAILED",
         )
         return result
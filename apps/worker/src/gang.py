@@ -0,0 +1,119 @@
+"""
+Gang scheduling with EASY backfill
+
+A job may ask for ``gpu_count`` GPUs. They are granted together on this
+worker (one node) or not at all: the loop only claims jobs whose gang fits
+the GPUs free right now, and allocates the whole gang before claiming again.
+
+Left at that, a job needing 4 GPUs would wait forever behind a stream of
+single-GPU jobs that each fit. So when the head of the queue (the job the
+claim policy would pick first if everything fitted: the most urgent one by
+priority, the best-ranked submitter's under fair share) is a gang that does
+not fit yet but would fit this node, the worker reserves GPUs for it,
+EASY-style. From the running jobs' deadlines
+it works out the shadow time, when enough GPUs will be free for the gang.
+Until then it only claims jobs that cannot delay it:
+
+- jobs whose own time limit ends before the shadow time (``window``), or
+- jobs small enough for the GPUs spare at the shadow time (``extra``).
+
+Run times come from ``max_runtime_seconds`` (capped by the worker's
+``job_max_runtime_seconds``). The worker enforces them, so every prediction
+is an upper bound. A running job without a limit has no predicted end. If
+the gang needs its GPUs, nothing is backfilled and the free GPUs stay
+reserved, so setting limits is what lets short jobs fill the gap.
+
+Each worker reserves on its own, for the same head job; whichever node frees
+up first runs it.
+"""
+
+import logging
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Allocation:
+    """GPUs a running job holds and when it will have released them"""
+
+    gpus: int
+    ends_at: float | None  # monotonic; None without a time limit
+
+
+def shadow(
+    need: int, free: int, running: Iterable[Allocation]
+) -> tuple[float | None, int]:
+    """
+    When `need` GPUs will be free and how many will be spare then.
+
+    (None, 0) when that depends on a job without a time limit.
+    """
+    available = free
+    for allocation in sorted(
+        running, key=lambda a: (a.ends_at is None, a.ends_at or 0.0)
+    ):
+        if allocation.ends_at is None:
+            break
+        available += allocation.gpus
+        if available >= need:
+            return allocation.ends_at, available - need
+    return None, 0
+
+
+class GangPlanner:
+    """Tracks this node's running allocations and what may be claimed next"""
+
+    def __init__(self, total_gpus: int, claim_policy, runtime_cap: float = 0.0):
+        self.total_gpus = total_gpus
+        self.claim_policy = claim_policy
+        self.runtime_cap = runtime_cap or None
+        self.running: dict[str, Allocation] = {}
+        self.reserved_for = None
+
+    def started(self, job_id, gpus: int, max_runtime_seconds: float):
+        ends_at = (
+            time.monotonic() + max_runtime_seconds if max_runtime_seconds else None
+        )
+        self.running[str(job_id)] = Allocation(gpus, ends_at)
+
+    def finished(self, job_id):
+        self.running.pop(str(job_id), None)
+
+    async def capacity(self, store, free_memory: list[int]) -> dict:
+        """
+        Claim parameters (see ``scheduling.FITS``) for what may start on the
+        free GPUs, given as their memory in MB
+        """
+        free = len(free_memory)
+        capacity = {
+            "free_memory": free_memory,
+            "extra": free,
+            "window": None,
+            "cap": self.runtime_cap,
+        }
+        head = await self.claim_policy.head_prepared(store)
+        if head is None or head.gpu_count <= free or head.gpu_count > self.total_gpus:
+            self.reserved_for = None
+            return capacity
+
+        shadow_at, extra = shadow(head.gpu_count, free, self.running.values())
+        if self.reserved_for != head.id:
+            self.reserved_for = head.id
+            logger.info(
+                "Reserving GPUs for job %s (needs %d, %d free, %s)",
+                head.id,
+                head.gpu_count,
+                free,
+                "shadow time unknown"
+                if shadow_at is None
+                else f"shadow time in {shadow_at - time.monotonic():.0f}s",
+            )
+        window = None if shadow_at is None else max(shadow_at - time.monotonic(), 0.0)
+        return {**capacity, "extra": extra, "window": window}
+
+    def backfilled(self, job_row) -> bool:
+        """Whether a claimed job jumped a reservation"""
+        return self.reserved_for is not None and job_row.id != self.reserved_for
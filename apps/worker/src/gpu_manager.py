@@ -44,15 +44,33 @@ class GPUManager:
         # Real GPU detection with pynvml would go here
         return []
 
-    def get_available_gpu(self) -> GPU | None:
-        for gpu in self.gpus:
-            if gpu.available and gpu.memory_used < gpu.memory_total * 0.8:
-                return gpu
-        return None
+    def available_gpus(self, memory_mb: int | None = None) -> list[GPU]:
+        """Free GPUs, each at least `memory_mb` large when the job says so"""
+        return [
+            gpu
+            for gpu in self.gpus
+            if gpu.available
+            and gpu.memory_used < gpu.memory_total * 0.8
+            and not (memory_mb and gpu.memory_total < memory_mb)
+        ]
+
+    def get_available_gpu(self, memory_mb: int | None = None) -> GPU | None:
+        """A free GPU, at least `memory_mb` large when the job says so"""
+        gpus = self.available_gpus(memory_mb)
+        return gpus[0] if gpus else None
 
     def allocate_gpu(self, gpu_id: int):
         self.gpus[gpu_id].available = False
 
+    def allocate_gpus(self, count: int = 1, memory_mb: int | None = None):
+        """Allocate `count` GPUs together, or none at all (returns None)"""
+        gpus = self.available_gpus(memory_mb)
+        if len(gpus) < count:
+            return None
+        for gpu in gpus[:count]:
+            self.allocate_gpu(gpu.id)
+        return gpus[:count]
+
     def release_gpu(self, gpu_id: int):
         self.gpus[gpu_id].available = True
         self.gpus[gpu_id].memory_used = 0
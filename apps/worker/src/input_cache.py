@@ -0,0 +1,329 @@
+"""
+Worker-local cache of job inputs, and claims that prefer cached inputs
+
+Jobs list the files they read in ``params["inputs"]``, each a URI or
+``{"uri": ..., "sha256": ...}``. Before a run the worker stages them into a
+size-bounded directory on local disk, keyed by content: the ``sha256`` the
+submitter gave (checked after the fetch), or else the hash of the URI, for
+sources that do not change once published (source scenes). The API stores
+the same keys on the job row (``input_keys``).
+
+- Writes are atomic: a fetch streams into ``tmp/`` and is renamed into
+  place, so a crash never leaves a partial entry behind.
+- Concurrent runs needing the same key wait for one fetch.
+- When the cache grows past ``max_bytes`` the least recently used entries
+  are deleted, except those pinned by a running job.
+- Entries survive restarts; their modification time is the LRU order.
+
+The worker advertises its most recently used keys in its heartbeat and
+claims through ``CacheAffinity`` first: a queued job with an input already
+here is taken over the queue's head as long as its priority is at most
+``skew`` points lower. Otherwise the claim policy decides as usual.
+"""
+
+import contextlib
+import hashlib
+import logging
+import os
+import re
+import shutil
+import tempfile
+import threading
+import urllib.request
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+from .scheduling import ANY_FIT, CLAIM_COLUMNS, FITS
+
+logger = logging.getLogger(__name__)
+
+INPUTS_PARAM = "inputs"
+
+# A key names a file in the cache, so a submitted sha256 must be exactly this
+SHA256_HEX = re.compile(r"[0-9a-fA-F]{64}")
+
+# Simulated inputs (sim://...?size=N) are this large unless given a size
+SIMULATED_INPUT_BYTES = 64 * 1024
+
+# A queued job that fits and reads a cached input, within `skew` priority
+# points of the most urgent queued job (served by ix_jobs_queued_input_keys)
+AFFINITY_CLAIM = f"""
+    UPDATE jobs
+    SET state = 'running', started_at = now()
+    WHERE id = (
+        SELECT id FROM jobs
+        WHERE state = 'queued' {FITS}
+          AND input_keys && CAST(:cached AS text[])
+          AND priority >= (
+              SELECT max(priority) FROM jobs WHERE state = 'queued'
+          ) - :skew
+        ORDER BY priority DESC, created_at ASC
+        FOR UPDATE SKIP LOCKED
+        LIMIT 1
+    )
+    RETURNING {CLAIM_COLUMNS}
+"""
+
+
+class InputFetchError(Exception):
+    """An input could not be fetched, or its content did not match"""
+
+
+@dataclass(frozen=True)
+class InputRef:
+    """One input of a job"""
+
+    uri: str
+    sha256: str | None = None
+
+    @property
+    def key(self) -> str:
+        return self.sha256 or hashlib.sha256(self.uri.encode()).hexdigest()
+
+
+def input_refs(params: dict | None) -> list[InputRef]:
+    """
+    The inputs listed in a job's params; malformed entries are ignored,
+    including any whose sha256 is not 64 hex digits (the API rejects those)
+    """
+    refs = []
+    for item in (params or {}).get(INPUTS_PARAM) or []:
+        if isinstance(item, str):
+            refs.append(InputRef(item))
+        elif isinstance(item, dict) and isinstance(item.get("uri"), str):
+            digest = item.get("sha256")
+            if digest is None:
+                refs.append(InputRef(item["uri"]))
+            elif isinstance(digest, str) and SHA256_HEX.fullmatch(digest):
+                refs.append(InputRef(item["uri"], digest.lower()))
+            else:
+                logger.warning("Ignoring input %s: bad sha256 %r", item["uri"], digest)
+    return refs
+
+
+def fetch_uri(uri: str, out):
+    """Stream `uri` into the binary file `out` (sim://, file:// or http(s)://)"""
+    parts = urlsplit(uri)
+    if parts.scheme == "sim":
+        size = int(parse_qs(parts.query).get("size", [SIMULATED_INPUT_BYTES])[0])
+        block = hashlib.sha256(uri.encode()).digest() * 2048
+        while size > 0:
+            out.write(block[:size])
+            size -= len(block)
+    elif parts.scheme in ("", "file"):
+        with open(parts.path, "rb") as source:
+            shutil.copyfileobj(source, out)
+    elif parts.scheme in ("http", "https"):
+        with urllib.request.urlopen(uri, timeout=60) as response:
+            shutil.copyfileobj(response, out)
+    else:
+        raise InputFetchError(f"Unsupported input URI: {uri}")
+
+
+class HashingWriter:
+    """File wrapper that hashes and counts what is written through it"""
+
+    def __init__(self, file):
+        self.file = file
+        self.digest = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data: bytes) -> int:
+        self.digest.update(data)
+        self.size += len(data)
+        return self.file.write(data)
+
+
+class InputCache:
+    """Size-bounded, content-keyed LRU cache of inputs on local disk"""
+
+    def __init__(self, root, max_bytes: int, fetch=fetch_uri, observer=None):
+        self.root = Path(root or Path(tempfile.gettempdir()) / "overflying-inputs")
+        self.max_bytes = max_bytes
+        self.fetch = fetch
+        self.observer = observer
+        self.entries: OrderedDict[str, int] = OrderedDict()  # key -> bytes, LRU first
+        self.size = 0
+        self.pinned: dict[str, int] = {}
+        self.fetching: dict[str, threading.Event] = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self._load()
+
+    def _load(self):
+        """Index the entries left by a previous run, oldest use first"""
+        if not self.root.is_dir():
+            return
+        shutil.rmtree(self.root / "tmp", ignore_errors=True)
+        found = [
+            (path.stat().st_mtime, path.name, path.stat().st_size)
+            for path in self.root.glob("??/*")
+            if path.is_file()
+        ]
+        for _, key, size in sorted(found):
+            self.entries[key] = size
+            self.size += size
+        self._evict()
+        if self.entries:
+            logger.info(
+                "Input cache has %d entries (%d bytes)", len(self.entries), self.size
+            )
+
+    def path(self, key: str) -> Path:
+        return self.root / key[:2] / key
+
+    def keys(self, limit: int) -> list[str]:
+        """Up to `limit` cached keys, most recently used first"""
+        with self.lock:
+            return list(reversed(self.entries))[:limit]
+
+    def status(self, limit: int) -> dict:
+        """Heartbeat section: advertised keys, size and hit rate"""
+        lookups = self.hits + self.misses
+        return {
+            "keys": self.keys(limit),
+            "entries": len(self.entries),
+            "bytes": self.size,
+            "max_bytes": self.max_bytes,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "bytes_saved": self.bytes_saved,
+        }
+
+    def stage(self, refs: list[InputRef]) -> dict[str, Path]:
+        """
+        Make every input local, pinned until ``release``; uri -> path.
+
+        Blocks on fetches, so call it off the event loop.
+        """
+        paths, staged = {}, []
+        try:
+            for ref in refs:
+                paths[ref.uri] = self.get(ref)
+                staged.append(ref)
+        except BaseException:
+            self.release(staged)
+            raise
+        return paths
+
+    def release(self, refs: list[InputRef]):
+        """Unpin the inputs of a finished run, then evict down to size"""
+        with self.lock:
+            for ref in refs:
+                self.pinned[ref.key] -= 1
+                if not self.pinned[ref.key]:
+                    del self.pinned[ref.key]
+            evicted = self._evict()
+        if evicted and self.observer:
+            self.observer.record_input_evictions(evicted)
+
+    def get(self, ref: InputRef) -> Path:
+        """The local path of one input, fetching it on a miss; pins it"""
+        key = ref.key
+        while True:
+            with self.lock:
+                if key in self.entries:
+                    self.entries.move_to_end(key)
+                    self.pinned[key] = self.pinned.get(key, 0) + 1
+                    size = self.entries[key]
+                    self.hits += 1
+                    self.bytes_saved += size
+                    break
+                pending = self.fetching.get(key)
+                if pending is None:
+                    self.fetching[key] = threading.Event()
+                    self.misses += 1
+                    size = None
+                    break
+            # Another run is fetching it: wait, then look again (a failed
+            # fetch leaves it missing and this run tries itself)
+            pending.wait()
+
+        path = self.path(key)
+        if size is not None:
+            with contextlib.suppress(OSError):
+                os.utime(path)
+            if self.observer:
+                self.observer.record_input_lookup("hit", size)
+            return path
+
+        try:
+            size = self._fetch(ref, path)
+            with self.lock:
+                self.entries[key] = size
+                self.size += size
+                self.pinned[key] = self.pinned.get(key, 0) + 1
+                evicted = self._evict()
+        finally:
+            with self.lock:
+                self.fetching.pop(key).set()
+
+        logger.info("Fetched input %s (%d bytes)", ref.uri, size)
+        if self.observer:
+            self.observer.record_input_lookup("miss", size)
+            if evicted:
+                self.observer.record_input_evictions(evicted)
+        return path
+
+    def _fetch(self, ref: InputRef, path: Path) -> int:
+        """Fetch into tmp/, verify, then rename into place"""
+        tmp_dir = self.root / "tmp"
+        tmp_dir.mkdir(parents=True, exist_ok=True)
+        path.parent.mkdir(exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=tmp_dir, delete=False) as tmp:
+            try:
+                writer = HashingWriter(tmp)
+                self.fetch(ref.uri, writer)
+                tmp.flush()
+                os.fsync(tmp.fileno())
+                if ref.sha256 and writer.digest.hexdigest() != ref.sha256:
+                    raise InputFetchError(
+                        f"Input {ref.uri} does not match sha256 {ref.sha256}"
+                    )
+            except BaseException:
+                os.unlink(tmp.name)
+                raise
+        os.replace(tmp.name, path)
+        return writer.size
+
+    def _evict(self) -> int:
+        """Delete least recently used, unpinned entries past ``max_bytes``"""
+        evicted = 0
+        for key in list(self.entries):
+            if self.size <= self.max_bytes:
+                break
+            if key in self.pinned:
+                continue
+            self.size -= self.entries.pop(key)
+            self.path(key).unlink(missing_ok=True)
+            evicted += 1
+        return evicted
+
+
+class CacheAffinity:
+    """Claims queued jobs whose inputs this worker already holds"""
+
+    statements = {"claim_cached": AFFINITY_CLAIM}
+
+    def __init__(self, skew: int = 1):
+        self.skew = skew
+
+    async def claim(self, store, keys: list[str], capacity: dict | None = None):
+        """A job reading one of `keys`, or None (then claim by policy)"""
+        if self.skew < 0 or not keys:
+            return None
+        return await store.fetchrow(
+            "claim_cached", cached=keys, skew=self.skew, **(capacity or ANY_FIT)
+        )
+
+
+def build_input_cache(settings, observer=None) -> InputCache:
+    """Create the input cache configured by ``settings.input_cache_*``"""
+    return InputCache(
+        settings.input_cache_dir,
+        max_bytes=settings.input_cache_max_bytes,
+        observer=observer,
+    )
@@ -0,0 +1,273 @@
+"""
+Structured, non-blocking logging for the worker
+
+Loggers hand records to a QueueHandler; a QueueListener thread formats them
+and writes them to stdout, so the event loop never waits on I/O. Each record
+is one JSON object (``LOG_FORMAT=text`` gives plain lines for local runs):
+
+- the job ID of the current context (``log_context``) and the active
+  span's trace and span IDs are added on the calling side, where those
+  context variables are visible
+- ``extra={...}`` fields become top-level keys
+- ``LOG_LEVELS`` sets per-logger levels, e.g. ``src.nats_client=DEBUG``
+- ``SamplingFilter`` lets through at most ``LOG_SAMPLE_RATE`` records per
+  second per logger and message template (after a burst of
+  ``LOG_SAMPLE_BURST``); the next record that passes carries the number of
+  records dropped in between as ``suppressed``
+
+Sampling is keyed by the unformatted message, so log with ``%s`` arguments
+rather than f-strings.
+"""
+
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import UTC, datetime
+
+from opentelemetry import trace
+
+job_id_var: ContextVar[str | None] = ContextVar("job_id", default=None)
+
+CORRELATION_FIELDS = {"job_id": job_id_var}
+
+# Records waiting for the listener; past this they are dropped, not awaited
+QUEUE_SIZE = 10_000
+
+# Attributes every LogRecord has; anything else came from extra= or filters
+_RECORD_ATTRIBUTES = set(
+    vars(logging.LogRecord("", logging.INFO, "", 0, "", None, None))
+) | {"message", "asctime", "taskName"}
+
+# Installed by setup_logging()
+_handler: logging.Handler | None = None
+_listener: logging.handlers.QueueListener | None = None
+
+
+@contextmanager
+def log_context(**fields: str | None) -> Iterator[None]:
+    """Attach correlation IDs (job_id) to records logged inside"""
+    tokens = []
+    for name, value in fields.items():
+        var = CORRELATION_FIELDS[name]
+        tokens.append((var, var.set(value)))
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """Copies correlation IDs and the active span onto each record"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        for name, var in CORRELATION_FIELDS.items():
+            if getattr(record, name, None) is None:
+                setattr(record, name, var.get())
+        span_context = trace.get_current_span().get_span_context()
+        if span_context.is_valid:
+            record.trace_id = format(span_context.trace_id, "032x")
+            record.span_id = format(span_context.span_id, "016x")
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Token bucket per (logger, level, message template)"""
+
+    # Templates come from code, so this only trips on f-string messages
+    MAX_BUCKETS = 4096
+
+    def __init__(self, rate: float, burst: int, clock=time.monotonic):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        # key -> [tokens, last refill, records dropped since the last pass]
+        self._buckets: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.rate <= 0:
+            return True
+
+        key = (record.name, record.levelno, record.msg)
+        with self._lock:
+            now = self.clock()
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= self.MAX_BUCKETS:
+                    self._buckets.clear()
+                bucket = self._buckets[key] = [self.burst, now, 0]
+            tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if tokens < 1:
+                bucket[0] = tokens
+                bucket[2] += 1
+                return False
+            bucket[0] = tokens - 1
+            suppressed, bucket[2] = bucket[2], 0
+
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Enqueues without waiting; records that do not fit are counted and dropped"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Arguments and tracebacks may change or go away before the listener
+        # runs, so render them here; everything else is formatted later
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        if self.dropped:
+            record.dropped, self.dropped = self.dropped, 0
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class StdoutHandler(logging.StreamHandler):
+    """Writes to whatever sys.stdout is when the record is emitted"""
+
+    def __init__(self):
+        super().__init__(sys.stdout)
+
+    def emit(self, record: logging.LogRecord):
+        self.stream = sys.stdout
+        super().emit(record)
+
+
+def _extra_fields(record: logging.LogRecord) -> dict:
+    return {
+        key: value
+        for key, value in vars(record).items()
+        if key not in _RECORD_ATTRIBUTES and value is not None
+    }
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, UTC).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            **_extra_fields(record),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Plain lines with the structured fields appended as key=value"""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = " ".join(f"{k}={v}" for k, v in _extra_fields(record).items())
+        return f"{line} {fields}" if fields else line
+
+
+def parse_levels(levels: str) -> dict[str, str]:
+    """``"a=DEBUG,b.c=WARNING"`` -> ``{"a": "DEBUG", "b.c": "WARNING"}``"""
+    parsed = {}
+    for item in levels.split(","):
+        if not item.strip():
+            continue
+        name, sep, level = item.partition("=")
+        if not sep or not name.strip():
+            raise ValueError(f"Invalid logger level {item!r}, expected name=LEVEL")
+        parsed[name.strip()] = level.strip().upper()
+    return parsed
+
+
+def setup_logging(
+    level: str = "INFO",
+    fmt: str = "json",
+    levels: str = "",
+    sample_rate: float = 10.0,
+    sample_burst: int = 20,
+    adopt: Iterable[str] = (),
+    stream=None,
+) -> logging.Handler:
+    """
+    Route the root logger through the queue; calling again reconfigures.
+
+    Loggers named in `adopt` (e.g. uvicorn's) drop their own handlers and
+    propagate to the root, so their output is structured too.
+    """
+    global _handler, _listener
+    shutdown_logging()
+
+    if fmt == "json":
+        formatter = JsonFormatter()
+    elif fmt == "text":
+        formatter = TextFormatter()
+    else:
+        raise ValueError(f"Unknown log format: {fmt!r}")
+
+    output = logging.StreamHandler(stream) if stream else StdoutHandler()
+    output.setFormatter(formatter)
+
+    log_queue: queue.Queue = queue.Queue(QUEUE_SIZE)
+    _handler = NonBlockingQueueHandler(log_queue)
+    _handler.addFilter(SamplingFilter(sample_rate, sample_burst))
+    _handler.addFilter(ContextFilter())
+    _listener = logging.handlers.QueueListener(log_queue, output)
+    _listener.start()
+
+    root = logging.getLogger()
+    root.addHandler(_handler)
+    root.setLevel(level.upper())
+    for name in adopt:
+        adopted = logging.getLogger(name)
+        adopted.handlers.clear()
+        adopted.propagate = True
+    for name, logger_level in parse_levels(levels).items():
+        logging.getLogger(name).setLevel(logger_level)
+    return _handler
+
+
+def shutdown_logging():
+    """Write out queued records and detach the handler"""
+    global _handler, _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+    if _handler is not None:
+        logging.getLogger().removeHandler(_handler)
+        _handler = None
+
+
+atexit.register(shutdown_logging)
@@ -1,26 +1,91 @@
 """Worker main loop"""
 
 import asyncio
+import contextlib
+import logging
+import random
+import re
+import socket
+import time
 from datetime import UTC, datetime
 
-from sqlalchemy import text
+from opentelemetry.trace import SpanKind
 
+from .cancellation import (
+    CANCEL_SUBJECT,
+    CANCELLED_STATE,
+    RunningJobs,
+    max_runtime,
+)
 from .config import settings
 from .database import SessionLocal, engine
-from .executor import JobExecutor
-from .gpu_manager import GPUManager
+from .executor import JobExecutor, JobStoppedError, PreemptedError, StopSignal
+from .gang import GangPlanner
+from .gpu_manager import GPU, GPUManager
+from .input_cache import CacheAffinity, build_input_cache, input_refs
+from .logs import log_context, setup_logging
+from .memoization import LINKED_STATE, ResultCache
 from .metrics import worker_metrics_manager
 from .nats_client import NATSManager
+from .preemption import build_preemption_policy
+from .retries import ScheduledJobs, build_retry_policy
+from .scheduling import build_claim_policy, record_usage
+from .store import JobStore, StoreUnavailableError
+from .tracing import extract_context, flush_tracing, get_tracer, setup_tracing
+
+logger = logging.getLogger(__name__)
+
+
+def worker_identity(configured: str = "") -> str:
+    """The configured worker id or the hostname, safe as a NATS subject token"""
+    return re.sub(r"[^A-Za-z0-9_-]", "-", configured or socket.gethostname())
 
 
 class Worker:
     def __init__(self):
         self.gpu_manager = GPUManager(simulation=settings.gpu_simulation)
         self.executor = JobExecutor()
-        self.db = SessionLocal()
+        self.worker_id = worker_identity(settings.worker_id)
         self.nats = NATSManager(settings.nats_url)
         self.metrics = worker_metrics_manager
-        print(f"Worker started with {len(self.gpu_manager.gpus)} GPUs")
+        self.claim_policy = build_claim_policy(settings)
+        self.preemption = build_preemption_policy(settings)
+        self.running = RunningJobs(settings.cancel_check_interval_seconds)
+        self.retry_policy = build_retry_policy(settings)
+        self.scheduled = ScheduledJobs(
+            refresh_seconds=settings.poll_interval,
+            batch_size=settings.schedule_batch_size,
+        )
+        self.gang = GangPlanner(
+            len(self.gpu_manager.gpus),
+            self.claim_policy,
+            runtime_cap=settings.job_max_runtime_seconds,
+        )
+        # Jobs run concurrently, as many as the GPUs hold
+        self.jobs: set[asyncio.Task] = set()
+        self.capacity_freed = asyncio.Event()
+        self.input_cache = build_input_cache(settings, observer=self.metrics)
+        self.affinity = CacheAffinity(settings.input_cache_affinity_skew)
+        self.store = JobStore(
+            settings.database_url,
+            self.claim_policy,
+            session_factory=SessionLocal,
+            statement_timeout_ms=settings.db_statement_timeout_ms,
+            connect_timeout=settings.db_connect_timeout_seconds,
+            pgbouncer=settings.db_pgbouncer,
+            statements={
+                **self.preemption.statements,
+                **RunningJobs.statements,
+                **ScheduledJobs.statements,
+                **CacheAffinity.statements,
+            },
+        )
+        self.tracer = get_tracer()
+        self.result_cache = ResultCache(
+            ttl_seconds=settings.memoization_ttl_seconds,
+            max_entries=settings.memoization_max_entries,
+        )
+        logger.info("Worker started with %d GPUs", len(self.gpu_manager.gpus))
 
     async def publish_job_event(self, job_id: str, state: str, metadata: dict = None):
         """Publish job state change event to NATS JetStream"""
@@ -37,28 +102,171 @@ class Worker:
         # Record metrics
         self.metrics.record_nats_event(event_type=state, subject=subject)
 
-    def poll_jobs(self):
-        """Poll for jobs using SKIP LOCKED pattern"""
-        query = text("""
-            UPDATE jobs
-            SET state = 'running'
-            WHERE id = (
-                SELECT id FROM jobs
-                WHERE state = 'queued'
-                ORDER BY priority DESC, created_at ASC
-                FOR UPDATE SKIP LOCKED
-                LIMIT 1
+    def heartbeat(self) -> dict:
+        """Capacity report for gpus.<worker_id>, valid for three intervals"""
+        return {
+            "worker_id": self.worker_id,
+            "sent_at": datetime.now(UTC).isoformat(),
+            "ttl_seconds": 3 * settings.gpu_heartbeat_interval_seconds,
+            **self.gpu_manager.get_status(),
+            "input_cache": self.input_cache.status(settings.input_cache_advertise_keys),
+        }
+
+    async def send_heartbeats(self):
+        """Publish GPU capacity until cancelled, then sign off"""
+        subject = f"gpus.{self.worker_id}"
+        try:
+            while True:
+                try:
+                    await self.nats.publish_core(subject, self.heartbeat())
+                except Exception as e:
+                    logger.warning("GPU heartbeat failed: %s", e)
+                await asyncio.sleep(settings.gpu_heartbeat_interval_seconds)
+        finally:
+            # Let the API drop this worker now rather than at TTL expiry
+            with contextlib.suppress(Exception):
+                await self.nats.publish_core(
+                    subject, {"worker_id": self.worker_id, "stopping": True}
+                )
+
+    async def poll_jobs(self):
+        """
+        Claim the next job that fits the free GPUs with the configured policy
+        (SKIP LOCKED pattern), minding any reservation for a gang job.
+        Jobs whose inputs are cached here go first, within a few priority
+        points of the queue head.
+        """
+        await self.scheduled.promote_due(self.store)
+        free = self.gpu_manager.available_gpus()
+        if not free:
+            return None
+        capacity = await self.gang.capacity(
+            self.store, [gpu.memory_total for gpu in free]
+        )
+        cached = self.input_cache.keys(settings.input_cache_advertise_keys)
+        job = await self.affinity.claim(self.store, cached, capacity)
+        if job:
+            self.metrics.record_affinity_claim(job.name)
+        else:
+            job = await self.store.claim(capacity)
+        if job and self.gang.backfilled(job):
+            logger.info("Backfilled job %s ahead of a reserved gang job", job.id)
+            self.metrics.record_backfill(job.name)
+        return job
+
+    def start_job(self, job_row, claimed=None, gpus: list[GPU] | None = None):
+        """Process a claimed job in the background, on its allocated GPUs"""
+        task = asyncio.create_task(self.process_job(job_row, claimed, gpus))
+        self.jobs.add(task)
+        task.add_done_callback(self._job_done)
+        return task
+
+    def _job_done(self, task: asyncio.Task):
+        self.jobs.discard(task)
+        self.capacity_freed.set()
+        if not task.cancelled() and task.exception():
+            logger.error(
+                "Job processing failed: %s",
+                task.exception(),
+                exc_info=task.exception(),
+            )
+
+    async def try_memoized(self, job_id, job_name: str, memo_key: str) -> bool:
+        """
+        Settle a claimed job from the memo cache or link it to a running original.
+
+        Returns True when the job no longer needs a GPU.
+        """
+        cached = await self.store.bookkeeping(self.result_cache.lookup, memo_key)
+        if cached:
+            original_id, result = cached
+            await self.store.transition(
+                "complete_memoized", id=job_id, result=result, original=original_id
             )
-            RETURNING id, name, params
-        """)
+            self.metrics.record_memo_lookup(
+                "hit", gpu_seconds_saved=result.get("duration_seconds", 0)
+            )
+            await self.publish_job_event(
+                job_id, "completed", {"name": job_name, "memoized": True}
+            )
+            return True
+
+        original_id = await self.store.bookkeeping(
+            self.result_cache.find_running_original, job_id, memo_key
+        )
+        if original_id:
+            await self.store.transition(
+                "link", id=job_id, state=LINKED_STATE, original=original_id
+            )
+            self.metrics.record_memo_lookup("linked")
+            await self.publish_job_event(
+                job_id, LINKED_STATE, {"name": job_name, "original": str(original_id)}
+            )
+            return True
 
-        result = self.db.execute(query)
-        self.db.commit()
-        return result.fetchone()
+        self.metrics.record_memo_lookup("miss")
+        return False
 
-    async def process_job(self, job_row):
-        """Process a single job"""
-        job_id, job_name, params = job_row
+    async def settle_memoized(self, job_id, memo_key: str, state: str, result: dict):
+        """Cache a finished job's result and resolve duplicates linked to it"""
+
+        def settle(db):
+            if state == "completed":
+                self.result_cache.store(db, memo_key, job_id, result)
+            return self.result_cache.resolve_linked(db, job_id, state, result)
+
+        resolved = await self.store.bookkeeping(settle)
+
+        for linked_id in resolved:
+            if state == "completed":
+                await self.publish_job_event(linked_id, "completed", {"memoized": True})
+            else:
+                await self.publish_job_event(
+                    linked_id, "queued", {"reason": "original_failed"}
+                )
+
+    async def process_job(
+        self,
+        job_row,
+        claimed: tuple[int, int] | None = None,
+        gpus: list[GPU] | None = None,
+    ):
+        """
+        Process a claimed job inside the trace of the request that created it.
+
+        `claimed` is the (start, end) of the claim in epoch nanoseconds; the
+        claim ran before the trace context was known, so its span is recorded
+        afterwards with those timestamps. `gpus` were allocated by the loop.
+        """
+        with (
+            log_context(job_id=str(job_row.id)),
+            self.tracer.start_as_current_span(
+                "job.process",
+                context=extract_context(job_row.trace_context),
+                kind=SpanKind.CONSUMER,
+                start_time=claimed[0] if claimed else None,
+                attributes={"job.id": str(job_row.id), "job.name": job_row.name},
+            ),
+        ):
+            if claimed:
+                claim_span = self.tracer.start_span("job.claim", start_time=claimed[0])
+                claim_span.set_attribute("claim.policy", self.claim_policy.name)
+                claim_span.end(end_time=claimed[1])
+            await self.run_job(job_row, gpus)
+
+    async def run_job(self, job_row, gpus: list[GPU] | None = None):
+        """
+        Run a claimed job: memo lookup, GPU allocation (unless `gpus` are
+        already allocated to it), execution, events
+        """
+        job_id, job_name, memo_key = job_row.id, job_row.name, job_row.memo_key
+        submitted_by = job_row.submitted_by
+
+        # Memoized jobs may be satisfied without running at all
+        if memo_key and await self.try_memoized(job_id, job_name, memo_key):
+            for gpu in gpus or []:
+                self.gpu_manager.release_gpu(gpu.id)
+            return
 
         # Record job started
         self.metrics.record_job_started()
@@ -66,32 +274,104 @@ class Worker:
         # Publish job started event
         await self.publish_job_event(job_id, "running", {"name": job_name})
 
-        # Get available GPU
-        gpu = self.gpu_manager.get_available_gpu()
-        if not gpu:
-            print("No GPU available, requeueing job")
-            self.db.execute(
-                text("UPDATE jobs SET state = 'queued' WHERE id = :id"),
-                {"id": job_id},
-            )
-            self.db.commit()
+        # Allocate the job's GPUs, all of them or none
+        with self.tracer.start_as_current_span("gpu.allocate") as span:
+            if gpus is None:
+                gpus = self.gpu_manager.allocate_gpus(
+                    job_row.gpu_count or 1, job_row.gpu_memory_mb
+                )
+            if gpus:
+                span.set_attribute("gpu.id", gpus[0].id)
+                span.set_attribute("gpu.count", len(gpus))
+        if not gpus:
+            logger.warning("No GPU available, requeueing job")
+            await self.store.transition("requeue", id=job_id)
             await self.publish_job_event(
                 job_id, "queued", {"reason": "no_gpu_available"}
             )
             return
 
-        # Allocate GPU and execute
-        self.gpu_manager.allocate_gpu(gpu.id)
+        # Execute, from the job's checkpoint if it was preempted before; the
+        # stop signal ends it early (preemption, cancellation, deadline)
+        gpu = gpus[0]
+        started = time.monotonic()
+        stop = self.running.start(job_id)
+        watchers = [asyncio.create_task(self.running.watch_state(self.store, job_id))]
+        if self.preemption.preemptible(job_row):
+            watchers.append(
+                asyncio.create_task(
+                    self.preemption.watch(
+                        self.store,
+                        job_row,
+                        gpu.memory_total,
+                        stop,
+                        gpus=len(gpus),
+                        free_gpus=lambda: len(self.gpu_manager.available_gpus()),
+                    )
+                )
+            )
+        deadline = max_runtime(
+            job_row.max_runtime_seconds, settings.job_max_runtime_seconds
+        )
+        timer = (
+            asyncio.get_running_loop().call_later(deadline, stop.request, "deadline")
+            if deadline
+            else None
+        )
+        self.gang.started(job_id, len(gpus), deadline)
+        refs, inputs = input_refs(job_row.params), {}
         try:
-            result = self.executor.execute(job_id, job_name, gpu.id)
-
-            # Update job state
+            # Local copies of the job's inputs, pinned in the cache until done
+            if refs:
+                with self.tracer.start_as_current_span(
+                    "inputs.stage", attributes={"inputs.count": len(refs)}
+                ):
+                    inputs = await asyncio.to_thread(self.input_cache.stage, refs)
+
+            with self.tracer.start_as_current_span(
+                "job.execute", attributes={"gpu.id": gpu.id}
+            ):
+                # Off the loop, so heartbeats keep flowing during long jobs
+                try:
+                    result = await asyncio.to_thread(
+                        self.executor.execute,
+                        job_id,
+                        job_name,
+                        gpu.id,
+                        checkpoint=job_row.checkpoint,
+                        stop=stop,
+                        gpu_ids=[g.id for g in gpus],
+                        inputs=inputs,
+                    )
+                finally:
+                    self.running.finish(job_id)
+                    self.gang.finished(job_id)
+                    if timer:
+                        timer.cancel()
+                    for watcher in watchers:
+                        watcher.cancel()
+                    await asyncio.gather(*watchers, return_exceptions=True)
+
+            # A failed run goes back to the queue after a backoff while it may
+            if not result["success"] and await self.schedule_retry(
+                job_row, gpus, result, result.get("duration_seconds", 0)
+            ):
+                return
+
+            # Update job state and charge the GPU time to the submitter
             new_state = "completed" if result["success"] else "failed"
-            self.db.execute(
-                text("UPDATE jobs SET state = :state WHERE id = :id"),
-                {"state": new_state, "id": job_id},
+            await self.store.transition(
+                "finish", id=job_id, state=new_state, result=result
             )
-            self.db.commit()
+            await self.store.bookkeeping(
+                record_usage,
+                submitted_by,
+                result.get("duration_seconds", 0) * len(gpus),
+                settings.fair_share_half_life_seconds,
+            )
+
+            if memo_key:
+                await self.settle_memoized(job_id, memo_key, new_state, result)
 
             # Publish completion event
             await self.publish_job_event(
@@ -99,7 +379,9 @@ class Worker:
                 new_state,
                 {
                     "name": job_name,
+                    "submitted_by": submitted_by,
                     "gpu_id": gpu.id,
+                    "gpu_count": len(gpus),
                     "execution_time": result.get("duration_seconds", 0),
                 },
             )
@@ -117,27 +399,196 @@ class Worker:
                     job_name=job_name,
                 )
 
+        except PreemptedError as e:
+            await self.requeue_preempted(job_row, gpus, e, stop)
+
+        except JobStoppedError as e:
+            await self.finish_stopped(job_row, gpus, e, stop, deadline)
+
         except Exception as e:
-            # Publish failure event
-            await self.publish_job_event(job_id, "failed", {"error": str(e)})
+            elapsed = time.monotonic() - started
+            error = {"success": False, "error": str(e), "gpu_id": gpu.id}
+            if await self.schedule_retry(job_row, gpus, error, elapsed):
+                logger.warning("Job %s crashed, retrying: %s", job_id, e)
+                return
+
+            # Publish failure event (GPU time up to the crash is still billable)
+            await self.publish_job_event(
+                job_id,
+                "failed",
+                {
+                    "name": job_name,
+                    "submitted_by": submitted_by,
+                    "gpu_id": gpu.id,
+                    "gpu_count": len(gpus),
+                    "execution_time": elapsed,
+                    "error": str(e),
+                },
+            )
+
+            # Linked duplicates must not wait on a job that crashed
+            if memo_key:
+                await self.settle_memoized(job_id, memo_key, "failed", {})
 
             # Record failure metric
             self.metrics.record_job_failed(
                 job_id=str(job_id),
                 job_name=job_name,
-                error=str(e),
+                error_type=type(e).__name__,
             )
             raise
         finally:
-            self.gpu_manager.release_gpu(gpu.id)
+            if inputs:
+                self.input_cache.release(refs)
+            for held in gpus:
+                self.gpu_manager.release_gpu(held.id)
             self.metrics.record_job_finished()
 
+    async def schedule_retry(
+        self, job_row, gpus: list[GPU], result: dict, elapsed: float
+    ) -> bool:
+        """
+        Schedule another run of a failed job after a backoff.
+
+        Returns False when the job is out of retries. Linked duplicates keep
+        waiting for the retry, and the failed run's GPU time is charged.
+        """
+        if not self.retry_policy.should_retry(job_row):
+            return False
+
+        job_id, job_name = job_row.id, job_row.name
+        retries = (job_row.retries or 0) + 1
+        delay = self.retry_policy.delay(retries - 1)
+        await self.store.transition("retry", id=job_id, result=result, delay=delay)
+        await self.store.bookkeeping(
+            record_usage,
+            job_row.submitted_by,
+            elapsed * len(gpus),
+            settings.fair_share_half_life_seconds,
+        )
+        self.scheduled.expect(delay)
+        await self.publish_job_event(
+            job_id,
+            "retrying",
+            {
+                "name": job_name,
+                "submitted_by": job_row.submitted_by,
+                "gpu_id": gpus[0].id,
+                "gpu_count": len(gpus),
+                "execution_time": elapsed,
+                "retry": retries,
+                "delay_seconds": delay,
+                "error": result.get("error"),
+            },
+        )
+        self.metrics.record_job_retry(job_name, delay)
+        return True
+
+    async def requeue_preempted(
+        self, job_row, gpus: list[GPU], preempted: PreemptedError, stop: StopSignal
+    ):
+        """Requeue a checkpointed job and charge the GPU time it used"""
+        job_id, job_name = job_row.id, job_row.name
+        await self.store.transition(
+            "preempt", id=job_id, checkpoint=preempted.checkpoint
+        )
+        await self.store.bookkeeping(
+            record_usage,
+            job_row.submitted_by,
+            preempted.elapsed * len(gpus),
+            settings.fair_share_half_life_seconds,
+        )
+        await self.publish_job_event(
+            job_id,
+            "preempted",
+            {
+                "name": job_name,
+                "submitted_by": job_row.submitted_by,
+                "gpu_id": gpus[0].id,
+                "gpu_count": len(gpus),
+                "execution_time": preempted.elapsed,
+                "wasted_seconds": preempted.wasted,
+                "checkpoint": preempted.checkpoint.get("ref"),
+            },
+        )
+        self.metrics.record_preemption(
+            job_name,
+            wasted_seconds=preempted.wasted,
+            checkpoint_seconds=time.monotonic() - stop.requested_at,
+        )
+
+    async def finish_stopped(
+        self,
+        job_row,
+        gpus: list[GPU],
+        stopped: JobStoppedError,
+        stop: StopSignal,
+        deadline: float,
+    ):
+        """Record a cancelled job, or one that ran past its deadline, as final"""
+        job_id, job_name = job_row.id, job_row.name
+        if stopped.reason == "cancel":
+            state, error = CANCELLED_STATE, "cancelled"
+        else:
+            state, error = "failed", "max_runtime_exceeded"
+        result = {
+            "success": False,
+            "error": error,
+            "duration_seconds": stopped.elapsed,
+            "gpu_id": gpus[0].id,
+        }
+        if stopped.reason == "deadline":
+            result["max_runtime_seconds"] = deadline
+
+        await self.store.transition("finish", id=job_id, state=state, result=result)
+        await self.store.bookkeeping(
+            record_usage,
+            job_row.submitted_by,
+            stopped.elapsed * len(gpus),
+            settings.fair_share_half_life_seconds,
+        )
+        if job_row.memo_key:
+            await self.settle_memoized(job_id, job_row.memo_key, state, result)
+        await self.publish_job_event(
+            job_id,
+            state,
+            {
+                "name": job_name,
+                "submitted_by": job_row.submitted_by,
+                "gpu_id": gpus[0].id,
+                "gpu_count": len(gpus),
+                "execution_time": stopped.elapsed,
+                "error": error,
+            },
+        )
+        self.metrics.record_job_stopped(
+            job_name, stopped.reason, time.monotonic() - stop.requested_at
+        )
+
+    async def wait_for_capacity(self, timeout: float):
+        """Sleep up to `timeout`, waking early when a running job finishes"""
+        with contextlib.suppress(TimeoutError):
+            await asyncio.wait_for(self.capacity_freed.wait(), timeout)
+
     async def run(self):
         """Main worker loop"""
-        print("Worker running, polling every", settings.poll_interval, "seconds...")
+        logger.info(
+            "Worker running, polling every %s seconds, claim policy: %s",
+            settings.poll_interval,
+            self.claim_policy.name,
+        )
+
+        # Tracing first, so the SQLAlchemy instrumentation picks it up
+        setup_tracing(
+            self.metrics.service_name,
+            exporter=settings.tracing_exporter,
+            sample_ratio=settings.tracing_sample_ratio,
+            file_path=settings.tracing_file_path,
+        )
 
         # Initialize metrics
         self.metrics.setup_metrics(engine)
+        self.store.observer = self.metrics
 
         # Start metrics HTTP server
         await self.metrics.start_metrics_server()
@@ -145,36 +596,86 @@ class Worker:
         # Connect to NATS and ensure stream exists
         await self.nats.connect()
         await self.nats.ensure_stream("JOBS", ["jobs.>"])
+        await self.nats.subscribe_core(CANCEL_SUBJECT, self.running.on_cancel)
+        heartbeats = asyncio.create_task(self.send_heartbeats())
 
+        failures = 0
         try:
             while True:
                 # Update GPU metrics
                 self.gpu_manager.update_metrics()
 
-                # Poll for job
-                job = self.poll_jobs()
-
-                # Record poll cycle
-                self.metrics.record_poll_cycle(jobs_found=(job is not None))
-
-                if job:
-                    await self.process_job(job)
-                else:
-                    await asyncio.sleep(settings.poll_interval)
+                try:
+                    # Claim while GPUs are free; finishing jobs wake the loop
+                    self.capacity_freed.clear()
+                    job = None
+                    if self.gpu_manager.available_gpus():
+                        claim_started = time.time_ns()
+                        job = await self.poll_jobs()
+                        claimed = (claim_started, time.time_ns())
+
+                        # Record poll cycle and claim latency
+                        self.metrics.record_poll_cycle(jobs_found=(job is not None))
+                        self.metrics.record_claim_duration(
+                            self.claim_policy.name, (claimed[1] - claimed[0]) / 1e9
+                        )
+
+                    if job:
+                        # The whole gang now, before the next claim counts GPUs
+                        gpus = self.gpu_manager.allocate_gpus(
+                            job.gpu_count or 1, job.gpu_memory_mb
+                        )
+                        self.start_job(job, claimed, gpus)
+                        if gpus is None:
+                            # Requeued by run_job; do not claim it straight back
+                            await self.wait_for_capacity(settings.poll_interval)
+                    else:
+                        # Sooner if a scheduled job falls due before then
+                        await self.wait_for_capacity(
+                            self.scheduled.sleep_seconds(settings.poll_interval)
+                        )
+                    failures = 0
+                except StoreUnavailableError as e:
+                    # Ride out restarts and failovers; full jitter as for NATS
+                    delay = random.uniform(
+                        0, min(settings.db_reconnect_max_backoff_seconds, 2**failures)
+                    )
+                    failures += 1
+                    logger.warning(
+                        "Database unavailable (attempt %d): %s; retrying in %.1f seconds",
+                        failures,
+                        e,
+                        delay,
+                    )
+                    await asyncio.sleep(delay)
 
         except (KeyboardInterrupt, asyncio.CancelledError):
-            print("\nShutting down worker...")
+            logger.info("Shutting down worker...")
         except Exception as e:
-            print(f"Error: {e}")
+            logger.exception("Error: %s", e)
         finally:
+            for task in list(self.jobs):
+                task.cancel()
+            await asyncio.gather(*self.jobs, return_exceptions=True)
+            heartbeats.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await heartbeats
             await self.nats.disconnect()
+            flush_tracing()
             await self.metrics.stop_metrics_server()
-            self.db.close()
+            await self.store.close()
 
 
 # Entry point for module execution
 async def main():
     """Main entry point with proper signal handling"""
+    setup_logging(
+        level=settings.log_level,
+        fmt=settings.log_format,
+        levels=settings.log_levels,
+        sample_rate=settings.log_sample_rate,
+        sample_burst=settings.log_sample_burst,
+    )
     worker = Worker()
     try:
         await worker.run()
@@ -186,4 +687,4 @@ if __name__ == "__main__":
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
-        print("Worker stopped")
+        logger.info("Worker stopped")
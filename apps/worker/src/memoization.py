@@ -0,0 +1,119 @@
+"""Result memoization at claim time
+
+Mirrors the API's submission-time check: a claimed job whose memo key has a
+fresh cached result is completed without touching a GPU, and a duplicate of a
+job that is already running is linked to it and resolved when it finishes.
+The memo key itself is computed by the API at submission and stored on the row.
+"""
+
+from typing import Any
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Session
+
+LINKED_STATE = "linked"
+
+
+class ResultCache:
+    """Postgres-backed result cache with TTL and size-based eviction"""
+
+    def __init__(self, ttl_seconds: int = 86400, max_entries: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+
+    def lookup(self, db: Session, memo_key: str) -> tuple[Any, dict] | None:
+        """Return (original_job_id, result) for a fresh cache entry"""
+        row = db.execute(
+            text("""
+                SELECT job_id, result FROM job_result_cache
+                WHERE memo_key = :key AND expires_at > now()
+            """),
+            {"key": memo_key},
+        ).fetchone()
+        return (row.job_id, row.result) if row else None
+
+    def find_running_original(self, db: Session, job_id, memo_key: str):
+        """
+        Return the id of an older running job with the same memo key.
+
+        Only jobs created before this one qualify, so two duplicates claimed
+        at the same moment can never end up linked to each other.
+        """
+        row = db.execute(
+            text("""
+                SELECT o.id FROM jobs o, jobs me
+                WHERE me.id = :id
+                  AND o.memo_key = :key
+                  AND o.state = 'running'
+                  AND o.id <> me.id
+                  AND (o.created_at, o.id) < (me.created_at, me.id)
+                ORDER BY o.created_at ASC
+                LIMIT 1
+            """),
+            {"id": job_id, "key": memo_key},
+        ).fetchone()
+        return row.id if row else None
+
+    def store(self, db: Session, memo_key: str, job_id, result: dict):
+        """Cache a successful result and evict expired and excess entries"""
+        db.execute(
+            text("""
+                INSERT INTO job_result_cache (memo_key, job_id, result, created_at, expires_at)
+                VALUES (
+                    :key, :job_id, :result,
+                    clock_timestamp(), clock_timestamp() + make_interval(secs => :ttl)
+                )
+                ON CONFLICT (memo_key) DO UPDATE
+                SET job_id = EXCLUDED.job_id,
+                    result = EXCLUDED.result,
+                    created_at = EXCLUDED.created_at,
+                    expires_at = EXCLUDED.expires_at
+            """).bindparams(bindparam("result", type_=JSONB)),
+            {
+                "key": memo_key,
+                "job_id": job_id,
+                "result": result,
+                "ttl": self.ttl_seconds,
+            },
+        )
+        db.execute(text("DELETE FROM job_result_cache WHERE expires_at <= now()"))
+        db.execute(
+            text("""
+                DELETE FROM job_result_cache
+                WHERE memo_key IN (
+                    SELECT memo_key FROM job_result_cache
+                    ORDER BY created_at DESC
+                    OFFSET :max_entries
+                )
+            """),
+            {"max_entries": self.max_entries},
+        )
+
+    def resolve_linked(self, db: Session, job_id, state: str, result: dict) -> list:
+        """
+        Settle duplicates linked to a finished job.
+
+        Successful results are shared with every linked job; failures are not
+        memoized, so linked jobs go back to the queue to run on their own.
+        """
+        if state == "completed":
+            rows = db.execute(
+                text("""
+                    UPDATE jobs
+                    SET state = 'completed', result = :result, finished_at = now()
+                    WHERE memoized_from = :id AND state = 'linked'
+                    RETURNING id
+                """).bindparams(bindparam("result", type_=JSONB)),
+                {"id": job_id, "result": result},
+            )
+        else:
+            rows = db.execute(
+                text("""
+                    UPDATE jobs SET state = 'queued', memoized_from = NULL
+                    WHERE memoized_from = :id AND state = 'linked'
+                    RETURNING id
+                """),
+                {"id": job_id},
+            )
+        return [row.id for row in rows]
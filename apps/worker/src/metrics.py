@@ -6,18 +6,60 @@ This module sets up OpenTelemetry with Prometheus exporter following best practi
 - System metrics (CPU, memory, disk)
 - SQLAlchemy instrumentation (database query metrics)
 - Lightweight HTTP server for /metrics endpoint (Prometheus scraping)
+
+Custom metric attributes pass through per-instrument ``AttributeGuard``s so
+that job IDs and error text never become unbounded label values, and /metrics
+is served from a short-lived cache rendered off the event loop.
 """
 
+import asyncio
+import logging
+import time
+
 from aiohttp import web
 from opentelemetry import metrics
 from opentelemetry.exporter.prometheus import PrometheusMetricReader
 from opentelemetry.instrumentation.sqlalchemy import SQLAlchemyInstrumentor
 from opentelemetry.instrumentation.system_metrics import SystemMetricsInstrumentor
+from opentelemetry.metrics import CallbackOptions, Observation
 from opentelemetry.sdk.metrics import MeterProvider
 from opentelemetry.sdk.resources import SERVICE_NAME, Resource
 from prometheus_client import REGISTRY, generate_latest
 from sqlalchemy import Engine
 
+from .cardinality import AttributeGuard, subject_template
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ExpositionCache:
+    """
+    Prometheus exposition shared by scrapes within `ttl` seconds.
+
+    ``generate_latest`` walks every series, so it runs in a thread; concurrent
+    scrapes wait for one render instead of starting their own.
+    """
+
+    def __init__(self, registry=REGISTRY, ttl: float = 1.0):
+        self.registry = registry
+        self.ttl = ttl
+        self._payload: bytes | None = None
+        self._expires = 0.0
+        self._lock = asyncio.Lock()
+
+    def _fresh(self) -> bool:
+        return self._payload is not None and time.monotonic() < self._expires
+
+    async def get(self) -> bytes:
+        if self._fresh():
+            return self._payload
+        async with self._lock:
+            if not self._fresh():
+                self._payload = await asyncio.to_thread(generate_latest, self.registry)
+                self._expires = time.monotonic() + self.ttl
+        return self._payload
+
 
 class WorkerMetricsManager:
     """
@@ -32,7 +74,11 @@ class WorkerMetricsManager:
     """
 
     def __init__(
-        self, service_name: str = "overflying-worker", metrics_port: int = 8010
+        self,
+        service_name: str = "overflying-worker",
+        metrics_port: int = 8010,
+        max_attribute_values: int = 100,
+        scrape_cache_seconds: float = 1.0,
     ):
         self.service_name = service_name
         self.metrics_port = metrics_port
@@ -40,6 +86,25 @@ class WorkerMetricsManager:
         self.meter = None
         self.app = None
         self.runner = None
+        self.exposition = ExpositionCache(ttl=scrape_cache_seconds)
+
+        # Attribute budgets per instrument
+        self.job_attributes = AttributeGuard({"job_name": None}, max_attribute_values)
+        self.failure_attributes = AttributeGuard(
+            {"job_name": None, "error_type": None}, max_attribute_values
+        )
+        self.poll_attributes = AttributeGuard({"jobs_found": {"True", "False"}})
+        self.nats_event_attributes = AttributeGuard(
+            {"event_type": None, "subject": subject_template}, max_attribute_values
+        )
+        self.stop_attributes = AttributeGuard(
+            {"job_name": None, "reason": {"cancel", "deadline"}},
+            max_attribute_values,
+        )
+        self.memo_attributes = AttributeGuard(
+            {"outcome": {"hit", "linked", "miss"}}, max_attribute_values
+        )
+        self.input_attributes = AttributeGuard({"outcome": {"hit", "miss"}})
 
         # Custom metrics instruments
         self.jobs_processed_counter = None
@@ -50,7 +115,26 @@ class WorkerMetricsManager:
         self.gpu_memory_used_gauge = None
         self.gpu_temperature_gauge = None
         self.poll_cycles_counter = None
+        self.claim_duration_histogram = None
+        self.store_reconnects_counter = None
         self.nats_events_counter = None
+        self.memo_lookups_counter = None
+        self.memo_gpu_seconds_saved_counter = None
+        self.preemptions_counter = None
+        self.preemption_wasted_counter = None
+        self.checkpoint_duration_histogram = None
+        self.jobs_stopped_counter = None
+        self.stop_latency_histogram = None
+        self.jobs_retried_counter = None
+        self.retry_delay_histogram = None
+        self.backfills_counter = None
+        self.input_lookups_counter = None
+        self.input_bytes_saved_counter = None
+        self.input_bytes_fetched_counter = None
+        self.input_evictions_counter = None
+        self.affinity_claims_counter = None
+        self.pool_wait_histogram = None
+        self.pool_timeout_counter = None
 
     def setup_metrics(self, engine: Engine = None):
         """
@@ -93,7 +177,7 @@ class WorkerMetricsManager:
         # Create custom metrics instruments
         self._create_custom_metrics()
 
-        print(f"[Metrics] OpenTelemetry metrics initialized for {self.service_name}")
+        logger.info("OpenTelemetry metrics initialized for %s", self.service_name)
 
     def _setup_automatic_instrumentation(self, engine: Engine = None):
         """Setup automatic instrumentation for SQLAlchemy and system metrics."""
@@ -104,13 +188,87 @@ class WorkerMetricsManager:
                 engine=engine,
                 meter_provider=self.meter_provider,
             )
-            print("[Metrics] SQLAlchemy automatic instrumentation enabled")
+            logger.info("SQLAlchemy automatic instrumentation enabled")
+            self.instrument_pool(engine)
 
         # Instrument system metrics (CPU, memory, disk)
         SystemMetricsInstrumentor().instrument(
             meter_provider=self.meter_provider,
         )
-        print("[Metrics] System metrics instrumentation enabled")
+        logger.info("System metrics instrumentation enabled")
+
+    def instrument_pool(self, engine: Engine):
+        """
+        Connection pool metrics for an engine on an InstrumentedQueuePool.
+
+        Connection counts are read from the pool at collection time; checkout
+        waits and timeouts are recorded by the pool as they happen.
+        """
+        pool_name = engine.pool.pool_name
+
+        def observe(key: str, **extra):
+            def callback(options: CallbackOptions):
+                # engine.pool, not pool: dispose() swaps in a new pool
+                value = engine.pool.status_counts()[key]
+                yield Observation(
+                    value, {"db.client.connection.pool.name": pool_name, **extra}
+                )
+
+            return callback
+
+        self.meter.create_observable_up_down_counter(
+            name="db.client.connection.count",
+            callbacks=[
+                observe("checked_out", **{"db.client.connection.state": "used"}),
+                observe("idle", **{"db.client.connection.state": "idle"}),
+            ],
+            description="Connections in the pool by state",
+            unit="{connection}",
+        )
+        self.meter.create_observable_gauge(
+            name="db.client.connection.max",
+            callbacks=[observe("max")],
+            description="Pool size plus max overflow",
+            unit="{connection}",
+        )
+        self.meter.create_observable_up_down_counter(
+            name="db.client.connection.pending_requests",
+            callbacks=[observe("pending")],
+            description="Checkouts waiting for a connection",
+            unit="{request}",
+        )
+        self.meter.create_observable_gauge(
+            name="overflying.db.client.connection.overflow",
+            callbacks=[observe("overflow")],
+            description="Connections open beyond the pool size",
+            unit="{connection}",
+        )
+        self.pool_wait_histogram = self.meter.create_histogram(
+            name="db.client.connection.wait_time",
+            description="Time to check a connection out of the pool",
+            unit="s",
+        )
+        self.pool_timeout_counter = self.meter.create_counter(
+            name="db.client.connection.timeouts",
+            description="Checkouts that gave up after the pool timeout",
+            unit="{timeout}",
+        )
+        engine.pool.observer = self
+        logger.info("Connection pool metrics enabled for %s", pool_name)
+
+    def record_pool_wait(self, pool_name: str, seconds: float):
+        """Record a connection checkout (InstrumentedQueuePool observer)."""
+        if self.pool_wait_histogram:
+            self.pool_wait_histogram.record(
+                seconds, {"db.client.connection.pool.name": pool_name}
+            )
+
+    def record_pool_timeout(self, pool_name: str):
+        """Record a checkout that timed out (InstrumentedQueuePool observer)."""
+        if self.pool_timeout_counter:
+            self.pool_timeout_counter.add(
+                1, {"db.client.connection.pool.name": pool_name}
+            )
 
     def _create_custom_metrics(self):
         """Create custom business metrics for Overflying Worker."""
@@ -166,6 +324,18 @@ class WorkerMetricsManager:
             unit="1",
         )
 
+        self.claim_duration_histogram = self.meter.create_histogram(
+            name="overflying.worker.claim.duration",
+            description="Time to claim the next job, empty polls included",
+            unit="s",
+        )
+
+        self.store_reconnects_counter = self.meter.create_counter(
+            name="overflying.worker.db.reconnects",
+            description="Claim connections re-established after a failure",
+            unit="1",
+        )
+
         # NATS metrics
         self.nats_events_counter = self.meter.create_counter(
             name="overflying.worker.nats.events.published",
@@ -173,7 +343,103 @@ class WorkerMetricsManager:
             unit="1",
         )
 
-        print("[Metrics] Custom worker metrics created")
+        # Memoization metrics
+        self.memo_lookups_counter = self.meter.create_counter(
+            name="overflying.worker.memo.lookups",
+            description="Memoization lookups at claim time by outcome (hit, linked, miss)",
+            unit="1",
+        )
+
+        self.memo_gpu_seconds_saved_counter = self.meter.create_counter(
+            name="overflying.worker.memo.gpu_seconds_saved",
+            description="GPU seconds not spent because a claimed job was memoized",
+            unit="s",
+        )
+
+        # Preemption metrics
+        self.preemptions_counter = self.meter.create_counter(
+            name="overflying.worker.preemptions",
+            description="Running jobs checkpointed and requeued for a more urgent job",
+            unit="1",
+        )
+
+        self.preemption_wasted_counter = self.meter.create_counter(
+            name="overflying.worker.preemption.wasted_work",
+            description="GPU seconds of work lost since the last completed step",
+            unit="s",
+        )
+
+        self.checkpoint_duration_histogram = self.meter.create_histogram(
+            name="overflying.worker.preemption.checkpoint_duration",
+            description="Time from asking a job to checkpoint until it released the GPU",
+            unit="s",
+        )
+
+        # Cancellation and deadline metrics
+        self.jobs_stopped_counter = self.meter.create_counter(
+            name="overflying.worker.jobs.stopped",
+            description="Running jobs stopped early by reason (cancel, deadline)",
+            unit="1",
+        )
+
+        self.stop_latency_histogram = self.meter.create_histogram(
+            name="overflying.worker.stop.latency",
+            description="Time from a stop request until the job's final state was recorded",
+            unit="s",
+        )
+
+        # Retry metrics
+        self.jobs_retried_counter = self.meter.create_counter(
+            name="overflying.worker.jobs.retried",
+            description="Failed runs scheduled to run again after a backoff",
+            unit="1",
+        )
+
+        self.retry_delay_histogram = self.meter.create_histogram(
+            name="overflying.worker.retry.delay",
+            description="Backoff before a failed job's next run",
+            unit="s",
+        )
+
+        # Gang scheduling metrics
+        self.backfills_counter = self.meter.create_counter(
+            name="overflying.worker.backfills",
+            description="Jobs started in GPUs held back for a waiting gang job",
+            unit="1",
+        )
+
+        # Input cache metrics (hit rate: hit lookups over all lookups)
+        self.input_lookups_counter = self.meter.create_counter(
+            name="overflying.worker.input_cache.lookups",
+            description="Job inputs staged by outcome (hit, miss)",
+            unit="1",
+        )
+
+        self.input_bytes_saved_counter = self.meter.create_counter(
+            name="overflying.worker.input_cache.bytes_saved",
+            description="Input bytes served from the local cache instead of fetched",
+            unit="By",
+        )
+
+        self.input_bytes_fetched_counter = self.meter.create_counter(
+            name="overflying.worker.input_cache.bytes_fetched",
+            description="Input bytes fetched into the local cache",
+            unit="By",
+        )
+
+        self.input_evictions_counter = self.meter.create_counter(
+            name="overflying.worker.input_cache.evictions",
+            description="Cached inputs deleted to stay within the size bound",
+            unit="1",
+        )
+
+        self.affinity_claims_counter = self.meter.create_counter(
+            name="overflying.worker.input_cache.affinity_claims",
+            description="Jobs claimed because their inputs were cached here",
+            unit="1",
+        )
+
+        logger.info("Custom worker metrics created")
 
     async def start_metrics_server(self):
         """Start a lightweight HTTP server for /metrics endpoint."""
@@ -187,22 +453,22 @@ class WorkerMetricsManager:
         site = web.TCPSite(self.runner, "0.0.0.0", self.metrics_port)
         await site.start()
 
-        print(f"[Metrics] HTTP server started on port {self.metrics_port}")
-        print(
-            f"[Metrics] Prometheus endpoint available at http://0.0.0.0:{self.metrics_port}/metrics"
+        logger.info("HTTP server started on port %d", self.metrics_port)
+        logger.info(
+            "Prometheus endpoint available at http://0.0.0.0:%d/metrics",
+            self.metrics_port,
         )
 
     async def stop_metrics_server(self):
         """Stop the metrics HTTP server."""
         if self.runner:
             await self.runner.cleanup()
-            print("[Metrics] HTTP server stopped")
+            logger.info("HTTP server stopped")
 
     async def _metrics_handler(self, request):
         """Handle /metrics endpoint for Prometheus scraping."""
-        metrics_data = generate_latest(REGISTRY)
         return web.Response(
-            body=metrics_data,
+            body=await self.exposition.get(),
             content_type="text/plain; version=0.0.4; charset=utf-8",
         )
 
@@ -215,29 +481,20 @@ class WorkerMetricsManager:
         if not self.jobs_processed_counter or not self.job_execution_time_histogram:
             return
 
-        self.jobs_processed_counter.add(
-            1,
-            attributes={
-                "job_name": job_name,
-            },
-        )
-        self.job_execution_time_histogram.record(
-            execution_time,
-            attributes={
-                "job_name": job_name,
-            },
-        )
+        attributes = self.job_attributes({"job_name": job_name})
+        self.jobs_processed_counter.add(1, attributes=attributes)
+        self.job_execution_time_histogram.record(execution_time, attributes=attributes)
 
-    def record_job_failed(self, job_id: str, job_name: str, error: str = None):
-        """Record a failed job."""
+    def record_job_failed(self, job_id: str, job_name: str, error_type: str = None):
+        """Record a failed job (`error_type` is an exception class, not a message)."""
         if not self.jobs_failed_counter:
             return
 
         attributes = {"job_name": job_name}
-        if error:
-            attributes["error_type"] = error[:50]  # Limit error string length
+        if error_type:
+            attributes["error_type"] = error_type
 
-        self.jobs_failed_counter.add(1, attributes=attributes)
+        self.jobs_failed_counter.add(1, attributes=self.failure_attributes(attributes))
 
     def record_job_started(self):
         """Record a job starting."""
@@ -255,12 +512,19 @@ class WorkerMetricsManager:
             return
 
         self.poll_cycles_counter.add(
-            1,
-            attributes={
-                "jobs_found": str(jobs_found),
-            },
+            1, attributes=self.poll_attributes({"jobs_found": jobs_found})
         )
 
+    def record_claim_duration(self, policy: str, seconds: float):
+        """Record one claim round trip on the claim connection."""
+        if self.claim_duration_histogram:
+            self.claim_duration_histogram.record(seconds, {"claim.policy": policy})
+
+    def record_store_reconnect(self):
+        """Record a re-established claim connection (JobStore observer)."""
+        if self.store_reconnects_counter:
+            self.store_reconnects_counter.add(1)
+
     def record_nats_event(self, event_type: str, subject: str):
         """Record a NATS event publication."""
         if not self.nats_events_counter:
@@ -268,10 +532,87 @@ class WorkerMetricsManager:
 
         self.nats_events_counter.add(
             1,
-            attributes={
-                "event_type": event_type,
-                "subject": subject,
-            },
+            attributes=self.nats_event_attributes(
+                {"event_type": event_type, "subject": subject}
+            ),
+        )
+
+    def record_memo_lookup(self, outcome: str, gpu_seconds_saved: float = 0.0):
+        """Record a claim-time memoization lookup and the GPU time it saved."""
+        if not self.memo_lookups_counter:
+            return
+
+        self.memo_lookups_counter.add(
+            1, attributes=self.memo_attributes({"outcome": outcome})
+        )
+        if gpu_seconds_saved > 0:
+            self.memo_gpu_seconds_saved_counter.add(gpu_seconds_saved)
+
+    def record_preemption(
+        self, job_name: str, wasted_seconds: float, checkpoint_seconds: float
+    ):
+        """Record a preempted job, the work it lost and its checkpoint time."""
+        if not self.preemptions_counter:
+            return
+
+        attributes = self.job_attributes({"job_name": job_name})
+        self.preemptions_counter.add(1, attributes=attributes)
+        self.preemption_wasted_counter.add(wasted_seconds, attributes=attributes)
+        self.checkpoint_duration_histogram.record(checkpoint_seconds)
+
+    def record_job_stopped(self, job_name: str, reason: str, latency: float):
+        """Record a job stopped by a cancel or its deadline."""
+        if not self.jobs_stopped_counter:
+            return
+
+        attributes = self.stop_attributes({"job_name": job_name, "reason": reason})
+        self.jobs_stopped_counter.add(1, attributes=attributes)
+        self.stop_latency_histogram.record(latency, {"reason": reason})
+
+    def record_job_retry(self, job_name: str, delay: float):
+        """Record a failed run scheduled for a retry."""
+        if not self.jobs_retried_counter:
+            return
+
+        self.jobs_retried_counter.add(
+            1, attributes=self.job_attributes({"job_name": job_name})
+        )
+        self.retry_delay_histogram.record(delay)
+
+    def record_backfill(self, job_name: str):
+        """Record a job backfilled ahead of a reserved gang job."""
+        if not self.backfills_counter:
+            return
+
+        self.backfills_counter.add(
+            1, attributes=self.job_attributes({"job_name": job_name})
+        )
+
+    def record_input_lookup(self, outcome: str, size: int):
+        """Record an input staged from the cache (hit) or fetched (miss)."""
+        if not self.input_lookups_counter:
+            return
+
+        self.input_lookups_counter.add(
+            1, attributes=self.input_attributes({"outcome": outcome})
+        )
+        if outcome == "hit":
+            self.input_bytes_saved_counter.add(size)
+        else:
+            self.input_bytes_fetched_counter.add(size)
+
+    def record_input_evictions(self, count: int):
+        """Record cached inputs evicted to stay within the size bound."""
+        if self.input_evictions_counter:
+            self.input_evictions_counter.add(count)
+
+    def record_affinity_claim(self, job_name: str):
+        """Record a job claimed for the inputs cached on this worker."""
+        if not self.affinity_claims_counter:
+            return
+
+        self.affinity_claims_counter.add(
+            1, attributes=self.job_attributes({"job_name": job_name})
         )
 
     def update_gpu_metrics(
@@ -290,4 +631,7 @@ class WorkerMetricsManager:
 
 
 # Global metrics manager instance
-worker_metrics_manager = WorkerMetricsManager()
+worker_metrics_manager = WorkerMetricsManager(
+    max_attribute_values=settings.metrics_max_attribute_values,
+    scrape_cache_seconds=settings.metrics_scrape_cache_seconds,
+)
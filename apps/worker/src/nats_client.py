@@ -3,11 +3,18 @@ NATS JetStream client utilities for persistent pub/sub messaging
 """
 
 import json
+import logging
 from typing import Any
 
 import nats
 from nats.aio.client import Client as NATSClient
 from nats.js import JetStreamContext
+from opentelemetry.trace import SpanKind
+
+from .cardinality import subject_template
+from .tracing import current_trace_context, get_tracer
+
+logger = logging.getLogger(__name__)
 
 
 class NATSManager:
@@ -25,14 +32,14 @@ class NATSManager:
 
         self.nc = await nats.connect(self.url)
         self.js = self.nc.jetstream()
-        print(f"[NATS] Connected to {self.url} with JetStream")
+        logger.info("Connected to %s with JetStream", self.url)
         return self.nc
 
     async def disconnect(self):
         """Disconnect from NATS server"""
         if self.nc and self.nc.is_connected:
             await self.nc.drain()
-            print("[NATS] Disconnected")
+            logger.info("Disconnected")
 
     async def ensure_stream(self, stream_name: str, subjects: list[str]):
         """Ensure a JetStream stream exists"""
@@ -41,14 +48,26 @@ class NATSManager:
 
         try:
             await self.js.stream_info(stream_name)
-            print(f"[NATS] Stream '{stream_name}' already exists")
+            logger.debug("Stream '%s' already exists", stream_name)
         except:
             # Stream doesn't exist, create it
             await self.js.add_stream(
                 name=stream_name,
                 subjects=subjects,
             )
-            print(f"[NATS] Created stream '{stream_name}' for subjects: {subjects}")
+            logger.info("Created stream '%s' for subjects: %s", stream_name, subjects)
+
+    async def publish_core(self, subject: str, data: dict[str, Any]):
+        """Fire-and-forget core NATS publish (heartbeats: not persisted)"""
+        if not self.nc:
+            await self.connect()
+        await self.nc.publish(subject, json.dumps(data, default=str).encode())
+
+    async def subscribe_core(self, subject: str, callback):
+        """Core NATS subscription (no consumer state; cancel requests)"""
+        if not self.nc:
+            await self.connect()
+        return await self.nc.subscribe(subject, cb=callback)
 
     async def publish(self, subject: str, data: dict[str, Any]):
         """Publish a message to JetStream"""
@@ -56,6 +75,16 @@ class NATSManager:
             await self.connect()
 
         payload = json.dumps(data, default=str).encode()  # default=str handles UUID
-        ack = await self.js.publish(subject, payload)
-        print(f"[NATS] Published to {subject}: {data} (seq: {ack.seq})")
+        with get_tracer().start_as_current_span(
+            f"{subject_template(subject)} publish",
+            kind=SpanKind.PRODUCER,
+            attributes={"messaging.destination.name": subject},
+        ):
+            # Consumers parent their spans on this one through the headers
+            ack = await self.js.publish(
+                subject, payload, headers=current_trace_context()
+            )
+        # Payloads only at DEBUG: rendering one per publish is not free
+        logger.info("Published to %s (seq: %s)", subject, ack.seq)
+        logger.debug("Payload for %s: %s", subject, data)
         return ack
@@ -0,0 +1,146 @@
+"""
+Connection pool setup and instrumentation
+
+``create_pooled_engine`` builds the service's engine from the pool settings:
+pool size and overflow, checkout timeout, pre-ping, recycle, and a
+per-statement timeout so a stuck query cannot hold a connection forever.
+
+With ``pgbouncer=True`` the engine is safe behind PgBouncer in transaction
+pooling mode, where consecutive transactions may land on different server
+connections:
+
+- the statement timeout is set with ``SET LOCAL`` at the start of every
+  transaction instead of as a startup parameter (PgBouncer rejects
+  ``options``), so it never leaks into another client's session
+- drivers that prepare statements server-side have that turned off
+  (psycopg2, the driver in use, never does)
+
+Session state does not survive a commit through PgBouncer; the worker keeps
+none (claims, usage and memo updates are each one transaction).
+
+``InstrumentedQueuePool`` times every checkout that has to wait and counts
+timeouts; an observer (the metrics manager) turns those into metrics.
+"""
+
+import threading
+import time
+
+from sqlalchemy import Engine, create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+# Per-driver connect arguments that disable server-side prepared statements
+NO_PREPARED_STATEMENTS = {
+    "psycopg": {"prepare_threshold": None},
+}
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool that reports checkout waits and timeouts.
+
+    ``observer`` (set after creation, carried over by ``recreate``) gets
+    ``record_pool_wait(pool_name, seconds)`` for every checkout and
+    ``record_pool_timeout(pool_name)`` when one gives up.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pool_name = "default"
+        self.observer = None
+        self.timeouts = 0
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+        # QueuePool._do_get retries by calling itself; only time the outer call
+        self._inside = threading.local()
+
+    def _do_get(self):
+        if getattr(self._inside, "active", False):
+            return super()._do_get()
+
+        self._inside.active = True
+        with self._pending_lock:
+            self._pending += 1
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.timeouts += 1
+            if self.observer:
+                self.observer.record_pool_timeout(self.pool_name)
+            raise
+        finally:
+            self._inside.active = False
+            with self._pending_lock:
+                self._pending -= 1
+        if self.observer:
+            self.observer.record_pool_wait(
+                self.pool_name, time.perf_counter() - started
+            )
+        return connection
+
+    def recreate(self) -> "InstrumentedQueuePool":
+        pool = super().recreate()
+        pool.pool_name = self.pool_name
+        pool.observer = self.observer
+        return pool
+
+    def status_counts(self) -> dict[str, int]:
+        """Checked-out, idle, overflow and waiting connections right now"""
+        return {
+            "size": self.size(),
+            "checked_out": self.checkedout(),
+            "idle": self.checkedin(),
+            "overflow": max(0, self.overflow()),
+            "max": self.size() + self._max_overflow,
+            "pending": self._pending,
+            "timeouts": self.timeouts,
+        }
+
+
+def create_pooled_engine(
+    url: str,
+    pool_name: str = "default",
+    pool_size: int = 5,
+    max_overflow: int = 10,
+    pool_timeout: float = 30.0,
+    pool_recycle: int = 1800,
+    pre_ping: bool = True,
+    statement_timeout_ms: int = 30000,
+    pgbouncer: bool = False,
+    **kwargs,
+) -> Engine:
+    """Engine on an ``InstrumentedQueuePool`` configured for this deployment"""
+    connect_args = dict(kwargs.pop("connect_args", {}))
+    if pgbouncer:
+        connect_args.update(
+            NO_PREPARED_STATEMENTS.get(make_url(url).get_driver_name(), {})
+        )
+    elif statement_timeout_ms > 0:
+        options = connect_args.get("options", "")
+        connect_args["options"] = (
+            f"{options} -c statement_timeout={int(statement_timeout_ms)}".strip()
+        )
+
+    engine = create_engine(
+        url,
+        poolclass=InstrumentedQueuePool,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=pool_timeout,
+        pool_recycle=pool_recycle,
+        pool_pre_ping=pre_ping,
+        connect_args=connect_args,
+        **kwargs,
+    )
+    engine.pool.pool_name = pool_name
+
+    if pgbouncer and statement_timeout_ms > 0:
+        statement = f"SET LOCAL statement_timeout = {int(statement_timeout_ms)}"
+
+        @event.listens_for(engine, "begin")
+        def set_statement_timeout(conn):
+            conn.exec_driver_sql(statement)
+
+    return engine
@@ -0,0 +1,108 @@
+"""
+Priority preemption of running jobs
+
+While a job runs, the worker probes the queue every few seconds for a job at
+least ``min_priority_gap`` more urgent that would fit on the same GPU. When
+one is waiting, the running job is asked to checkpoint (a ``preempt`` stop
+request to the executor), requeued with its checkpoint, and the loop goes straight
+back to claiming, which with the priority policy picks the urgent job.
+
+Knobs keep preemption from thrashing: jobs that have run less than
+``min_runtime_seconds`` in this run are left alone (little to gain, and a
+checkpoint costs time), and a job preempted ``max_preemptions`` times runs
+to completion so low-priority work cannot be starved forever.
+"""
+
+import asyncio
+import logging
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from .executor import StopSignal
+
+logger = logging.getLogger(__name__)
+
+# Most urgent queued job that could take this job's GPUs (plus any free
+# ones), if urgent enough
+WAITING_PROBE = """
+    SELECT id, priority, gpu_count FROM jobs
+    WHERE state = 'queued'
+      AND priority >= :priority
+      AND COALESCE(gpu_memory_mb, 0) <= :memory_mb
+      AND gpu_count <= :gpus
+    ORDER BY priority DESC
+    LIMIT 1
+"""
+
+
+@dataclass
+class PreemptionPolicy:
+    """When a running job should make way for a queued one"""
+
+    enabled: bool = True
+    min_priority_gap: int = 10
+    min_runtime_seconds: float = 30.0
+    max_preemptions: int = 3
+    check_interval_seconds: float = 2.0
+
+    statements = {"waiting_probe": WAITING_PROBE}
+
+    def preemptible(self, job_row) -> bool:
+        return self.enabled and (job_row.preemptions or 0) < self.max_preemptions
+
+    async def watch(
+        self,
+        store,
+        job_row,
+        memory_mb: int,
+        stop: StopSignal,
+        gpus: int = 1,
+        free_gpus: Callable[[], int] = lambda: 0,
+    ):
+        """
+        Request a preempt once a more urgent job is waiting; runs until cancelled.
+
+        `gpus` is how many GPUs the job holds and `free_gpus` how many are
+        free on the node; a waiting job the free GPUs can hold by themselves
+        is left to the claim loop. Returns the waiting job's row. Probe
+        failures are logged and retried: a flaky database should not stop
+        the running job.
+        """
+        started = time.monotonic()
+        threshold = (job_row.priority or 0) + self.min_priority_gap
+        while True:
+            await asyncio.sleep(self.check_interval_seconds)
+            if time.monotonic() - started < self.min_runtime_seconds:
+                continue
+            free = free_gpus()
+            try:
+                waiting = await store.fetchrow(
+                    "waiting_probe",
+                    priority=threshold,
+                    memory_mb=memory_mb,
+                    gpus=gpus + free,
+                )
+            except Exception as e:
+                logger.warning("Preemption probe failed: %s", e)
+                continue
+            if waiting and waiting.gpu_count > free:
+                logger.info(
+                    "Preempting job %s (priority %s) for job %s (priority %s)",
+                    job_row.id,
+                    job_row.priority,
+                    waiting.id,
+                    waiting.priority,
+                )
+                stop.request("preempt")
+                return waiting
+
+
+def build_preemption_policy(settings) -> PreemptionPolicy:
+    return PreemptionPolicy(
+        enabled=settings.preemption_enabled,
+        min_priority_gap=settings.preemption_min_priority_gap,
+        min_runtime_seconds=settings.preemption_min_runtime_seconds,
+        max_preemptions=settings.preemption_max_per_job,
+        check_interval_seconds=settings.preemption_check_interval_seconds,
+    )
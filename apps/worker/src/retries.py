@@ -0,0 +1,117 @@
+"""
+Scheduled jobs and retries with backoff
+
+A job that should not run yet waits in the ``scheduled`` state with the time
+it becomes due in ``next_run_at``: jobs submitted with a future ``run_at``,
+and failed runs the worker retries. Scheduled jobs are outside the partial
+``state = 'queued'`` claim indexes, so claims never walk past them; the
+partial ``ix_jobs_scheduled_next_run`` index serves the two queries below.
+
+Before claiming, the worker promotes due jobs to ``queued`` (in batches,
+``SKIP LOCKED`` so workers do not contend). It knows when the next one is
+due from a probe of that index, repeated at most every ``refresh_seconds``
+and after every promotion, and wakes up for it rather than sleeping out the
+whole poll interval.
+
+A failed run is retried up to ``max_retries`` times (the job's own
+``max_retries`` if set) after an exponential backoff with jitter, so a batch
+of jobs failing together does not come back as one burst.
+"""
+
+import logging
+import random
+import time
+from dataclasses import dataclass
+
+logger = logging.getLogger(__name__)
+
+SCHEDULED_STATE = "scheduled"
+
+PROMOTE_DUE = """
+    UPDATE jobs SET state = 'queued'
+    WHERE id IN (
+        SELECT id FROM jobs
+        WHERE state = 'scheduled' AND next_run_at <= now()
+        ORDER BY next_run_at
+        FOR UPDATE SKIP LOCKED
+        LIMIT :batch
+    )
+    RETURNING id
+"""
+
+# Seconds until the earliest scheduled job is due, on the database's clock
+NEXT_DUE = """
+    SELECT extract(epoch FROM min(next_run_at) - now())::float8 AS due_in
+    FROM jobs WHERE state = 'scheduled'
+"""
+
+
+@dataclass
+class RetryPolicy:
+    """How often and how long after a failure a job runs again"""
+
+    max_retries: int = 2
+    base_delay_seconds: float = 10.0
+    max_delay_seconds: float = 600.0
+
+    def should_retry(self, job_row) -> bool:
+        limit = self.max_retries if job_row.max_retries is None else job_row.max_retries
+        return (job_row.retries or 0) < limit
+
+    def delay(self, retries: int) -> float:
+        """Backoff before retry number `retries` + 1, with "equal" jitter"""
+        ceiling = min(self.max_delay_seconds, self.base_delay_seconds * 2**retries)
+        return random.uniform(ceiling / 2, ceiling)
+
+
+class ScheduledJobs:
+    """Promotes due scheduled jobs and tracks when the next one is due"""
+
+    statements = {"promote_due": PROMOTE_DUE, "next_due": NEXT_DUE}
+
+    def __init__(self, refresh_seconds: float = 5.0, batch_size: int = 100):
+        self.refresh_seconds = refresh_seconds
+        self.batch_size = batch_size
+        self.due_at: float | None = None
+        self.refreshed_at: float | None = None
+
+    def expect(self, due_in: float):
+        """Note a job this worker scheduled itself, due in `due_in` seconds"""
+        due_at = time.monotonic() + max(due_in, 0.0)
+        if self.due_at is None or due_at < self.due_at:
+            self.due_at = due_at
+
+    async def refresh(self, store):
+        row = await store.fetchrow("next_due")
+        self.refreshed_at = time.monotonic()
+        self.due_at = None
+        if row and row.due_in is not None:
+            self.expect(row.due_in)
+
+    async def promote_due(self, store) -> int:
+        """Queue the jobs that are due; returns how many were promoted"""
+        now = time.monotonic()
+        if self.refreshed_at is None or now - self.refreshed_at >= self.refresh_seconds:
+            await self.refresh(store)
+        if self.due_at is None or self.due_at > now:
+            return 0
+
+        promoted = len(await store.fetch("promote_due", batch=self.batch_size))
+        if promoted:
+            logger.info("Queued %d scheduled jobs", promoted)
+        await self.refresh(store)
+        return promoted
+
+    def sleep_seconds(self, poll_interval: float) -> float:
+        """Idle sleep: the poll interval, or less if a job is due sooner"""
+        if self.due_at is None:
+            return poll_interval
+        return min(poll_interval, max(self.due_at - time.monotonic(), 0.0))
+
+
+def build_retry_policy(settings) -> RetryPolicy:
+    return RetryPolicy(
+        max_retries=settings.max_retries,
+        base_delay_seconds=settings.retry_base_delay_seconds,
+        max_delay_seconds=settings.retry_max_delay_seconds,
+    )
@@ -0,0 +1,356 @@
+"""Claim-ordering policies for the worker poll loop
+
+Two policies share the same interface, ``claim(db, capacity) -> Row | None``
+on a session, and ``claim_prepared(store, capacity)`` for the worker's
+``JobStore``, which prepares each policy's ``statements`` once per
+connection. ``capacity`` limits claims to jobs that fit the worker's free
+GPUs (``FITS``, see ``src/gang.py``); without it any job may be claimed.
+``head_prepared(store)`` is the job the policy would claim first if every
+job fitted, which gang scheduling reserves GPUs for:
+
+- ``PriorityClaimPolicy``: strict ``priority DESC, created_at ASC`` (the
+  original behaviour).
+- ``FairShareClaimPolicy``: picks the submitter with the largest fair-share
+  deficit, measured in exponentially decayed GPU-seconds, and ages priority
+  so that old low-priority jobs eventually win.
+
+Neither policy sorts the whole queue. Fair-share walks the distinct queued
+submitters with a loose index scan and probes each one's head jobs through
+the partial ``ix_jobs_queued_submitter_*`` indexes, so a claim costs
+O(submitters * log n) no matter how many jobs a single submitter has queued.
+"""
+
+from dataclasses import dataclass
+from datetime import UTC, datetime
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+CLAIM_COLUMNS = (
+    "id, name, params, priority, memo_key, submitted_by, trace_context, "
+    "gpu_memory_mb, checkpoint, preemptions, max_runtime_seconds, "
+    "retries, max_retries, gpu_count"
+)
+
+# What fits this worker now (see src/gang.py): the whole gang on free GPUs
+# each large enough for it (:free_memory lists the free GPUs' memory in MB,
+# NULL for any job) and, while GPUs are reserved for a gang, nothing that
+# could delay it
+FITS = """
+          AND (CAST(:free_memory AS int[]) IS NULL
+               OR gpu_count <= (
+                   SELECT count(*) FROM unnest(CAST(:free_memory AS int[])) AS m
+                   WHERE m >= COALESCE(gpu_memory_mb, 0)))
+          AND (gpu_count <= :extra
+               OR LEAST(max_runtime_seconds, CAST(:cap AS float8))
+                  <= CAST(:window AS float8))
+"""
+
+# Claim parameters that let any job through
+ANY_FIT = {
+    "free_memory": None,
+    "extra": 2**31 - 1,
+    "cap": None,
+    "window": None,
+}
+
+PRIORITY_CLAIM = text(f"""
+    UPDATE jobs
+    SET state = 'running', started_at = now()
+    WHERE id = (
+        SELECT id FROM jobs
+        WHERE state = 'queued' {FITS}
+        ORDER BY priority DESC, created_at ASC
+        FOR UPDATE SKIP LOCKED
+        LIMIT 1
+    )
+    RETURNING {CLAIM_COLUMNS}
+""")
+
+# The queued job claimed first when everything fits, without claiming it
+PRIORITY_HEAD = """
+    SELECT id, gpu_count FROM jobs
+    WHERE state = 'queued'
+    ORDER BY priority DESC, created_at ASC
+    LIMIT 1
+"""
+
+SUBMITTER_CANDIDATES = text("""
+    WITH RECURSIVE submitters AS (
+        (
+            SELECT COALESCE(submitted_by, '') AS submitter FROM jobs
+            WHERE state = 'queued'
+            ORDER BY COALESCE(submitted_by, '')
+            LIMIT 1
+        )
+        UNION ALL
+        SELECT (
+            SELECT COALESCE(j.submitted_by, '') FROM jobs j
+            WHERE j.state = 'queued'
+              AND COALESCE(j.submitted_by, '') > s.submitter
+            ORDER BY COALESCE(j.submitted_by, '')
+            LIMIT 1
+        )
+        FROM submitters s
+        WHERE s.submitter IS NOT NULL
+    )
+    SELECT
+        s.submitter,
+        head.priority AS head_priority,
+        head.created_at AS head_created_at,
+        oldest.priority AS oldest_priority,
+        oldest.created_at AS oldest_created_at,
+        COALESCE(
+            u.gpu_seconds * exp(
+                -ln(2) * extract(epoch FROM now() - u.updated_at) / :half_life
+            ),
+            0
+        ) AS usage_seconds
+    FROM submitters s
+    CROSS JOIN LATERAL (
+        SELECT priority, created_at FROM jobs
+        WHERE state = 'queued' AND COALESCE(submitted_by, '') = s.submitter
+        ORDER BY priority DESC, created_at ASC
+        LIMIT 1
+    ) head
+    CROSS JOIN LATERAL (
+        SELECT priority, created_at FROM jobs
+        WHERE state = 'queued' AND COALESCE(submitted_by, '') = s.submitter
+        ORDER BY created_at ASC
+        LIMIT 1
+    ) oldest
+    LEFT JOIN submitter_usage u ON u.submitted_by = s.submitter
+    WHERE s.submitter IS NOT NULL
+""")
+
+# Per-submitter claim; {order} is one of SUBMITTER_ORDERS, never user input
+SUBMITTER_CLAIM = f"""
+    UPDATE jobs
+    SET state = 'running', started_at = now()
+    WHERE id = (
+        SELECT id FROM jobs
+        WHERE state = 'queued' AND COALESCE(submitted_by, '') = :submitter
+          {FITS}
+        ORDER BY {{order}}
+        FOR UPDATE SKIP LOCKED
+        LIMIT 1
+    )
+    RETURNING {CLAIM_COLUMNS}
+"""
+
+# A submitter's job claimed first when everything fits; {order} as above
+SUBMITTER_HEAD = """
+    SELECT id, gpu_count FROM jobs
+    WHERE state = 'queued' AND COALESCE(submitted_by, '') = :submitter
+    ORDER BY {order}
+    LIMIT 1
+"""
+
+SUBMITTER_ORDERS = {
+    "head": "priority DESC, created_at ASC",
+    "oldest": "created_at ASC",
+}
+
+RECORD_USAGE = text("""
+    INSERT INTO submitter_usage (submitted_by, gpu_seconds, updated_at)
+    VALUES (:submitter, :gpu_seconds, now())
+    ON CONFLICT (submitted_by) DO UPDATE
+    SET gpu_seconds = submitter_usage.gpu_seconds * exp(
+            -ln(2) * extract(epoch FROM now() - submitter_usage.updated_at) / :half_life
+        ) + EXCLUDED.gpu_seconds,
+        updated_at = now()
+""")
+
+
+@dataclass
+class SubmitterCandidate:
+    """Head-of-queue summary for one submitter"""
+
+    submitter: str
+    head_priority: int
+    head_created_at: datetime
+    oldest_priority: int
+    oldest_created_at: datetime
+    usage_seconds: float
+
+
+@dataclass
+class ScoredCandidate:
+    """A submitter, which of its head jobs to claim, and the resulting score"""
+
+    submitter: str
+    order: str
+    score: float
+
+
+def aged_priority(priority: int, created_at: datetime, now: datetime, rate: float):
+    """Priority plus `rate` points for every hour the job has been waiting"""
+    age_hours = max((now - created_at).total_seconds(), 0.0) / 3600
+    return priority + rate * age_hours
+
+
+def score_candidates(
+    candidates: list[SubmitterCandidate],
+    now: datetime,
+    fair_share_weight: float,
+    aging_per_hour: float,
+) -> list[ScoredCandidate]:
+    """
+    Rank submitters by aged priority plus a fair-share deficit bonus.
+
+    Every active submitter is entitled to an equal share of recent GPU time.
+    The deficit (entitled share minus actual share, in [-1, 1]) is scaled by
+    ``fair_share_weight`` so that a weight of 10 lets an idle submitter
+    outrank a busy one holding jobs up to 10 priority points higher.
+    """
+    if not candidates:
+        return []
+
+    total_usage = sum(c.usage_seconds for c in candidates)
+    entitled = 1 / len(candidates)
+
+    scored = []
+    for c in candidates:
+        share = c.usage_seconds / total_usage if total_usage > 0 else 0.0
+        deficit = entitled - share
+
+        head = aged_priority(c.head_priority, c.head_created_at, now, aging_per_hour)
+        oldest = aged_priority(
+            c.oldest_priority, c.oldest_created_at, now, aging_per_hour
+        )
+        order, best = ("oldest", oldest) if oldest > head else ("head", head)
+
+        scored.append(
+            ScoredCandidate(
+                submitter=c.submitter,
+                order=order,
+                score=best + fair_share_weight * deficit,
+            )
+        )
+
+    return sorted(scored, key=lambda s: s.score, reverse=True)
+
+
+def record_usage(
+    db: Session, submitted_by: str | None, gpu_seconds: float, half_life: float
+):
+    """Add GPU time to a submitter's decayed usage (policy independent)"""
+    db.execute(
+        RECORD_USAGE,
+        {
+            "submitter": submitted_by or "",
+            "gpu_seconds": gpu_seconds,
+            "half_life": half_life,
+        },
+    )
+
+
+class PriorityClaimPolicy:
+    """Strict priority ordering, oldest first within a priority"""
+
+    name = "priority"
+    statements = {"claim": PRIORITY_CLAIM.text, "queue_head": PRIORITY_HEAD}
+
+    def claim(self, db: Session, capacity: dict | None = None):
+        return db.execute(PRIORITY_CLAIM, capacity or ANY_FIT).fetchone()
+
+    async def claim_prepared(self, store, capacity: dict | None = None):
+        return await store.fetchrow("claim", **(capacity or ANY_FIT))
+
+    async def head_prepared(self, store):
+        return await store.fetchrow("queue_head")
+
+
+class FairShareClaimPolicy:
+    """Deficit-weighted fair share across submitters with priority aging"""
+
+    name = "fair_share"
+    statements = {
+        **PriorityClaimPolicy.statements,
+        "candidates": SUBMITTER_CANDIDATES.text,
+        "claim_head": SUBMITTER_CLAIM.format(order=SUBMITTER_ORDERS["head"]),
+        "claim_oldest": SUBMITTER_CLAIM.format(order=SUBMITTER_ORDERS["oldest"]),
+        "head_head": SUBMITTER_HEAD.format(order=SUBMITTER_ORDERS["head"]),
+        "head_oldest": SUBMITTER_HEAD.format(order=SUBMITTER_ORDERS["oldest"]),
+    }
+
+    def __init__(
+        self,
+        half_life_seconds: float = 3600.0,
+        fair_share_weight: float = 10.0,
+        aging_per_hour: float = 1.0,
+        max_candidates: int = 4,
+    ):
+        self.half_life_seconds = half_life_seconds
+        self.fair_share_weight = fair_share_weight
+        self.aging_per_hour = aging_per_hour
+        self.max_candidates = max_candidates
+        self._fallback = PriorityClaimPolicy()
+
+    def candidates(self, db: Session) -> list[SubmitterCandidate]:
+        rows = db.execute(
+            SUBMITTER_CANDIDATES, {"half_life": self.half_life_seconds}
+        ).fetchall()
+        return [SubmitterCandidate(*row) for row in rows]
+
+    def rank(self, candidates: list[SubmitterCandidate]) -> list[ScoredCandidate]:
+        return score_candidates(
+            candidates,
+            now=datetime.now(UTC),
+            fair_share_weight=self.fair_share_weight,
+            aging_per_hour=self.aging_per_hour,
+        )
+
+    def claim(self, db: Session, capacity: dict | None = None):
+        capacity = capacity or ANY_FIT
+        ranked = self.rank(self.candidates(db))
+
+        # Try the best few submitters; their heads may be locked by other
+        # workers, or too large for the GPUs free here
+        for candidate in ranked[: self.max_candidates]:
+            query = SUBMITTER_CLAIM.format(order=SUBMITTER_ORDERS[candidate.order])
+            row = db.execute(
+                text(query), {"submitter": candidate.submitter, **capacity}
+            ).fetchone()
+            if row:
+                return row
+
+        # Heavily contended: fall back to any claimable job rather than idle
+        return self._fallback.claim(db, capacity) if ranked else None
+
+    async def claim_prepared(self, store, capacity: dict | None = None):
+        capacity = capacity or ANY_FIT
+        rows = await store.fetch("candidates", half_life=self.half_life_seconds)
+        ranked = self.rank([SubmitterCandidate(*row) for row in rows])
+
+        for candidate in ranked[: self.max_candidates]:
+            row = await store.fetchrow(
+                f"claim_{candidate.order}", submitter=candidate.submitter, **capacity
+            )
+            if row:
+                return row
+
+        return await self._fallback.claim_prepared(store, capacity) if ranked else None
+
+    async def head_prepared(self, store):
+        """The best-ranked submitter's job, whether or not it fits"""
+        rows = await store.fetch("candidates", half_life=self.half_life_seconds)
+        ranked = self.rank([SubmitterCandidate(*row) for row in rows])
+        if not ranked:
+            return None
+        best = ranked[0]
+        return await store.fetchrow(f"head_{best.order}", submitter=best.submitter)
+
+
+def build_claim_policy(settings) -> PriorityClaimPolicy | FairShareClaimPolicy:
+    """Create the claim policy selected by ``settings.claim_policy``"""
+    if settings.claim_policy == "priority":
+        return PriorityClaimPolicy()
+    if settings.claim_policy == "fair_share":
+        return FairShareClaimPolicy(
+            half_life_seconds=settings.fair_share_half_life_seconds,
+            fair_share_weight=settings.fair_share_weight,
+            aging_per_hour=settings.priority_aging_per_hour,
+            max_candidates=settings.fair_share_candidates,
+        )
+    raise ValueError(f"Unknown claim policy: {settings.claim_policy!r}")
@@ -0,0 +1,378 @@
+"""Discrete-event simulation of the worker pool for offline policy evaluation
+
+``JobExecutor`` runs in real time, so comparing claim policies on a live
+cluster takes as long as the workload itself. The simulator replays a
+synthetic workload against a pool of virtual workers on a virtual clock:
+
+- each worker owns a real ``GPUManager`` and, like ``Worker.run``, claims
+  while it has a free GPU, running one job per GPU at once; a finishing job
+  releases its GPU, charges usage and wakes its worker to claim again, and a
+  worker that found the queue empty sleeps ``poll_interval`` virtual seconds
+- claims go through an in-memory queue that orders jobs the way the claim
+  policy's SQL does; fair share ranks submitters with the real
+  ``score_candidates`` and decays usage like ``record_usage``
+
+Every simulated job takes one GPU. Gang jobs (``gpu_count > 1``), the
+``GangPlanner`` reservation with backfill ahead of it, runtime caps and GPU
+memory fits are not modelled, so results say nothing about gang or backfill
+settings; ``simulate`` refuses a workload with gang jobs rather than run them
+as single-GPU jobs.
+
+Jobs are rows across parallel ``array`` columns (about 30 bytes per job), so a
+million-job month fits in memory and runs in seconds. Runs are deterministic
+for a given workload and seed.
+"""
+
+import bisect
+import heapq
+import itertools
+import math
+import random
+import time
+from array import array
+from collections import deque
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+
+from .gpu_manager import GPUManager
+from .scheduling import (
+    FairShareClaimPolicy,
+    PriorityClaimPolicy,
+    SubmitterCandidate,
+    score_candidates,
+)
+
+# Virtual time zero, only needed because aging works on datetimes
+EPOCH = datetime(2025, 1, 1, tzinfo=UTC)
+
+LN2 = math.log(2)
+
+# GPUs per worker, as the simulated GPUManager detects them
+GPUS_PER_WORKER = len(GPUManager(simulation=True).gpus)
+
+
+@dataclass
+class Workload:
+    """Jobs as parallel columns, ordered by arrival (seconds from EPOCH)"""
+
+    arrival: array  # "d"
+    duration: array  # "d", seconds on a GPU
+    priority: array  # "b"
+    submitter: array  # "H", index into submitters
+    submitters: list[str]
+    # "B", GPUs per job; None when every job takes one (the only case simulated)
+    gpu_count: array | None = None
+
+    def __len__(self) -> int:
+        return len(self.arrival)
+
+
+def generate_workload(
+    jobs: int,
+    days: float = 30.0,
+    workers: int = 8,
+    load: float = 0.85,
+    submitters: int = 20,
+    skew: float = 1.0,
+    burst: float = 1.0,
+    max_priority: int = 9,
+    duration_sigma: float = 1.0,
+    seed: int = 1,
+) -> Workload:
+    """
+    Synthetic workload with Poisson arrivals over `days`.
+
+    Jobs arrive in bursts of mean size `burst` from one submitter each;
+    submitters are picked with Zipf weights ``1 / rank**skew``. Durations are
+    lognormal with their mean chosen so that the GPUs of `workers` workers are
+    `load` busy on average.
+    """
+    rng = random.Random(seed)
+    horizon = days * 86400
+    mean_duration = load * workers * GPUS_PER_WORKER * horizon / jobs
+    mu = math.log(mean_duration) - duration_sigma**2 / 2
+
+    cum_weights = list(
+        itertools.accumulate(1 / (rank + 1) ** skew for rank in range(submitters))
+    )
+
+    arrival = array("d")
+    submitter = array("H")
+    burst_rate = jobs / burst / horizon
+    now = 0.0
+    while len(arrival) < jobs:
+        now += rng.expovariate(burst_rate)
+        size = 1 + int(rng.expovariate(1 / (burst - 1))) if burst > 1 else 1
+        owner = bisect.bisect(cum_weights, rng.random() * cum_weights[-1])
+        for _ in range(min(size, jobs - len(arrival))):
+            arrival.append(now)
+            submitter.append(owner)
+
+    duration = array("d", (rng.lognormvariate(mu, duration_sigma) for _ in range(jobs)))
+    priority = array("b", (int(rng.random() * (max_priority + 1)) for _ in range(jobs)))
+    width = len(str(submitters - 1))
+    return Workload(
+        arrival=arrival,
+        duration=duration,
+        priority=priority,
+        submitter=submitter,
+        submitters=[f"submitter-{i:0{width}d}" for i in range(submitters)],
+    )
+
+
+class PriorityQueue:
+    """In-memory ``PriorityClaimPolicy``: priority DESC, arrival ASC"""
+
+    def __init__(self, workload: Workload):
+        self._workload = workload
+        self._heap = []
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def push(self, job: int):
+        w = self._workload
+        heapq.heappush(self._heap, (-w.priority[job], w.arrival[job], job))
+
+    def pop(self, now: float) -> int | None:
+        return heapq.heappop(self._heap)[2] if self._heap else None
+
+    def record_usage(self, submitter: int, gpu_seconds: float, now: float):
+        pass
+
+
+class FairShareQueue:
+    """
+    In-memory ``FairShareClaimPolicy``.
+
+    Each submitter keeps its queued jobs in a priority heap (the "head" order)
+    and an arrival deque (the "oldest" order); a claimed job stays in the
+    other structure and is skipped when it reaches the front. Candidates are
+    rebuilt only for submitters whose queue changed, then every claim ranks
+    them with ``score_candidates`` exactly as the worker does.
+    """
+
+    def __init__(self, workload: Workload, policy: FairShareClaimPolicy):
+        self._workload = workload
+        self.policy = policy
+        count = len(workload.submitters)
+        self._by_priority = [[] for _ in range(count)]
+        self._by_arrival = [deque() for _ in range(count)]
+        self._queued = [0] * count
+        self._claimed = bytearray(len(workload))
+        self._candidates: list[SubmitterCandidate | None] = [None] * count
+        self._active = []  # submitters with queued jobs, in name order
+        self._stale = set()
+        self._usage = [0.0] * count
+        self._usage_at = [0.0] * count
+        self._index = {name: i for i, name in enumerate(workload.submitters)}
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def push(self, job: int):
+        w = self._workload
+        s = w.submitter[job]
+        heapq.heappush(self._by_priority[s], (-w.priority[job], w.arrival[job], job))
+        self._by_arrival[s].append(job)
+        self._queued[s] += 1
+        self._size += 1
+        self._stale.add(s)
+
+    def decayed_usage(self, submitter: int, now: float) -> float:
+        elapsed = now - self._usage_at[submitter]
+        return self._usage[submitter] * math.exp(
+            -LN2 * elapsed / self.policy.half_life_seconds
+        )
+
+    def record_usage(self, submitter: int, gpu_seconds: float, now: float):
+        self._usage[submitter] = self.decayed_usage(submitter, now) + gpu_seconds
+        self._usage_at[submitter] = now
+
+    def _refresh(self, s: int):
+        if not self._queued[s]:
+            self._candidates[s] = None
+            self._active.remove(s)
+            return
+        heap, fifo, claimed = self._by_priority[s], self._by_arrival[s], self._claimed
+        while claimed[heap[0][2]]:
+            heapq.heappop(heap)
+        while claimed[fifo[0]]:
+            fifo.popleft()
+
+        if self._candidates[s] is None:
+            bisect.insort(self._active, s)
+        w = self._workload
+        head, oldest = heap[0][2], fifo[0]
+        self._candidates[s] = SubmitterCandidate(
+            submitter=w.submitters[s],
+            head_priority=w.priority[head],
+            head_created_at=EPOCH + timedelta(seconds=w.arrival[head]),
+            oldest_priority=w.priority[oldest],
+            oldest_created_at=EPOCH + timedelta(seconds=w.arrival[oldest]),
+            usage_seconds=0.0,
+        )
+
+    def pop(self, now: float) -> int | None:
+        if not self._size:
+            return None
+        for s in self._stale:
+            self._refresh(s)
+        self._stale.clear()
+
+        # Ordered by submitter like the SQL, so score ties break the same way
+        candidates = []
+        for s in self._active:
+            candidate = self._candidates[s]
+            candidate.usage_seconds = self.decayed_usage(s, now)
+            candidates.append(candidate)
+
+        best = score_candidates(
+            candidates,
+            now=EPOCH + timedelta(seconds=now),
+            fair_share_weight=self.policy.fair_share_weight,
+            aging_per_hour=self.policy.aging_per_hour,
+        )[0]
+
+        s = self._index[best.submitter]
+        if best.order == "head":
+            job = heapq.heappop(self._by_priority[s])[2]
+        else:
+            job = self._by_arrival[s].popleft()
+        self._claimed[job] = 1
+        self._queued[s] -= 1
+        self._size -= 1
+        self._stale.add(s)
+        return job
+
+
+def queue_for_policy(
+    policy: PriorityClaimPolicy | FairShareClaimPolicy, workload: Workload
+):
+    """In-memory queue that claims in the same order as `policy`"""
+    if isinstance(policy, FairShareClaimPolicy):
+        return FairShareQueue(workload, policy)
+    if isinstance(policy, PriorityClaimPolicy):
+        return PriorityQueue(workload)
+    raise ValueError(f"No simulated queue for policy {policy!r}")
+
+
+@dataclass
+class SimulationRun:
+    """Outcome of one policy over one workload"""
+
+    policy: str
+    workers: int
+    gpus: int
+    start: array  # "d", claim time per job
+    busy_seconds: float
+    makespan: float
+    events: int
+    wall_seconds: float
+
+
+def simulate(
+    workload: Workload,
+    policy: PriorityClaimPolicy | FairShareClaimPolicy,
+    workers: int = 8,
+    poll_interval: float = 5.0,
+    seed: int = 1,
+) -> SimulationRun:
+    """
+    Run `workload` through `workers` virtual workers until every job finished.
+
+    Each worker polls at a random phase within its first interval. With
+    ``poll_interval <= 0`` idle workers instead wake as soon as a job
+    arrives, which bounds what faster polling could gain.
+    """
+    if workload.gpu_count is not None and any(n > 1 for n in workload.gpu_count):
+        raise ValueError(
+            "Gang jobs (gpu_count > 1) are not simulated: the model has no "
+            "gang reservation or backfill"
+        )
+
+    started = time.perf_counter()
+    rng = random.Random(seed)
+    queue = queue_for_policy(policy, workload)
+    managers = [GPUManager(simulation=True) for _ in range(workers)]
+    arrival, duration, owner = workload.arrival, workload.duration, workload.submitter
+    total = len(workload)
+
+    start = array("d", bytes(8 * total))
+    # Workers with a free GPU that found the queue empty (poll_interval <= 0)
+    idle = deque()
+    is_idle = [poll_interval <= 0] * workers
+    # (virtual time, worker, job, GPU) when a job finishes, or
+    # (virtual time, worker, -1, wakeup) when a worker polls; a poll is stale
+    # once its worker was woken by a finish and went back to sleep
+    events = []
+    wakeup = [0] * workers
+    if poll_interval > 0:
+        for w in range(workers):
+            heapq.heappush(events, (rng.uniform(0, poll_interval), w, -1, 0))
+    else:
+        idle.extend(range(workers))
+
+    next_job = 0
+    busy = makespan = 0.0
+    handled = 0
+    while True:
+        next_event = events[0][0] if events else math.inf
+        # Arrivals at the same instant are visible to that poll
+        if next_job < total and arrival[next_job] <= next_event:
+            now = arrival[next_job]
+            queue.push(next_job)
+            next_job += 1
+            while idle:
+                w = idle.popleft()
+                if is_idle[w]:
+                    is_idle[w] = False
+                    wakeup[w] += 1
+                    heapq.heappush(events, (now, w, -1, wakeup[w]))
+                    break
+            continue
+        if not events:
+            break
+
+        now, w, job, tag = heapq.heappop(events)
+        manager = managers[w]
+        if job >= 0:
+            manager.release_gpu(tag)
+            queue.record_usage(owner[job], duration[job], now)
+            busy += duration[job]
+            makespan = now
+        elif tag != wakeup[w]:
+            continue
+        handled += 1
+
+        # Claim while a GPU is free, as Worker.run does
+        while gpu := manager.get_available_gpu():
+            job = queue.pop(now)
+            if job is None:
+                break
+            manager.allocate_gpu(gpu.id)
+            start[job] = now
+            heapq.heappush(events, (now + duration[job], w, job, gpu.id))
+
+        # Busy on every GPU, the next finish wakes it; otherwise sleep
+        wakeup[w] += 1
+        if gpu is not None and next_job < total:
+            if poll_interval > 0:
+                heapq.heappush(events, (now + poll_interval, w, -1, wakeup[w]))
+            elif not is_idle[w]:
+                is_idle[w] = True
+                idle.append(w)
+        else:
+            is_idle[w] = False
+
+    return SimulationRun(
+        policy=policy.name,
+        workers=workers,
+        gpus=sum(len(m.gpus) for m in managers),
+        start=start,
+        busy_seconds=busy,
+        makespan=makespan,
+        events=handled,
+        wall_seconds=time.perf_counter() - started,
+    )
@@ -0,0 +1,298 @@
+"""
+Async data path for the worker loop
+
+Claims, state transitions and queue probes run on one dedicated asyncpg
+connection with their statements prepared once per connection, so the hot
+path is a single round trip without parsing or planning and never queues for
+a pooled connection behind slower work.
+
+When that connection breaks (server restart, failover, network) it is
+dropped and re-established on next use, re-preparing everything. Idempotent
+transitions are retried once on the new connection; claims are not, since a
+claim whose commit was lost in flight must not take a second job. Callers
+get ``StoreUnavailableError`` and back off. With a multi-host
+``DATABASE_URL`` reconnects only accept a read-write server, so a failover
+lands on the new primary.
+
+Slower bookkeeping (memo cache, usage accounting) runs on the service's
+SQLAlchemy pool in a thread, with a fresh session and transaction per call,
+so it neither blocks the loop nor leaves a failed transaction behind.
+
+Behind PgBouncer (``pgbouncer=True``) named prepared statements are not
+used and the statement timeout is enforced client-side.
+"""
+
+import asyncio
+import json
+import logging
+import re
+
+import asyncpg
+from sqlalchemy import exc
+
+logger = logging.getLogger(__name__)
+
+REQUEUED_STATE = """
+    state = CASE WHEN state = 'cancelling' THEN 'cancelled' ELSE 'queued' END,
+    finished_at = CASE WHEN state = 'cancelling' THEN now() END
+"""
+
+# State transitions on claimed jobs; all idempotent, so safe to retry
+TRANSITIONS = {
+    "finish": """
+        UPDATE jobs
+        SET state = :state, result = :result, finished_at = now(), checkpoint = NULL
+        WHERE id = :id
+    """,
+    # Back to the queue, unless a cancel arrived meanwhile
+    "requeue": f"""
+        UPDATE jobs SET {REQUEUED_STATE}
+        WHERE id = :id
+    """,
+    # Guarded on state so a retry does not count the preemption twice
+    "preempt": f"""
+        UPDATE jobs
+        SET {REQUEUED_STATE}, checkpoint = :checkpoint,
+            preemptions = preemptions + 1
+        WHERE id = :id AND state IN ('running', 'cancelling')
+    """,
+    # Run again after a backoff, unless a cancel arrived meanwhile; guarded
+    # on state so a retry of the statement does not count twice
+    "retry": """
+        UPDATE jobs
+        SET state = CASE WHEN state = 'cancelling' THEN 'cancelled' ELSE 'scheduled' END,
+            finished_at = CASE WHEN state = 'cancelling' THEN now() END,
+            next_run_at = now() + make_interval(secs => :delay),
+            retries = retries + 1, result = :result, checkpoint = NULL
+        WHERE id = :id AND state IN ('running', 'cancelling')
+    """,
+    "complete_memoized": """
+        UPDATE jobs
+        SET state = 'completed', result = :result,
+            memoized_from = :original, finished_at = now()
+        WHERE id = :id
+    """,
+    "link": """
+        UPDATE jobs SET state = :state, memoized_from = :original
+        WHERE id = :id
+    """,
+}
+
+# Errors after which the connection cannot be trusted (a read-only error
+# means we are still talking to a demoted primary)
+CONNECTION_ERRORS = (
+    OSError,
+    TimeoutError,
+    asyncpg.PostgresConnectionError,
+    asyncpg.OperatorInterventionError,
+    asyncpg.ReadOnlySQLTransactionError,
+    asyncpg.TargetServerAttributeNotMatched,
+)
+
+# Worth backing off from, but the connection itself is fine
+TRANSIENT_ERRORS = (asyncpg.QueryCanceledError,)
+
+NAMED_PARAM = re.compile(r"(?<![:\w]):(\w+)")
+
+
+class StoreUnavailableError(RuntimeError):
+    """The database could not be reached; back off and try again"""
+
+
+class Row(asyncpg.Record):
+    """Record with attribute access, like the SQLAlchemy rows it replaces"""
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+
+def asyncpg_dsn(url: str) -> str:
+    """Drop the SQLAlchemy driver suffix (``postgresql+psycopg2://``)"""
+    return re.sub(r"^postgres(ql)?\+\w+://", "postgresql://", url)
+
+
+class Statement:
+    """
+    A ``:name``-style statement on the claim connection.
+
+    Prepared server-side when bound with ``prepare=True``; otherwise every
+    call sends the query as an unnamed statement (PgBouncer-safe).
+    """
+
+    def __init__(self, sql: str):
+        self.names: list[str] = []
+        self.sql = NAMED_PARAM.sub(self._positional, sql)
+        self._conn = None
+        self._prepared = None
+
+    def _positional(self, match: re.Match) -> str:
+        name = match.group(1)
+        if name not in self.names:
+            self.names.append(name)
+        return f"${self.names.index(name) + 1}"
+
+    async def bind(self, conn: asyncpg.Connection, prepare: bool):
+        self._conn = conn
+        self._prepared = await conn.prepare(self.sql) if prepare else None
+
+    async def fetch(self, **params) -> list:
+        args = [params[name] for name in self.names]
+        if self._prepared:
+            return await self._prepared.fetch(*args)
+        return await self._conn.fetch(self.sql, *args)
+
+    async def fetchrow(self, **params):
+        rows = await self.fetch(**params)
+        return rows[0] if rows else None
+
+
+class JobStore:
+    """Claim and transition statements on a dedicated, self-healing connection"""
+
+    def __init__(
+        self,
+        url: str,
+        claim_policy,
+        session_factory,
+        statement_timeout_ms: int = 30000,
+        connect_timeout: float = 5.0,
+        pgbouncer: bool = False,
+        statements: dict | None = None,
+    ):
+        self.dsn = asyncpg_dsn(url)
+        self.claim_policy = claim_policy
+        self.session_factory = session_factory
+        self.statement_timeout_ms = statement_timeout_ms
+        self.connect_timeout = connect_timeout
+        self.pgbouncer = pgbouncer
+        self.statements = {
+            name: Statement(sql)
+            for name, sql in {
+                **claim_policy.statements,
+                **(statements or {}),
+                **TRANSITIONS,
+            }.items()
+        }
+        self.reconnects = 0
+        self.observer = None
+        self._conn: asyncpg.Connection | None = None
+        self._lock = asyncio.Lock()
+        self._busy = asyncio.Lock()
+
+    @property
+    def is_connected(self) -> bool:
+        return self._conn is not None and not self._conn.is_closed()
+
+    async def _connect(self) -> asyncpg.Connection:
+        options = {"timeout": self.connect_timeout, "record_class": Row}
+        timeout = (
+            self.statement_timeout_ms / 1000 if self.statement_timeout_ms else None
+        )
+        if self.pgbouncer:
+            options.update(statement_cache_size=0, command_timeout=timeout)
+        else:
+            options["target_session_attrs"] = "read-write"
+            if timeout:
+                options["server_settings"] = {
+                    "statement_timeout": str(int(self.statement_timeout_ms))
+                }
+
+        conn = await asyncpg.connect(self.dsn, **options)
+        try:
+            await conn.set_type_codec(
+                "jsonb", encoder=json.dumps, decoder=json.loads, schema="pg_catalog"
+            )
+            for statement in self.statements.values():
+                await statement.bind(conn, prepare=not self.pgbouncer)
+        except BaseException:
+            conn.terminate()
+            raise
+        return conn
+
+    async def connection(self) -> asyncpg.Connection:
+        """The claim connection, (re)connecting and preparing if needed"""
+        if self.is_connected:
+            return self._conn
+        async with self._lock:
+            if self.is_connected:
+                return self._conn
+            try:
+                conn = await self._connect()
+            except CONNECTION_ERRORS as e:
+                raise StoreUnavailableError(f"Cannot connect: {e}") from e
+            # A closed connection left behind means this is a reconnect
+            if self._conn is not None:
+                self.reconnects += 1
+                if self.observer:
+                    self.observer.record_store_reconnect()
+                logger.info("Claim connection re-established")
+            self._conn = conn
+            return conn
+
+    def _lost(self, error: Exception) -> bool:
+        return isinstance(error, CONNECTION_ERRORS) or not self.is_connected
+
+    def _drop(self, error: Exception):
+        logger.warning("Claim connection lost: %s", error)
+        if self._conn is not None:
+            self._conn.terminate()
+
+    async def _run(self, method: str, name: str, params: dict, retry: bool):
+        # The loop and a running job's watchers share the connection
+        async with self._busy:
+            return await self._run_locked(method, name, params, retry)
+
+    async def _run_locked(self, method: str, name: str, params: dict, retry: bool):
+        for attempt in range(2 if retry else 1):
+            await self.connection()
+            statement = self.statements[name]
+            try:
+                return await getattr(statement, method)(**params)
+            except asyncpg.InvalidCachedStatementError:
+                # A migration changed a table under a prepared statement;
+                # the statement failed before running, so re-prepare and retry
+                await statement.bind(self._conn, prepare=not self.pgbouncer)
+                return await getattr(statement, method)(**params)
+            except TRANSIENT_ERRORS as e:
+                raise StoreUnavailableError(str(e)) from e
+            except Exception as e:
+                if not self._lost(e):
+                    raise
+                self._drop(e)
+                if attempt or not retry:
+                    raise StoreUnavailableError(str(e)) from e
+
+    async def fetch(self, name: str, **params) -> list:
+        """Run a claim or probe statement; never retried (see module docstring)"""
+        return await self._run("fetch", name, params, retry=False)
+
+    async def fetchrow(self, name: str, **params):
+        """Single-row form of ``fetch``"""
+        return await self._run("fetchrow", name, params, retry=False)
+
+    async def claim(self, capacity: dict | None = None):
+        """Claim the next job that fits `capacity` with the claim policy, or None"""
+        return await self.claim_policy.claim_prepared(self, capacity)
+
+    async def transition(self, name: str, **params):
+        """Run one of ``TRANSITIONS``, retrying once across a reconnect"""
+        await self._run("fetch", name, params, retry=True)
+
+    def _bookkeeping(self, fn, *args):
+        with self.session_factory() as db, db.begin():
+            return fn(db, *args)
+
+    async def bookkeeping(self, fn, *args):
+        """Run ``fn(session, *args)`` in its own pooled transaction, off the loop"""
+        try:
+            return await asyncio.to_thread(self._bookkeeping, fn, *args)
+        except (exc.OperationalError, exc.InterfaceError) as e:
+            raise StoreUnavailableError(str(e.orig or e)) from e
+
+    async def close(self):
+        if self.is_connected:
+            await self._conn.close()
+        self._conn = None
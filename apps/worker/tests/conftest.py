@@ -2,7 +2,7 @@
 
 import os
 import pytest
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 from sqlalchemy.orm import Session, sessionmaker
 from src.database import Base
 
@@ -32,3 +32,16 @@ def db_session(test_db_engine):
     session.close()
     transaction.rollback()
     connection.close()
+
+
+@pytest.fixture(scope="function")
+def committed_session(test_db_engine):
+    """
+    Session whose commits are real, for code on its own connections (the
+    worker's JobStore); the tables are emptied afterwards
+    """
+    session = sessionmaker(bind=test_db_engine)()
+    yield session
+    session.close()
+    with test_db_engine.begin() as conn:
+        conn.execute(text("TRUNCATE jobs, job_result_cache, submitter_usage"))
@@ -0,0 +1,138 @@
+"""Test cancelling running jobs and enforcing their deadlines"""
+
+import asyncio
+import json
+import time
+from datetime import UTC, datetime
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import text
+from src.cancellation import max_runtime
+from src.config import settings
+from src.database import Job
+from src.executor import StopSignal
+from src.main import Worker
+
+
+class FakeJetStream:
+    def __init__(self):
+        self.published = []
+
+    async def publish(self, subject, payload, headers=None):
+        self.published.append((subject, json.loads(payload)))
+        return SimpleNamespace(seq=len(self.published))
+
+
+@pytest.fixture
+async def worker(committed_session):
+    worker = Worker()
+    worker.nats.js = FakeJetStream()
+    yield worker
+    await worker.store.close()
+
+
+def add_job(session, **columns):
+    job = Job(
+        id=uuid4(),
+        name="render",
+        params={},
+        priority=0,
+        state="queued",
+        created_at=datetime.now(UTC),
+        **columns,
+    )
+    session.add(job)
+    session.commit()
+    return job.id
+
+
+def reload(session, job_id):
+    session.expire_all()
+    return session.get(Job, job_id)
+
+
+def mark_cancelling(session, job_id):
+    """What POST /jobs/{id}/cancel does to a running job"""
+    session.execute(
+        text("UPDATE jobs SET state = 'cancelling' WHERE id = :id"), {"id": job_id}
+    )
+    session.commit()
+
+
+def test_cancel_overrides_preempt():
+    signal = StopSignal()
+    signal.request("preempt")
+    signal.request("cancel")
+    signal.request("preempt")
+
+    assert signal.reason == "cancel"
+    with pytest.raises(ValueError):
+        signal.request("pause")
+
+
+def test_max_runtime_takes_the_tighter_limit():
+    assert max_runtime(None, 0) == 0
+    assert max_runtime(600, 0) == 600
+    assert max_runtime(600, 60.0) == 60.0
+
+
+async def test_cancel_message_stops_the_job(worker, committed_session):
+    """Test that a cancel frees the GPU at once and records the final state"""
+    job_id = add_job(committed_session)
+    running = asyncio.create_task(worker.run_job(await worker.poll_jobs()))
+    await asyncio.sleep(0.05)
+    assert not worker.gpu_manager.gpus[0].available
+
+    mark_cancelling(committed_session, job_id)
+    cancelled_at = time.monotonic()
+    await worker.running.on_cancel(SimpleNamespace(subject=f"jobs.{job_id}.cancel"))
+    await asyncio.wait_for(running, timeout=2)
+
+    assert time.monotonic() - cancelled_at < 0.5
+    assert all(gpu.available for gpu in worker.gpu_manager.gpus)
+    job = reload(committed_session, job_id)
+    assert job.state == "cancelled"
+    assert job.result["error"] == "cancelled"
+    subject, event = worker.nats.js.published[-1]
+    assert subject == f"jobs.{job_id}.cancelled"
+    assert event["gpu_id"] == 0
+
+
+async def test_missed_cancel_is_caught_by_the_state_probe(worker, committed_session):
+    worker.running.check_interval_seconds = 0.01
+    job_id = add_job(committed_session)
+    running = asyncio.create_task(worker.run_job(await worker.poll_jobs()))
+    await asyncio.sleep(0.05)
+
+    mark_cancelling(committed_session, job_id)
+    await asyncio.wait_for(running, timeout=2)
+
+    assert reload(committed_session, job_id).state == "cancelled"
+
+
+async def test_deadline_fails_the_job(worker, committed_session, monkeypatch):
+    monkeypatch.setattr(settings, "job_max_runtime_seconds", 0.05)
+    job_id = add_job(committed_session, max_runtime_seconds=3600)
+
+    await asyncio.wait_for(worker.run_job(await worker.poll_jobs()), timeout=2)
+
+    job = reload(committed_session, job_id)
+    assert job.state == "failed"
+    assert job.result["error"] == "max_runtime_exceeded"
+    assert job.result["max_runtime_seconds"] == 0.05
+    assert all(gpu.available for gpu in worker.gpu_manager.gpus)
+
+
+async def test_requeue_of_a_cancelling_job_cancels_it(worker, committed_session):
+    """Test that a job cancelled while being requeued is not run again"""
+    job_id = add_job(committed_session)
+    await worker.poll_jobs()
+    mark_cancelling(committed_session, job_id)
+
+    await worker.store.transition("requeue", id=job_id)
+
+    job = reload(committed_session, job_id)
+    assert job.state == "cancelled"
+    assert job.finished_at is not None
@@ -0,0 +1,223 @@
+"""Test gang allocation of multi-GPU jobs and EASY backfill"""
+
+import asyncio
+import json
+import threading
+from datetime import UTC, datetime, timedelta
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from src.config import settings
+from src.database import Job, SubmitterUsage
+from src.gang import Allocation, shadow
+from src.gpu_manager import GPUManager
+from src.main import Worker
+
+
+class FakeJetStream:
+    def __init__(self):
+        self.published = []
+
+    async def publish(self, subject, payload, headers=None):
+        self.published.append((subject, json.loads(payload)))
+        return SimpleNamespace(seq=len(self.published))
+
+
+class GatedExecutor:
+    """Runs until released, recording the GPUs each job was given"""
+
+    def __init__(self):
+        self.gpus = {}
+        self.release = threading.Event()
+
+    def execute(
+        self,
+        job_id,
+        job_name,
+        gpu_id,
+        checkpoint=None,
+        stop=None,
+        gpu_ids=None,
+        inputs=None,
+    ):
+        self.gpus[job_name] = gpu_ids
+        self.release.wait(timeout=5)
+        return {"success": True, "duration_seconds": 3.0, "gpu_id": gpu_id}
+
+
+@pytest.fixture
+async def worker(committed_session):
+    worker = Worker()
+    worker.nats.js = FakeJetStream()
+    worker.executor = GatedExecutor()
+    yield worker
+    worker.executor.release.set()
+    await asyncio.gather(*worker.jobs, return_exceptions=True)
+    await worker.store.close()
+
+
+@pytest.fixture
+def fair_share(monkeypatch, committed_session):
+    """Workers created from here on claim by fair share; "heavy" is busy"""
+    monkeypatch.setattr(settings, "claim_policy", "fair_share")
+    committed_session.add(SubmitterUsage(submitted_by="heavy", gpu_seconds=36000))
+    committed_session.commit()
+
+
+def add_job(session, name, priority=0, age_seconds=0, **columns):
+    job = Job(
+        id=uuid4(),
+        name=name,
+        params={},
+        priority=priority,
+        state="queued",
+        created_at=datetime.now(UTC) - timedelta(seconds=age_seconds),
+        **columns,
+    )
+    session.add(job)
+    session.commit()
+    return job.id
+
+
+async def claim_and_start(worker):
+    """One turn of the worker loop: claim, allocate the gang, start it"""
+    job = await worker.poll_jobs()
+    if job:
+        gpus = worker.gpu_manager.allocate_gpus(job.gpu_count, job.gpu_memory_mb)
+        worker.start_job(job, gpus=gpus)
+        await asyncio.sleep(0.02)
+    return job
+
+
+async def claim_and_start_job(worker, session, name, **columns):
+    add_job(session, name, **columns)
+    job = await claim_and_start(worker)
+    assert job.name == name
+    return job
+
+
+def test_gang_allocation_is_all_or_nothing():
+    manager = GPUManager(simulation=True)
+
+    assert manager.allocate_gpus(3) is None
+    assert all(gpu.available for gpu in manager.gpus)
+
+    assert [gpu.id for gpu in manager.allocate_gpus(2)] == [0, 1]
+    assert manager.allocate_gpus(1) is None
+
+
+def test_shadow_time_from_running_deadlines():
+    running = [Allocation(2, 50.0), Allocation(1, 10.0), Allocation(1, None)]
+
+    assert shadow(2, 1, running) == (10.0, 0)
+    assert shadow(2, 0, running) == (50.0, 1)
+    assert shadow(4, 0, running) == (None, 0)  # waits on a job with no limit
+    assert shadow(1, 1, []) == (None, 0)
+
+
+async def test_jobs_run_concurrently_up_to_the_gpus(worker, committed_session):
+    for name in ("a", "b", "c"):
+        add_job(committed_session, name)
+
+    assert (await claim_and_start(worker)).name == "a"
+    assert (await claim_and_start(worker)).name == "b"
+    assert await claim_and_start(worker) is None
+
+    assert worker.executor.gpus == {"a": [0], "b": [1]}
+
+
+async def test_gang_gets_all_its_gpus(worker, committed_session):
+    """Test that a gang runs on every GPU it asked for and is charged for each"""
+    gang = add_job(committed_session, "train", gpu_count=2)
+
+    await claim_and_start(worker)
+    assert worker.executor.gpus == {"train": [0, 1]}
+    worker.executor.release.set()
+    await asyncio.gather(*worker.jobs)
+
+    assert committed_session.get(Job, gang).state == "completed"
+    subject, event = worker.nats.js.published[-1]
+    assert (subject, event["gpu_count"]) == (f"jobs.{gang}.completed", 2)
+    usage = committed_session.get(SubmitterUsage, "")
+    assert usage.gpu_seconds == pytest.approx(6.0)
+
+
+async def test_gang_needs_enough_gpus_of_its_size(worker, committed_session):
+    """Test that on mixed GPUs a gang is not claimed for its largest one alone"""
+    worker.gpu_manager.gpus[1].memory_total = 81920
+    gang = add_job(
+        committed_session, "gang", priority=5, gpu_count=2, gpu_memory_mb=40000
+    )
+    add_job(committed_session, "large", gpu_memory_mb=40000)
+
+    assert (await claim_and_start(worker)).name == "large"
+    assert worker.executor.gpus == {"large": [1]}
+    assert committed_session.get(Job, gang).state == "queued"
+
+
+async def test_waiting_gang_is_not_starved(worker, committed_session):
+    """Test that single-GPU jobs stop taking GPUs a waiting gang needs"""
+    await claim_and_start_job(worker, committed_session, "running")
+    gang = add_job(committed_session, "train", priority=5, gpu_count=2)
+    add_job(committed_session, "single")
+
+    # The running job has no time limit, so the free GPU stays reserved
+    assert await claim_and_start(worker) is None
+    assert worker.gang.reserved_for == gang
+
+    worker.executor.release.set()
+    await asyncio.gather(*worker.jobs)
+    worker.executor.release.clear()
+
+    assert (await claim_and_start(worker)).id == gang
+
+
+async def test_short_jobs_backfill_the_reserved_gap(worker, committed_session):
+    """Test that only jobs ending before the gang could start are backfilled"""
+    await claim_and_start_job(
+        worker, committed_session, "running", max_runtime_seconds=60
+    )
+    add_job(committed_session, "train", priority=5, gpu_count=2)
+    add_job(committed_session, "long", age_seconds=10, max_runtime_seconds=600)
+    add_job(committed_session, "unbounded", age_seconds=5)
+    short = add_job(committed_session, "short", max_runtime_seconds=30)
+
+    backfilled = await claim_and_start(worker)
+
+    assert backfilled.id == short
+    assert worker.executor.gpus["short"] == [1]
+
+
+async def test_gang_larger_than_the_node_does_not_block(worker, committed_session):
+    add_job(committed_session, "huge", priority=5, gpu_count=4)
+    add_job(committed_session, "single")
+
+    assert (await claim_and_start(worker)).name == "single"
+    assert worker.gang.reserved_for is None
+
+
+async def test_fair_share_reserves_for_its_own_pick(
+    fair_share, worker, committed_session
+):
+    """Test that a gang the policy would not pick next gets no reservation"""
+    await claim_and_start_job(worker, committed_session, "running")
+    add_job(committed_session, "train", priority=5, gpu_count=2, submitted_by="heavy")
+    add_job(committed_session, "single", submitted_by="light")
+
+    # By priority the heavy submitter's gang is the head; fair share picks
+    # the idle submitter's job, which fits
+    assert (await claim_and_start(worker)).name == "single"
+    assert worker.gang.reserved_for is None
+
+
+async def test_fair_share_pick_gang_is_reserved_for(
+    fair_share, worker, committed_session
+):
+    """Test that a low-priority gang ranked first by fair share is not starved"""
+    await claim_and_start_job(worker, committed_session, "running")
+    gang = add_job(committed_session, "train", gpu_count=2, submitted_by="light")
+    add_job(committed_session, "single", priority=5, submitted_by="heavy")
+
+    assert await claim_and_start(worker) is None
+    assert worker.gang.reserved_for == gang
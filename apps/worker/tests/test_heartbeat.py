@@ -0,0 +1,69 @@
+"""Test GPU capacity heartbeats and memory-aware GPU selection"""
+
+import asyncio
+
+import pytest
+from src.config import settings
+from src.gpu_manager import GPUManager
+from src.main import Worker, worker_identity
+
+
+class RecordingNATS:
+    def __init__(self):
+        self.published = []
+
+    async def publish_core(self, subject, data):
+        self.published.append((subject, data))
+
+
+@pytest.fixture
+async def worker():
+    worker = Worker()
+    worker.nats = RecordingNATS()
+    yield worker
+    await worker.store.close()
+
+
+def test_available_gpu_respects_memory():
+    """Test that a job is only placed on a GPU large enough for it"""
+    manager = GPUManager(simulation=True)
+
+    assert manager.get_available_gpu(30000) is None
+    assert manager.get_available_gpu(20000).id == 0
+
+    manager.allocate_gpu(0)
+    assert manager.get_available_gpu(20000).id == 1
+
+
+def test_worker_identity_is_a_subject_token():
+    assert worker_identity("gpu-node.eu-1") == "gpu-node-eu-1"
+    assert worker_identity()
+
+
+async def test_heartbeat_reports_every_gpu(worker):
+    worker.gpu_manager.allocate_gpu(1)
+
+    beat = worker.heartbeat()
+
+    assert beat["worker_id"] == worker.worker_id
+    assert beat["ttl_seconds"] == 3 * settings.gpu_heartbeat_interval_seconds
+    assert [gpu["available"] for gpu in beat["gpus"]] == [True, False]
+    assert beat["gpus"][0]["memory_total_mb"] == 24576
+
+
+async def test_heartbeats_repeat_and_sign_off(worker, monkeypatch):
+    """Test periodic heartbeats, and a final one so the API drops us at once"""
+    monkeypatch.setattr(settings, "gpu_heartbeat_interval_seconds", 0.01)
+
+    task = asyncio.create_task(worker.send_heartbeats())
+    await asyncio.sleep(0.05)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    subjects = {subject for subject, _ in worker.nats.published}
+    assert subjects == {f"gpus.{worker.worker_id}"}
+    beats = [data for _, data in worker.nats.published]
+    assert len(beats) >= 3
+    assert all("gpus" in beat for beat in beats[:-1])
+    assert beats[-1] == {"worker_id": worker.worker_id, "stopping": True}
@@ -0,0 +1,219 @@
+"""Test the local input cache and claims that prefer cached inputs"""
+
+import hashlib
+import json
+import threading
+import time
+from datetime import UTC, datetime
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from src.database import Job
+from src.input_cache import InputCache, InputFetchError, InputRef, input_refs
+from src.main import Worker
+
+
+class FakeJetStream:
+    def __init__(self):
+        self.published = []
+
+    async def publish(self, subject, payload, headers=None):
+        self.published.append((subject, json.loads(payload)))
+        return SimpleNamespace(seq=len(self.published))
+
+
+class CountingFetch:
+    """Writes `size` bytes per URI, counting fetches"""
+
+    def __init__(self, size=100, delay=0.0):
+        self.size = size
+        self.delay = delay
+        self.fetched = []
+
+    def __call__(self, uri, out):
+        self.fetched.append(uri)
+        time.sleep(self.delay)
+        out.write(b"x" * self.size)
+
+
+class ReadingExecutor:
+    """Succeeds at once, recording the staged inputs it was given"""
+
+    def __init__(self):
+        self.inputs = None
+
+    def execute(
+        self,
+        job_id,
+        job_name,
+        gpu_id,
+        checkpoint=None,
+        stop=None,
+        gpu_ids=None,
+        inputs=None,
+    ):
+        self.inputs = {uri: path.read_bytes() for uri, path in inputs.items()}
+        return {"success": True, "duration_seconds": 0.1, "gpu_id": gpu_id}
+
+
+@pytest.fixture
+async def worker(committed_session, tmp_path):
+    worker = Worker()
+    worker.nats.js = FakeJetStream()
+    worker.executor = ReadingExecutor()
+    worker.input_cache = InputCache(tmp_path, max_bytes=10_000, fetch=CountingFetch())
+    yield worker
+    await worker.store.close()
+
+
+def add_job(session, name, priority=0, inputs=(), **columns):
+    keys = [InputRef(uri).key for uri in inputs]
+    job = Job(
+        id=uuid4(),
+        name=name,
+        params={"inputs": list(inputs)},
+        priority=priority,
+        state="queued",
+        created_at=datetime.now(UTC),
+        input_keys=keys or None,
+        **columns,
+    )
+    session.add(job)
+    session.commit()
+    return job.id
+
+
+def test_input_refs_from_params():
+    digest = "AB" * 32
+
+    refs = input_refs(
+        {"inputs": ["s3://scenes/a.tif", {"uri": "s3://b", "sha256": digest}, 3]}
+    )
+
+    assert refs == [InputRef("s3://scenes/a.tif"), InputRef("s3://b", digest.lower())]
+    assert refs[0].key == hashlib.sha256(b"s3://scenes/a.tif").hexdigest()
+    assert refs[1].key == digest.lower()
+    assert input_refs({}) == []
+
+
+def test_input_refs_skip_malformed_digests():
+    """Test that a sha256 is never a path: anything but 64 hex digits is dropped"""
+    refs = input_refs(
+        {
+            "inputs": [
+                {"uri": "s3://a", "sha256": "../../etc/passwd"},
+                {"uri": "s3://b", "sha256": "/tmp/" + "0" * 59},
+                {"uri": "s3://c", "sha256": ["0" * 64]},
+                {"uri": "s3://d", "sha256": "0" * 64},
+            ]
+        }
+    )
+
+    assert refs == [InputRef("s3://d", "0" * 64)]
+
+
+def test_second_read_is_a_hit(tmp_path):
+    fetch = CountingFetch()
+    cache = InputCache(tmp_path, max_bytes=1000, fetch=fetch)
+    ref = InputRef("sim://scenes/a")
+
+    path = cache.stage([ref])[ref.uri]
+    cache.release([ref])
+    again = cache.stage([ref])[ref.uri]
+
+    assert path == again
+    assert path.read_bytes() == b"x" * 100
+    assert fetch.fetched == ["sim://scenes/a"]
+    status = cache.status(10)
+    assert status["keys"] == [ref.key]
+    assert (status["hit_rate"], status["bytes_saved"]) == (0.5, 100)
+    assert list((tmp_path / "tmp").iterdir()) == []
+
+
+def test_least_recently_used_is_evicted(tmp_path):
+    cache = InputCache(tmp_path, max_bytes=250, fetch=CountingFetch())
+    a, b, c = (InputRef(f"sim://{name}") for name in "abc")
+
+    for ref in (a, b, a, c):
+        cache.stage([ref])
+        cache.release([ref])
+
+    assert cache.keys(10) == [c.key, a.key]
+    assert not cache.path(b.key).exists()
+    assert cache.size == 200
+
+
+def test_pinned_inputs_are_not_evicted(tmp_path):
+    cache = InputCache(tmp_path, max_bytes=150, fetch=CountingFetch())
+    a, b = InputRef("sim://a"), InputRef("sim://b")
+
+    cache.stage([a])
+    cache.stage([b])  # over the bound while a running job reads a
+    assert cache.path(a.key).exists()
+
+    cache.release([a])
+    assert cache.keys(10) == [b.key]
+
+
+def test_concurrent_fetches_of_a_key_are_shared(tmp_path):
+    fetch = CountingFetch(delay=0.1)
+    cache = InputCache(tmp_path, max_bytes=1000, fetch=fetch)
+    ref = InputRef("sim://scenes/a")
+
+    threads = [threading.Thread(target=cache.stage, args=([ref],)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert fetch.fetched == [ref.uri]
+    assert (cache.hits, cache.misses) == (3, 1)
+
+
+def test_content_mismatch_is_not_cached(tmp_path):
+    cache = InputCache(tmp_path, max_bytes=1000, fetch=CountingFetch())
+    ref = InputRef("sim://scenes/a", sha256="0" * 64)
+
+    with pytest.raises(InputFetchError):
+        cache.stage([ref])
+
+    assert cache.keys(10) == []
+    assert not cache.path(ref.key).exists()
+    assert list((tmp_path / "tmp").iterdir()) == []
+
+
+def test_entries_survive_a_restart(tmp_path):
+    cache = InputCache(tmp_path, max_bytes=1000, fetch=CountingFetch())
+    refs = [InputRef("sim://a"), InputRef("sim://b")]
+    cache.stage(refs)
+    cache.release(refs)
+
+    restarted = InputCache(tmp_path, max_bytes=1000, fetch=CountingFetch())
+
+    assert sorted(restarted.keys(10)) == sorted(ref.key for ref in refs)
+    assert restarted.size == 200
+
+
+async def test_job_inputs_are_staged_for_the_run(worker, committed_session):
+    job_id = add_job(committed_session, "tile", inputs=["sim://scenes/a"])
+
+    await worker.run_job(await worker.poll_jobs())
+
+    assert committed_session.get(Job, job_id).state == "completed"
+    assert worker.executor.inputs == {"sim://scenes/a": b"x" * 100}
+    assert worker.input_cache.pinned == {}
+    heartbeat = worker.heartbeat()["input_cache"]
+    assert heartbeat["keys"] == [InputRef("sim://scenes/a").key]
+
+
+async def test_cached_inputs_win_within_the_skew(worker, committed_session):
+    """Test that a job reading cached inputs may jump the head by `skew` points"""
+    worker.input_cache.stage([InputRef("sim://scenes/a")])
+    add_job(committed_session, "head", priority=5)
+    cached = add_job(committed_session, "cached", priority=4, inputs=["sim://scenes/a"])
+    add_job(committed_session, "far", priority=0, inputs=["sim://scenes/a"])
+
+    assert (await worker.poll_jobs()).id == cached
+    assert (await worker.poll_jobs()).name == "head"
+    assert (await worker.poll_jobs()).name == "far"  # nothing more urgent left
@@ -0,0 +1,77 @@
+"""Test structured worker logs"""
+
+import io
+import json
+import logging
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from src.database import Job
+from src.logs import setup_logging, shutdown_logging
+from src.main import Worker
+
+
+class FakeJetStream:
+    async def publish(self, subject, payload, headers=None):
+        return SimpleNamespace(seq=1)
+
+
+class InstantExecutor:
+    def execute(
+        self,
+        job_id,
+        job_name,
+        gpu_id,
+        checkpoint=None,
+        stop=None,
+        gpu_ids=None,
+        inputs=None,
+    ):
+        return {"success": True, "duration_seconds": 0.01, "gpu_id": gpu_id}
+
+
+@pytest.fixture
+def log_buffer():
+    buffer = io.StringIO()
+    setup_logging(sample_rate=1, sample_burst=3, stream=buffer)
+    yield buffer
+    shutdown_logging()
+
+
+def read_lines(buffer):
+    shutdown_logging()
+    return [json.loads(line) for line in buffer.getvalue().splitlines()]
+
+
+async def test_job_logs_carry_the_job_id(committed_session, log_buffer):
+    """Test that lines logged while processing a job are tagged with it"""
+    job_id = uuid4()
+    committed_session.add(
+        Job(id=job_id, name="logged", params={}, priority=0, state="queued")
+    )
+    committed_session.commit()
+    worker = Worker()
+    worker.nats.js = FakeJetStream()
+    worker.executor = InstantExecutor()
+
+    try:
+        await worker.process_job(await worker.poll_jobs())
+    finally:
+        await worker.store.close()
+
+    published = [
+        line for line in read_lines(log_buffer) if line["logger"] == "src.nats_client"
+    ]
+    assert published
+    assert {line["job_id"] for line in published} == {str(job_id)}
+
+
+def test_repeated_messages_are_sampled(log_buffer):
+    """Test that a flood of one message is cut to the burst"""
+    logger = logging.getLogger("src.tests")
+    for n in range(100):
+        logger.info("Polled %d", n)
+
+    lines = read_lines(log_buffer)
+    assert [line["message"] for line in lines] == ["Polled 0", "Polled 1", "Polled 2"]
@@ -0,0 +1,93 @@
+"""Test claim-time result memoization"""
+
+from datetime import UTC, datetime, timedelta
+from uuid import uuid4
+
+from sqlalchemy import text
+from src.database import Job, JobResultCache
+from src.memoization import ResultCache
+
+
+def make_job(db_session, memo_key, state="running", created_at=None, **kwargs):
+    job = Job(
+        id=uuid4(),
+        name="tile",
+        params={},
+        priority=0,
+        state=state,
+        created_at=created_at or datetime.now(UTC),
+        submitted_by="test",
+        memo_key=memo_key,
+        **kwargs,
+    )
+    db_session.add(job)
+    db_session.commit()
+    return job
+
+
+def test_store_and_lookup(db_session):
+    """Test that a stored result is returned until it expires"""
+    cache = ResultCache(ttl_seconds=60)
+    job_id = uuid4()
+    cache.store(db_session, "k1", job_id, {"success": True})
+
+    assert cache.lookup(db_session, "k1") == (job_id, {"success": True})
+    assert cache.lookup(db_session, "missing") is None
+
+
+def test_lookup_ignores_expired(db_session):
+    """Test that expired entries are not served"""
+    db_session.add(
+        JobResultCache(
+            memo_key="old",
+            job_id=uuid4(),
+            result={"success": True},
+            expires_at=datetime.now(UTC) - timedelta(seconds=1),
+        )
+    )
+    db_session.commit()
+
+    assert ResultCache().lookup(db_session, "old") is None
+
+
+def test_store_evicts_beyond_max_entries(db_session):
+    """Test size-based eviction keeps only the newest entries"""
+    cache = ResultCache(ttl_seconds=60, max_entries=2)
+    for key in ("a", "b", "c"):
+        cache.store(db_session, key, uuid4(), {"success": True})
+
+    count = db_session.execute(text("SELECT count(*) FROM job_result_cache")).scalar()
+    assert count == 2
+    assert cache.lookup(db_session, "a") is None
+
+
+def test_find_running_original_only_links_younger(db_session):
+    """Test that only the younger of two running duplicates links to the other"""
+    now = datetime.now(UTC)
+    older = make_job(db_session, "dup", created_at=now - timedelta(seconds=5))
+    younger = make_job(db_session, "dup", created_at=now)
+    cache = ResultCache()
+
+    assert cache.find_running_original(db_session, younger.id, "dup") == older.id
+    assert cache.find_running_original(db_session, older.id, "dup") is None
+
+
+def test_resolve_linked_on_success_and_failure(db_session):
+    """Test linked jobs complete on success and are requeued on failure"""
+    original = make_job(db_session, "dup")
+    linked = make_job(db_session, "dup", state="linked", memoized_from=original.id)
+    cache = ResultCache()
+
+    assert cache.resolve_linked(db_session, original.id, "failed", {}) == [linked.id]
+    db_session.refresh(linked)
+    assert linked.state == "queued"
+    assert linked.memoized_from is None
+
+    linked.state = "linked"
+    linked.memoized_from = original.id
+    db_session.commit()
+
+    cache.resolve_linked(db_session, original.id, "completed", {"success": True})
+    db_session.refresh(linked)
+    assert linked.state == "completed"
+    assert linked.result == {"success": True}
@@ -0,0 +1,37 @@
+"""Test bounded metric attributes on the worker"""
+
+from prometheus_client import CollectorRegistry, Counter
+from src.cardinality import OVERFLOW_VALUE, subject_template
+from src.metrics import ExpositionCache, WorkerMetricsManager
+
+
+def test_event_subjects_collapse_to_templates():
+    """Test that per-job NATS subjects become one series per state"""
+    subject = "jobs.3f2b7a9e-1c44-4d0a-9a55-0d6c2f7e8b11.completed"
+
+    assert subject_template(subject) == "jobs.*.completed"
+    assert subject_template("jobs.created") == "jobs.created"
+
+
+def test_failure_attributes_are_bounded():
+    """Test that error types beyond the budget land in the overflow bucket"""
+    manager = WorkerMetricsManager(max_attribute_values=3)
+    seen = {
+        manager.failure_attributes({"job_name": "train", "error_type": f"E{n}"})[
+            "error_type"
+        ]
+        for n in range(10)
+    }
+
+    assert seen == {"E0", "E1", "E2", OVERFLOW_VALUE}
+
+
+async def test_exposition_is_cached():
+    registry = CollectorRegistry()
+    counter = Counter("worker_events", "events", registry=registry)
+    cache = ExpositionCache(registry=registry, ttl=60)
+
+    first = await cache.get()
+    counter.inc()
+
+    assert await cache.get() is first
@@ -0,0 +1,18 @@
+"""Test the worker's pool settings"""
+
+from sqlalchemy import text
+from src.config import settings
+from src.database import engine
+from src.pool import InstrumentedQueuePool
+
+
+def test_worker_engine_uses_the_instrumented_pool():
+    """Test that the configured pool and statement timeout are in effect"""
+    assert isinstance(engine.pool, InstrumentedQueuePool)
+    assert engine.pool.pool_name == "worker"
+
+    with engine.connect() as conn:
+        timeout_ms = conn.execute(
+            text("SELECT setting FROM pg_settings WHERE name = 'statement_timeout'")
+        ).scalar()
+        assert int(timeout_ms) == settings.db_statement_timeout_ms
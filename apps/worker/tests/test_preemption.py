@@ -0,0 +1,174 @@
+"""Test priority preemption with checkpoint and resume"""
+
+import asyncio
+import json
+import threading
+from datetime import UTC, datetime
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from src.database import Job
+from src.executor import JobExecutor, PreemptedError, StopSignal
+from src.main import Worker
+from src.preemption import PreemptionPolicy
+
+
+class FakeJetStream:
+    def __init__(self):
+        self.published = []
+
+    async def publish(self, subject, payload, headers=None):
+        self.published.append((subject, json.loads(payload)))
+        return SimpleNamespace(seq=len(self.published))
+
+
+class CheckpointingExecutor:
+    """First run waits to be preempted, later ones finish at once"""
+
+    def __init__(self):
+        self.started_from = []
+
+    def execute(
+        self,
+        job_id,
+        job_name,
+        gpu_id,
+        checkpoint=None,
+        stop=None,
+        gpu_ids=None,
+        inputs=None,
+    ):
+        self.started_from.append(checkpoint)
+        if len(self.started_from) == 1 and stop.wait(timeout=5):
+            step = (checkpoint or {}).get("step", 0) + 4
+            raise PreemptedError({"step": step, "ref": f"ckpt-{step}"}, 2.0, 0.5)
+        return {"success": True, "duration_seconds": 0.01, "gpu_id": gpu_id}
+
+
+@pytest.fixture
+async def worker(committed_session):
+    worker = Worker()
+    worker.nats.js = FakeJetStream()
+    worker.executor = CheckpointingExecutor()
+    worker.preemption = PreemptionPolicy(
+        min_runtime_seconds=0, check_interval_seconds=0.01
+    )
+    yield worker
+    await worker.store.close()
+
+
+def add_job(session, priority, **columns):
+    job = Job(
+        id=uuid4(),
+        name=f"p{priority}",
+        params={},
+        priority=priority,
+        state="queued",
+        created_at=datetime.now(UTC),
+        **columns,
+    )
+    session.add(job)
+    session.commit()
+    return job.id
+
+
+def reload(session, job_id):
+    session.expire_all()
+    return session.get(Job, job_id)
+
+
+def test_executor_checkpoints_and_resumes():
+    executor = JobExecutor(step_seconds=0.01)
+    stop = StopSignal()
+    threading.Timer(0.035, stop.request, ["preempt"]).start()
+
+    with pytest.raises(PreemptedError) as info:
+        executor.execute(uuid4(), "train", 0, stop=stop)
+    checkpoint = info.value.checkpoint
+    assert checkpoint["step"] >= 3
+    assert 0 <= info.value.wasted < 0.01
+
+    result = executor.execute(
+        uuid4(), "train", 0, checkpoint={**checkpoint, "duration_seconds": 0.1}
+    )
+    assert result["resumed_from_step"] == checkpoint["step"]
+    assert result["duration_seconds"] < 0.1
+
+
+def test_policy_caps_preemptions_per_job():
+    policy = PreemptionPolicy(max_preemptions=2)
+
+    assert policy.preemptible(SimpleNamespace(preemptions=1))
+    assert not policy.preemptible(SimpleNamespace(preemptions=2))
+    assert not PreemptionPolicy(enabled=False).preemptible(
+        SimpleNamespace(preemptions=0)
+    )
+
+
+async def test_urgent_job_preempts_and_victim_resumes(worker, committed_session):
+    """Test checkpoint, requeue, urgent job first, then resume from checkpoint"""
+    low = add_job(committed_session, 0)
+    worker.gpu_manager.allocate_gpu(1)  # busy with another job
+    running = asyncio.create_task(worker.run_job(await worker.poll_jobs()))
+    await asyncio.sleep(0.05)
+
+    urgent = add_job(committed_session, 20)
+    await asyncio.wait_for(running, timeout=5)
+
+    job = reload(committed_session, low)
+    assert (job.state, job.preemptions) == ("queued", 1)
+    assert job.checkpoint == {"step": 4, "ref": "ckpt-4"}
+    subject, event = worker.nats.js.published[-1]
+    assert subject == f"jobs.{low}.preempted"
+    assert event["execution_time"] == 2.0
+    assert event["checkpoint"] == "ckpt-4"
+
+    # The urgent job runs next (nothing outranks it), then the victim resumes
+    urgent_row = await worker.poll_jobs()
+    assert urgent_row.id == urgent
+    await worker.run_job(urgent_row)
+    await worker.run_job(await worker.poll_jobs())
+
+    assert worker.executor.started_from == [None, None, {"step": 4, "ref": "ckpt-4"}]
+    job = reload(committed_session, low)
+    assert (job.state, job.checkpoint) == ("completed", None)
+
+
+async def test_only_urgent_jobs_that_fit_preempt(worker, committed_session):
+    """Test the probe ignores jobs under the priority gap or too big for the GPU"""
+    add_job(committed_session, 0)
+    row = await worker.poll_jobs()
+    add_job(committed_session, 9)
+    add_job(committed_session, 50, gpu_memory_mb=80000)
+    add_job(committed_session, 50, gpu_count=2)
+
+    stop = StopSignal()
+    watcher = asyncio.create_task(
+        worker.preemption.watch(worker.store, row, 24576, stop)
+    )
+    await asyncio.sleep(0.05)
+    assert not stop.is_set()
+
+    add_job(committed_session, 10)
+    waiting = await asyncio.wait_for(watcher, timeout=5)
+
+    assert stop.reason == "preempt"
+    assert waiting.priority == 10
+
+
+async def test_free_gpus_take_the_urgent_job_instead(worker, committed_session):
+    """Test that nothing is preempted for a job the idle GPUs can run"""
+    add_job(committed_session, 0)
+    row = await worker.poll_jobs()
+    add_job(committed_session, 20)
+
+    stop = StopSignal()
+    watcher = asyncio.create_task(
+        worker.preemption.watch(worker.store, row, 24576, stop, free_gpus=lambda: 1)
+    )
+    await asyncio.sleep(0.05)
+    watcher.cancel()
+    await asyncio.gather(watcher, return_exceptions=True)
+
+    assert not stop.is_set()
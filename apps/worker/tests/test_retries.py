@@ -0,0 +1,187 @@
+"""Test scheduled jobs and retries with backoff"""
+
+import asyncio
+import json
+from datetime import UTC, datetime, timedelta
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import text
+from src.database import Job
+from src.main import Worker
+from src.retries import RetryPolicy
+
+
+class FakeJetStream:
+    def __init__(self):
+        self.published = []
+
+    async def publish(self, subject, payload, headers=None):
+        self.published.append((subject, json.loads(payload)))
+        return SimpleNamespace(seq=len(self.published))
+
+
+class FailingExecutor:
+    """Fails (or crashes) the first `failures` runs, then succeeds"""
+
+    def __init__(self, failures: int, crash: bool = False):
+        self.failures = failures
+        self.crash = crash
+        self.runs = 0
+
+    def execute(
+        self,
+        job_id,
+        job_name,
+        gpu_id,
+        checkpoint=None,
+        stop=None,
+        gpu_ids=None,
+        inputs=None,
+    ):
+        self.runs += 1
+        if self.runs <= self.failures:
+            if self.crash:
+                raise RuntimeError("CUDA error: out of memory")
+            return {"success": False, "duration_seconds": 0.5, "gpu_id": gpu_id}
+        return {"success": True, "duration_seconds": 0.5, "gpu_id": gpu_id}
+
+
+@pytest.fixture
+async def worker(committed_session):
+    worker = Worker()
+    worker.nats.js = FakeJetStream()
+    worker.retry_policy = RetryPolicy(
+        max_retries=2, base_delay_seconds=0.02, max_delay_seconds=0.05
+    )
+    yield worker
+    await worker.store.close()
+
+
+def add_job(session, state="queued", **columns):
+    job = Job(
+        id=uuid4(),
+        name="render",
+        params={},
+        priority=0,
+        state=state,
+        created_at=datetime.now(UTC),
+        **columns,
+    )
+    session.add(job)
+    session.commit()
+    return job.id
+
+
+def reload(session, job_id):
+    session.expire_all()
+    return session.get(Job, job_id)
+
+
+def test_backoff_grows_and_is_capped():
+    policy = RetryPolicy(max_retries=5, base_delay_seconds=10, max_delay_seconds=60)
+
+    for retries, (low, high) in enumerate([(5, 10), (10, 20), (20, 40), (30, 60)]):
+        delays = [policy.delay(retries) for _ in range(50)]
+        assert all(low <= delay <= high for delay in delays)
+    assert len({policy.delay(0) for _ in range(10)}) > 1  # jittered
+
+
+def test_job_max_retries_overrides_the_default():
+    policy = RetryPolicy(max_retries=2)
+
+    assert policy.should_retry(SimpleNamespace(retries=1, max_retries=None))
+    assert not policy.should_retry(SimpleNamespace(retries=2, max_retries=None))
+    assert not policy.should_retry(SimpleNamespace(retries=0, max_retries=0))
+    assert policy.should_retry(SimpleNamespace(retries=4, max_retries=5))
+
+
+async def test_failed_run_is_scheduled_for_a_retry(worker, committed_session):
+    worker.executor = FailingExecutor(failures=1)
+    job_id = add_job(committed_session)
+
+    await worker.run_job(await worker.poll_jobs())
+
+    job = reload(committed_session, job_id)
+    assert job.state == "scheduled"
+    assert job.retries == 1
+    assert job.result["success"] is False
+    assert job.finished_at is None
+    subject, event = worker.nats.js.published[-1]
+    assert subject == f"jobs.{job_id}.retrying"
+    assert event["retry"] == 1
+    assert 0.01 <= event["delay_seconds"] <= 0.02
+    assert all(gpu.available for gpu in worker.gpu_manager.gpus)
+
+    # Due after the backoff, then claimed and run again
+    await asyncio.sleep(worker.scheduled.sleep_seconds(5))
+    await worker.run_job(await worker.poll_jobs())
+
+    job = reload(committed_session, job_id)
+    assert job.state == "completed"
+    assert worker.executor.runs == 2
+
+
+async def test_crashed_run_is_retried(worker, committed_session):
+    worker.executor = FailingExecutor(failures=1, crash=True)
+    job_id = add_job(committed_session)
+
+    await worker.run_job(await worker.poll_jobs())
+
+    job = reload(committed_session, job_id)
+    assert job.state == "scheduled"
+    assert job.result["error"] == "CUDA error: out of memory"
+
+
+async def test_out_of_retries_fails(worker, committed_session):
+    worker.executor = FailingExecutor(failures=10)
+    job_id = add_job(committed_session, max_retries=0)
+
+    await worker.run_job(await worker.poll_jobs())
+
+    job = reload(committed_session, job_id)
+    assert job.state == "failed"
+    assert job.retries == 0
+
+
+async def test_claims_skip_jobs_until_due(worker, committed_session):
+    """Test that a scheduled job is claimed only once due, without busy polling"""
+    later = add_job(
+        committed_session,
+        state="scheduled",
+        next_run_at=datetime.now(UTC) + timedelta(hours=1),
+    )
+    soon = add_job(
+        committed_session,
+        state="scheduled",
+        next_run_at=datetime.now(UTC) + timedelta(seconds=0.2),
+    )
+
+    assert await worker.poll_jobs() is None
+    sleep = worker.scheduled.sleep_seconds(5)
+    assert 0 < sleep <= 0.2
+
+    await asyncio.sleep(sleep)
+    claimed = await worker.poll_jobs()
+
+    assert claimed.id == soon
+    assert await worker.poll_jobs() is None
+    assert reload(committed_session, later).state == "scheduled"
+    assert worker.scheduled.sleep_seconds(5) == 5
+
+
+async def test_retry_of_a_cancelling_job_cancels_it(worker, committed_session):
+    worker.executor = FailingExecutor(failures=1)
+    job_id = add_job(committed_session)
+    job_row = await worker.poll_jobs()
+    committed_session.execute(
+        text("UPDATE jobs SET state = 'cancelling' WHERE id = :id"), {"id": job_id}
+    )
+    committed_session.commit()
+
+    await worker.run_job(job_row)
+
+    job = reload(committed_session, job_id)
+    assert job.state == "cancelled"
+    assert job.finished_at is not None
@@ -0,0 +1,135 @@
+"""Test claim-ordering policies"""
+
+from datetime import UTC, datetime, timedelta
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import text
+from src.database import Job
+from src.scheduling import (
+    FairShareClaimPolicy,
+    PriorityClaimPolicy,
+    SubmitterCandidate,
+    build_claim_policy,
+    record_usage,
+    score_candidates,
+)
+
+NOW = datetime(2025, 11, 12, 12, 0, tzinfo=UTC)
+
+
+def candidate(submitter, priority=0, age_hours=0.0, usage=0.0, oldest=None):
+    created_at = NOW - timedelta(hours=age_hours)
+    oldest_priority, oldest_age = oldest or (priority, age_hours)
+    return SubmitterCandidate(
+        submitter=submitter,
+        head_priority=priority,
+        head_created_at=created_at,
+        oldest_priority=oldest_priority,
+        oldest_created_at=NOW - timedelta(hours=oldest_age),
+        usage_seconds=usage,
+    )
+
+
+def add_job(db_session, submitted_by, priority=0, age_seconds=0):
+    job = Job(
+        id=uuid4(),
+        name="tile",
+        params={},
+        priority=priority,
+        state="queued",
+        created_at=datetime.now(UTC) - timedelta(seconds=age_seconds),
+        submitted_by=submitted_by,
+    )
+    db_session.add(job)
+    db_session.commit()
+    return job
+
+
+def test_underserved_submitter_ranks_first():
+    """Test that an idle submitter outranks a busy one at equal priority"""
+    ranked = score_candidates(
+        [candidate("heavy", age_hours=2, usage=5000), candidate("light")],
+        now=NOW,
+        fair_share_weight=10,
+        aging_per_hour=0,
+    )
+
+    assert [c.submitter for c in ranked] == ["light", "heavy"]
+
+
+def test_priority_aging_promotes_old_jobs():
+    """Test that aging lets an old low-priority job beat a fresh higher one"""
+    ranked = score_candidates(
+        [candidate("new", priority=5), candidate("old", priority=0, age_hours=10)],
+        now=NOW,
+        fair_share_weight=0,
+        aging_per_hour=1,
+    )
+
+    assert ranked[0].submitter == "old"
+
+
+def test_oldest_job_wins_within_submitter_when_aged():
+    """Test that a submitter's oldest job is chosen once it outscores the head"""
+    ranked = score_candidates(
+        [candidate("a", priority=3, oldest=(0, 24))],
+        now=NOW,
+        fair_share_weight=0,
+        aging_per_hour=1,
+    )
+
+    assert ranked[0].order == "oldest"
+
+
+def test_priority_policy_claims_highest_priority(db_session):
+    """Test the strict policy keeps priority DESC, created_at ASC"""
+    add_job(db_session, "a", priority=1, age_seconds=60)
+    high = add_job(db_session, "b", priority=9)
+
+    row = PriorityClaimPolicy().claim(db_session)
+
+    assert row.id == high.id
+    assert row.submitted_by == "b"
+
+
+def test_fair_share_policy_prefers_underserved_submitter(db_session):
+    """Test that fair share skips a busy submitter's older backlog"""
+    for _ in range(5):
+        add_job(db_session, "heavy", age_seconds=600)
+    light = add_job(db_session, "light")
+    record_usage(db_session, "heavy", 3600, half_life=3600)
+
+    row = FairShareClaimPolicy(aging_per_hour=0).claim(db_session)
+
+    assert row.id == light.id
+    state = db_session.execute(
+        text("SELECT state FROM jobs WHERE id = :id"), {"id": light.id}
+    ).scalar()
+    assert state == "running"
+
+
+def test_fair_share_policy_empty_queue(db_session):
+    """Test that claiming from an empty queue returns None"""
+    assert FairShareClaimPolicy().claim(db_session) is None
+
+
+def test_record_usage_accumulates(db_session):
+    """Test that usage is added per submitter, with NULL mapped to ''"""
+    record_usage(db_session, None, 10, half_life=3600)
+    record_usage(db_session, None, 5, half_life=3600)
+
+    usage = db_session.execute(
+        text("SELECT gpu_seconds FROM submitter_usage WHERE submitted_by = ''")
+    ).scalar()
+    assert usage == pytest.approx(15, rel=1e-3)
+
+
+def test_build_claim_policy():
+    """Test policy selection from settings"""
+    assert build_claim_policy(SimpleNamespace(claim_policy="priority")).name == (
+        "priority"
+    )
+    with pytest.raises(ValueError):
+        build_claim_policy(SimpleNamespace(claim_policy="lottery"))
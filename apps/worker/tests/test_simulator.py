@@ -0,0 +1,97 @@
+"""Test the discrete-event scheduler simulator"""
+
+from array import array
+
+import pytest
+from src.scheduling import FairShareClaimPolicy, PriorityClaimPolicy
+from src.simulator import GPUS_PER_WORKER, Workload, generate_workload, simulate
+
+
+def workload(jobs, gpu_count=None):
+    """Workload from (arrival, duration, priority, submitter index) tuples"""
+    arrival, duration, priority, submitter = zip(*jobs, strict=True)
+    return Workload(
+        arrival=array("d", arrival),
+        duration=array("d", duration),
+        priority=array("b", priority),
+        submitter=array("H", submitter),
+        submitters=["heavy", "light"],
+        gpu_count=array("B", gpu_count) if gpu_count else None,
+    )
+
+
+def test_generated_workload_is_seeded():
+    """Test that the same seed gives the same arrival-ordered workload"""
+    a = generate_workload(2000, days=1, burst=5, seed=7)
+    b = generate_workload(2000, days=1, burst=5, seed=7)
+
+    assert len(a) == 2000
+    assert a.arrival == b.arrival and a.submitter == b.submitter
+    assert list(a.arrival) == sorted(a.arrival)
+    assert a.arrival != generate_workload(2000, days=1, burst=5, seed=8).arrival
+
+
+def test_priority_order_on_one_worker():
+    """Test that a freed GPU takes the highest priority, then the oldest job"""
+    jobs = workload([(0, 10, 0, 0), (0, 20, 0, 0), (1, 10, 0, 0), (2, 10, 5, 0)])
+
+    run = simulate(jobs, PriorityClaimPolicy(), workers=1, poll_interval=0)
+
+    assert list(run.start) == [0, 0, 20, 10]
+    assert run.makespan == 30
+    assert run.busy_seconds == 50
+
+
+def test_worker_runs_a_job_per_gpu():
+    """Test that a worker claims until its GPUs are busy, then on each finish"""
+    jobs = workload([(0, 10, 0, 0)] * (GPUS_PER_WORKER + 1))
+
+    run = simulate(jobs, PriorityClaimPolicy(), workers=1, poll_interval=5, seed=3)
+
+    first = run.start[0]
+    assert list(run.start) == [first] * GPUS_PER_WORKER + [first + 10]
+    assert run.makespan == first + 20
+
+
+def test_gang_jobs_are_refused():
+    """Test that gang jobs are not silently simulated as single-GPU jobs"""
+    jobs = workload([(0, 10, 0, 0), (1, 10, 0, 0)], gpu_count=[1, 2])
+
+    with pytest.raises(ValueError, match="Gang jobs"):
+        simulate(jobs, PriorityClaimPolicy(), workers=1)
+    assert simulate(workload([(0, 10, 0, 0)], gpu_count=[1]), PriorityClaimPolicy())
+
+
+def test_idle_worker_sees_arrivals_at_next_poll():
+    """Test that a job arriving between polls waits for the sleeping worker"""
+    jobs = workload([(100.5, 1, 0, 0)])
+
+    run = simulate(jobs, PriorityClaimPolicy(), workers=1, poll_interval=5, seed=3)
+
+    wait = run.start[0] - 100.5
+    assert 0 < wait <= 5
+
+
+def test_fair_share_serves_light_submitter_ahead_of_backlog():
+    """Test that fair share interleaves a light submitter into a heavy backlog"""
+    backlog = [(0, 60, 0, 0)] * 10 * GPUS_PER_WORKER
+    jobs = workload([*backlog, (1, 60, 0, 1)])
+
+    by_priority = simulate(jobs, PriorityClaimPolicy(), workers=1, poll_interval=0)
+    fair = simulate(jobs, FairShareClaimPolicy(), workers=1, poll_interval=0)
+
+    assert by_priority.start[-1] == 600
+    assert fair.start[-1] == 60
+
+
+def test_simulation_is_deterministic_and_releases_gpus():
+    jobs = generate_workload(5000, days=1, workers=4, load=0.9, burst=10, seed=2)
+    policy = FairShareClaimPolicy(aging_per_hour=0.5)
+
+    first = simulate(jobs, policy, workers=4, seed=2)
+    second = simulate(jobs, policy, workers=4, seed=2)
+
+    assert first.start == second.start
+    assert first.gpus == 8  # every worker's GPUManager simulates two GPUs
+    assert all(first.start[i] >= jobs.arrival[i] for i in range(len(jobs)))
+    assert first.busy_seconds == pytest.approx(sum(jobs.duration))
@@ -0,0 +1,138 @@
+"""Test the worker's async claim and transition data path"""
+
+from datetime import UTC, datetime, timedelta
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+from src.database import Job
+from src.scheduling import FairShareClaimPolicy, PriorityClaimPolicy, record_usage
+from src.store import JobStore, Statement, StoreUnavailableError, asyncpg_dsn
+
+
+@pytest.fixture
+def database_url(test_db_engine) -> str:
+    return test_db_engine.url.render_as_string(hide_password=False)
+
+
+@pytest.fixture
+async def store(test_db_engine, database_url, committed_session):
+    store = JobStore(
+        database_url,
+        PriorityClaimPolicy(),
+        session_factory=sessionmaker(bind=test_db_engine),
+    )
+    yield store
+    await store.close()
+
+
+def add_job(session, submitted_by="alice", priority=0, age_seconds=0):
+    job = Job(
+        id=uuid4(),
+        name="tile",
+        params={"size": 1},
+        priority=priority,
+        state="queued",
+        created_at=datetime.now(UTC) - timedelta(seconds=age_seconds),
+        submitted_by=submitted_by,
+    )
+    session.add(job)
+    session.commit()
+    return job.id
+
+
+def job_state(session, job_id):
+    session.expire_all()
+    return session.get(Job, job_id)
+
+
+def test_named_params_become_positional():
+    """Test that casts survive and repeated names share one placeholder"""
+    statement = Statement("SELECT :a::text, :b, :a WHERE x = '12:00'")
+
+    assert statement.sql == "SELECT $1::text, $2, $1 WHERE x = '12:00'"
+    assert statement.names == ["a", "b"]
+    assert asyncpg_dsn("postgresql+psycopg2://u@h/db") == "postgresql://u@h/db"
+
+
+async def test_claim_and_finish(store, committed_session):
+    """Test a prepared claim and transition, with rows usable like ORM rows"""
+    low = add_job(committed_session, priority=0)
+    high = add_job(committed_session, priority=5)
+
+    row = await store.claim()
+    await store.transition(
+        "finish", id=row.id, state="completed", result={"success": True}
+    )
+
+    assert row.id == high
+    assert row.params == {"size": 1}
+    job = job_state(committed_session, high)
+    assert (job.state, job.result) == ("completed", {"success": True})
+    assert job_state(committed_session, low).state == "queued"
+
+
+async def test_fair_share_claim_prepared(
+    test_db_engine, database_url, committed_session
+):
+    """Test that the prepared fair-share path picks the underserved submitter"""
+    add_job(committed_session, "heavy", priority=1, age_seconds=60)
+    light = add_job(committed_session, "light")
+    record_usage(committed_session, "heavy", 5000, half_life=3600)
+    committed_session.commit()
+    store = JobStore(
+        database_url,
+        FairShareClaimPolicy(aging_per_hour=0),
+        session_factory=sessionmaker(bind=test_db_engine),
+    )
+
+    try:
+        assert (await store.claim()).id == light
+        assert (await store.claim()).submitted_by == "heavy"
+        assert await store.claim() is None
+    finally:
+        await store.close()
+
+
+async def test_reconnects_after_connection_loss(store, committed_session):
+    """Test that a killed connection fails one claim, then heals itself"""
+    job_id = add_job(committed_session)
+    conn = await store.connection()
+    committed_session.execute(
+        text("SELECT pg_terminate_backend(:pid)"), {"pid": conn.get_server_pid()}
+    )
+
+    # Transitions are idempotent and retried across the reconnect
+    await store.transition("requeue", id=job_id)
+    assert store.reconnects == 1
+
+    committed_session.execute(
+        text("SELECT pg_terminate_backend(:pid)"),
+        {"pid": store._conn.get_server_pid()},
+    )
+
+    # Claims are not: the caller backs off and the next one goes through
+    with pytest.raises(StoreUnavailableError):
+        await store.claim()
+    assert (await store.claim()).id == job_id
+    assert store.reconnects == 2
+
+
+async def test_unreachable_database_raises_unavailable(test_db_engine):
+    store = JobStore(
+        "postgresql://nobody@127.0.0.1:1/none",
+        PriorityClaimPolicy(),
+        session_factory=sessionmaker(bind=test_db_engine),
+    )
+
+    with pytest.raises(StoreUnavailableError, match="Cannot connect"):
+        await store.claim()
+
+
+async def test_bookkeeping_failure_does_not_poison_later_calls(store):
+    """Test that every bookkeeping call gets a fresh session and transaction"""
+    with pytest.raises(Exception, match="division by zero"):
+        await store.bookkeeping(lambda db: db.execute(text("SELECT 1 / 0")))
+
+    assert await store.bookkeeping(lambda db: db.execute(text("SELECT 1")).scalar())
@@ -0,0 +1,107 @@
+"""Test that the worker continues each job's submission trace"""
+
+import json
+import time
+from datetime import UTC, datetime
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from src import tracing
+from src.database import Job
+from src.main import Worker
+
+
+class FakeJetStream:
+    def __init__(self):
+        self.published = []
+
+    async def publish(self, subject, payload, headers=None):
+        self.published.append((subject, json.loads(payload), headers))
+        return SimpleNamespace(seq=len(self.published))
+
+
+class InstantExecutor:
+    def execute(
+        self,
+        job_id,
+        job_name,
+        gpu_id,
+        checkpoint=None,
+        stop=None,
+        gpu_ids=None,
+        inputs=None,
+    ):
+        return {"success": True, "duration_seconds": 0.01, "gpu_id": gpu_id}
+
+
+@pytest.fixture
+def spans():
+    tracing.setup_tracing("overflying-worker-test", exporter="memory")
+    if not hasattr(tracing.span_exporter, "get_finished_spans"):
+        pytest.skip("tracing already set up with another exporter")
+    tracing.span_exporter.clear()
+    yield tracing.span_exporter
+    tracing.span_exporter.clear()
+
+
+@pytest.fixture
+async def worker(committed_session):
+    worker = Worker()
+    worker.nats.js = FakeJetStream()
+    worker.executor = InstantExecutor()
+    yield worker
+    await worker.store.close()
+
+
+async def test_process_job_continues_submission_trace(committed_session, worker, spans):
+    """Test claim, GPU, execution and publish spans under the API's trace"""
+    with tracing.get_tracer().start_as_current_span("POST /jobs") as request:
+        trace_context = tracing.current_trace_context()
+    committed_session.add(
+        Job(
+            id=uuid4(),
+            name="traced",
+            params={},
+            priority=0,
+            state="queued",
+            created_at=datetime.now(UTC),
+            trace_context=trace_context,
+        )
+    )
+    committed_session.commit()
+
+    claim_started = time.time_ns()
+    row = await worker.poll_jobs()
+    await worker.process_job(row, claimed=(claim_started, time.time_ns()))
+
+    finished = {s.name: s for s in spans.get_finished_spans()}
+    process = finished["job.process"]
+    assert process.context.trace_id == request.get_span_context().trace_id
+    assert process.parent.span_id == request.get_span_context().span_id
+    assert process.start_time == claim_started
+    for name in (
+        "job.claim",
+        "gpu.allocate",
+        "job.execute",
+        "jobs.*.completed publish",
+    ):
+        assert finished[name].parent.span_id == process.context.span_id
+
+    # Event consumers can continue from the completion message
+    _, event, headers = worker.nats.js.published[-1]
+    assert event["state"] == "completed"
+    assert int(headers["traceparent"].split("-")[1], 16) == process.context.trace_id
+
+
+async def test_untraced_job_starts_a_new_trace(committed_session, worker, spans):
+    """Test that jobs submitted without a trace still get worker spans"""
+    committed_session.add(
+        Job(id=uuid4(), name="plain", params={}, priority=0, state="queued")
+    )
+    committed_session.commit()
+
+    await worker.process_job(await worker.poll_jobs())
+
+    process = next(s for s in spans.get_finished_spans() if s.name == "job.process")
+    assert process.parent is None
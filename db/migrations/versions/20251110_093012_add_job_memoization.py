@@ -0,0 +1,65 @@
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20251110_093012_add_job_memoization"
+down_revision = "20251103_133844_seed_default_users"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("jobs", sa.Column("memo_key", sa.Text(), nullable=True))
+    op.add_column(
+        "jobs", sa.Column("result", sa.dialects.postgresql.JSONB(), nullable=True)
+    )
+    op.add_column(
+        "jobs",
+        sa.Column(
+            "memoized_from", sa.dialects.postgresql.UUID(as_uuid=True), nullable=True
+        ),
+    )
+    # Partial indexes: only opted-in jobs carry a memo key / link
+    op.create_index(
+        "ix_jobs_memo_key",
+        "jobs",
+        ["memo_key"],
+        postgresql_where=sa.text("memo_key IS NOT NULL"),
+    )
+    op.create_index(
+        "ix_jobs_memoized_from",
+        "jobs",
+        ["memoized_from"],
+        postgresql_where=sa.text("memoized_from IS NOT NULL"),
+    )
+
+    op.create_table(
+        "job_result_cache",
+        sa.Column("memo_key", sa.Text(), primary_key=True),
+        sa.Column("job_id", sa.dialects.postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("result", sa.dialects.postgresql.JSONB(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.TIMESTAMP(timezone=True),
+            nullable=False,
+            server_default=sa.text("now()"),
+        ),
+        sa.Column("expires_at", sa.TIMESTAMP(timezone=True), nullable=False),
+    )
+    op.create_index(
+        "ix_job_result_cache_expires_at", "job_result_cache", ["expires_at"]
+    )
+    op.create_index(
+        "ix_job_result_cache_created_at", "job_result_cache", ["created_at"]
+    )
+
+
+def downgrade():
+    op.drop_index("ix_job_result_cache_created_at", table_name="job_result_cache")
+    op.drop_index("ix_job_result_cache_expires_at", table_name="job_result_cache")
+    op.drop_table("job_result_cache")
+    op.drop_index("ix_jobs_memoized_from", table_name="jobs")
+    op.drop_index("ix_jobs_memo_key", table_name="jobs")
+    op.drop_column("jobs", "memoized_from")
+    op.drop_column("jobs", "result")
+    op.drop_column("jobs", "memo_key")
@@ -0,0 +1,67 @@
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20251112_141507_add_fair_share_scheduling"
+down_revision = "20251110_093012_add_job_memoization"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Exponentially decayed GPU-seconds per submitter (NULL submitter -> '')
+    op.create_table(
+        "submitter_usage",
+        sa.Column("submitted_by", sa.Text(), primary_key=True),
+        sa.Column(
+            "gpu_seconds",
+            sa.Float(),
+            nullable=False,
+            server_default=sa.text("0"),
+        ),
+        sa.Column(
+            "updated_at",
+            sa.TIMESTAMP(timezone=True),
+            nullable=False,
+            server_default=sa.text("now()"),
+        ),
+    )
+
+    # Claim indexes only cover queued rows, so they stay small as history
+    # grows. Built concurrently so a deploy does not stop writes to jobs.
+    queued = sa.text("state = 'queued'")
+    submitter = sa.text("(COALESCE(submitted_by, ''))")
+    priority = sa.text("priority DESC")
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_jobs_queued_priority",
+            "jobs",
+            [priority, "created_at"],
+            postgresql_where=queued,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_jobs_queued_submitter_priority",
+            "jobs",
+            [submitter, priority, "created_at"],
+            postgresql_where=queued,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_jobs_queued_submitter_created",
+            "jobs",
+            [submitter, "created_at"],
+            postgresql_where=queued,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name in (
+            "ix_jobs_queued_submitter_created",
+            "ix_jobs_queued_submitter_priority",
+            "ix_jobs_queued_priority",
+        ):
+            op.drop_index(name, table_name="jobs", postgresql_concurrently=True)
+    op.drop_table("submitter_usage")
@@ -0,0 +1,52 @@
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20251117_160420_add_job_lifecycle_timestamps"
+down_revision = "20251114_101233_add_jobs_history_partitions"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for table in ("jobs", "jobs_history"):
+        op.add_column(
+            table, sa.Column("started_at", sa.TIMESTAMP(timezone=True), nullable=True)
+        )
+        # Existing rows get the migration time, so the first export picks
+        # them all up
+        op.add_column(
+            table,
+            sa.Column(
+                "updated_at",
+                sa.TIMESTAMP(timezone=True),
+                nullable=False,
+                server_default=sa.text("now()"),
+            ),
+        )
+        # Watermark scans for the incremental Parquet export
+        op.create_index(f"ix_{table}_updated_at", table, ["updated_at"])
+
+    # Every write to a hot job bumps updated_at; archival copies it verbatim
+    op.execute("""
+        CREATE OR REPLACE FUNCTION jobs_touch_updated_at() RETURNS trigger AS $$
+        BEGIN
+            NEW.updated_at = now();
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER trg_jobs_touch_updated_at
+        BEFORE UPDATE ON jobs
+        FOR EACH ROW EXECUTE FUNCTION jobs_touch_updated_at()
+    """)
+
+
+def downgrade():
+    op.execute("DROP TRIGGER IF EXISTS trg_jobs_touch_updated_at ON jobs")
+    op.execute("DROP FUNCTION IF EXISTS jobs_touch_updated_at()")
+    for table in ("jobs_history", "jobs"):
+        op.drop_index(f"ix_{table}_updated_at", table_name=table)
+        op.drop_column(table, "updated_at")
+        op.drop_column(table, "started_at")
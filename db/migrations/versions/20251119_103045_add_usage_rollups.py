@@ -0,0 +1,52 @@
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20251119_103045_add_usage_rollups"
+down_revision = "20251117_160420_add_job_lifecycle_timestamps"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Hourly GPU usage per submitter (NULL submitter -> '') and job name
+    op.create_table(
+        "usage_rollups",
+        sa.Column("bucket_start", sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.Column("submitted_by", sa.Text(), nullable=False),
+        sa.Column("job_name", sa.Text(), nullable=False),
+        sa.Column(
+            "gpu_seconds", sa.Float(), nullable=False, server_default=sa.text("0")
+        ),
+        sa.Column("jobs", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column(
+            "failed_jobs", sa.Integer(), nullable=False, server_default=sa.text("0")
+        ),
+        sa.PrimaryKeyConstraint("submitted_by", "bucket_start", "job_name"),
+    )
+    # Leaderboards scan a time range across all submitters
+    op.create_index("ix_usage_rollups_bucket_start", "usage_rollups", ["bucket_start"])
+
+    # JetStream sequences already folded into the rollups (redelivery guard)
+    op.create_table(
+        "usage_applied_events",
+        sa.Column("stream_seq", sa.BigInteger(), primary_key=True),
+        sa.Column(
+            "applied_at",
+            sa.TIMESTAMP(timezone=True),
+            nullable=False,
+            server_default=sa.text("now()"),
+        ),
+    )
+    op.create_index(
+        "ix_usage_applied_events_applied_at", "usage_applied_events", ["applied_at"]
+    )
+
+
+def downgrade():
+    op.drop_index(
+        "ix_usage_applied_events_applied_at", table_name="usage_applied_events"
+    )
+    op.drop_table("usage_applied_events")
+    op.drop_index("ix_usage_rollups_bucket_start", table_name="usage_rollups")
+    op.drop_table("usage_rollups")
@@ -0,0 +1,21 @@
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects.postgresql import JSONB
+
+# revision identifiers, used by Alembic.
+revision = "20251121_094512_add_job_trace_context"
+down_revision = "20251119_103045_add_usage_rollups"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # W3C trace context (traceparent/tracestate) of the request that created
+    # the job, so the worker can continue the same trace
+    for table in ("jobs", "jobs_history"):
+        op.add_column(table, sa.Column("trace_context", JSONB, nullable=True))
+
+
+def downgrade():
+    for table in ("jobs_history", "jobs"):
+        op.drop_column(table, "trace_context")
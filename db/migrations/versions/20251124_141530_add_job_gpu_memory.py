@@ -0,0 +1,20 @@
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20251124_141530_add_job_gpu_memory"
+down_revision = "20251121_094512_add_job_trace_context"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # GPU memory a job needs (MB); submission checks it against the live fleet
+    # and workers only place the job on a GPU that large
+    for table in ("jobs", "jobs_history"):
+        op.add_column(table, sa.Column("gpu_memory_mb", sa.Integer, nullable=True))
+
+
+def downgrade():
+    for table in ("jobs_history", "jobs"):
+        op.drop_column(table, "gpu_memory_mb")
@@ -0,0 +1,119 @@
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20251125_093000_add_queue_stats"
+down_revision = "20251124_141530_add_job_gpu_memory"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Queued and finished counts per priority band, kept by triggers so the
+    # backlog endpoint and autoscaler never count(*) the jobs table. Each
+    # band is spread over 16 shards (by backend pid) so concurrent claims do
+    # not all update the same row; readers sum the shards.
+    op.create_table(
+        "queue_stats",
+        sa.Column("band", sa.Text(), nullable=False),
+        sa.Column("shard", sa.SmallInteger(), nullable=False),
+        sa.Column(
+            "queued", sa.BigInteger(), nullable=False, server_default=sa.text("0")
+        ),
+        sa.Column(
+            "finished", sa.BigInteger(), nullable=False, server_default=sa.text("0")
+        ),
+        sa.PrimaryKeyConstraint("band", "shard"),
+    )
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION job_priority_band(priority integer) RETURNS text
+        LANGUAGE sql IMMUTABLE AS $$
+            SELECT CASE
+                WHEN priority < 0 THEN 'low'
+                WHEN priority = 0 THEN 'normal'
+                WHEN priority < 10 THEN 'high'
+                ELSE 'urgent'
+            END
+        $$
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION jobs_queue_stats() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        DECLARE
+            slot smallint := pg_backend_pid() % 16;
+        BEGIN
+            IF TG_OP = 'UPDATE'
+               AND OLD.state = NEW.state AND OLD.priority = NEW.priority THEN
+                RETURN NULL;
+            END IF;
+            IF TG_OP <> 'INSERT' AND OLD.state = 'queued' THEN
+                INSERT INTO queue_stats AS s (band, shard, queued)
+                VALUES (job_priority_band(OLD.priority), slot, -1)
+                ON CONFLICT (band, shard) DO UPDATE SET queued = s.queued - 1;
+            END IF;
+            IF TG_OP <> 'DELETE' AND NEW.state = 'queued' THEN
+                INSERT INTO queue_stats AS s (band, shard, queued)
+                VALUES (job_priority_band(NEW.priority), slot, 1)
+                ON CONFLICT (band, shard) DO UPDATE SET queued = s.queued + 1;
+            END IF;
+            IF TG_OP = 'UPDATE' AND OLD.state = 'running'
+               AND NEW.state IN ('completed', 'failed') THEN
+                INSERT INTO queue_stats AS s (band, shard, finished)
+                VALUES (job_priority_band(NEW.priority), slot, 1)
+                ON CONFLICT (band, shard) DO UPDATE SET finished = s.finished + 1;
+            END IF;
+            RETURN NULL;
+        END
+        $$
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION jobs_queue_stats_truncate() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            UPDATE queue_stats SET queued = 0;
+            RETURN NULL;
+        END
+        $$
+    """)
+    op.execute("""
+        CREATE TRIGGER jobs_queue_stats
+        AFTER INSERT OR DELETE OR UPDATE OF state, priority ON jobs
+        FOR EACH ROW EXECUTE FUNCTION jobs_queue_stats()
+    """)
+    op.execute("""
+        CREATE TRIGGER jobs_queue_stats_truncate
+        AFTER TRUNCATE ON jobs
+        FOR EACH STATEMENT EXECUTE FUNCTION jobs_queue_stats_truncate()
+    """)
+
+    # Start from what is queued now (the trigger is already counting changes
+    # made after this point within the same transaction)
+    op.execute("""
+        INSERT INTO queue_stats (band, shard, queued)
+        SELECT job_priority_band(priority), 0, count(*)
+        FROM jobs WHERE state = 'queued'
+        GROUP BY 1
+        ON CONFLICT (band, shard)
+        DO UPDATE SET queued = queue_stats.queued + EXCLUDED.queued
+    """)
+
+    # Oldest queued job without walking past finished ones; concurrently, as
+    # claims and submits keep writing to jobs while this deploys
+    with op.get_context().autocommit_block():
+        op.execute("""
+            CREATE INDEX CONCURRENTLY ix_jobs_queued_created
+            ON jobs (created_at)
+            WHERE state = 'queued'
+        """)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY ix_jobs_queued_created")
+    op.execute("DROP TRIGGER jobs_queue_stats_truncate ON jobs")
+    op.execute("DROP TRIGGER jobs_queue_stats ON jobs")
+    op.execute("DROP FUNCTION jobs_queue_stats_truncate()")
+    op.execute("DROP FUNCTION jobs_queue_stats()")
+    op.execute("DROP FUNCTION job_priority_band(integer)")
+    op.drop_table("queue_stats")
@@ -0,0 +1,33 @@
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20251126_104215_add_job_checkpoints"
+down_revision = "20251125_093000_add_queue_stats"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Where a preempted job resumes (written by the worker, cleared when it
+    # finishes) and how often it has been preempted (capped by the worker)
+    for table in ("jobs", "jobs_history"):
+        op.add_column(
+            table,
+            sa.Column("checkpoint", sa.dialects.postgresql.JSONB(), nullable=True),
+        )
+        op.add_column(
+            table,
+            sa.Column(
+                "preemptions",
+                sa.Integer,
+                nullable=False,
+                server_default=sa.text("0"),
+            ),
+        )
+
+
+def downgrade():
+    for table in ("jobs_history", "jobs"):
+        op.drop_column(table, "preemptions")
+        op.drop_column(table, "checkpoint")
@@ -0,0 +1,22 @@
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20251127_151020_add_job_max_runtime"
+down_revision = "20251126_104215_add_job_checkpoints"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Per-run deadline in seconds, enforced by the worker (NULL: none). The
+    # new cancelling/cancelled states need no schema change: state is text.
+    for table in ("jobs", "jobs_history"):
+        op.add_column(
+            table, sa.Column("max_runtime_seconds", sa.Integer, nullable=True)
+        )
+
+
+def downgrade():
+    for table in ("jobs_history", "jobs"):
+        op.drop_column(table, "max_runtime_seconds")
@@ -0,0 +1,57 @@
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20251128_103412_add_job_scheduling"
+down_revision = "20251127_151020_add_job_max_runtime"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # run_at: when the submitter wants the job to start (NULL: now).
+    # next_run_at: when the job is next due; 'scheduled' jobs wait for it,
+    # set from run_at on submission and by the worker's retry backoff.
+    # retries: failed runs retried so far; max_retries overrides the worker's.
+    for table in ("jobs", "jobs_history"):
+        op.add_column(
+            table, sa.Column("run_at", sa.TIMESTAMP(timezone=True), nullable=True)
+        )
+        op.add_column(
+            table,
+            sa.Column(
+                "next_run_at",
+                sa.TIMESTAMP(timezone=True),
+                nullable=False,
+                server_default=sa.text("now()"),
+            ),
+        )
+        op.add_column(
+            table,
+            sa.Column(
+                "retries", sa.Integer, nullable=False, server_default=sa.text("0")
+            ),
+        )
+        op.add_column(table, sa.Column("max_retries", sa.Integer, nullable=True))
+
+    # Not-yet-due jobs stay out of the queued claim indexes; workers find the
+    # due ones, and the next due time, through this one (built without
+    # blocking writes to jobs)
+    with op.get_context().autocommit_block():
+        op.execute("""
+            CREATE INDEX CONCURRENTLY ix_jobs_scheduled_next_run
+            ON jobs (next_run_at)
+            WHERE state = 'scheduled'
+        """)
+
+
+def downgrade():
+    # Nothing would promote them any more
+    op.execute("UPDATE jobs SET state = 'queued' WHERE state = 'scheduled'")
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY ix_jobs_scheduled_next_run")
+    for table in ("jobs_history", "jobs"):
+        op.drop_column(table, "max_retries")
+        op.drop_column(table, "retries")
+        op.drop_column(table, "next_run_at")
+        op.drop_column(table, "run_at")
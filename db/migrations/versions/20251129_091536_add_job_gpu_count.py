@@ -0,0 +1,24 @@
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20251129_091536_add_job_gpu_count"
+down_revision = "20251128_103412_add_job_scheduling"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # GPUs a job needs, granted together on one worker (gang scheduling)
+    for table in ("jobs", "jobs_history"):
+        op.add_column(
+            table,
+            sa.Column(
+                "gpu_count", sa.Integer, nullable=False, server_default=sa.text("1")
+            ),
+        )
+
+
+def downgrade():
+    for table in ("jobs_history", "jobs"):
+        op.drop_column(table, "gpu_count")
@@ -0,0 +1,36 @@
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20251130_142207_add_job_input_keys"
+down_revision = "20251129_091536_add_job_gpu_count"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Cache keys of the inputs listed in params (see the API's src/inputs.py)
+    for table in ("jobs", "jobs_history"):
+        op.add_column(
+            table,
+            sa.Column(
+                "input_keys", sa.dialects.postgresql.ARRAY(sa.Text), nullable=True
+            ),
+        )
+
+    # Workers claim queued jobs reading inputs they hold (input_keys && :cached).
+    # Built concurrently: a plain GIN build would hold off every submit,
+    # claim and transition on jobs until it finished.
+    with op.get_context().autocommit_block():
+        op.execute("""
+            CREATE INDEX CONCURRENTLY ix_jobs_queued_input_keys
+            ON jobs USING gin (input_keys)
+            WHERE state = 'queued'
+        """)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY ix_jobs_queued_input_keys")
+    for table in ("jobs_history", "jobs"):
+        op.drop_column(table, "input_keys")
@@ -0,0 +1,54 @@
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20251201_101844_add_job_params_gin_index"
+down_revision = "20251130_142207_add_job_input_keys"
+branch_labels = None
+depends_on = None
+
+PARAMS_INDEX = "USING gin (params jsonb_path_ops)"
+
+
+def upgrade():
+    # GET /jobs params filters: containment (@>) and JSONPath equality (@@).
+    # jsonb_path_ops indexes only hashes of paths to values, so it is smaller
+    # and faster than the default jsonb_ops, which also serves key-existence
+    # operators the API does not offer.
+    #
+    # Both tables are large and written to constantly, so nothing here takes
+    # a lock that blocks writes. A partitioned index cannot be built
+    # concurrently: it is created ON ONLY jobs_history (invalid, and
+    # inherited by partitions created from now on), each existing partition
+    # gets its index concurrently, and attaching the last one makes the
+    # parent valid.
+    with op.get_context().autocommit_block():
+        op.execute(f"CREATE INDEX CONCURRENTLY ix_jobs_params ON jobs {PARAMS_INDEX}")
+
+        op.execute(
+            f"CREATE INDEX ix_jobs_history_params ON ONLY jobs_history {PARAMS_INDEX}"
+        )
+        partitions = op.get_bind().execute(
+            sa.text("""
+                SELECT c.relname FROM pg_inherits i
+                JOIN pg_class c ON c.oid = i.inhrelid
+                WHERE i.inhparent = 'jobs_history'::regclass
+                ORDER BY c.relname
+            """)
+        )
+        for partition in partitions.scalars().all():
+            op.execute(
+                f"CREATE INDEX CONCURRENTLY ix_{partition}_params "
+                f"ON {partition} {PARAMS_INDEX}"
+            )
+            op.execute(
+                "ALTER INDEX ix_jobs_history_params "
+                f"ATTACH PARTITION ix_{partition}_params"
+            )
+
+
+def downgrade():
+    # Dropping the partitioned index drops every partition's index with it
+    op.drop_index("ix_jobs_history_params", table_name="jobs_history")
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY ix_jobs_params")
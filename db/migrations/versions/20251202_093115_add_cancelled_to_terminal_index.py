@@ -0,0 +1,55 @@
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20251202_093115_add_cancelled_to_terminal_index"
+down_revision = "20251201_101844_add_job_params_gin_index"
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH = 5000
+
+
+def rebuild_terminal_index(states: str):
+    """Swap ix_jobs_terminal_finished_at for one over `states`, without
+    blocking writes to jobs"""
+    op.execute(f"""
+        CREATE INDEX CONCURRENTLY ix_jobs_terminal_finished_at_new
+        ON jobs (finished_at)
+        WHERE state IN ({states})
+    """)
+    op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_jobs_terminal_finished_at")
+    op.execute(
+        "ALTER INDEX ix_jobs_terminal_finished_at_new "
+        "RENAME TO ix_jobs_terminal_finished_at"
+    )
+
+
+def upgrade():
+    # Cancelled jobs are archived like completed and failed ones (the
+    # archiver's TERMINAL_STATES), which needs finished_at and the archiver's
+    # partial index to cover them. Each statement commits on its own, so the
+    # backfill only locks one batch at a time.
+    with op.get_context().autocommit_block():
+        conn = op.get_bind()
+        while True:
+            updated = conn.execute(
+                sa.text("""
+                    UPDATE jobs SET finished_at = COALESCE(updated_at, created_at)
+                    WHERE id IN (
+                        SELECT id FROM jobs
+                        WHERE state = 'cancelled' AND finished_at IS NULL
+                        LIMIT :batch
+                    )
+                """),
+                {"batch": BACKFILL_BATCH},
+            ).rowcount
+            if not updated:
+                break
+
+        rebuild_terminal_index("'completed', 'failed', 'cancelled'")
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        rebuild_terminal_index("'completed', 'failed'")
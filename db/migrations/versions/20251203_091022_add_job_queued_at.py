@@ -0,0 +1,81 @@
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20251203_091022_add_job_queued_at"
+down_revision = "20251202_093115_add_cancelled_to_terminal_index"
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH = 5000
+
+
+def upgrade():
+    # When the job last entered the queue. The backlog's oldest queued age
+    # is measured from it rather than created_at, which would count the
+    # time a scheduled job waited for its due time, or a retry for its
+    # backoff, as queueing. Stamped by a trigger on every transition into
+    # 'queued', whichever code path makes it.
+    for table in ("jobs", "jobs_history"):
+        op.add_column(
+            table, sa.Column("queued_at", sa.TIMESTAMP(timezone=True), nullable=True)
+        )
+    op.execute("""
+        CREATE OR REPLACE FUNCTION jobs_mark_queued() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            IF NEW.state = 'queued' AND TG_OP = 'INSERT' THEN
+                NEW.queued_at := COALESCE(NEW.queued_at, now());
+            ELSIF NEW.state = 'queued' AND OLD.state <> 'queued' THEN
+                NEW.queued_at := now();
+            END IF;
+            RETURN NEW;
+        END
+        $$
+    """)
+    op.execute("""
+        CREATE TRIGGER jobs_mark_queued
+        BEFORE INSERT OR UPDATE OF state ON jobs
+        FOR EACH ROW EXECUTE FUNCTION jobs_mark_queued()
+    """)
+
+    # Jobs already queued became due at next_run_at (their submission time
+    # unless scheduled or retried). Batched, and the index built without
+    # blocking writes, outside the migration's transaction.
+    with op.get_context().autocommit_block():
+        conn = op.get_bind()
+        while True:
+            updated = conn.execute(
+                sa.text("""
+                    UPDATE jobs SET queued_at = next_run_at
+                    WHERE id IN (
+                        SELECT id FROM jobs
+                        WHERE state = 'queued' AND queued_at IS NULL
+                        LIMIT :batch
+                    )
+                """),
+                {"batch": BACKFILL_BATCH},
+            ).rowcount
+            if not updated:
+                break
+
+        op.execute("""
+            CREATE INDEX CONCURRENTLY ix_jobs_queued_queued_at
+            ON jobs (queued_at)
+            WHERE state = 'queued'
+        """)
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_jobs_queued_created")
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.execute("""
+            CREATE INDEX CONCURRENTLY ix_jobs_queued_created
+            ON jobs (created_at)
+            WHERE state = 'queued'
+        """)
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_jobs_queued_queued_at")
+    op.execute("DROP TRIGGER jobs_mark_queued ON jobs")
+    op.execute("DROP FUNCTION jobs_mark_queued()")
+    for table in ("jobs_history", "jobs"):
+        op.drop_column(table, "queued_at")